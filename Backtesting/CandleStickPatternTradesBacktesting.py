@@ -13,6 +13,9 @@ import Utils as util
 no_of_sessions_to_scan_forstocks = 200
 diff_between_start_end_date = 1600
 no_of_sessions_to_skip_for_sr_from_start = sr.no_of_sessions_to_scan
+# True: build one time-versioned S/R index per stock and let the pattern checks query it
+# as of each session (levels only appear once confirmed). False keeps S/R checks disabled.
+use_support_resistance_index = False
 no_of_sessions_to_buffer_from_end = 5
 no_of_sessions_for_previous_market_trend = 10
 no_of_sessions_to_scan_for_RSI = 14
@@ -54,6 +57,10 @@ for stock_latest_info in stocks_latest_info:
                                                         end_date, stock_latest_info[nse_bse.EXCHANGE], None, False)
 
         #print ("---Fetched historic data of sessions:" + str (len (stock_latest_data)) + " for stock:" + stock_latest_info[nse_bse.STOCK_ID])
+        supports_resistances = None
+        if use_support_resistance_index:
+            supports_resistances = sr.get_support_resistance_index (stock_latest_data, len (stock_latest_data))
+
         i = no_of_sessions_to_skip_for_sr_from_start
 
         while i + no_of_sessions_to_buffer_from_end < len (stock_latest_data):
@@ -64,7 +71,7 @@ for stock_latest_info in stocks_latest_info:
             csutil.getCSResAndErrors (stock_latest_info, stock_latest_data[:i], stocks_pattern_recognition_responses,
                                       exception_errors, market_previous_trend, no_of_sessions_to_scan_forstocks,
                                       no_of_sessions_to_scan_for_RSI, no_of_sessions_to_scan_for_volatility,
-                                      no_of_days_for_volatility_stop_loss)
+                                      no_of_days_for_volatility_stop_loss, supports_resistances)
 
             for stocks_pattern_recognition_response in stocks_pattern_recognition_responses:
                 if stocks_pattern_recognition_response.pattern_match:
@@ -70,8 +70,8 @@ Default output directory:
     ./nifty_sensex_4y_deviation_output
 
 Files created:
-    candles/nifty_1min.pkl
-    candles/sensex_1min.pkl
+    candles/nifty_1min.pkl          (only with PAIR_STORE=0)
+    candles/sensex_1min.pkl         (only with PAIR_STORE=0)
     nifty_sensex_aligned_1min.pkl
     combined_threshold_summary.xlsx
     z_ge_2/nifty_sensex_z_ge_2.xlsx
@@ -79,6 +79,14 @@ Files created:
     z_ge_4/nifty_sensex_z_ge_4.xlsx
     z_ge_5/nifty_sensex_z_ge_5.xlsx
 
+Candle data
+-----------
+When pyarrow is available the candles come from the shared pair store
+(Trading_2024/back_testing/pair_store.py, root PAIR_STORE_DIR): NIFTY and
+SENSEX 1-minute series are stored once, only days missing from them are
+downloaded (Kite is not initialised when nothing is missing), and the aligned
+pair is cached per date range. PAIR_STORE=0 falls back to candles/*.pkl.
+
 """
 
 from __future__ import annotations
@@ -97,6 +105,11 @@ import pandas as pd
 # It should return an authenticated KiteConnect object.
 import Trading_2024.OptionTradeUtils as oUtils
 
+try:
+    from Trading_2024.back_testing import pair_store
+except Exception:  # pragma: no cover - pyarrow missing
+    pair_store = None  # type: ignore
+
 try:
     from dateutil.relativedelta import relativedelta
 except Exception:  # pragma: no cover
@@ -156,6 +169,9 @@ COST_PER_TRADE_RUPEES = float(os.environ.get("COST_PER_TRADE_RUPEES", "0"))
 # FORCE_DOWNLOAD=1 ignores cached candle files and downloads again.
 FORCE_DOWNLOAD = os.environ.get("FORCE_DOWNLOAD", "0").strip().lower() in {"1", "true", "yes", "y"}
 
+# Load candles through the shared pair store (PAIR_STORE=0 disables it).
+USE_PAIR_STORE = pair_store is not None and pair_store.PAIR_STORE_ENABLED
+
 # Date override. If END_DATE is blank, IST today is used.
 # START_DATE is optional; if blank, END_DATE - LOOKBACK_YEARS is used.
 END_DATE_ENV = os.environ.get("END_DATE", "").strip()
@@ -299,7 +315,14 @@ def get_instrument_token(kite, spec: IndexSpec, cache: Dict[str, List[Dict]]) ->
     raise ValueError(f"Instrument not found: {spec.exchange}:{spec.tradingsymbol}")
 
 
-def fetch_history_1min(kite, instrument_token: int, from_dt: datetime, to_dt: datetime, label: str) -> List[Dict]:
+def fetch_history_1min(
+    kite,
+    instrument_token: int,
+    from_dt: datetime,
+    to_dt: datetime,
+    label: str,
+    failed_chunks: Optional[List[Tuple[datetime, datetime]]] = None,
+) -> List[Dict]:
     """Fetch 1-minute historical data using chunking and retry logic."""
     chunks = iter_chunks_by_date(from_dt, to_dt, MAX_DAYS_PER_CHUNK)
     print(f"[INFO] Fetching {label} token={instrument_token}, range={from_dt} to {to_dt}, chunks={len(chunks)}")
@@ -332,6 +355,8 @@ def fetch_history_1min(kite, instrument_token: int, from_dt: datetime, to_dt: da
 
         if last_err is not None:
             print(f"    [ERROR] Giving up on chunk {idx}/{len(chunks)} for {label}: {last_err}")
+            if failed_chunks is not None:
+                failed_chunks.append((c_from, c_to))
 
         time.sleep(SLEEP_BETWEEN_CALLS_SEC)
 
@@ -410,6 +435,37 @@ def load_or_download_index(kite, spec: IndexSpec, start_d: date, end_d: date, pa
     return df
 
 
+def load_aligned_from_pair_store(start_d: date, end_d: date, cache: Dict[str, List[Dict]]) -> pd.DataFrame:
+    """Aligned NIFTY/SENSEX closes from the shared pair store (align_nifty_sensex() columns)."""
+    nifty_key = pair_store.InstrumentKey(NIFTY_SPEC.exchange, NIFTY_SPEC.tradingsymbol)
+    sensex_key = pair_store.InstrumentKey(SENSEX_SPEC.exchange, SENSEX_SPEC.tradingsymbol)
+    specs = {nifty_key: NIFTY_SPEC, sensex_key: SENSEX_SPEC}
+    kite_holder: List[object] = []
+
+    def fetch(key, from_d: date, to_d: date):
+        if not kite_holder:
+            print("\n[STEP] Initializing Kite API ...")
+            kite_holder.append(oUtils.intialize_kite_api())
+            print("[INFO] Kite API initialized.")
+        kite = kite_holder[0]
+        spec = specs[key]
+        token, real_ex = get_instrument_token(kite, spec, cache)
+        from_dt = datetime.combine(from_d, SESSION_START)
+        to_dt = datetime.combine(to_d, SESSION_END)
+        failed: List[Tuple[datetime, datetime]] = []
+        rows = fetch_history_1min(
+            kite, token, from_dt, to_dt, label=f"{real_ex}:{spec.tradingsymbol}", failed_chunks=failed
+        )
+        return rows_to_dataframe(rows, label=spec.label), [(a.date(), b.date()) for a, b in failed]
+
+    pair = pair_store.aligned_pair(
+        nifty_key, sensex_key, start_d, end_d, interval=INTERVAL, fetch=fetch, force=FORCE_DOWNLOAD
+    )
+    aligned = pair.rename(columns={"left_close": "nifty_close", "right_close": "sensex_close"})
+    aligned["trading_date"] = aligned["date"].dt.date
+    return aligned
+
+
 # =============================================================================
 # SPREAD / Z-SCORE CALCULATION
 # =============================================================================
@@ -937,19 +993,24 @@ def main() -> None:
     print(f"[CONFIG] Max wait bars    : {MAX_LOOKAHEAD_BARS} (~{MAX_WAIT_TRADING_DAYS} trading days)")
     print(f"[CONFIG] Futures qty      : NIFTY={NIFTY_QTY}, SENSEX={SENSEX_QTY}")
     print(f"[CONFIG] FORCE_DOWNLOAD   : {FORCE_DOWNLOAD}")
-
-    print("\n[STEP] Initializing Kite API ...")
-    kite = oUtils.intialize_kite_api()
-    print("[INFO] Kite API initialized.")
+    print(f"[CONFIG] Pair store       : {pair_store.PAIR_STORE_DIR if USE_PAIR_STORE else 'off'}")
 
     instruments_cache: Dict[str, List[Dict]] = {}
 
-    print("\n[STEP] Loading/downloading NIFTY and SENSEX 1-min candles ...")
-    nifty_df = load_or_download_index(kite, NIFTY_SPEC, start_d, end_d, paths, instruments_cache)
-    sensex_df = load_or_download_index(kite, SENSEX_SPEC, start_d, end_d, paths, instruments_cache)
+    if USE_PAIR_STORE:
+        print("\n[STEP] Loading aligned NIFTY and SENSEX 1-min closes from the pair store ...")
+        aligned = load_aligned_from_pair_store(start_d, end_d, instruments_cache)
+    else:
+        print("\n[STEP] Initializing Kite API ...")
+        kite = oUtils.intialize_kite_api()
+        print("[INFO] Kite API initialized.")
+
+        print("\n[STEP] Loading/downloading NIFTY and SENSEX 1-min candles ...")
+        nifty_df = load_or_download_index(kite, NIFTY_SPEC, start_d, end_d, paths, instruments_cache)
+        sensex_df = load_or_download_index(kite, SENSEX_SPEC, start_d, end_d, paths, instruments_cache)
 
-    print("\n[STEP] Aligning NIFTY and SENSEX candles ...")
-    aligned = align_nifty_sensex(nifty_df, sensex_df)
+        print("\n[STEP] Aligning NIFTY and SENSEX candles ...")
+        aligned = align_nifty_sensex(nifty_df, sensex_df)
     if aligned.empty:
         raise RuntimeError("No common NIFTY-SENSEX timestamps after alignment.")
 
@@ -68,11 +68,14 @@ This script DOES NOT download data. It reuses existing downloaded 1-minute data.
 It tries, in order:
 
     1. ALIGNED_PATH env var, if supplied.
-    2. ./nifty_sensex_4y_deviation_output/nifty_sensex_aligned_1min.pkl
-    3. ./nifty_sensex_4y_deviation_output_z225/nifty_sensex_aligned_1min.pkl
-    4. ./nifty_sensex_4y_deviation_output_z375/nifty_sensex_aligned_1min.pkl
-    5. ./nifty_sensex_4y_deviation_output_z50/nifty_sensex_aligned_1min.pkl
-    6. candle pickle pair under common output folders.
+    2. The shared pair store (PAIR_STORE_DIR, filled by the NIFTY/SENSEX
+       testers), unless NIFTY_CANDLES_PATH/SENSEX_CANDLES_PATH are set or
+       PAIR_STORE=0. Everything stored for both indices is used.
+    3. ./nifty_sensex_4y_deviation_output/nifty_sensex_aligned_1min.pkl
+    4. ./nifty_sensex_4y_deviation_output_z225/nifty_sensex_aligned_1min.pkl
+    5. ./nifty_sensex_4y_deviation_output_z375/nifty_sensex_aligned_1min.pkl
+    6. ./nifty_sensex_4y_deviation_output_z50/nifty_sensex_aligned_1min.pkl
+    7. candle pickle pair under common output folders.
 
 Expected aligned columns:
     date, nifty_close, sensex_close
@@ -92,6 +95,9 @@ Typical Windows CMD run
     set LAST_ENTRY_TIME=14:30
     python NiftySensexPrevDayRatioBacktester_RECALIBRATED.py
 
+All thresholds are built in one sweep over shared deviation/exit arrays
+(EVENT_ENGINE=SWEEP). EVENT_ENGINE=LEGACY rescans once per threshold.
+
 Output
 ------
 Default output folder:
@@ -118,6 +124,11 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+try:
+    from Trading_2024.back_testing import pair_store
+except Exception:  # pragma: no cover - pyarrow missing
+    pair_store = None  # type: ignore
+
 
 # =============================================================================
 # CONFIGURATION
@@ -135,6 +146,9 @@ ALIGNED_PATH_ENV = os.environ.get("ALIGNED_PATH", "").strip()
 NIFTY_CANDLES_PATH_ENV = os.environ.get("NIFTY_CANDLES_PATH", "").strip()
 SENSEX_CANDLES_PATH_ENV = os.environ.get("SENSEX_CANDLES_PATH", "").strip()
 
+# Read NIFTY/SENSEX from the shared pair store when it has them (PAIR_STORE=0 disables).
+USE_PAIR_STORE = pair_store is not None and pair_store.PAIR_STORE_ENABLED
+
 # Previous-day baseline mode. MEAN follows your original idea. MEDIAN is optional.
 PREV_DAY_BASELINE_MODE = os.environ.get("PREV_DAY_BASELINE_MODE", "MEAN").strip().upper()
 
@@ -202,6 +216,14 @@ ENABLE_ENTRY_TIME_FILTER = os.environ.get("ENABLE_ENTRY_TIME_FILTER", "1").strip
 ENTRY_START_TIME = dtime.fromisoformat(os.environ.get("ENTRY_START_TIME", "09:30"))
 LAST_ENTRY_TIME = dtime.fromisoformat(os.environ.get("LAST_ENTRY_TIME", "14:30"))
 
+# SWEEP builds the ratio/deviation series once and walks every threshold from
+# shared crossing and exit tables. LEGACY runs build_events_for_threshold() once
+# per threshold (same output, kept as the reference implementation).
+EVENT_ENGINE = os.environ.get("EVENT_ENGINE", "SWEEP").strip().upper()
+
+# Upper bound on (entries x bars) cells evaluated per block when resolving exits.
+SWEEP_EXIT_BLOCK_CELLS = int(os.environ.get("SWEEP_EXIT_BLOCK_CELLS", "2000000"))
+
 
 # =============================================================================
 # DATA STRUCTURES
@@ -327,6 +349,21 @@ def find_existing_data() -> Tuple[pd.DataFrame, DataSourceInfo]:
             raise ValueError(f"ALIGNED_PATH does not contain aligned columns: {ALIGNED_PATH_ENV}")
         return standardize_aligned_columns(df), DataSourceInfo("explicit_aligned", ALIGNED_PATH_ENV)
 
+    if USE_PAIR_STORE and not (NIFTY_CANDLES_PATH_ENV and SENSEX_CANDLES_PATH_ENV):
+        nifty_key = pair_store.InstrumentKey("NSE", "NIFTY 50")
+        sensex_key = pair_store.InstrumentKey("BSE", "SENSEX")
+        try:
+            pair = pair_store.aligned_pair(nifty_key, sensex_key, interval="minute")
+        except FileNotFoundError:
+            pair = None
+        if pair is not None and not pair.empty:
+            aligned = pair.rename(columns={"left_close": "nifty_close", "right_close": "sensex_close"})
+            return standardize_aligned_columns(aligned), DataSourceInfo(
+                "pair_store",
+                str(pair_store.series_path(nifty_key, "minute")),
+                str(pair_store.series_path(sensex_key, "minute")),
+            )
+
     candidate_aligned_paths = [
         "./nifty_sensex_4y_deviation_output/nifty_sensex_aligned_1min.pkl",
         "./nifty_sensex_4y_deviation_output_z225/nifty_sensex_aligned_1min.pkl",
@@ -555,6 +592,186 @@ def last_allowed_same_day_index(dates: np.ndarray, trading_dates: np.ndarray, en
     return last_before_force_time if last_before_force_time is not None else last_same_day
 
 
+def event_work_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Validate enriched columns and drop rows without a ratio or previous-day baseline."""
+    required_cols = [
+        "date", "trading_date", "nifty_close", "sensex_close", "ratio", "prev_day_avg_ratio"
+    ]
+    missing = [c for c in required_cols if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    return df.dropna(subset=["ratio", "prev_day_avg_ratio"]).copy().reset_index(drop=True)
+
+
+def build_event_record(
+    threshold_pct: float,
+    event_id: int,
+    entry_i: int,
+    exit_j: int,
+    settle_j: Optional[int],
+    exit_reason: str,
+    entry_baseline: float,
+    entry_baseline_source: str,
+    entry_baseline_set_time: Optional[pd.Timestamp],
+    entry_baseline_lookback_bars: int,
+    dates: np.ndarray,
+    trading_dates: np.ndarray,
+    nifty: np.ndarray,
+    sensex: np.ndarray,
+    ratio: np.ndarray,
+) -> Dict:
+    """
+    Build the report row for one completed event from its entry/exit indices.
+
+    Shared by the per-threshold scanner and the multi-threshold sweep so both
+    produce identical event columns.
+    """
+    entry_time = pd.Timestamp(dates[entry_i])
+    entry_ratio = float(ratio[entry_i])
+    entry_dev = deviation_pct_from_baseline(entry_ratio, entry_baseline)
+    entry_abs_dev = abs(entry_dev)
+    side = infer_side(entry_dev)
+    entry_nifty = float(nifty[entry_i])
+    entry_sensex = float(sensex[entry_i])
+
+    path_slice = slice(entry_i, exit_j + 1)
+    path_nifty = nifty[path_slice]
+    path_sensex = sensex[path_slice]
+    path_ratio = ratio[path_slice]
+    path_dates = dates[path_slice]
+
+    path_dev_from_entry_baseline = ((path_ratio / entry_baseline) - 1.0) * 100.0
+    path_abs_dev_from_entry_baseline = np.abs(path_dev_from_entry_baseline)
+
+    pnl_path = compute_pair_pnl_path(
+        side=side,
+        entry_nifty=entry_nifty,
+        entry_sensex=entry_sensex,
+        path_nifty=path_nifty,
+        path_sensex=path_sensex,
+    )
+
+    gross_exit_pnl = float(pnl_path[-1])
+    net_exit_pnl = gross_exit_pnl - COST_PER_TRADE_RUPEES
+
+    min_pnl_idx = int(np.nanargmin(pnl_path))
+    max_pnl_idx = int(np.nanargmax(pnl_path))
+    max_loss_rupees = float(pnl_path[min_pnl_idx])
+    max_profit_rupees = float(pnl_path[max_pnl_idx])
+    max_loss_abs_rupees = abs(min(0.0, max_loss_rupees))
+
+    max_abs_dev_idx = int(np.nanargmax(path_abs_dev_from_entry_baseline))
+    max_abs_dev_value = float(path_abs_dev_from_entry_baseline[max_abs_dev_idx])
+
+    if entry_dev > 0:
+        directional_worst_dev = float(np.nanmax(path_dev_from_entry_baseline))
+        directional_worst_idx = int(np.nanargmax(path_dev_from_entry_baseline))
+    else:
+        directional_worst_dev = float(np.nanmin(path_dev_from_entry_baseline))
+        directional_worst_idx = int(np.nanargmin(path_dev_from_entry_baseline))
+
+    positive_indices = np.where(pnl_path > 0)[0]
+    first_positive_idx = int(positive_indices[0]) if len(positive_indices) else None
+
+    bars_held = int(exit_j - entry_i)
+    calendar_minutes_held = float((pd.Timestamp(dates[exit_j]) - pd.Timestamp(dates[entry_i])).total_seconds() / 60.0)
+
+    return {
+        "event_id": event_id,
+        "threshold_pct": threshold_pct,
+        "entry_time": entry_time,
+        "entry_date": entry_time.date(),
+        "entry_trading_date": trading_dates[entry_i],
+        "side": side,
+        "entry_ratio": entry_ratio,
+        "entry_baseline_ratio": entry_baseline,
+        "entry_baseline_source": entry_baseline_source,
+        "entry_baseline_set_time": entry_baseline_set_time if entry_baseline_set_time is not None else pd.NaT,
+        "entry_baseline_lookback_bars": entry_baseline_lookback_bars,
+        "entry_deviation_pct": entry_dev,
+        "entry_abs_deviation_pct": entry_abs_dev,
+        "entry_nifty_close": entry_nifty,
+        "entry_sensex_close": entry_sensex,
+        "settled": bool(settle_j is not None),
+        "settle_time": pd.Timestamp(dates[settle_j]) if settle_j is not None else pd.NaT,
+        "exit_time": pd.Timestamp(dates[exit_j]),
+        "exit_reason": exit_reason,
+        "exit_ratio": float(ratio[exit_j]),
+        "exit_deviation_from_entry_baseline_pct": float(path_dev_from_entry_baseline[-1]),
+        "exit_abs_deviation_from_entry_baseline_pct": float(path_abs_dev_from_entry_baseline[-1]),
+        "exit_nifty_close": float(nifty[exit_j]),
+        "exit_sensex_close": float(sensex[exit_j]),
+        "bars_to_exit": bars_held,
+        "bars_to_settle": bars_held if settle_j is not None else np.nan,
+        "approx_trading_days_to_exit": bars_held / float(INTRADAY_BARS_PER_DAY),
+        "calendar_minutes_to_exit": calendar_minutes_held,
+        "max_abs_deviation_during_wait_pct": max_abs_dev_value,
+        "max_abs_deviation_time": pd.Timestamp(path_dates[max_abs_dev_idx]),
+        "directional_worst_deviation_pct": directional_worst_dev,
+        "directional_worst_deviation_time": pd.Timestamp(path_dates[directional_worst_idx]),
+        "max_loss_rupees": max_loss_rupees,
+        "max_loss_abs_rupees": max_loss_abs_rupees,
+        "max_loss_time": pd.Timestamp(path_dates[min_pnl_idx]),
+        "max_profit_rupees": max_profit_rupees,
+        "max_profit_time": pd.Timestamp(path_dates[max_pnl_idx]),
+        "first_positive_pnl_time": pd.Timestamp(path_dates[first_positive_idx]) if first_positive_idx is not None else pd.NaT,
+        "first_positive_pnl_bars": int(first_positive_idx) if first_positive_idx is not None else np.nan,
+        "gross_exit_pnl_rupees": gross_exit_pnl,
+        "cost_rupees": COST_PER_TRADE_RUPEES,
+        "net_exit_pnl_rupees": net_exit_pnl,
+        "nifty_qty": NIFTY_QTY,
+        "sensex_qty": SENSEX_QTY,
+        "nifty_points_at_exit": float(nifty[exit_j] - nifty[entry_i]),
+        "sensex_points_at_exit": float(sensex[exit_j] - sensex[entry_i]),
+    }
+
+
+def build_rebase_record(
+    threshold_pct: float,
+    event_id: int,
+    exit_reason: str,
+    exit_j: int,
+    new_state: Optional[BaselineState],
+    dates: np.ndarray,
+    trading_dates: np.ndarray,
+    ratio: np.ndarray,
+    prev_day_baseline: np.ndarray,
+) -> Dict:
+    """Build the baseline_recalibrations row written after a forced exit."""
+    if new_state is not None:
+        return {
+            "threshold_pct": threshold_pct,
+            "after_event_id": event_id,
+            "forced_exit_reason": exit_reason,
+            "rebase_time": new_state.set_time,
+            "rebase_index": new_state.set_index,
+            "rebase_trading_date": new_state.valid_trading_date,
+            "rebase_lookback_bars_requested": REBASE_LOOKBACK_BARS,
+            "rebase_lookback_bars_used": new_state.lookback_bars_used,
+            "new_baseline_ratio": new_state.value,
+            "prev_day_baseline_at_exit": float(prev_day_baseline[exit_j]),
+            "ratio_at_exit": float(ratio[exit_j]),
+            "deviation_from_new_baseline_at_exit_pct": deviation_pct_from_baseline(float(ratio[exit_j]), new_state.value),
+        }
+
+    return {
+        "threshold_pct": threshold_pct,
+        "after_event_id": event_id,
+        "forced_exit_reason": exit_reason,
+        "rebase_time": pd.Timestamp(dates[exit_j]),
+        "rebase_index": exit_j,
+        "rebase_trading_date": trading_dates[exit_j],
+        "rebase_lookback_bars_requested": REBASE_LOOKBACK_BARS,
+        "rebase_lookback_bars_used": 0,
+        "new_baseline_ratio": np.nan,
+        "prev_day_baseline_at_exit": float(prev_day_baseline[exit_j]),
+        "ratio_at_exit": float(ratio[exit_j]),
+        "deviation_from_new_baseline_at_exit_pct": np.nan,
+        "message": "Not enough same-day bars to recalibrate baseline.",
+    }
+
+
 def build_events_for_threshold(df: pd.DataFrame, threshold_pct: float) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Build non-overlapping event rows for one deviation threshold.
@@ -573,14 +790,7 @@ def build_events_for_threshold(df: pd.DataFrame, threshold_pct: float) -> Tuple[
         - NO_OVERNIGHT_EXIT
         - FORCED_MAX_WAIT_EXIT
     """
-    required_cols = [
-        "date", "trading_date", "nifty_close", "sensex_close", "ratio", "prev_day_avg_ratio"
-    ]
-    missing = [c for c in required_cols if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing required columns: {missing}")
-
-    work = df.dropna(subset=["ratio", "prev_day_avg_ratio"]).copy().reset_index(drop=True)
+    work = event_work_frame(df)
 
     dates = work["date"].to_numpy()
     trading_dates = work["trading_date"].to_numpy()
@@ -632,9 +842,7 @@ def build_events_for_threshold(df: pd.DataFrame, threshold_pct: float) -> Tuple[
         entry_baseline_source = baseline_source_i
         entry_baseline_set_time = baseline_set_time_i
         entry_baseline_lookback_bars = baseline_lb_i
-        entry_ratio = float(ratio[entry_i])
-        entry_dev = deviation_pct_from_baseline(entry_ratio, entry_baseline)
-        entry_abs_dev = abs(entry_dev)
+        entry_dev = deviation_pct_from_baseline(float(ratio[entry_i]), entry_baseline)
         side = infer_side(entry_dev)
 
         max_j = min(n - 1, entry_i + MAX_LOOKAHEAD_BARS)
@@ -687,139 +895,26 @@ def build_events_for_threshold(df: pd.DataFrame, threshold_pct: float) -> Tuple[
             else:
                 exit_reason = "FORCED_MAX_WAIT_EXIT"
 
-        path_slice = slice(entry_i, exit_j + 1)
-        path_nifty = nifty[path_slice]
-        path_sensex = sensex[path_slice]
-        path_ratio = ratio[path_slice]
-        path_dates = dates[path_slice]
-
-        path_dev_from_entry_baseline = ((path_ratio / entry_baseline) - 1.0) * 100.0
-        path_abs_dev_from_entry_baseline = np.abs(path_dev_from_entry_baseline)
-
-        pnl_path = compute_pair_pnl_path(
-            side=side,
-            entry_nifty=entry_nifty,
-            entry_sensex=entry_sensex,
-            path_nifty=path_nifty,
-            path_sensex=path_sensex,
-        )
-
-        gross_exit_pnl = float(pnl_path[-1])
-        net_exit_pnl = gross_exit_pnl - COST_PER_TRADE_RUPEES
-
-        min_pnl_idx = int(np.nanargmin(pnl_path))
-        max_pnl_idx = int(np.nanargmax(pnl_path))
-        max_loss_rupees = float(pnl_path[min_pnl_idx])
-        max_profit_rupees = float(pnl_path[max_pnl_idx])
-        max_loss_abs_rupees = abs(min(0.0, max_loss_rupees))
-
-        max_abs_dev_idx = int(np.nanargmax(path_abs_dev_from_entry_baseline))
-        max_abs_dev_value = float(path_abs_dev_from_entry_baseline[max_abs_dev_idx])
-
-        if entry_dev > 0:
-            directional_worst_dev = float(np.nanmax(path_dev_from_entry_baseline))
-            directional_worst_idx = int(np.nanargmax(path_dev_from_entry_baseline))
-        else:
-            directional_worst_dev = float(np.nanmin(path_dev_from_entry_baseline))
-            directional_worst_idx = int(np.nanargmin(path_dev_from_entry_baseline))
-
-        positive_indices = np.where(pnl_path > 0)[0]
-        first_positive_idx = int(positive_indices[0]) if len(positive_indices) else None
-
-        bars_held = int(exit_j - entry_i)
-        calendar_minutes_held = float((pd.Timestamp(dates[exit_j]) - pd.Timestamp(dates[entry_i])).total_seconds() / 60.0)
-
         rows.append(
-            {
-                "event_id": event_id,
-                "threshold_pct": threshold_pct,
-                "entry_time": entry_time,
-                "entry_date": entry_time.date(),
-                "entry_trading_date": trading_dates[entry_i],
-                "side": side,
-                "entry_ratio": entry_ratio,
-                "entry_baseline_ratio": entry_baseline,
-                "entry_baseline_source": entry_baseline_source,
-                "entry_baseline_set_time": entry_baseline_set_time if entry_baseline_set_time is not None else pd.NaT,
-                "entry_baseline_lookback_bars": entry_baseline_lookback_bars,
-                "entry_deviation_pct": entry_dev,
-                "entry_abs_deviation_pct": entry_abs_dev,
-                "entry_nifty_close": entry_nifty,
-                "entry_sensex_close": entry_sensex,
-                "settled": bool(settle_j is not None),
-                "settle_time": pd.Timestamp(dates[settle_j]) if settle_j is not None else pd.NaT,
-                "exit_time": pd.Timestamp(dates[exit_j]),
-                "exit_reason": exit_reason,
-                "exit_ratio": float(ratio[exit_j]),
-                "exit_deviation_from_entry_baseline_pct": float(path_dev_from_entry_baseline[-1]),
-                "exit_abs_deviation_from_entry_baseline_pct": float(path_abs_dev_from_entry_baseline[-1]),
-                "exit_nifty_close": float(nifty[exit_j]),
-                "exit_sensex_close": float(sensex[exit_j]),
-                "bars_to_exit": bars_held,
-                "bars_to_settle": bars_held if settle_j is not None else np.nan,
-                "approx_trading_days_to_exit": bars_held / float(INTRADAY_BARS_PER_DAY),
-                "calendar_minutes_to_exit": calendar_minutes_held,
-                "max_abs_deviation_during_wait_pct": max_abs_dev_value,
-                "max_abs_deviation_time": pd.Timestamp(path_dates[max_abs_dev_idx]),
-                "directional_worst_deviation_pct": directional_worst_dev,
-                "directional_worst_deviation_time": pd.Timestamp(path_dates[directional_worst_idx]),
-                "max_loss_rupees": max_loss_rupees,
-                "max_loss_abs_rupees": max_loss_abs_rupees,
-                "max_loss_time": pd.Timestamp(path_dates[min_pnl_idx]),
-                "max_profit_rupees": max_profit_rupees,
-                "max_profit_time": pd.Timestamp(path_dates[max_pnl_idx]),
-                "first_positive_pnl_time": pd.Timestamp(path_dates[first_positive_idx]) if first_positive_idx is not None else pd.NaT,
-                "first_positive_pnl_bars": int(first_positive_idx) if first_positive_idx is not None else np.nan,
-                "gross_exit_pnl_rupees": gross_exit_pnl,
-                "cost_rupees": COST_PER_TRADE_RUPEES,
-                "net_exit_pnl_rupees": net_exit_pnl,
-                "nifty_qty": NIFTY_QTY,
-                "sensex_qty": SENSEX_QTY,
-                "nifty_points_at_exit": float(nifty[exit_j] - nifty[entry_i]),
-                "sensex_points_at_exit": float(sensex[exit_j] - sensex[entry_i]),
-            }
+            build_event_record(
+                threshold_pct, event_id, entry_i, exit_j, settle_j, exit_reason,
+                entry_baseline, entry_baseline_source, entry_baseline_set_time, entry_baseline_lookback_bars,
+                dates, trading_dates, nifty, sensex, ratio,
+            )
         )
 
         # Recalibrate baseline after forced exit. Normal settled exits do not
         # trigger recalibration because the old baseline worked.
         if ENABLE_REBASE_AFTER_FORCED_EXIT and exit_reason.upper() in REBASE_AFTER_EXIT_REASONS:
             new_state = recalibrate_baseline(ratio, dates, trading_dates, exit_j, trading_dates[exit_j])
+            rebase_rows.append(
+                build_rebase_record(
+                    threshold_pct, event_id, exit_reason, exit_j, new_state,
+                    dates, trading_dates, ratio, prev_day_baseline,
+                )
+            )
             if new_state is not None:
                 baseline_state = new_state
-                rebase_rows.append(
-                    {
-                        "threshold_pct": threshold_pct,
-                        "after_event_id": event_id,
-                        "forced_exit_reason": exit_reason,
-                        "rebase_time": new_state.set_time,
-                        "rebase_index": new_state.set_index,
-                        "rebase_trading_date": new_state.valid_trading_date,
-                        "rebase_lookback_bars_requested": REBASE_LOOKBACK_BARS,
-                        "rebase_lookback_bars_used": new_state.lookback_bars_used,
-                        "new_baseline_ratio": new_state.value,
-                        "prev_day_baseline_at_exit": float(prev_day_baseline[exit_j]),
-                        "ratio_at_exit": float(ratio[exit_j]),
-                        "deviation_from_new_baseline_at_exit_pct": deviation_pct_from_baseline(float(ratio[exit_j]), new_state.value),
-                    }
-                )
-            else:
-                rebase_rows.append(
-                    {
-                        "threshold_pct": threshold_pct,
-                        "after_event_id": event_id,
-                        "forced_exit_reason": exit_reason,
-                        "rebase_time": pd.Timestamp(dates[exit_j]),
-                        "rebase_index": exit_j,
-                        "rebase_trading_date": trading_dates[exit_j],
-                        "rebase_lookback_bars_requested": REBASE_LOOKBACK_BARS,
-                        "rebase_lookback_bars_used": 0,
-                        "new_baseline_ratio": np.nan,
-                        "prev_day_baseline_at_exit": float(prev_day_baseline[exit_j]),
-                        "ratio_at_exit": float(ratio[exit_j]),
-                        "deviation_from_new_baseline_at_exit_pct": np.nan,
-                        "message": "Not enough same-day bars to recalibrate baseline.",
-                    }
-                )
 
         if SKIP_OVERLAPPING_EVENTS:
             i = exit_j + 1
@@ -829,6 +924,314 @@ def build_events_for_threshold(df: pd.DataFrame, threshold_pct: float) -> Tuple[
     return pd.DataFrame(rows), pd.DataFrame(rebase_rows)
 
 
+# =============================================================================
+# MULTI-THRESHOLD SWEEP
+# =============================================================================
+#
+# build_events_for_threshold() rescans every row once per threshold and walks
+# each trade bar by bar. The sweep shares everything that does not depend on
+# the threshold:
+#   - deviation of each bar and of the bar before it from the previous-day
+#     baseline, so a threshold's crossings are one vectorised comparison
+#   - day boundaries, the no-overnight exit bar and the entry time filter
+#   - exits for every previous-day-baseline entry of every threshold, resolved
+#     together as (entries x bars) blocks
+# Each threshold then only hops between its own crossing indices with
+# searchsorted. Entries made after a recalibration use a baseline that exists
+# only for that threshold and day; those bars are rescanned against it.
+
+SETTLED_CODE, MAX_LOSS_CODE, HARD_TIME_CODE, NO_OVERNIGHT_CODE, MAX_WAIT_CODE = range(5)
+EXIT_REASON_BY_CODE = (
+    "SETTLED_TO_ENTRY_BASELINE",
+    "MAX_LOSS_STOP",
+    "HARD_TIME_STOP",
+    "NO_OVERNIGHT_EXIT",
+    "FORCED_MAX_WAIT_EXIT",
+)
+
+
+@dataclass
+class PairSeries:
+    """Threshold-independent arrays shared by every threshold in the sweep."""
+
+    dates: np.ndarray
+    trading_dates: np.ndarray
+    nifty: np.ndarray
+    sensex: np.ndarray
+    ratio: np.ndarray
+    prev_day_baseline: np.ndarray
+    day_start: np.ndarray  # first row of each row's trading day
+    day_end: np.ndarray  # last row of each row's trading day
+    same_day_limit: np.ndarray  # last bar a trade entered on this row may be held to
+    entry_allowed: np.ndarray  # entry time filter per row
+    abs_dev_now: np.ndarray  # |deviation of row i from prev-day baseline of row i|
+    abs_dev_prev: np.ndarray  # |deviation of row i-1 from prev-day baseline of row i|
+
+
+def time_of_day_us(t: dtime) -> int:
+    """Microseconds since midnight for a datetime.time."""
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 1_000_000 + t.microsecond
+
+
+def prepare_pair_series(df: pd.DataFrame) -> PairSeries:
+    """Build the shared arrays once from the enriched frame."""
+    work = event_work_frame(df)
+    n = len(work)
+    idx = np.arange(n)
+
+    ratio = work["ratio"].to_numpy(dtype=float)
+    prev_day_baseline = work["prev_day_avg_ratio"].to_numpy(dtype=float)
+
+    # Rows are sorted by time, so each trading day is one contiguous block.
+    day_codes = pd.factorize(work["trading_date"])[0]
+    starts = np.flatnonzero(np.r_[True, day_codes[1:] != day_codes[:-1]]) if n else np.zeros(0, dtype=int)
+    ends = np.r_[starts[1:] - 1, n - 1] if n else np.zeros(0, dtype=int)
+    day_len = ends - starts + 1
+    day_start = np.repeat(starts, day_len)
+    day_end = np.repeat(ends, day_len)
+
+    stamps = pd.DatetimeIndex(work["date"])
+    tod_us = np.asarray((stamps - stamps.normalize()) // pd.Timedelta(microseconds=1), dtype=np.int64)
+
+    if NO_OVERNIGHT and n:
+        # Same answer as last_allowed_same_day_index(): the day's last bar at or
+        # before FORCE_EXIT_TIME if the entry is not after it, else the last bar.
+        before_force = np.where(tod_us <= time_of_day_us(FORCE_EXIT_TIME), idx, -1)
+        force_row = np.repeat(np.maximum.reduceat(before_force, starts), day_len)
+        same_day_limit = np.where(force_row >= idx, force_row, day_end)
+    else:
+        same_day_limit = np.full(n, n - 1)
+
+    if ENABLE_ENTRY_TIME_FILTER:
+        entry_allowed = (tod_us >= time_of_day_us(ENTRY_START_TIME)) & (tod_us <= time_of_day_us(LAST_ENTRY_TIME))
+    else:
+        entry_allowed = np.ones(n, dtype=bool)
+
+    abs_dev_now = np.abs(((ratio / prev_day_baseline) - 1.0) * 100.0)
+    abs_dev_prev = np.full(n, np.nan)
+    abs_dev_prev[1:] = np.abs(((ratio[:-1] / prev_day_baseline[1:]) - 1.0) * 100.0)
+
+    return PairSeries(
+        dates=work["date"].to_numpy(),
+        trading_dates=work["trading_date"].to_numpy(),
+        nifty=work["nifty_close"].to_numpy(dtype=float),
+        sensex=work["sensex_close"].to_numpy(dtype=float),
+        ratio=ratio,
+        prev_day_baseline=prev_day_baseline,
+        day_start=day_start,
+        day_end=day_end,
+        same_day_limit=same_day_limit,
+        entry_allowed=entry_allowed,
+        abs_dev_now=abs_dev_now,
+        abs_dev_prev=abs_dev_prev,
+    )
+
+
+def prev_day_crossings(series: PairSeries, threshold_pct: float) -> np.ndarray:
+    """Sorted rows where |deviation| first reaches threshold_pct against the previous-day baseline."""
+    hit = (series.abs_dev_now >= threshold_pct) & (series.abs_dev_prev < threshold_pct) & series.entry_allowed
+    return np.flatnonzero(hit)
+
+
+def rebased_crossings(series: PairSeries, start: int, end: int, baseline: float, threshold_pct: float) -> np.ndarray:
+    """Crossing rows in [start, end] against a recalibrated baseline (start >= 1)."""
+    abs_dev = np.abs(((series.ratio[start - 1:end + 1] / baseline) - 1.0) * 100.0)
+    hit = (abs_dev[1:] >= threshold_pct) & (abs_dev[:-1] < threshold_pct) & series.entry_allowed[start:end + 1]
+    return np.flatnonzero(hit) + start
+
+
+def resolve_exits(series: PairSeries, entries: np.ndarray, baselines: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exit row and exit-reason code for each (entry row, frozen baseline) pair.
+
+    Same rules and precedence as the bar loop in build_events_for_threshold():
+    settle, max loss, hard time stop, no-overnight, then the max_j fallback.
+    """
+    n = len(series.ratio)
+    entries = np.asarray(entries, dtype=np.int64)
+    baselines = np.asarray(baselines, dtype=float)
+
+    limit_j = series.same_day_limit[entries]
+    max_j = np.minimum(n - 1, entries + MAX_LOOKAHEAD_BARS)
+    if HARD_TIME_STOP_BARS > 0:
+        max_j = np.minimum(max_j, entries + HARD_TIME_STOP_BARS)
+    max_j = np.minimum(max_j, limit_j)
+
+    exit_j = max_j.copy()
+    reason = np.full(len(entries), MAX_WAIT_CODE, dtype=np.int8)
+    if HARD_TIME_STOP_BARS > 0:
+        reason[max_j >= entries + HARD_TIME_STOP_BARS] = HARD_TIME_CODE
+    if NO_OVERNIGHT:
+        reason[max_j >= limit_j] = NO_OVERNIGHT_CODE
+
+    span = max_j - entries
+    width = int(span.max()) if len(entries) else 0
+    if width <= 0:
+        return exit_j, reason
+
+    rich = ((series.ratio[entries] / baselines) - 1.0) * 100.0 > 0
+    steps = np.arange(1, width + 1)
+    block = max(1, SWEEP_EXIT_BLOCK_CELLS // width)
+
+    for lo in range(0, len(entries), block):
+        sl = slice(lo, lo + block)
+        e = entries[sl, None]
+        j = np.minimum(e + steps, n - 1)
+        live = steps <= span[sl, None]
+
+        dev = ((series.ratio[j] / baselines[sl, None]) - 1.0) * 100.0
+        sensex_leg = (series.sensex[e] - series.sensex[j]) * SENSEX_QTY
+        nifty_leg = (series.nifty[j] - series.nifty[e]) * NIFTY_QTY
+        cheap_sensex_leg = (series.sensex[j] - series.sensex[e]) * SENSEX_QTY
+        cheap_nifty_leg = (series.nifty[e] - series.nifty[j]) * NIFTY_QTY
+        pnl = np.where(rich[sl, None], sensex_leg + nifty_leg, cheap_sensex_leg + cheap_nifty_leg)
+
+        settle = np.abs(dev) <= SETTLE_DEVIATION_PCT
+        loss = pnl <= -abs(MAX_LOSS_RUPEES) if MAX_LOSS_RUPEES > 0 else np.zeros_like(settle)
+        hard = np.broadcast_to(steps >= HARD_TIME_STOP_BARS if HARD_TIME_STOP_BARS > 0 else np.zeros(width, dtype=bool), settle.shape)
+        night = j >= limit_j[sl, None] if NO_OVERNIGHT else np.zeros_like(settle)
+
+        any_hit = (settle | loss | hard | night) & live
+        first = any_hit.argmax(axis=1)
+        rows = np.arange(len(first))
+        found = any_hit[rows, first]
+        if not found.any():
+            continue
+
+        code = np.select(
+            [settle[rows, first], loss[rows, first], hard[rows, first]],
+            [SETTLED_CODE, MAX_LOSS_CODE, HARD_TIME_CODE],
+            NO_OVERNIGHT_CODE,
+        ).astype(np.int8)
+        exit_j[sl][found] = j[rows, first][found]
+        reason[sl][found] = code[found]
+
+    return exit_j, reason
+
+
+def next_entry(
+    series: PairSeries,
+    crossings: np.ndarray,
+    i: int,
+    threshold_pct: float,
+    rebase: Optional[BaselineState],
+) -> Tuple[int, bool]:
+    """
+    First entry row >= i for one threshold and whether it uses the rebased baseline.
+
+    The recalibrated baseline covers its own trading day only; every other row
+    uses the shared previous-day crossings. Returns (-1, False) when none remain.
+    """
+    if rebase is not None:
+        rebase_start = int(series.day_start[rebase.set_index])
+        rebase_end = int(series.day_end[rebase.set_index])
+        if i <= rebase_end:
+            if i < rebase_start:
+                k = int(np.searchsorted(crossings, i))
+                if k < len(crossings) and crossings[k] < rebase_start:
+                    return int(crossings[k]), False
+            hits = rebased_crossings(series, max(i, rebase_start), rebase_end, rebase.value, threshold_pct)
+            if len(hits):
+                return int(hits[0]), True
+            i = rebase_end + 1
+
+    k = int(np.searchsorted(crossings, i))
+    if k < len(crossings):
+        return int(crossings[k]), False
+    return -1, False
+
+
+def walk_threshold(
+    series: PairSeries,
+    threshold_pct: float,
+    crossings: np.ndarray,
+    shared_entries: np.ndarray,
+    shared_exit_j: np.ndarray,
+    shared_reason: np.ndarray,
+    shared_records: Dict[int, Dict],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Replay build_events_for_threshold() for one threshold from the shared tables.
+
+    shared_records caches event rows of previous-day-baseline entries by entry
+    row; another threshold entering on the same bar reuses it with its own
+    threshold_pct and event_id.
+    """
+    rows: List[Dict] = []
+    rebase_rows: List[Dict] = []
+    rebase: Optional[BaselineState] = None
+    event_id = 0
+    i = 1
+
+    while i < len(series.ratio):
+        entry_i, rebased = next_entry(series, crossings, i, threshold_pct, rebase)
+        if entry_i < 0:
+            break
+
+        if rebased:
+            entry_baseline = float(rebase.value)
+            baseline_meta = (rebase.source, rebase.set_time, int(rebase.lookback_bars_used))
+            exits, reasons = resolve_exits(series, np.array([entry_i]), np.array([entry_baseline]))
+            exit_j, code = int(exits[0]), int(reasons[0])
+        else:
+            entry_baseline = float(series.prev_day_baseline[entry_i])
+            baseline_meta = ("PREV_DAY", None, 0)
+            k = int(np.searchsorted(shared_entries, entry_i))
+            exit_j, code = int(shared_exit_j[k]), int(shared_reason[k])
+
+        event_id += 1
+        exit_reason = EXIT_REASON_BY_CODE[code]
+        record = None if rebased else shared_records.get(entry_i)
+        if record is None:
+            settle_j = exit_j if code == SETTLED_CODE else None
+            record = build_event_record(
+                threshold_pct, event_id, entry_i, exit_j, settle_j, exit_reason,
+                entry_baseline, *baseline_meta,
+                series.dates, series.trading_dates, series.nifty, series.sensex, series.ratio,
+            )
+            if not rebased:
+                shared_records[entry_i] = record
+        rows.append({**record, "event_id": event_id, "threshold_pct": threshold_pct})
+
+        if ENABLE_REBASE_AFTER_FORCED_EXIT and exit_reason.upper() in REBASE_AFTER_EXIT_REASONS:
+            new_state = recalibrate_baseline(series.ratio, series.dates, series.trading_dates, exit_j, series.trading_dates[exit_j])
+            rebase_rows.append(
+                build_rebase_record(
+                    threshold_pct, event_id, exit_reason, exit_j, new_state,
+                    series.dates, series.trading_dates, series.ratio, series.prev_day_baseline,
+                )
+            )
+            if new_state is not None:
+                rebase = new_state
+
+        i = exit_j + 1 if SKIP_OVERLAPPING_EVENTS else entry_i + 1
+
+    return pd.DataFrame(rows), pd.DataFrame(rebase_rows)
+
+
+def build_events_for_thresholds(
+    df: pd.DataFrame,
+    thresholds_pct: List[float],
+) -> Dict[float, Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Build (events, recalibrations) for every threshold in one sweep.
+
+    Output per threshold matches build_events_for_threshold().
+    """
+    series = prepare_pair_series(df)
+    crossings = {t: prev_day_crossings(series, t) for t in thresholds_pct}
+
+    shared_entries = np.unique(np.concatenate(list(crossings.values()))) if crossings else np.zeros(0, dtype=int)
+    shared_exit_j, shared_reason = resolve_exits(series, shared_entries, series.prev_day_baseline[shared_entries])
+    print(f"[INFO] Sweep: {len(series.ratio):,} rows, {len(shared_entries):,} shared entry candidates")
+
+    shared_records: Dict[int, Dict] = {}
+    return {
+        t: walk_threshold(series, t, crossings[t], shared_entries, shared_exit_j, shared_reason, shared_records)
+        for t in thresholds_pct
+    }
+
+
 # =============================================================================
 # SUMMARY / REPORTING
 # =============================================================================
@@ -1032,6 +1435,7 @@ def make_config_df(data_source: DataSourceInfo, aligned: pd.DataFrame) -> pd.Dat
         ("sensex_qty", SENSEX_QTY),
         ("cost_per_trade_rupees", COST_PER_TRADE_RUPEES),
         ("skip_overlapping_events", SKIP_OVERLAPPING_EVENTS),
+        ("event_engine", EVENT_ENGINE),
         ("enable_entry_time_filter", ENABLE_ENTRY_TIME_FILTER),
         ("entry_start_time", ENTRY_START_TIME.isoformat(timespec="minutes")),
         ("last_entry_time", LAST_ENTRY_TIME.isoformat(timespec="minutes")),
@@ -1150,9 +1554,16 @@ def main() -> None:
     all_summaries: List[pd.DataFrame] = []
     files: List[Dict] = []
 
-    print("[STEP] Building threshold reports ...")
+    print(f"[STEP] Building threshold reports (engine={EVENT_ENGINE}) ...")
+    if EVENT_ENGINE == "LEGACY":
+        built = {t: build_events_for_threshold(enriched, threshold_pct=t) for t in THRESHOLDS_PCT}
+    elif EVENT_ENGINE == "SWEEP":
+        built = build_events_for_thresholds(enriched, THRESHOLDS_PCT)
+    else:
+        raise ValueError("EVENT_ENGINE must be SWEEP or LEGACY")
+
     for threshold in THRESHOLDS_PCT:
-        events, rebase_events = build_events_for_threshold(enriched, threshold_pct=threshold)
+        events, rebase_events = built[threshold]
         summary = summarize_events(events, threshold_pct=threshold, trading_days=trading_days)
         all_summaries.append(summary)
         report_path = write_threshold_report(threshold, events, rebase_events, summary, config_df)
@@ -17,8 +17,10 @@ This script answers the more important question:
 
 What this script checks
 -----------------------
-1) Loads NIFTY and SENSEX close prices from your earlier scanner output OR
-   downloads fresh data using Kite if local data is not found.
+1) Loads NIFTY and SENSEX close prices from the shared pair store
+   (Trading_2024/back_testing/pair_store.py), downloading only the days it
+   does not have yet. With PAIR_STORE=0 (or without pyarrow) it uses your
+   earlier scanner output OR downloads fresh data using Kite.
 
 2) Aligns both instruments on common timestamps.
 
@@ -116,6 +118,11 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+try:
+    from Trading_2024.back_testing import pair_store
+except Exception:  # pragma: no cover - pyarrow missing
+    pair_store = None  # type: ignore
+
 # Kite initialization is kept consistent with your existing downloader scripts.
 # Your project already uses Trading_2024.OptionTradeUtils.intialize_kite_api().
 try:
@@ -182,6 +189,10 @@ OUTPUT_DIR = os.environ.get("OUTPUT_DIR", "./nifty_sensex_tradeability_output").
 CLOSE_MATRIX_PATH = os.environ.get("CLOSE_MATRIX_PATH", "").strip()
 FORCE_DOWNLOAD = os.environ.get("FORCE_DOWNLOAD", "0").strip().lower() in {"1", "true", "yes", "y"}
 
+# Shared NIFTY/SENSEX series store (PAIR_STORE=0 disables it). An explicit
+# CLOSE_MATRIX_PATH still takes precedence.
+USE_PAIR_STORE = pair_store is not None and pair_store.PAIR_STORE_ENABLED
+
 # Candidate local paths from the earlier correlation scanner.
 # The script will try these automatically if CLOSE_MATRIX_PATH is not supplied.
 LOCAL_CLOSE_CANDIDATES = [
@@ -311,12 +322,21 @@ def get_instrument_token(kite, exchange: str, tradingsymbol: str, cache: Dict[st
     raise ValueError(f"Instrument not found on {ex}: {tradingsymbol}")
 
 
-def fetch_history(kite, instrument_token: int, from_dt: datetime, to_dt: datetime, interval: str, label: str) -> List[Dict]:
+def fetch_history(
+    kite,
+    instrument_token: int,
+    from_dt: datetime,
+    to_dt: datetime,
+    interval: str,
+    label: str,
+    failed_chunks: Optional[List[Tuple[datetime, datetime]]] = None,
+) -> List[Dict]:
     """
     Fetch historical candles from Kite with chunking and retries.
 
     For day interval, Kite still accepts datetime/date inputs; we pass datetime
-    consistently to keep the code simple.
+    consistently to keep the code simple. Chunks abandoned after MAX_ATTEMPTS are
+    appended to failed_chunks (when given) so callers can tell a partial download.
     """
     chunks = _iter_chunks_by_date(from_dt, to_dt, days_per_chunk=MAX_DAYS_PER_CHUNK)
     print(f"[INFO] Fetching {interval} data for {label} token={instrument_token} in {len(chunks)} chunk(s).")
@@ -348,6 +368,8 @@ def fetch_history(kite, instrument_token: int, from_dt: datetime, to_dt: datetim
 
         if last_err is not None:
             print(f"    [ERROR] Giving up on chunk {idx}/{len(chunks)} for {label}: {last_err}")
+            if failed_chunks is not None:
+                failed_chunks.append((c_from, c_to))
 
         time.sleep(SLEEP_BETWEEN_CALLS_SEC)
 
@@ -414,6 +436,56 @@ def download_nifty_sensex_from_kite() -> pd.DataFrame:
     return wide
 
 
+def load_close_matrix_from_pair_store() -> pd.DataFrame:
+    """
+    NIFTY/SENSEX close matrix for the last LOOKBACK_DAYS from the shared pair store.
+
+    Only days missing from the stored series are downloaded, so Kite is
+    initialised only when there is something to top up.
+    """
+    kite_holder: List[object] = []
+    instruments_cache: Dict[str, List[Dict]] = {}
+
+    def fetch(key, from_d: date, to_d: date):
+        if oUtils is None:
+            raise RuntimeError(
+                "Trading_2024.OptionTradeUtils could not be imported. "
+                "Either run this from your TradingScripts environment or provide CLOSE_MATRIX_PATH."
+            )
+        if not kite_holder:
+            print("[STEP] Initializing Kite API ...")
+            kite_holder.append(oUtils.intialize_kite_api())
+            print("[INFO] Kite API initialized.")
+        kite = kite_holder[0]
+        token, real_ex = get_instrument_token(kite, key.exchange, key.tradingsymbol, instruments_cache)
+        from_dt = datetime.combine(from_d, SESSION_START)
+        to_dt = datetime.combine(to_d, SESSION_END)
+        failed: List[Tuple[datetime, datetime]] = []
+        rows = fetch_history(kite, token, from_dt, to_dt, INTERVAL, f"{real_ex}:{key.tradingsymbol}", failed)
+        return rows_to_dataframe(rows), [(a.date(), b.date()) for a, b in failed]
+
+    end_date = _ist_today()
+    start_date = end_date - timedelta(days=LOOKBACK_DAYS)
+    print(f"[STEP] Loading NIFTY/SENSEX {INTERVAL} closes from pair store: {start_date} -> {end_date}")
+
+    pair = pair_store.aligned_pair(
+        pair_store.InstrumentKey("NSE", "NIFTY 50"),
+        pair_store.InstrumentKey("BSE", "SENSEX"),
+        start_date,
+        end_date,
+        interval=INTERVAL,
+        fetch=fetch,
+        force=FORCE_DOWNLOAD,
+    )
+    wide = pair.rename(columns={"left_close": "NIFTY", "right_close": "SENSEX"}).set_index("date").sort_index()
+
+    if wide.empty:
+        raise RuntimeError("Pair store returned no aligned NIFTY/SENSEX rows.")
+
+    print(f"[INFO] Loaded NIFTY/SENSEX rows: {len(wide)}")
+    return wide
+
+
 # ===================== DATA LOADING HELPERS =====================
 
 def find_existing_close_matrix() -> Optional[str]:
@@ -452,9 +524,15 @@ def load_or_download_close_matrix() -> pd.DataFrame:
     """
     Load NIFTY/SENSEX close matrix from local file, unless FORCE_DOWNLOAD is enabled.
     If no local file is found, download from Kite.
+
+    Unless CLOSE_MATRIX_PATH is given, the shared pair store is used instead
+    when enabled.
     """
     ensure_output_dir()
 
+    if USE_PAIR_STORE and not CLOSE_MATRIX_PATH:
+        return load_close_matrix_from_pair_store()
+
     if not FORCE_DOWNLOAD:
         path = find_existing_close_matrix()
         if path:
@@ -1176,6 +1254,7 @@ def write_outputs(full_df: pd.DataFrame, trades_df: pd.DataFrame, equity_df: pd.
         {"parameter": "STATSMODELS_AVAILABLE", "value": STATSMODELS_AVAILABLE},
         {"parameter": "FORCE_DOWNLOAD", "value": FORCE_DOWNLOAD},
         {"parameter": "CLOSE_MATRIX_PATH", "value": CLOSE_MATRIX_PATH},
+        {"parameter": "PAIR_STORE_DIR", "value": pair_store.PAIR_STORE_DIR if USE_PAIR_STORE else "off"},
         {"parameter": "OUTPUT_DIR", "value": OUTPUT_DIR},
     ]
     config_df = pd.DataFrame(config_rows)
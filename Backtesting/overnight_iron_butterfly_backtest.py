@@ -57,6 +57,8 @@ from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import pandas as pd
 
+from Trading_2024.back_testing import report_writer
+
 try:
     from zoneinfo import ZoneInfo  # Python 3.9+
 except Exception:  # pragma: no cover - fallback for older environments
@@ -1297,21 +1299,6 @@ def build_daywise_pivot(actual_df: pd.DataFrame) -> pd.DataFrame:
     return actual_df[[c for c in cols if c in actual_df.columns]].copy()
 
 
-def _autosize_columns_safe(ws) -> None:
-    """Best-effort autosize for openpyxl worksheets."""
-    try:
-        for col_idx in range(1, (ws.max_column or 0) + 1):
-            col_letter = ws.cell(row=1, column=col_idx).column_letter
-            max_len = 0
-            for row_idx in range(1, min(ws.max_row or 1, 2500) + 1):
-                val = ws.cell(row=row_idx, column=col_idx).value
-                if val is not None:
-                    max_len = max(max_len, len(str(val)))
-            ws.column_dimensions[col_letter].width = min(70, max(10, max_len + 2))
-    except Exception:
-        return
-
-
 def write_excel(
     *,
     all_trades_df: pd.DataFrame,
@@ -1366,20 +1353,19 @@ def write_excel(
     ]
     config_df = pd.DataFrame(config_rows)
 
-    with pd.ExcelWriter(OUTPUT_XLSX, engine="openpyxl") as xw:
-        all_trades_df.to_excel(xw, sheet_name="all_trades_backtested", index=False)
-        actual_trades_df.to_excel(xw, sheet_name="actual_trades", index=False)
-        actual_daywise.to_excel(xw, sheet_name="actual_daywise", index=False)
-        monthwise_summary.to_excel(xw, sheet_name="monthwise_summary", index=False)
-        instrument_summary.to_excel(xw, sheet_name="instrument_summary", index=False)
-        skipped_df.to_excel(xw, sheet_name="skipped_trades", index=False)
-        file_skipped_df.to_excel(xw, sheet_name="skipped_files", index=False)
-        config_df.to_excel(xw, sheet_name="config", index=False)
-
-        wb = xw.book
-        for ws in wb.worksheets:
-            ws.freeze_panes = "A2"
-            _autosize_columns_safe(ws)
+    report_writer.write_report(
+        OUTPUT_XLSX,
+        [
+            ("all_trades_backtested", all_trades_df),
+            ("actual_trades", actual_trades_df),
+            ("actual_daywise", actual_daywise),
+            ("monthwise_summary", monthwise_summary),
+            ("instrument_summary", instrument_summary),
+            ("skipped_trades", skipped_df),
+            ("skipped_files", file_skipped_df),
+            ("config", config_df),
+        ],
+    )
 
     print(f"[DONE] Excel written: {OUTPUT_XLSX}")
 
@@ -29,6 +29,10 @@ SESSION_END   = dtime(15, 30, 0)
 # Output folder for Parquet files (one per stock)
 OUTPUT_DIR = "./stock_history_parquet"
 
+# Rows per Parquet row group (~1 week of 1-min bars). Small groups let readers
+# skip by footer date min/max instead of decoding the whole multi-year file.
+PARQUET_ROW_GROUP_ROWS = 375 * 5
+
 # Historical API chunk size (1-min limit is ~60 days)
 DAYS_PER_CHUNK = 60
 
@@ -376,7 +380,7 @@ def save_symbol_parquet(exchange: str, tradingsymbol: str, df: pd.DataFrame):
         ctx=f"save_symbol_parquet {exchange}:{tradingsymbol}"
     )
     df = df.sort_values("date").reset_index(drop=True)
-    df.to_parquet(path, index=False)
+    df.to_parquet(path, index=False, row_group_size=PARQUET_ROW_GROUP_ROWS)
     log("STEP", f"Saved {len(df)} rows for {exchange}:{tradingsymbol} → {os.path.abspath(path)}")
 
 
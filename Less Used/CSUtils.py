@@ -27,11 +27,14 @@ def get_stop_loss(buy_price, volatility_stop_loss, sup_or_resistance, action_val
 
 def getCSResAndErrors(stock_latest_info, stock_latest_data, stocks_pattern_recognition_responses, exception_errors,
                       market_previous_trend, no_of_sessions_to_scan_forstocks, no_of_sessions_to_scan_for_RSI,
-                      no_of_sessions_to_scan_for_volatility, no_of_days_for_volatility_stop_loss):
+                      no_of_sessions_to_scan_for_volatility, no_of_days_for_volatility_stop_loss,
+                      supports_resistances=None):
     stock_data_closing_prices_series = util.get_panda_series_of_stock_closing_prices (stock_latest_data)
 
     # supports_resistances = sr.get_supports_resistances (stock_latest_data)
-    supports_resistances = []
+    # Callers may pass a SupportResistanceIndex built once per stock (sr.get_support_resistance_index).
+    if supports_resistances is None:
+        supports_resistances = []
 
     # if len (supports_resistances) == 0:
     #     exception_errors.append (
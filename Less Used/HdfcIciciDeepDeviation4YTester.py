@@ -55,6 +55,12 @@ using your existing Kite utility:
 The cache filenames include the date range, so old data is less likely to be
 accidentally reused after changing START_DATE / END_DATE / LOOKBACK_YEARS.
 
+When pyarrow is available the shared pair store is used instead
+(Trading_2024/back_testing/pair_store.py): per-stock 1-minute series are kept
+once under PAIR_STORE_DIR, only days missing from them are downloaded (Kite is
+not even initialised when nothing is missing), and the aligned pair is cached
+per date range. Set PAIR_STORE=0 to use the per-range pickles above.
+
 PnL modes
 ---------
 For stock pairs, using fixed quantities blindly is usually poor. This script
@@ -136,6 +142,25 @@ Useful overrides
     set BETA_MODE=FIRST
     set BETA_TRAIN_DAYS=60
 
+Window x threshold grid
+-----------------------
+RUN_GRID=1 replaces the per-threshold reports with one research matrix over
+every (z lookback, entry threshold, exit rule) combination:
+
+    set RUN_GRID=1
+    set GRID_Z_WINDOWS=120,225,375,750
+    set GRID_THRESHOLDS=2,2.5,3,4
+    set GRID_SETTLE_Z=0,0.5
+    set GRID_HARD_EXIT_BARS=60,240
+    set GRID_STOP_LOSS_RUPEES=0,5000
+    set GRID_WORKERS=6
+    python HdfcIciciDeepDeviation4YTester.py
+
+Rolling mean/std for all lookbacks come from one pair of cumulative sums of
+the spread (O(n) per lookback, min_periods = lookback), and the combinations
+are evaluated in parallel worker processes with the same event logic as the
+normal run. Exit rule = (settle |z|, hard exit bars, rupee stop).
+
 Output
 ------
 Default output directory:
@@ -150,17 +175,20 @@ Files created:
     z_ge_2/hdfc_icici_z_ge_2.xlsx
     z_ge_3/hdfc_icici_z_ge_3.xlsx
     ...
+    <numerator>_<denominator>_grid_summary.xlsx   (RUN_GRID=1 only)
 
 """
 
 from __future__ import annotations
 
+import itertools
 import math
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import date, datetime, time as dtime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
@@ -169,6 +197,11 @@ import pandas as pd
 # It should return an authenticated KiteConnect object.
 import Trading_2024.OptionTradeUtils as oUtils
 
+try:
+    from Trading_2024.back_testing import pair_store
+except Exception:  # pragma: no cover - pyarrow missing
+    pair_store = None  # type: ignore
+
 try:
     from dateutil.relativedelta import relativedelta
 except Exception:  # pragma: no cover
@@ -265,6 +298,9 @@ STOP_LOSS_RUPEES = float(os.environ.get("STOP_LOSS_RUPEES", "5000"))
 # FORCE_DOWNLOAD=1 ignores cached candle files and downloads again.
 FORCE_DOWNLOAD = os.environ.get("FORCE_DOWNLOAD", "0").strip().lower() in {"1", "true", "yes", "y"}
 
+# Load candles through the shared pair store (PAIR_STORE=0 disables it).
+USE_PAIR_STORE = pair_store is not None and pair_store.PAIR_STORE_ENABLED
+
 # Date override. If END_DATE is blank, IST today is used.
 END_DATE_ENV = os.environ.get("END_DATE", "").strip()
 START_DATE_ENV = os.environ.get("START_DATE", "").strip()
@@ -287,6 +323,40 @@ ENABLE_ENTRY_TIME_FILTER = os.environ.get("ENABLE_ENTRY_TIME_FILTER", "0").strip
 ENTRY_START_TIME = dtime.fromisoformat(os.environ.get("ENTRY_START_TIME", "09:30"))
 LAST_ENTRY_TIME = dtime.fromisoformat(os.environ.get("LAST_ENTRY_TIME", "14:30"))
 
+# -----------------------------------------------------------------------------
+# Window x threshold grid (RUN_GRID=1)
+# -----------------------------------------------------------------------------
+# Every combination of z lookback, entry threshold and exit rule is evaluated and
+# written to one summary matrix instead of the per-threshold workbooks.
+RUN_GRID = os.environ.get("RUN_GRID", "0").strip().lower() in {"1", "true", "yes", "y"}
+GRID_Z_WINDOWS = [
+    int(x.strip())
+    for x in os.environ.get("GRID_Z_WINDOWS", "120,225,375,750").split(",")
+    if x.strip()
+]
+GRID_THRESHOLDS = [
+    float(x.strip())
+    for x in os.environ.get("GRID_THRESHOLDS", ",".join(str(t) for t in THRESHOLDS)).split(",")
+    if x.strip()
+]
+# Exit rules are the cartesian product of these three lists.
+GRID_SETTLE_Z = [
+    float(x.strip())
+    for x in os.environ.get("GRID_SETTLE_Z", str(SETTLE_Z)).split(",")
+    if x.strip()
+]
+GRID_HARD_EXIT_BARS = [
+    int(x.strip())
+    for x in os.environ.get("GRID_HARD_EXIT_BARS", str(HARD_EXIT_BARS)).split(",")
+    if x.strip()
+]
+GRID_STOP_LOSS_RUPEES = [
+    float(x.strip())
+    for x in os.environ.get("GRID_STOP_LOSS_RUPEES", str(STOP_LOSS_RUPEES)).split(",")
+    if x.strip()
+]
+GRID_WORKERS = int(os.environ.get("GRID_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
 
 # =============================================================================
 # DATA STRUCTURES
@@ -440,7 +510,14 @@ def get_instrument_token(kite, spec: EquitySpec, cache: Dict[str, List[Dict]]) -
     return int(r["instrument_token"]), str(r.get("exchange", spec.exchange))
 
 
-def fetch_history_1min(kite, instrument_token: int, from_dt: datetime, to_dt: datetime, label: str) -> List[Dict]:
+def fetch_history_1min(
+    kite,
+    instrument_token: int,
+    from_dt: datetime,
+    to_dt: datetime,
+    label: str,
+    failed_chunks: Optional[List[Tuple[datetime, datetime]]] = None,
+) -> List[Dict]:
     """Fetch 1-minute historical data using chunking and retry logic."""
     chunks = iter_chunks_by_date(from_dt, to_dt, MAX_DAYS_PER_CHUNK)
     print(f"[INFO] Fetching {label} token={instrument_token}, range={from_dt} to {to_dt}, chunks={len(chunks)}")
@@ -473,6 +550,8 @@ def fetch_history_1min(kite, instrument_token: int, from_dt: datetime, to_dt: da
 
         if last_err is not None:
             print(f"    [ERROR] Giving up on chunk {idx}/{len(chunks)} for {label}: {last_err}")
+            if failed_chunks is not None:
+                failed_chunks.append((c_from, c_to))
 
         time.sleep(SLEEP_BETWEEN_CALLS_SEC)
 
@@ -554,6 +633,42 @@ def load_or_download_equity(
     return df
 
 
+def load_aligned_from_pair_store(start_d: date, end_d: date, cache: Dict[str, List[Dict]]) -> pd.DataFrame:
+    """
+    Aligned denominator/numerator closes from the shared pair store.
+
+    Only days missing from the stored series are downloaded, and Kite is
+    initialised only if something is missing. Returns the align_pair() columns.
+    """
+    denom_key = pair_store.InstrumentKey(DENOMINATOR_SPEC.exchange, DENOMINATOR_SPEC.tradingsymbol)
+    numer_key = pair_store.InstrumentKey(NUMERATOR_SPEC.exchange, NUMERATOR_SPEC.tradingsymbol)
+    specs = {denom_key: DENOMINATOR_SPEC, numer_key: NUMERATOR_SPEC}
+    kite_holder: List[object] = []
+
+    def fetch(key, from_d: date, to_d: date):
+        if not kite_holder:
+            print("\n[STEP] Initializing Kite API ...")
+            kite_holder.append(oUtils.intialize_kite_api())
+            print("[INFO] Kite API initialized.")
+        kite = kite_holder[0]
+        spec = specs[key]
+        token, real_ex = get_instrument_token(kite, spec, cache)
+        from_dt = datetime.combine(from_d, SESSION_START)
+        to_dt = datetime.combine(to_d, SESSION_END)
+        failed: List[Tuple[datetime, datetime]] = []
+        rows = fetch_history_1min(
+            kite, token, from_dt, to_dt, label=f"{real_ex}:{spec.tradingsymbol}", failed_chunks=failed
+        )
+        return rows_to_dataframe(rows, label=spec.label), [(a.date(), b.date()) for a, b in failed]
+
+    pair = pair_store.aligned_pair(
+        denom_key, numer_key, start_d, end_d, interval=INTERVAL, fetch=fetch, force=FORCE_DOWNLOAD
+    )
+    aligned = pair.rename(columns={"left_close": "denom_close", "right_close": "numer_close"})
+    aligned["trading_date"] = aligned["date"].dt.date
+    return aligned
+
+
 # =============================================================================
 # SPREAD / Z-SCORE CALCULATION
 # =============================================================================
@@ -733,7 +848,13 @@ def is_time_allowed(ts: pd.Timestamp) -> bool:
     return ENTRY_START_TIME <= t <= LAST_ENTRY_TIME
 
 
-def build_events_for_threshold(df: pd.DataFrame, threshold: float) -> pd.DataFrame:
+def build_events_for_threshold(
+    df: pd.DataFrame,
+    threshold: float,
+    settle_z: Optional[float] = None,
+    hard_exit_bars: Optional[int] = None,
+    stop_loss_rupees: Optional[float] = None,
+) -> pd.DataFrame:
     """
     Build non-overlapping deviation-settlement events for one |z| threshold.
 
@@ -751,7 +872,14 @@ def build_events_for_threshold(df: pd.DataFrame, threshold: float) -> pd.DataFra
     Stop-loss is checked before z-settlement. This is conservative: if a bar
     both settles statistically and is already below the rupee stop, the row is
     classified as STOP_LOSS_RUPEES.
+
+    settle_z / hard_exit_bars / stop_loss_rupees override SETTLE_Z /
+    HARD_EXIT_BARS / STOP_LOSS_RUPEES for one call (used by the grid run).
     """
+    settle_z = SETTLE_Z if settle_z is None else settle_z
+    hard_exit_bars = HARD_EXIT_BARS if hard_exit_bars is None else hard_exit_bars
+    stop_loss_rupees = STOP_LOSS_RUPEES if stop_loss_rupees is None else stop_loss_rupees
+
     required_cols = ["date", "trading_date", "denom_close", "numer_close", "z", "abs_z"]
     missing = [c for c in required_cols if c not in df.columns]
     if missing:
@@ -796,8 +924,8 @@ def build_events_for_threshold(df: pd.DataFrame, threshold: float) -> pd.DataFra
         # scan will not look beyond 60 bars for this trade. Set HARD_EXIT_BARS=0
         # to restore the older diagnostic behaviour.
         max_j = min(n - 1, entry_i + MAX_LOOKAHEAD_BARS)
-        if HARD_EXIT_BARS > 0:
-            max_j = min(max_j, entry_i + HARD_EXIT_BARS)
+        if hard_exit_bars > 0:
+            max_j = min(max_j, entry_i + hard_exit_bars)
 
         settle_j: Optional[int] = None
         exit_j: Optional[int] = None
@@ -821,13 +949,13 @@ def build_events_for_threshold(df: pd.DataFrame, threshold: float) -> pd.DataFra
             # 1) Rupee stop-loss first. This protects capital and avoids marking
             # a trade as statistically settled when it has already breached the
             # configured maximum loss.
-            if STOP_LOSS_RUPEES > 0 and pnl_j <= -abs(STOP_LOSS_RUPEES):
+            if stop_loss_rupees > 0 and pnl_j <= -abs(stop_loss_rupees):
                 exit_j = j
                 exit_reason = "STOP_LOSS_RUPEES"
                 break
 
             # 2) Normal z-score settlement.
-            if abs_z[j] <= SETTLE_Z:
+            if abs_z[j] <= settle_z:
                 settle_j = j
                 exit_j = j
                 exit_reason = "SETTLED"
@@ -835,14 +963,14 @@ def build_events_for_threshold(df: pd.DataFrame, threshold: float) -> pd.DataFra
 
             # 3) Hard bar/time stop. This is especially important because your
             # results showed that trades taking too long generally lose quality.
-            if HARD_EXIT_BARS > 0 and bars_held_now >= HARD_EXIT_BARS:
+            if hard_exit_bars > 0 and bars_held_now >= hard_exit_bars:
                 exit_j = j
                 exit_reason = "HARD_EXIT_BARS"
                 break
 
         if exit_j is None:
             exit_j = max_j
-            if HARD_EXIT_BARS > 0 and exit_j >= entry_i + HARD_EXIT_BARS:
+            if hard_exit_bars > 0 and exit_j >= entry_i + hard_exit_bars:
                 exit_reason = "HARD_EXIT_BARS"
             else:
                 exit_reason = "FORCED_MAX_WAIT_EXIT"
@@ -935,8 +1063,8 @@ def build_events_for_threshold(df: pd.DataFrame, threshold: float) -> pd.DataFra
                 "gross_exit_pnl_rupees": gross_exit_pnl,
                 "cost_rupees": COST_PER_TRADE_RUPEES,
                 "net_exit_pnl_rupees": net_exit_pnl,
-                "hard_exit_bars_config": HARD_EXIT_BARS,
-                "stop_loss_rupees_config": STOP_LOSS_RUPEES,
+                "hard_exit_bars_config": hard_exit_bars,
+                "stop_loss_rupees_config": stop_loss_rupees,
                 "denom_points_at_exit": float(denom[exit_j] - denom[entry_i]),
                 "numer_points_at_exit": float(numer[exit_j] - numer[entry_i]),
             }
@@ -1210,6 +1338,208 @@ def make_config_df(start_d: date, end_d: date, beta: float, aligned_rows: int, t
     return pd.DataFrame(rows, columns=["parameter", "value"])
 
 
+# =============================================================================
+# WINDOW x THRESHOLD GRID
+# =============================================================================
+
+# Arrays shared by grid workers. Set once per process by _grid_init() so tasks
+# only carry (window, threshold, exit rule).
+_GRID_BASE: Dict[str, object] = {}
+
+
+def spread_cumsums(spread: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+    """
+    Return (offset, cumsum(x), cumsum(x*x)) for x = spread - offset.
+
+    Both cumsums start with a leading 0 so window sums are plain differences.
+    Subtracting the overall mean first keeps x small, which keeps the
+    sum-of-squares variance accurate over years of 1-minute bars.
+    """
+    offset = float(np.mean(spread))
+    x = spread - offset
+    cs1 = np.concatenate(([0.0], np.cumsum(x)))
+    cs2 = np.concatenate(([0.0], np.cumsum(x * x)))
+    return offset, cs1, cs2
+
+
+def rolling_mean_std_from_cumsums(
+    offset: float,
+    cs1: np.ndarray,
+    cs2: np.ndarray,
+    window: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and population std (ddof=0) of the spread for one lookback.
+
+    Matches spread.rolling(window, min_periods=window).mean()/.std(ddof=0):
+    the first window-1 rows are NaN, and a non-positive (or rounding-noise)
+    variance gives NaN std like add_spread_and_zscore().
+    """
+    n = len(cs1) - 1
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if window <= 0 or window > n:
+        return mean, std
+
+    s1 = cs1[window:] - cs1[:-window]
+    s2 = cs2[window:] - cs2[:-window]
+    m = s1 / window
+    var = s2 / window - m * m
+    noise = 64.0 * np.finfo(float).eps * (np.abs(cs2[window:]) + np.abs(cs2[:-window])) / window
+
+    mean[window - 1:] = m + offset
+    std[window - 1:] = np.where(var > noise, np.sqrt(np.maximum(var, 0.0)), np.nan)
+    return mean, std
+
+
+def _grid_init(base: Dict[str, object]) -> None:
+    """Process-pool initializer: receive the shared arrays once per worker."""
+    _GRID_BASE.clear()
+    _GRID_BASE.update(base)
+
+
+def _grid_zscore_frame(window: int) -> pd.DataFrame:
+    """Frame with z / abs_z for one lookback, cached for the worker's next task."""
+    cached = _GRID_BASE.get("_frame")
+    if cached is not None and _GRID_BASE.get("_frame_window") == window:
+        return cached  # type: ignore[return-value]
+
+    spread = _GRID_BASE["spread"]
+    mean, std = rolling_mean_std_from_cumsums(
+        _GRID_BASE["offset"], _GRID_BASE["cs1"], _GRID_BASE["cs2"], window  # type: ignore[arg-type]
+    )
+    z = (spread - mean) / std  # type: ignore[operator]
+    frame = pd.DataFrame({
+        "date": _GRID_BASE["date"],
+        "trading_date": _GRID_BASE["trading_date"],
+        "denom_close": _GRID_BASE["denom_close"],
+        "numer_close": _GRID_BASE["numer_close"],
+        "z": z,
+        "abs_z": np.abs(z),
+    })
+    _GRID_BASE["_frame"] = frame
+    _GRID_BASE["_frame_window"] = window
+    return frame
+
+
+def _grid_task(window: int, threshold: float, exit_rule: Tuple[float, int, float]) -> Dict:
+    """Evaluate one (lookback, threshold, exit rule) cell; return its summary row."""
+    settle_z, hard_exit_bars, stop_loss_rupees = exit_rule
+    frame = _grid_zscore_frame(window)
+    events = build_events_for_threshold(
+        frame,
+        threshold=threshold,
+        settle_z=settle_z,
+        hard_exit_bars=hard_exit_bars,
+        stop_loss_rupees=stop_loss_rupees,
+    )
+    row = summarize_events(events, threshold=threshold, trading_day_count=int(_GRID_BASE["trading_days"])).iloc[0].to_dict()
+    row.update({
+        "z_window": window,
+        "min_periods": window,
+        "settle_z": settle_z,
+        "hard_exit_bars": hard_exit_bars,
+        "stop_loss_rupees": stop_loss_rupees,
+    })
+    return row
+
+
+def run_window_threshold_grid(
+    aligned: pd.DataFrame,
+    trading_days: int,
+    windows: Sequence[int],
+    thresholds: Sequence[float],
+    exit_rules: Sequence[Tuple[float, int, float]],
+    workers: int,
+) -> pd.DataFrame:
+    """
+    Evaluate every (lookback, threshold, exit rule) combination.
+
+    The spread (and beta) come from add_spread_and_zscore(); only the rolling
+    window changes across the grid. Returns one summary row per combination,
+    same metrics as summarize_events().
+    """
+    offset, cs1, cs2 = spread_cumsums(aligned["spread"].to_numpy(dtype=float))
+    base = {
+        "date": aligned["date"].to_numpy(),
+        "trading_date": aligned["trading_date"].to_numpy(),
+        "denom_close": aligned["denom_close"].to_numpy(dtype=float),
+        "numer_close": aligned["numer_close"].to_numpy(dtype=float),
+        "spread": aligned["spread"].to_numpy(dtype=float),
+        "offset": offset,
+        "cs1": cs1,
+        "cs2": cs2,
+        "trading_days": trading_days,
+    }
+
+    # Window-major order lets each worker reuse its cached z frame.
+    tasks = list(itertools.product(windows, thresholds, exit_rules))
+    rows: List[Dict] = []
+    t0 = time.time()
+
+    if workers <= 1 or len(tasks) <= 1:
+        _grid_init(base)
+        for idx, (window, threshold, rule) in enumerate(tasks, start=1):
+            rows.append(_grid_task(window, threshold, rule))
+            print(f"  [GRID {idx:03d}/{len(tasks):03d}] window={window} |z|>={threshold} exit={rule} "
+                  f"events={rows[-1]['total_events']}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_grid_init, initargs=(base,)) as pool:
+            futures = {pool.submit(_grid_task, *task): task for task in tasks}
+            for idx, fut in enumerate(as_completed(futures), start=1):
+                window, threshold, rule = futures[fut]
+                rows.append(fut.result())
+                print(f"  [GRID {idx:03d}/{len(tasks):03d}] window={window} |z|>={threshold} exit={rule} "
+                      f"events={rows[-1]['total_events']}")
+
+    print(f"[INFO] Grid of {len(tasks)} combinations done in {time.time() - t0:.1f}s")
+
+    grid = pd.DataFrame(rows)
+    key_cols = ["z_window", "threshold_abs_z", "settle_z", "hard_exit_bars", "stop_loss_rupees"]
+    other_cols = [c for c in grid.columns if c not in key_cols]
+    grid = grid[key_cols + other_cols]
+    return grid.sort_values(key_cols).reset_index(drop=True)
+
+
+def grid_metric_matrix(grid: pd.DataFrame, metric: str) -> pd.DataFrame:
+    """Pivot one metric: rows = exit rule x lookback, columns = entry threshold."""
+    if grid.empty or metric not in grid.columns:
+        return pd.DataFrame()
+    matrix = grid.pivot_table(
+        index=["settle_z", "hard_exit_bars", "stop_loss_rupees", "z_window"],
+        columns="threshold_abs_z",
+        values=metric,
+        aggfunc="first",
+    )
+    matrix.columns = [f"z_ge_{c:g}" for c in matrix.columns]
+    return matrix.reset_index()
+
+
+def write_grid_excel(grid: pd.DataFrame, config_df: pd.DataFrame) -> str:
+    """Write the long grid table plus one matrix sheet per headline metric."""
+    grid_path = os.path.join(OUTPUT_DIR, f"{NUMERATOR_LABEL.lower()}_{DENOMINATOR_LABEL.lower()}_grid_summary.xlsx")
+    with pd.ExcelWriter(grid_path, engine="openpyxl") as writer:
+        grid.to_excel(writer, sheet_name="grid", index=False)
+        autosize_excel_columns(writer, "grid", grid)
+
+        for metric, sheet in (
+            ("net_total_pnl_rupees", "net_pnl_matrix"),
+            ("profit_factor_net", "profit_factor_matrix"),
+            ("win_rate_net_pct", "win_rate_matrix"),
+            ("total_events", "events_matrix"),
+            ("settlement_rate_pct", "settlement_matrix"),
+        ):
+            matrix = grid_metric_matrix(grid, metric)
+            matrix.to_excel(writer, sheet_name=sheet, index=False)
+            autosize_excel_columns(writer, sheet, matrix)
+
+        config_df.to_excel(writer, sheet_name="config", index=False)
+        autosize_excel_columns(writer, "config", config_df)
+
+    print(f"[DONE] Grid summary: {grid_path}")
+    return grid_path
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -1236,19 +1566,24 @@ def main() -> None:
     print(f"[CONFIG] Stop loss        : Rs {STOP_LOSS_RUPEES:,.2f} (0 disables)")
     print(f"[CONFIG] Qty mode         : {QTY_MODE}")
     print(f"[CONFIG] FORCE_DOWNLOAD   : {FORCE_DOWNLOAD}")
-
-    print("\n[STEP] Initializing Kite API ...")
-    kite = oUtils.intialize_kite_api()
-    print("[INFO] Kite API initialized.")
+    print(f"[CONFIG] Pair store       : {pair_store.PAIR_STORE_DIR if USE_PAIR_STORE else 'off'}")
 
     instruments_cache: Dict[str, List[Dict]] = {}
 
-    print(f"\n[STEP] Loading/downloading {DENOMINATOR_LABEL} and {NUMERATOR_LABEL} 1-min candles ...")
-    denom_df = load_or_download_equity(kite, DENOMINATOR_SPEC, start_d, end_d, paths, instruments_cache)
-    numer_df = load_or_download_equity(kite, NUMERATOR_SPEC, start_d, end_d, paths, instruments_cache)
+    if USE_PAIR_STORE:
+        print(f"\n[STEP] Loading aligned {DENOMINATOR_LABEL} and {NUMERATOR_LABEL} 1-min closes from the pair store ...")
+        aligned = load_aligned_from_pair_store(start_d, end_d, instruments_cache)
+    else:
+        print("\n[STEP] Initializing Kite API ...")
+        kite = oUtils.intialize_kite_api()
+        print("[INFO] Kite API initialized.")
+
+        print(f"\n[STEP] Loading/downloading {DENOMINATOR_LABEL} and {NUMERATOR_LABEL} 1-min candles ...")
+        denom_df = load_or_download_equity(kite, DENOMINATOR_SPEC, start_d, end_d, paths, instruments_cache)
+        numer_df = load_or_download_equity(kite, NUMERATOR_SPEC, start_d, end_d, paths, instruments_cache)
 
-    print(f"\n[STEP] Aligning {DENOMINATOR_LABEL} and {NUMERATOR_LABEL} candles ...")
-    aligned = align_pair(denom_df, numer_df)
+        print(f"\n[STEP] Aligning {DENOMINATOR_LABEL} and {NUMERATOR_LABEL} candles ...")
+        aligned = align_pair(denom_df, numer_df)
     if aligned.empty:
         raise RuntimeError(f"No common {DENOMINATOR_LABEL}-{NUMERATOR_LABEL} timestamps after alignment.")
 
@@ -1269,6 +1604,40 @@ def main() -> None:
 
     config_df = make_config_df(start_d, end_d, beta, aligned_rows=len(aligned), trading_days=trading_days)
 
+    if RUN_GRID:
+        exit_rules = list(itertools.product(GRID_SETTLE_Z, GRID_HARD_EXIT_BARS, GRID_STOP_LOSS_RUPEES))
+        grid_config = pd.DataFrame([
+            ("grid_z_windows", ",".join(str(x) for x in GRID_Z_WINDOWS)),
+            ("grid_thresholds", ",".join(str(x) for x in GRID_THRESHOLDS)),
+            ("grid_settle_z", ",".join(str(x) for x in GRID_SETTLE_Z)),
+            ("grid_hard_exit_bars", ",".join(str(x) for x in GRID_HARD_EXIT_BARS)),
+            ("grid_stop_loss_rupees", ",".join(str(x) for x in GRID_STOP_LOSS_RUPEES)),
+            ("grid_workers", GRID_WORKERS),
+        ], columns=["parameter", "value"])
+        config_df = pd.concat([config_df, grid_config], ignore_index=True)
+
+        print(
+            f"\n[STEP] Running grid: {len(GRID_Z_WINDOWS)} windows x {len(GRID_THRESHOLDS)} thresholds x "
+            f"{len(exit_rules)} exit rules on {GRID_WORKERS} worker(s) ..."
+        )
+        grid = run_window_threshold_grid(
+            aligned,
+            trading_days=trading_days,
+            windows=GRID_Z_WINDOWS,
+            thresholds=GRID_THRESHOLDS,
+            exit_rules=exit_rules,
+            workers=GRID_WORKERS,
+        )
+        grid_path = write_grid_excel(grid, config_df)
+
+        print("\n==================== NET PNL MATRIX ====================")
+        print(grid_metric_matrix(grid, "net_total_pnl_rupees").to_string(index=False))
+        print("-------------------------------------------------------")
+        print(f"Grid summary     : {grid_path}")
+        print(f"Output directory : {OUTPUT_DIR}")
+        print("=======================================================")
+        return
+
     all_summaries: List[pd.DataFrame] = []
     threshold_files: List[Dict] = []
 
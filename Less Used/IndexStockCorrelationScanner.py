@@ -70,7 +70,7 @@ By default, files are written under:
     ./pair_correlation_output
 
 Main outputs:
-    candles/                         reusable per-instrument candle files
+    candles/                         reusable per-instrument candle files (PAIR_STORE=0)
     wide_close_<interval>.pkl         aligned close-price matrix
     wide_returns_<interval>.pkl       aligned log-return matrix
     pair_correlation_metrics.csv      all pairwise metrics
@@ -83,6 +83,10 @@ Required:
 
 Optional:
     pyarrow or fastparquet for parquet output. If missing, the script uses pickle.
+    With pyarrow, candles go through the shared pair store
+    (Trading_2024/back_testing/pair_store.py, root PAIR_STORE_DIR): each
+    instrument/interval is stored once and only days missing from it are
+    downloaded on later runs. Set PAIR_STORE=0 for the candles/ pickles.
 
 Kite dependency
 ---------------
@@ -106,6 +110,11 @@ import pandas as pd
 # Same initialization pattern as your existing downloader.
 import Trading_2024.OptionTradeUtils as oUtils
 
+try:
+    from Trading_2024.back_testing import pair_store
+except Exception:  # pragma: no cover - pyarrow missing
+    pair_store = None  # type: ignore
+
 try:
     from zoneinfo import ZoneInfo  # Python 3.9+
 except Exception:  # pragma: no cover
@@ -151,6 +160,10 @@ MIN_COMMON_RETURNS = int(os.environ.get("MIN_COMMON_RETURNS", "100"))
 # Set FORCE_DOWNLOAD=1 to re-download even if local candle file exists.
 FORCE_DOWNLOAD = os.environ.get("FORCE_DOWNLOAD", "0").strip() == "1"
 
+# Keep candles in the shared pair store and top them up incrementally.
+# PAIR_STORE=0 falls back to the whole-range candles/ pickles.
+USE_PAIR_STORE = pair_store is not None and pair_store.PAIR_STORE_ENABLED
+
 # Set SAVE_CSV_CANDLES=1 if you also want one CSV per instrument.
 SAVE_CSV_CANDLES = os.environ.get("SAVE_CSV_CANDLES", "0").strip() == "1"
 
@@ -175,6 +188,19 @@ INCLUDE_NIFTY50_STOCKS_ONLY = os.environ.get("INCLUDE_NIFTY50_STOCKS_ONLY", "0")
 # If TOP_N_SHEETS=50, the Excel report will include top 50 positive/negative/stable pairs.
 TOP_N_SHEETS = int(os.environ.get("TOP_N_SHEETS", "50"))
 
+# Pair metrics engine:
+#   matrix   -> all pairs from masked matrix products + cumulative-sum rolling moments
+#               (needed for the full F&O list: ~200 names, ~20k pairs)
+#   pairwise -> original pandas loop, one pair at a time (reference implementation)
+PAIR_ENGINE = os.environ.get("PAIR_ENGINE", "matrix").strip().lower()
+
+# dtype of the centred return matrix used for the full-period matrix products.
+# Rolling cumulative sums always use float64 (differences of long cumsums).
+PAIR_MATRIX_DTYPE = os.environ.get("PAIR_MATRIX_DTYPE", "float32").strip()
+
+# Columns per rolling block. Memory per block ~ rows * block * 8 bytes * ~6 arrays.
+ROLLING_BLOCK_COLS = int(os.environ.get("ROLLING_BLOCK_COLS", "32"))
+
 
 # Fallback list. NIFTY 50 composition changes periodically.
 # The script tries custom CSV / NSE CSV first; this list is only the fallback.
@@ -333,6 +359,7 @@ def fetch_history(
     to_dt: datetime,
     interval: str,
     label: str,
+    failed_chunks: Optional[List[Tuple[datetime, datetime]]] = None,
 ) -> List[Dict]:
     """Fetch historical data using chunking and retries."""
     days_per_chunk = days_per_chunk_for_interval(interval)
@@ -374,6 +401,8 @@ def fetch_history(
 
         if last_err is not None:
             print(f"    [ERROR] Giving up on chunk {idx}/{len(chunks)} for {label}: {last_err}")
+            if failed_chunks is not None:
+                failed_chunks.append((c_from, c_to))
 
         time.sleep(SLEEP_BETWEEN_CALLS_SEC)
 
@@ -614,6 +643,9 @@ def download_one_instrument(
     Returns:
         (spec, dataframe_or_none, error_message_or_none)
     """
+    if USE_PAIR_STORE:
+        return load_instrument_from_pair_store(kite, spec, from_dt, to_dt, interval, instruments_cache)
+
     path = candle_file_path(output_dir, spec, interval)
 
     cached = load_candles_if_available(path)
@@ -653,6 +685,67 @@ def download_one_instrument(
         return spec, None, str(exc)
 
 
+def load_instrument_from_pair_store(
+    kite,
+    spec: InstrumentSpec,
+    from_dt: datetime,
+    to_dt: datetime,
+    interval: str,
+    instruments_cache: Dict[str, List[Dict]],
+) -> Tuple[InstrumentSpec, Optional[pd.DataFrame], Optional[str]]:
+    """
+    Same contract as download_one_instrument(), backed by the shared pair store.
+
+    Only the days missing from the stored series are downloaded. Chunks that failed
+    (or an empty download) are not marked covered, so they are retried next run.
+    """
+
+    def fetch(key, from_d: date, to_d: date):
+        token, real_exchange, _ = get_instrument_token(
+            kite=kite,
+            exchange=spec.exchange,
+            tradingsymbol=spec.tradingsymbol,
+            cache=instruments_cache,
+        )
+        print(
+            f"\n[DOWNLOAD] {spec.label} | {real_exchange}:{spec.tradingsymbol} | "
+            f"token={token} | kind={spec.kind} | {from_d} -> {to_d}"
+        )
+        failed: List[Tuple[datetime, datetime]] = []
+        rows = fetch_history(
+            kite=kite,
+            instrument_token=token,
+            from_dt=datetime.combine(from_d, SESSION_START),
+            to_dt=datetime.combine(to_d, SESSION_END),
+            interval=interval,
+            label=f"{real_exchange}:{spec.tradingsymbol}",
+            failed_chunks=failed,
+        )
+        return rows_to_dataframe(rows, spec), [(a.date(), b.date()) for a, b in failed]
+
+    try:
+        df = pair_store.load_series(
+            pair_store.InstrumentKey(spec.exchange, spec.tradingsymbol),
+            from_dt.date(),
+            to_dt.date(),
+            interval=interval,
+            fetch=fetch,
+            force=FORCE_DOWNLOAD,
+        )
+    except Exception as exc:
+        return spec, None, str(exc)
+
+    if df.empty:
+        return spec, None, "No historical candles returned"
+
+    df.insert(0, "label", spec.label)
+    df.insert(1, "exchange", spec.exchange)
+    df.insert(2, "tradingsymbol", spec.tradingsymbol)
+    df.insert(3, "kind", spec.kind)
+    print(f"[PAIR_STORE] {spec.label}: rows={len(df)}")
+    return spec, df, None
+
+
 def download_universe(
     kite,
     specs: List[InstrumentSpec],
@@ -951,6 +1044,301 @@ def compute_pair_metrics(
     return metrics
 
 
+# =============================================================================
+# MATRIX ENGINE (all pairs at once)
+# =============================================================================
+
+
+ROLLING_QUANTILES = (0.05, 0.25, 0.50, 0.75, 0.95)
+
+
+def _rolling_stats_from_series(rolling_corr: pd.Series) -> Dict[str, Optional[float]]:
+    """Same rolling summary as compute_pair_metrics(), for one already-dropna'd series."""
+    if len(rolling_corr) == 0:
+        return {}
+    q = rolling_corr.quantile(list(ROLLING_QUANTILES))
+    return {
+        "mean": rolling_corr.mean(),
+        "min": rolling_corr.min(),
+        "max": rolling_corr.max(),
+        "std": rolling_corr.std(),
+        "last": rolling_corr.iloc[-1],
+        "p05": q.iloc[0], "p25": q.iloc[1], "p50": q.iloc[2], "p75": q.iloc[3], "p95": q.iloc[4],
+        "gt50": float((rolling_corr > 0.50).mean() * 100.0),
+        "gt70": float((rolling_corr > 0.70).mean() * 100.0),
+        "gt80": float((rolling_corr > 0.80).mean() * 100.0),
+    }
+
+
+def _column_spans(valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per column: first valid row, last valid row, and whether the valid rows are
+    contiguous (no NaN holes inside the span). -1 for empty columns.
+    """
+    t = valid.shape[0]
+    has = valid.any(axis=0)
+    first = np.where(has, valid.argmax(axis=0), -1)
+    last = np.where(has, t - 1 - valid[::-1].argmax(axis=0), -1)
+    count = valid.sum(axis=0)
+    contiguous = has & (count == (last - first + 1))
+    return first, last, contiguous
+
+
+def pairwise_moments(returns: pd.DataFrame, dtype: str = PAIR_MATRIX_DTYPE) -> Dict[str, np.ndarray]:
+    """
+    Pairwise-complete moments for every (a, b) from a handful of matrix products.
+
+    Returns are centred once per column, zero-filled where missing, and M is the
+    validity mask. For pair (a, b) over rows where BOTH are present:
+        n[a,b]      = M^T M
+        sum_a[a,b]  = X^T M          (sum of a where b present)
+        sq_a[a,b]   = (X*X)^T M
+        cross[a,b]  = X^T X
+    which gives the same numbers as returns[[a, b]].dropna() per pair.
+    """
+    raw = returns.to_numpy(dtype=np.float64)
+    valid = np.isfinite(raw)
+
+    # Masked column means; columns with no valid rows get 0 (they are all masked anyway).
+    counts = valid.sum(axis=0)
+    col_mean = np.divide(
+        np.where(valid, raw, 0.0).sum(axis=0), counts, out=np.zeros(raw.shape[1]), where=counts > 0
+    )
+    x = np.where(valid, raw - col_mean, 0.0).astype(dtype)
+    m = valid.astype(dtype)
+
+    n = (m.T @ m).astype(np.float64)
+    sum_a = (x.T @ m).astype(np.float64)
+    sq_a = ((x * x).T @ m).astype(np.float64)
+    cross = (x.T @ x).astype(np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_a = sum_a / n
+        # ddof=1 like pandas .std()/.cov()
+        var_a = (sq_a - sum_a * mean_a) / (n - 1)
+        cov = (cross - sum_a * sum_a.T / n) / (n - 1)
+
+    return {"n": n, "var_a": var_a, "cov": cov, "valid": valid, "raw": raw, "x": x, "col_mean": col_mean}
+
+
+def _rolling_block(
+    cs_x: np.ndarray,
+    cs_xx: np.ndarray,
+    xa: np.ndarray,
+    x_block: np.ndarray,
+    a: int,
+    cols: np.ndarray,
+    window: int,
+) -> np.ndarray:
+    """
+    Rolling correlation of column a against each column in `cols` using cumulative
+    sums. Row r of the result is the window ending at row r + window - 1.
+    """
+    cs_xy = np.zeros((x_block.shape[0] + 1, len(cols)), dtype=np.float64)
+    np.cumsum(xa[:, None] * x_block, axis=0, out=cs_xy[1:])
+
+    sxy = cs_xy[window:] - cs_xy[:-window]
+    sx = (cs_x[window:, a] - cs_x[:-window, a])[:, None]
+    sy = cs_x[window:, cols] - cs_x[:-window, cols]
+    sxx = (cs_xx[window:, a] - cs_xx[:-window, a])[:, None]
+    syy = cs_xx[window:, cols] - cs_xx[:-window, cols]
+
+    cov = sxy - sx * sy / window
+    vx = sxx - sx * sx / window
+    vy = syy - sy * sy / window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        den = np.sqrt(vx * vy)
+        rc = np.where(den > 0, cov / den, np.nan)
+    return rc
+
+
+def _rolling_stats_block(rc: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Dict[str, np.ndarray]:
+    """Summary stats per column of rc over rows [start, end] (groups columns sharing a span)."""
+    k = rc.shape[1]
+    out = {name: np.full(k, np.nan) for name in ("mean", "min", "max", "std", "last", "p05", "p25", "p50", "p75", "p95", "gt50", "gt70", "gt80")}
+
+    spans: Dict[Tuple[int, int], List[int]] = {}
+    for j in range(k):
+        if ends[j] >= starts[j]:
+            spans.setdefault((int(starts[j]), int(ends[j])), []).append(j)
+
+    for (s, e), js in spans.items():
+        blk = rc[s:e + 1, js]
+        if not np.isfinite(blk).all():
+            # Degenerate windows (zero variance) are dropped like pandas dropna()
+            for j in js:
+                ser = pd.Series(rc[s:e + 1, j]).dropna()
+                for key, val in _rolling_stats_from_series(ser).items():
+                    out[key][j] = np.nan if val is None else val
+            continue
+
+        out["mean"][js] = blk.mean(axis=0)
+        out["min"][js] = blk.min(axis=0)
+        out["max"][js] = blk.max(axis=0)
+        out["std"][js] = blk.std(axis=0, ddof=1) if blk.shape[0] > 1 else np.nan
+        out["last"][js] = blk[-1]
+        qs = np.quantile(blk, ROLLING_QUANTILES, axis=0)
+        for name, row in zip(("p05", "p25", "p50", "p75", "p95"), qs):
+            out[name][js] = row
+        out["gt50"][js] = (blk > 0.50).mean(axis=0) * 100.0
+        out["gt70"][js] = (blk > 0.70).mean(axis=0) * 100.0
+        out["gt80"][js] = (blk > 0.80).mean(axis=0) * 100.0
+
+    return out
+
+
+def compute_pair_metrics_matrix(
+    returns: pd.DataFrame,
+    interval: str,
+    rolling_window: int,
+    min_common_returns: int,
+) -> pd.DataFrame:
+    """
+    Matrix version of compute_pair_metrics(): same columns and values, all pairs at once.
+
+    - Full-period corr / beta / vol come from pairwise_moments() (single matrix products).
+    - Rolling corr comes from float64 cumulative sums, one column block at a time.
+      Pairs whose common rows are not contiguous (a NaN hole inside the span of either
+      instrument) fall back to the pandas rolling for exactness.
+    - The rolling-mean matrix used by the Excel report is attached as
+      metrics.attrs["rolling_corr_mean_matrix"] so it is not recomputed.
+    """
+    labels = list(returns.columns)
+    n_inst = len(labels)
+    ann = annualization_factor(interval)
+    index = returns.index
+
+    mom = pairwise_moments(returns)
+    n_common, var_a, cov = mom["n"], mom["var_a"], mom["cov"]
+    valid, raw, x = mom["valid"], mom["raw"], mom["x"].astype(np.float64)
+
+    first, last, contiguous = _column_spans(valid)
+
+    cs_x = np.zeros((x.shape[0] + 1, n_inst), dtype=np.float64)
+    np.cumsum(x, axis=0, out=cs_x[1:])
+    cs_xx = np.zeros_like(cs_x)
+    np.cumsum(x * x, axis=0, out=cs_xx[1:])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        full_corr = cov / np.sqrt(var_a * var_a.T)
+        beta = cov / var_a.T  # beta[a, b] = cov / var(b over common rows)
+
+    roll_mean_mat = np.full((n_inst, n_inst), np.nan)
+    np.fill_diagonal(roll_mean_mat, 1.0)
+
+    rows: List[Dict] = []
+    pair_count = n_inst * (n_inst - 1) // 2
+    done = 0
+
+    for a in range(n_inst):
+        bs = np.arange(a + 1, n_inst)
+        if len(bs) == 0:
+            continue
+
+        # Common first/last timestamps and mean |ra - rb| per pair (blocked)
+        first_common = np.full(len(bs), -1)
+        last_common = np.full(len(bs), -1)
+        mean_abs_diff = np.full(len(bs), np.nan)
+        for off in range(0, len(bs), ROLLING_BLOCK_COLS):
+            blk = bs[off:off + ROLLING_BLOCK_COLS]
+            common = valid[:, [a]] & valid[:, blk]
+            has = common.any(axis=0)
+            first_common[off:off + len(blk)] = np.where(has, common.argmax(axis=0), -1)
+            last_common[off:off + len(blk)] = np.where(has, common.shape[0] - 1 - common[::-1].argmax(axis=0), -1)
+            n_blk = common.sum(axis=0)
+            abs_sum = np.where(common, np.abs(raw[:, [a]] - raw[:, blk]), 0.0).sum(axis=0)
+            np.divide(abs_sum, n_blk, out=mean_abs_diff[off:off + len(blk)], where=n_blk > 0)
+
+        # Rolling stats: fast path for contiguous pairs with enough rows
+        stats: Dict[int, Dict[str, float]] = {}
+        fast = bs[contiguous[a] & contiguous[bs] & (n_common[a, bs] >= rolling_window)]
+        for off in range(0, len(fast), ROLLING_BLOCK_COLS):
+            blk = fast[off:off + ROLLING_BLOCK_COLS]
+            rc = _rolling_block(cs_x, cs_xx, x[:, a], x[:, blk], a, blk, rolling_window)
+            starts = np.maximum(first[a], first[blk])
+            ends = np.minimum(last[a], last[blk]) - rolling_window + 1
+            st = _rolling_stats_block(rc, starts, ends)
+            for j, b in enumerate(blk):
+                stats[int(b)] = {k: v[j] for k, v in st.items()}
+
+        slow = [int(b) for b in bs if int(b) not in stats and n_common[a, b] >= rolling_window]
+        for b in slow:
+            pair = returns[[labels[a], labels[b]]].dropna()
+            rc = pair.iloc[:, 0].rolling(rolling_window).corr(pair.iloc[:, 1]).dropna()
+            stats[b] = _rolling_stats_from_series(rc)
+
+        for j, b in enumerate(bs):
+            b = int(b)
+            done += 1
+            st = stats.get(b, {})
+            rm = st.get("mean", np.nan)
+            roll_mean_mat[a, b] = roll_mean_mat[b, a] = np.nan if rm is None else rm
+
+            n = int(n_common[a, b])
+            if n < min_common_returns:
+                rows.append(
+                    {
+                        "instrument_a": labels[a],
+                        "instrument_b": labels[b],
+                        "common_returns": n,
+                        "status": "INSUFFICIENT_DATA",
+                    }
+                )
+                continue
+
+            fc = full_corr[a, b]
+            rows.append(
+                {
+                    "instrument_a": labels[a],
+                    "instrument_b": labels[b],
+                    "common_returns": n,
+                    # NaT when the pair shares no rows, like pair.index.min() on an empty pair
+                    "first_common_timestamp": index[first_common[j]] if first_common[j] >= 0 else pd.NaT,
+                    "last_common_timestamp": index[last_common[j]] if last_common[j] >= 0 else pd.NaT,
+                    "status": "OK",
+                    "full_period_return_correlation": safe_float(fc),
+                    "rolling_window_candles": rolling_window,
+                    "rolling_corr_mean": safe_float(st.get("mean")),
+                    "rolling_corr_min": safe_float(st.get("min")),
+                    "rolling_corr_max": safe_float(st.get("max")),
+                    "rolling_corr_std": safe_float(st.get("std")),
+                    "rolling_corr_last": safe_float(st.get("last")),
+                    "rolling_corr_p05": safe_float(st.get("p05")),
+                    "rolling_corr_p25": safe_float(st.get("p25")),
+                    "rolling_corr_median": safe_float(st.get("p50")),
+                    "rolling_corr_p75": safe_float(st.get("p75")),
+                    "rolling_corr_p95": safe_float(st.get("p95")),
+                    "rolling_corr_gt_0_50_pct": safe_float(st.get("gt50")),
+                    "rolling_corr_gt_0_70_pct": safe_float(st.get("gt70")),
+                    "rolling_corr_gt_0_80_pct": safe_float(st.get("gt80")),
+                    "r_squared_from_full_corr": safe_float(fc * fc if np.isfinite(fc) else None),
+                    "beta_a_on_b_returns": safe_float(beta[a, b] if var_a[b, a] > 0 else None),
+                    "beta_b_on_a_returns": safe_float(beta[b, a] if var_a[a, b] > 0 else None),
+                    "ann_vol_a_pct": safe_float(math.sqrt(var_a[a, b]) * math.sqrt(ann) * 100.0 if var_a[a, b] >= 0 else None),
+                    "ann_vol_b_pct": safe_float(math.sqrt(var_a[b, a]) * math.sqrt(ann) * 100.0 if var_a[b, a] >= 0 else None),
+                    "mean_abs_return_diff_bps": safe_float(mean_abs_diff[j] * 10000.0),
+                }
+            )
+
+        print(f"[METRICS] Completed {done}/{pair_count} pairs (matrix engine, rolling fallback pairs={len(slow)})")
+
+    metrics = pd.DataFrame(rows)
+
+    if not metrics.empty and "full_period_return_correlation" in metrics.columns:
+        metrics["abs_full_corr"] = metrics["full_period_return_correlation"].abs()
+        metrics["corr_stability_score"] = (
+            metrics["rolling_corr_mean"].fillna(-999.0)
+            - metrics["rolling_corr_std"].fillna(999.0)
+        )
+        metrics = metrics.sort_values(
+            by=["status", "full_period_return_correlation", "rolling_corr_mean"],
+            ascending=[True, False, False],
+        ).reset_index(drop=True)
+
+    metrics.attrs["rolling_corr_mean_matrix"] = pd.DataFrame(roll_mean_mat, index=labels, columns=labels)
+    return metrics
+
+
 def correlation_matrix(returns: pd.DataFrame) -> pd.DataFrame:
     """Full-period return correlation matrix."""
     return returns.corr()
@@ -1020,7 +1408,9 @@ def write_reports(
     # Excel report. If openpyxl/xlsxwriter is unavailable, CSVs are still saved.
     try:
         corr_mat = correlation_matrix(returns)
-        roll_mean_mat = rolling_corr_mean_matrix(returns, rolling_window=rolling_window)
+        roll_mean_mat = metrics.attrs.get("rolling_corr_mean_matrix")
+        if roll_mean_mat is None:
+            roll_mean_mat = rolling_corr_mean_matrix(returns, rolling_window=rolling_window)
 
         ok_metrics = metrics[metrics.get("status", "") == "OK"].copy() if not metrics.empty else metrics
 
@@ -1045,6 +1435,7 @@ def write_reports(
                     {"parameter": "interval", "value": interval},
                     {"parameter": "lookback_days", "value": LOOKBACK_DAYS},
                     {"parameter": "rolling_window_candles", "value": rolling_window},
+                    {"parameter": "pair_engine", "value": PAIR_ENGINE},
                     {"parameter": "min_common_returns", "value": MIN_COMMON_RETURNS},
                     {"parameter": "output_dir", "value": output_dir},
                     {"parameter": "force_download", "value": FORCE_DOWNLOAD},
@@ -1127,8 +1518,10 @@ def main() -> None:
     print(f"Lookback days: {LOOKBACK_DAYS}")
     print(f"Date range: {from_dt} -> {to_dt}")
     print(f"Rolling window: {ROLLING_WINDOW} candles")
+    print(f"Pair engine: {PAIR_ENGINE}")
     print(f"Output directory: {OUTPUT_DIR}")
     print(f"Force download: {FORCE_DOWNLOAD}")
+    print(f"Pair store: {pair_store.PAIR_STORE_DIR if USE_PAIR_STORE else 'off'}")
     print("=" * 90)
 
     print("[STEP] Building instrument universe ...")
@@ -1162,8 +1555,9 @@ def main() -> None:
     returns = compute_log_returns(wide_close)
     print(f"[INFO] Return matrix shape: rows={returns.shape[0]}, instruments={returns.shape[1]}")
 
-    print("\n[STEP] Computing pairwise correlation metrics ...")
-    metrics = compute_pair_metrics(
+    print(f"\n[STEP] Computing pairwise correlation metrics (engine={PAIR_ENGINE}) ...")
+    pair_metrics_fn = compute_pair_metrics_matrix if PAIR_ENGINE == "matrix" else compute_pair_metrics
+    metrics = pair_metrics_fn(
         returns=returns,
         interval=INTERVAL,
         rolling_window=ROLLING_WINDOW,
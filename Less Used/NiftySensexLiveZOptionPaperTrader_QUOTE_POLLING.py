@@ -6,8 +6,9 @@ NiftySensexLiveZOptionPaperTrader_QUOTE_POLLING.py
 Purpose
 -------
 Live **paper-trading / virtual-trade monitor** for the NIFTY-SENSEX z-score
-mean-reversion idea, using `kite.quote()` polling instead of KiteTicker
-WebSocket streaming.
+mean-reversion idea. Prices come from KiteTicker WebSocket ticks by default,
+with `kite.quote()` polling as the fallback (or as the only source with
+FEED_MODE=POLL).
 
 This script DOES NOT place real orders. It only:
 
@@ -16,7 +17,10 @@ This script DOES NOT place real orders. It only:
 
 2. Seeds the NIFTY-SENSEX spread model using recent 1-minute historical data.
 
-3. Polls live quotes once every second using:
+3. Streams live prices from KiteTicker:
+       indices in LTP mode, active option legs in quote/full mode
+   and re-evaluates on every tick. If the socket goes quiet for
+   TICKER_STALE_SEC, it polls once per POLL_INTERVAL_SEC instead using:
        kite.quote(["NSE:NIFTY 50", "BSE:SENSEX", option_keys...])
 
 4. Calculates live:
@@ -31,12 +35,18 @@ This script DOES NOT place real orders. It only:
 
 7. It writes detailed CSV logs so the files can be studied later.
 
-Why quote polling instead of WebSocket?
---------------------------------------
-KiteTicker WebSocket can disconnect or become inconvenient in some local setups.
-For research/paper logging, polling `kite.quote()` every second is simpler and
-more deterministic. It is not as fast as WebSocket ticks, but it is sufficient
-for studying whether second-level monitoring improves the z-score strategy.
+Ticks vs quote polling
+----------------------
+Polling `kite.quote()` caps monitoring at 1 Hz, spends REST quota and adds a
+full quote round-trip before every z evaluation. With FEED_MODE=TICKER (the
+default) the loop wakes on each tick instead, so signal latency is tick time.
+KiteTicker can disconnect in some local setups; whenever no index tick has
+arrived for TICKER_STALE_SEC the loop falls back to polling until ticks resume.
+FEED_MODE=POLL restores the pure 1-second polling behaviour.
+
+Option legs are subscribed in TICKER_OPTION_MODE. Quote-mode ticks carry no
+market depth, so with USE_BID_ASK_REALISTIC_PNL=1 the default is full mode
+(top-of-book bid/ask); otherwise quote mode is enough.
 
 Important design choice
 -----------------------
@@ -91,7 +101,8 @@ Default output folder:
     ./nifty_sensex_live_z_quote_logs/YYYYMMDD/
 
 Files:
-    market_state_YYYYMMDD.csv       every POLL_INTERVAL_SEC seconds
+    market_state_YYYYMMDD.csv       every MARKET_STATE_LOG_INTERVAL_SEC seconds
+                                    (and on every entry/exit)
     trade_events_YYYYMMDD.csv       signal / entry / exit / quote errors
     virtual_trades_YYYYMMDD.csv     completed virtual trades
     startup_config_YYYYMMDD.csv     run configuration
@@ -107,6 +118,7 @@ import csv
 import math
 import os
 import signal
+import threading
 import time
 from collections import deque
 from dataclasses import dataclass
@@ -128,6 +140,11 @@ try:
 except Exception:  # pragma: no cover
     ZoneInfo = None  # type: ignore
 
+try:
+    from kiteconnect import KiteTicker
+except Exception:  # pragma: no cover
+    KiteTicker = None  # type: ignore
+
 
 # =============================================================================
 # CONFIGURATION
@@ -147,9 +164,24 @@ EXIT_ON_FORCE_EXIT_TIME = os.environ.get("EXIT_ON_FORCE_EXIT_TIME", "1").strip()
 
 OUTPUT_DIR = os.environ.get("OUTPUT_DIR", "nifty_sensex_live_z_quote_logs")
 
-# Polling interval. 1 second is the intended research mode.
+# Polling interval. 1 second is the intended research mode. In TICKER mode this
+# is the fallback polling cadence while the socket is stale.
 POLL_INTERVAL_SEC = float(os.environ.get("POLL_INTERVAL_SEC", "1.0"))
 
+# TICKER: evaluate on every KiteTicker tick, poll only when the socket is stale.
+# POLL: kite.quote() every POLL_INTERVAL_SEC (original behaviour).
+FEED_MODE = os.environ.get("FEED_MODE", "TICKER").strip().upper()
+
+# No index tick for this long => treat the socket as stale and poll instead.
+TICKER_STALE_SEC = float(os.environ.get("TICKER_STALE_SEC", "3.0"))
+
+# Optional replay server (Trading_2024.trainer.kite_ticker_replay) for offline runs.
+KITE_TICKER_ROOT = os.environ.get("KITE_TICKER_ROOT", "").strip()
+
+# Ticks can arrive several times a second; market_state rows are written at most
+# this often, plus on every entry/exit.
+MARKET_STATE_LOG_INTERVAL_SEC = float(os.environ.get("MARKET_STATE_LOG_INTERVAL_SEC", str(POLL_INTERVAL_SEC)))
+
 # Signal thresholds.
 ENTRY_Z = float(os.environ.get("ENTRY_Z", "2.0"))
 SETTLE_Z = float(os.environ.get("SETTLE_Z", "0.5"))
@@ -194,6 +226,10 @@ TARGET_PROFIT_RUPEES = float(os.environ.get("TARGET_PROFIT_RUPEES", "0"))  # 0 d
 # This gives a more conservative paper PnL than LTP-only PnL.
 USE_BID_ASK_REALISTIC_PNL = os.environ.get("USE_BID_ASK_REALISTIC_PNL", "1").strip().lower() in {"1", "true", "yes", "y"}
 
+# KiteTicker subscription mode for option legs. Quote-mode ticks carry no depth,
+# so bid/ask PnL needs full mode.
+TICKER_OPTION_MODE = os.environ.get("TICKER_OPTION_MODE", "full" if USE_BID_ASK_REALISTIC_PNL else "quote").strip().lower()
+
 # Kite index instruments.
 NIFTY_INDEX_EXCHANGE = "NSE"
 NIFTY_INDEX_SYMBOL = "NIFTY 50"
@@ -282,6 +318,12 @@ class LiveState:
     stop_requested: bool = False
     last_seen_minute: Optional[pd.Timestamp] = None
     last_spread_for_minute: Optional[float] = None
+    # Rolling mean/std only change when a completed minute is appended, so they
+    # are cached per window_version instead of recomputed on every tick.
+    window_version: int = 0
+    stats_version: int = -1
+    window_mean: float = np.nan
+    window_std: float = np.nan
 
 
 # =============================================================================
@@ -446,7 +488,7 @@ def setup_loggers() -> Tuple[str, Loggers]:
         "nifty_option_ltp", "sensex_option_ltp",
         "nifty_option_bid", "nifty_option_ask", "sensex_option_bid", "sensex_option_ask",
         "ltp_pnl", "realistic_pnl", "max_ltp_pnl", "min_ltp_pnl", "max_realistic_pnl", "min_realistic_pnl",
-        "quote_keys_count", "missing_quote_keys", "message",
+        "quote_keys_count", "missing_quote_keys", "feed_source", "message",
     ]
     event_fields = [
         "timestamp", "event_type", "trade_id", "side", "z", "abs_z", "spread", "nifty_ltp", "sensex_ltp",
@@ -478,6 +520,10 @@ def write_config(logs: Loggers, beta: float, spread_count: int) -> None:
         "ENTRY_Z": ENTRY_Z,
         "SETTLE_Z": SETTLE_Z,
         "POLL_INTERVAL_SEC": POLL_INTERVAL_SEC,
+        "FEED_MODE": FEED_MODE,
+        "TICKER_STALE_SEC": TICKER_STALE_SEC,
+        "TICKER_OPTION_MODE": TICKER_OPTION_MODE,
+        "MARKET_STATE_LOG_INTERVAL_SEC": MARKET_STATE_LOG_INTERVAL_SEC,
         "Z_WINDOW": Z_WINDOW,
         "MIN_SEED_SPREADS": MIN_SEED_SPREADS,
         "SEED_LOOKBACK_CALENDAR_DAYS": SEED_LOOKBACK_CALENDAR_DAYS,
@@ -501,7 +547,7 @@ def write_config(logs: Loggers, beta: float, spread_count: int) -> None:
         "TARGET_PROFIT_RUPEES": TARGET_PROFIT_RUPEES,
         "REARM_Z": REARM_Z,
         "USE_BID_ASK_REALISTIC_PNL": USE_BID_ASK_REALISTIC_PNL,
-        "note": "Paper trading only. Uses kite.quote polling and option LTP/bid/ask snapshots. No real orders are placed.",
+        "note": "Paper trading only. Uses KiteTicker ticks (kite.quote polling when stale or FEED_MODE=POLL). No real orders are placed.",
     }
     ts = ist_now().isoformat(sep=" ")
     for k, v in params.items():
@@ -740,14 +786,37 @@ def select_itm_options_for_signal(
 # LIVE Z / PNL LOGIC
 # =============================================================================
 
-def compute_live_z(nifty_ltp: float, sensex_ltp: float, beta: float, spread_window: Deque[float]) -> Tuple[float, float, float, float, float]:
-    """Return spread, rolling_mean, rolling_std, z, abs_z for current quote."""
+def spread_window_stats(state: LiveState) -> Tuple[float, float]:
+    """Rolling mean/std of the completed-minute spread window, recomputed once per appended minute."""
+    if state.stats_version != state.window_version:
+        arr = np.array(state.spread_window, dtype=float)
+        state.window_mean = float(np.nanmean(arr))
+        state.window_std = float(np.nanstd(arr, ddof=0))
+        state.stats_version = state.window_version
+    return state.window_mean, state.window_std
+
+
+def compute_live_z(
+    nifty_ltp: float,
+    sensex_ltp: float,
+    beta: float,
+    spread_window: Deque[float],
+    stats: Optional[Tuple[float, float]] = None,
+) -> Tuple[float, float, float, float, float]:
+    """
+    Return spread, rolling_mean, rolling_std, z, abs_z for current quote.
+
+    stats=(mean, std) skips the window pass; see spread_window_stats().
+    """
     if nifty_ltp <= 0 or sensex_ltp <= 0:
         raise ValueError("Invalid index LTP for z calculation.")
     spread = math.log(sensex_ltp) - beta * math.log(nifty_ltp)
-    arr = np.array(spread_window, dtype=float)
-    mean = float(np.nanmean(arr))
-    std = float(np.nanstd(arr, ddof=0))
+    if stats is None:
+        arr = np.array(spread_window, dtype=float)
+        mean = float(np.nanmean(arr))
+        std = float(np.nanstd(arr, ddof=0))
+    else:
+        mean, std = stats
     if std <= 0 or not math.isfinite(std):
         z = np.nan
     else:
@@ -759,9 +828,9 @@ def update_completed_minute_spread(state: LiveState, now: datetime, current_spre
     """
     Append one spread sample per completed minute.
 
-    Since we poll quotes every second, this uses the last seen spread of the
-    previous minute as the completed-minute spread. This is a practical proxy,
-    not exchange OHLC minute close.
+    This uses the last seen spread (last tick or poll) of the previous minute as
+    the completed-minute spread. This is a practical proxy, not exchange OHLC
+    minute close.
     """
     minute = pd.Timestamp(now).floor("min")
     if state.last_seen_minute is None:
@@ -772,6 +841,7 @@ def update_completed_minute_spread(state: LiveState, now: datetime, current_spre
     if minute != state.last_seen_minute:
         if state.last_spread_for_minute is not None and math.isfinite(state.last_spread_for_minute):
             state.spread_window.append(float(state.last_spread_for_minute))
+            state.window_version += 1
         state.last_seen_minute = minute
         state.last_spread_for_minute = current_spread
     else:
@@ -1052,14 +1122,213 @@ def build_quote_keys(state: LiveState) -> List[str]:
     return list(dict.fromkeys(keys))
 
 
+# =============================================================================
+# KITE TICKER FEED
+# =============================================================================
+
+class TickerQuoteFeed:
+    """
+    Latest KiteTicker tick per quote key, shaped like kite.quote() snapshots.
+
+    Indices stay subscribed in LTP mode for the whole run. Option legs are
+    subscribed in TICKER_OPTION_MODE while a virtual trade is open and dropped
+    when it exits. Ticks arrive on the KiteTicker thread; the main loop waits on
+    tick_event and reads snapshot(), so all trade logic stays on one thread.
+    """
+
+    def __init__(self, api_key: str, access_token: str, index_tokens: Dict[int, str]):
+        if KiteTicker is None:
+            raise RuntimeError("kiteconnect is not installed. Run: pip install kiteconnect")
+        try:
+            self.ticker = KiteTicker(
+                api_key,
+                access_token,
+                root=KITE_TICKER_ROOT or None,
+                reconnect=True,
+                reconnect_max_tries=300,
+                reconnect_max_delay=60,
+            )
+        except TypeError:
+            self.ticker = KiteTicker(api_key, access_token)
+
+        self._lock = threading.Lock()
+        self.tick_event = threading.Event()
+        self.connected = threading.Event()
+        self._index_tokens: Dict[int, str] = dict(index_tokens)
+        self._option_tokens: Dict[int, str] = {}
+        self._key_by_token: Dict[int, str] = dict(index_tokens)
+        self._latest: Dict[str, Dict] = {}
+        self._last_index_tick = 0.0
+        self._last_poll = 0.0
+        self.tick_count = 0
+
+        self.ticker.on_ticks = self._on_ticks
+        self.ticker.on_connect = self._on_connect
+        self.ticker.on_close = self._on_close
+        self.ticker.on_error = self._on_error
+        self.ticker.on_reconnect = self._on_reconnect
+
+    def _mode(self, name: str):
+        return {"ltp": self.ticker.MODE_LTP, "quote": self.ticker.MODE_QUOTE, "full": self.ticker.MODE_FULL}[name]
+
+    def _on_ticks(self, ws, ticks: List[Dict]) -> None:  # noqa: ANN001
+        now = time.monotonic()
+        with self._lock:
+            for tick in ticks:
+                key = self._key_by_token.get(int(tick.get("instrument_token", -1)))
+                if key is None:
+                    continue
+                self._latest[key] = tick
+                self.tick_count += 1
+                if key in (NIFTY_INDEX_KEY, SENSEX_INDEX_KEY):
+                    self._last_index_tick = now
+        self.tick_event.set()
+
+    def _on_connect(self, ws, response) -> None:  # noqa: ANN001
+        print("[INFO] KiteTicker connected.")
+        self.connected.set()
+        indices = list(self._index_tokens)
+        ws.subscribe(indices)
+        ws.set_mode(ws.MODE_LTP, indices)
+        options = list(self._option_tokens)
+        if options:
+            ws.subscribe(options)
+            ws.set_mode(self._mode(TICKER_OPTION_MODE), options)
+
+    def _on_close(self, ws, code, reason) -> None:  # noqa: ANN001
+        self.connected.clear()
+        print(f"[WARN] KiteTicker closed code={code}, reason={reason}")
+
+    def _on_error(self, ws, code, reason) -> None:  # noqa: ANN001
+        print(f"[WARN] KiteTicker error code={code}, reason={reason}")
+
+    def _on_reconnect(self, ws, attempts_count) -> None:  # noqa: ANN001
+        print(f"[WARN] KiteTicker reconnecting; attempt={attempts_count}")
+
+    def start(self, timeout: float = 15.0) -> bool:
+        self.ticker.connect(threaded=True)
+        return self.connected.wait(timeout)
+
+    def stop(self) -> None:
+        try:
+            self.ticker.close()
+        except Exception:
+            pass
+
+    def is_stale(self) -> bool:
+        """True when disconnected or no index tick arrived within TICKER_STALE_SEC."""
+        if not self.connected.is_set():
+            return True
+        with self._lock:
+            return time.monotonic() - self._last_index_tick > TICKER_STALE_SEC
+
+    def poll_due(self) -> bool:
+        """
+        True at most once per POLL_INTERVAL_SEC (monotonic clock).
+
+        Option ticks keep waking the loop while the index feed is stale, so the
+        kite.quote() fallback is gated here to stay at the old 1 Hz polling rate.
+        """
+        now = time.monotonic()
+        if now - self._last_poll < POLL_INTERVAL_SEC:
+            return False
+        self._last_poll = now
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """Block until the next tick (or timeout) and reset the wake-up flag."""
+        woke = self.tick_event.wait(timeout)
+        self.tick_event.clear()
+        return woke
+
+    def set_option_legs(self, options: List[OptionInstrument]) -> None:
+        """Subscribe the active trade's legs and drop legs of a closed trade."""
+        wanted = {o.instrument_token: o.quote_key for o in options}
+        if wanted.keys() == self._option_tokens.keys():
+            return
+        added = [t for t in wanted if t not in self._option_tokens]
+        removed = [t for t in self._option_tokens if t not in wanted]
+        with self._lock:
+            for t in removed:
+                self._latest.pop(self._option_tokens[t], None)
+                self._key_by_token.pop(t, None)
+            self._key_by_token.update(wanted)
+            self._option_tokens = wanted
+        if not self.connected.is_set():
+            return  # _on_connect subscribes the current legs
+        try:
+            if removed:
+                self.ticker.unsubscribe(removed)
+            if added:
+                self.ticker.subscribe(added)
+                self.ticker.set_mode(self._mode(TICKER_OPTION_MODE), added)
+        except Exception as e:  # noqa: BLE001
+            print(f"[WARN] KiteTicker option subscription update failed: {e}")
+
+    def snapshot(self, keys: List[str]) -> Dict[str, Dict]:
+        with self._lock:
+            return {k: self._latest[k] for k in keys if k in self._latest}
+
+    def seed(self, quotes: Dict[str, Dict]) -> None:
+        """Use REST quotes for subscribed keys that have not ticked yet."""
+        with self._lock:
+            subscribed = set(self._key_by_token.values())
+            for key, q in quotes.items():
+                if key in subscribed and key not in self._latest:
+                    self._latest[key] = q
+
+
+def start_ticker_feed(kite, cache: Dict[str, List[Dict]]) -> Optional[TickerQuoteFeed]:
+    """Start the KiteTicker feed for both indices; None means quote polling only."""
+    try:
+        nifty_token = get_instrument_token(kite, InstrumentSpec("NIFTY", NIFTY_INDEX_EXCHANGE, NIFTY_INDEX_SYMBOL), cache)
+        sensex_token = get_instrument_token(kite, InstrumentSpec("SENSEX", SENSEX_INDEX_EXCHANGE, SENSEX_INDEX_SYMBOL), cache)
+        api_key = getattr(kite, "api_key", None) or getattr(oUtils, "KITE_API_KEY", None)
+        access_token = getattr(kite, "access_token", None) or getattr(oUtils, "KITE_ACCESS_CODE", None)
+        if not api_key or not access_token:
+            raise RuntimeError("Could not obtain api_key/access_token for KiteTicker.")
+        feed = TickerQuoteFeed(str(api_key), str(access_token), {nifty_token: NIFTY_INDEX_KEY, sensex_token: SENSEX_INDEX_KEY})
+    except Exception as e:  # noqa: BLE001
+        print(f"[WARN] KiteTicker unavailable ({e}); using kite.quote polling.")
+        return None
+
+    if not feed.start():
+        print("[WARN] KiteTicker connection not confirmed yet; polling until ticks arrive.")
+    return feed
+
+
+def collect_quotes(kite, feed: Optional[TickerQuoteFeed], keys: List[str], logs: Loggers) -> Tuple[Dict[str, Dict], str]:
+    """
+    Quotes for this evaluation and where they came from.
+
+    Fresh ticker: latest ticks (REST only for keys that never ticked, at most
+    once per POLL_INTERVAL_SEC).
+    Stale ticker or no ticker: one kite.quote() batch, as in POLL mode. The main
+    loop only gets here on a stale ticker once feed.poll_due() allowed it.
+    """
+    if feed is None:
+        return get_quote_batch(kite, keys, logs), "POLL"
+    if feed.is_stale():
+        return get_quote_batch(kite, keys, logs), "POLL_TICKER_STALE"
+
+    quotes = feed.snapshot(keys)
+    missing = [k for k in keys if k not in quotes]
+    if not missing or not feed.poll_due():
+        return quotes, "TICKER"
+    polled = get_quote_batch(kite, missing, logs)
+    feed.seed(polled)
+    quotes.update(polled)
+    return quotes, "TICKER+POLL"
+
+
 # =============================================================================
 # MAIN LOOP
 # =============================================================================
 
 def main() -> None:
-    """Run live quote-polling paper trader."""
+    """Run live tick-driven (or quote-polling) paper trader."""
     print("============================================================")
-    print("NIFTY-SENSEX live z-score option paper trader - quote polling")
+    print(f"NIFTY-SENSEX live z-score option paper trader - feed {FEED_MODE}")
     print("============================================================")
 
     if not NIFTY_EXPIRY_DATE_ENV or not SENSEX_EXPIRY_DATE_ENV:
@@ -1093,12 +1362,28 @@ def main() -> None:
     signal.signal(signal.SIGINT, handle_signal)
     signal.signal(signal.SIGTERM, handle_signal)
 
-    print("[INFO] Starting quote polling loop. Press Ctrl+C to stop.")
+    if FEED_MODE not in {"TICKER", "POLL"}:
+        raise ValueError("FEED_MODE must be TICKER or POLL")
+    feed: Optional[TickerQuoteFeed] = None
+    if FEED_MODE == "TICKER":
+        print("[STEP] Starting KiteTicker feed ...")
+        feed = start_ticker_feed(kite, instruments_cache)
+
+    print(f"[INFO] Starting {'tick-driven' if feed else 'quote polling'} loop. Press Ctrl+C to stop.")
+    last_state_log = 0.0
 
     try:
         while not state.stop_requested:
+            if feed is not None:
+                feed.set_option_legs([leg.option for leg in state.active_trade.legs] if state.active_trade else [])
+                # Fresh socket: wake on the next tick. Stale: poll at POLL_INTERVAL_SEC.
+                feed.wait(POLL_INTERVAL_SEC if feed.is_stale() else TICKER_STALE_SEC)
+                if feed.is_stale() and not feed.poll_due() and not state.stop_requested:
+                    continue  # woken by an option tick; the stale fallback polls at most once per POLL_INTERVAL_SEC
+
             loop_start = time.time()
             now = ist_now()
+            trade_at_start = state.active_trade
 
             # Stop after market session end if no active trade remains. If an active
             # trade exists, FORCE_EXIT_TIME should normally close it before session end.
@@ -1107,7 +1392,7 @@ def main() -> None:
                 break
 
             keys = build_quote_keys(state)
-            quotes = get_quote_batch(kite, keys, logs)
+            quotes, feed_source = collect_quotes(kite, feed, keys, logs)
             missing_keys = [k for k in keys if k not in quotes]
 
             nq = quotes.get(NIFTY_INDEX_KEY, {})
@@ -1118,19 +1403,25 @@ def main() -> None:
             message = ""
             if not math.isfinite(nifty_ltp) or not math.isfinite(sensex_ltp) or nifty_ltp <= 0 or sensex_ltp <= 0:
                 message = "Missing or invalid index quote; skipping z calculation."
-                logs.market_state.write({
-                    "timestamp": now.isoformat(sep=" "),
-                    "state": "ACTIVE" if state.active_trade else "IDLE",
-                    "rearmed": state.rearmed,
-                    "quote_keys_count": len(keys),
-                    "missing_quote_keys": ";".join(missing_keys),
-                    "message": message,
-                })
-                sleep_remaining = max(0.0, POLL_INTERVAL_SEC - (time.time() - loop_start))
-                time.sleep(sleep_remaining)
+                if feed is None or loop_start - last_state_log >= MARKET_STATE_LOG_INTERVAL_SEC:
+                    last_state_log = loop_start
+                    logs.market_state.write({
+                        "timestamp": now.isoformat(sep=" "),
+                        "state": "ACTIVE" if state.active_trade else "IDLE",
+                        "rearmed": state.rearmed,
+                        "quote_keys_count": len(keys),
+                        "missing_quote_keys": ";".join(missing_keys),
+                        "feed_source": feed_source,
+                        "message": message,
+                    })
+                if feed is None:
+                    sleep_remaining = max(0.0, POLL_INTERVAL_SEC - (time.time() - loop_start))
+                    time.sleep(sleep_remaining)
                 continue
 
-            spread, mean, std, z, abs_z = compute_live_z(nifty_ltp, sensex_ltp, state.beta, state.spread_window)
+            spread, mean, std, z, abs_z = compute_live_z(
+                nifty_ltp, sensex_ltp, state.beta, state.spread_window, stats=spread_window_stats(state)
+            )
             update_completed_minute_spread(state, now, spread)
 
             # Rearm after abs_z normalizes sufficiently.
@@ -1251,7 +1542,16 @@ def main() -> None:
                 elif math.isfinite(abs_z) and abs_z > ENTRY_Z and not in_entry_time_window(now):
                     message = f"Signal ignored due to entry time filter: {ENTRY_START_TIME}-{LAST_ENTRY_TIME}"
 
-            # Market-state log row every polling cycle.
+            # Market-state log row every polling cycle; on ticks, at most every
+            # MARKET_STATE_LOG_INTERVAL_SEC plus whenever a trade opened or closed.
+            log_due = (
+                feed is None
+                or state.active_trade is not trade_at_start
+                or loop_start - last_state_log >= MARKET_STATE_LOG_INTERVAL_SEC
+            )
+            if not log_due:
+                continue
+            last_state_log = loop_start
             logs.market_state.write({
                 "timestamp": now.isoformat(sep=" "),
                 "state": "ACTIVE" if state.active_trade else "IDLE",
@@ -1284,12 +1584,14 @@ def main() -> None:
                 "min_realistic_pnl": min_realistic_pnl,
                 "quote_keys_count": len(keys),
                 "missing_quote_keys": ";".join(missing_keys),
+                "feed_source": feed_source,
                 "message": message,
             })
 
-            elapsed = time.time() - loop_start
-            sleep_remaining = max(0.0, POLL_INTERVAL_SEC - elapsed)
-            time.sleep(sleep_remaining)
+            if feed is None:
+                elapsed = time.time() - loop_start
+                sleep_remaining = max(0.0, POLL_INTERVAL_SEC - elapsed)
+                time.sleep(sleep_remaining)
 
     finally:
         # If stopped while a trade is active, write an informational event. We do not
@@ -1306,6 +1608,9 @@ def main() -> None:
                 "realistic_pnl": state.active_trade.last_realistic_pnl,
                 "message": "Script stopped before virtual trade exit.",
             })
+        if feed is not None:
+            feed.stop()
+            print(f"[INFO] KiteTicker ticks received: {feed.tick_count:,}")
         logs.close()
         print("[DONE] Logs closed.")
 
@@ -1,6 +1,7 @@
 import enum
 
 import Utils as util
+from SupportResistanceIndex import SupportResistanceIndex
 
 
 class Trend (enum.Enum):
@@ -224,6 +225,10 @@ def append_unacceptable_target_stoploss_variation_error(res, target_or_stop_loss
 
 
 def find_nearest_resistance_support(supports_resistances,price_to_scan,current_day_timestamp,is_support=True):
+    # Pre-built per-symbol index: bisect lookup, only levels formed by current_day_timestamp
+    if isinstance(supports_resistances, SupportResistanceIndex):
+        return supports_resistances.nearest_resistance_support(price_to_scan, current_day_timestamp, is_support)
+
     if len(supports_resistances) == 0:
         return 0
     if is_support:
@@ -240,7 +245,10 @@ def find_nearest_resistance_support(supports_resistances,price_to_scan,current_d
     return nearest_support_resistance['close']
 
 
-def is_resistance_support_appropriate(supports_resistances,price_to_scan):
+def is_resistance_support_appropriate(supports_resistances,price_to_scan,current_day_timestamp=None):
+    if isinstance(supports_resistances, SupportResistanceIndex):
+        return supports_resistances.is_near_level(price_to_scan, support_resistance_variation_percent, current_day_timestamp)
+
     for support_resistance in supports_resistances:
         if(util.nearly_equal(support_resistance['close'],price_to_scan,support_resistance_variation_percent)):
            return True
@@ -323,7 +331,7 @@ def Recognize_Bullish_Marubozo(stock_data, supports_resistances, rsi, rsi_14_9_p
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, lower_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances,current_day_data['low']) == False:
+    if is_resistance_support_appropriate(supports_resistances,current_day_data['low'], current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error (res, current_day_data['low'])
         res.correct_support = False
     else:
@@ -395,7 +403,7 @@ def Recognize_Gap_Up_Down(stock_data, supports_resistances, rsi, rsi_14_9_period
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, lower_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate (supports_resistances, current_day_data['low']) == False:
+    if is_resistance_support_appropriate (supports_resistances, current_day_data['low'], current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error (res, current_day_data['low'])
         res.correct_support = False
     else:
@@ -469,7 +477,7 @@ def Recognize_Doji(stock_data, supports_resistances, rsi, rsi_14_9_period_SMA, m
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, lower_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate (supports_resistances, current_day_data['low']) == False:
+    if is_resistance_support_appropriate (supports_resistances, current_day_data['low'], current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error (res, current_day_data['low'])
         res.correct_support = False
     else:
@@ -548,7 +556,7 @@ def Recognize_Bearish_Marubozo(stock_data, supports_resistances, rsi, rsi_14_9_p
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, current_day_data['high']) == False:
+    if is_resistance_support_appropriate(supports_resistances, current_day_data['high'], current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, current_day_data['high'])
         res.correct_resistance = False
     else:
@@ -659,7 +667,7 @@ def Recognize_Hammer(stock_data, supports_resistances, rsi, rsi_14_9_period_SMA,
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, lower_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, current_day_data['low']) == False:
+    if is_resistance_support_appropriate(supports_resistances, current_day_data['low'], current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, current_day_data['low'])
         res.correct_support = False
     else:
@@ -770,7 +778,7 @@ def Recognize_Hanging_Man(stock_data, supports_resistances, rsi, rsi_14_9_period
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, current_day_data['high']) == False:
+    if is_resistance_support_appropriate(supports_resistances, current_day_data['high'], current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, current_day_data['high'])
         res.correct_resistance = False
     else:
@@ -878,7 +886,7 @@ def Recognize_Shooting_Star(stock_data, supports_resistances, rsi, rsi_14_9_peri
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, current_day_data['high']) == False:
+    if is_resistance_support_appropriate(supports_resistances, current_day_data['high'], current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, current_day_data['high'])
         res.correct_resistance = False
     else:
@@ -988,7 +996,7 @@ def Recognize_Inverted_Hammer(stock_data, supports_resistances, rsi, rsi_14_9_pe
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate (supports_resistances, current_day_data['high']) == False:
+    if is_resistance_support_appropriate (supports_resistances, current_day_data['high'], current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error (res, current_day_data['high'])
         res.correct_resistance = False
     else:
@@ -1098,7 +1106,7 @@ def Recognize_Bullish_Engulfing_pattern(stock_data, supports_resistances, rsi, r
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, lower_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, lowest_low) == False:
+    if is_resistance_support_appropriate(supports_resistances, lowest_low, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, lowest_low)
         res.correct_support = False
     else:
@@ -1209,7 +1217,7 @@ def Recognize_Bullish_Piercing_pattern(stock_data, supports_resistances, rsi, rs
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, lower_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate (supports_resistances, lowest_low) == False:
+    if is_resistance_support_appropriate (supports_resistances, lowest_low, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error (res, lowest_low)
         res.correct_support = False
     else:
@@ -1320,7 +1328,7 @@ def Recognize_Bearish_Engulfing_pattern(stock_data, supports_resistances, rsi, r
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, highest_high) == False:
+    if is_resistance_support_appropriate(supports_resistances, highest_high, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, highest_high)
         res.correct_resistance = False
     else:
@@ -1432,7 +1440,7 @@ def Recognize_Bearish_Piercing_pattern(stock_data, supports_resistances, rsi, rs
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate (supports_resistances, highest_high) == False:
+    if is_resistance_support_appropriate (supports_resistances, highest_high, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error (res, highest_high)
         res.correct_resistance = False
     else:
@@ -1540,7 +1548,7 @@ def Recognize_Bullish_Harami_pattern(stock_data, supports_resistances, rsi, rsi_
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, lower_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, lowest_low) == False:
+    if is_resistance_support_appropriate(supports_resistances, lowest_low, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, lowest_low)
         res.correct_support = False
     else:
@@ -1649,7 +1657,7 @@ def Recognize_Bearish_Harami_pattern(stock_data, supports_resistances, rsi, rsi_
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, highest_high) == False:
+    if is_resistance_support_appropriate(supports_resistances, highest_high, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, highest_high)
         res.correct_resistance = False
     else:
@@ -1798,7 +1806,7 @@ def Recognize_Morning_Star_pattern(stock_data, supports_resistances, rsi, rsi_14
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, lower_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, lowest_low_final) == False:
+    if is_resistance_support_appropriate(supports_resistances, lowest_low_final, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, lowest_low_final)
         res.correct_support = False
     else:
@@ -1947,7 +1955,7 @@ def Recognize_Evening_Star_pattern(stock_data, supports_resistances, rsi, rsi_14
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate(supports_resistances, highest_high_final) == False:
+    if is_resistance_support_appropriate(supports_resistances, highest_high_final, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error(res, highest_high_final)
         res.correct_resistance = False
     else:
@@ -2039,7 +2047,7 @@ def Recognize_Uptrend_pattern(stock_data, supports_resistances, rsi, rsi_14_9_pe
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate (supports_resistances, highest_high) == False:
+    if is_resistance_support_appropriate (supports_resistances, highest_high, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error (res, highest_high)
         res.correct_resistance = False
     else:
@@ -2130,7 +2138,7 @@ def Recognize_Downtrend_pattern(stock_data, supports_resistances, rsi, rsi_14_9_
         append_unacceptable_rsi_14_9_period_SMA_error (res, rsi_14_9_period_SMA, upper_limit_for_rsi_14_9_period_SMA)
         res.correct_rsi_14_9_period_SMA = False
 
-    if is_resistance_support_appropriate (supports_resistances, highest_high) == False:
+    if is_resistance_support_appropriate (supports_resistances, highest_high, current_day_data['timestamp']) == False:
         append_unacceptable_target_stoploss_variation_error (res, highest_high)
         res.correct_resistance = False
     else:
@@ -0,0 +1,305 @@
+"""
+Vectorised candlestick pattern scanner.
+
+Evaluates every pattern of PatternRecognition.py over a whole OHLCV history in one
+pass with NumPy boolean masks instead of calling the Recognize_* functions candle
+by candle. Features shared by all patterns (previous/previous-to-previous candle,
+body & shadows, 10-session average volume, previous trend, RSI) are computed once.
+
+Result is a compact (bars x patterns) boolean hit matrix whose columns follow
+PATTERNS (Pattern_Name members). A hit means:
+    shape matched (same conditions as Recognize_*  -> res.pattern_match)
+    and previous trend acceptable (strong or weak, only for patterns that check it)
+    and volume acceptable (is_volume_appropriate)
+which is is_pattern_tradable() minus the support/resistance check (per-symbol
+levels are looked up afterwards only for the few hit bars).
+
+Usage:
+    hits, feats = scan_patterns(stock_data)          # stock_data = list of dicts
+    df = hits_to_frame(hits, feats)                   # rows only for hits
+    df_all = scan_universe({'INFY': data, ...})       # full universe
+"""
+
+import numpy as np
+import pandas as pd
+
+import Indicators as ind
+import PatternRecognition as pr
+
+Pattern_Name = pr.Pattern_Name
+Action = pr.Action
+Trend = pr.Trend
+
+# Column order of the hit matrix
+PATTERNS = [
+    Pattern_Name.BULLISH_MARUBOZO,
+    Pattern_Name.BEARISH_MARUBOZO,
+    Pattern_Name.HAMMER,
+    Pattern_Name.HANGING_MAN,
+    Pattern_Name.SHOOTING_STAR,
+    Pattern_Name.BULLISH_ENGULFING,
+    Pattern_Name.BEARISH_ENGULFING,
+    Pattern_Name.BULLISH_HARAMI,
+    Pattern_Name.BEARISH_HARAMI,
+    Pattern_Name.MORNING_STAR,
+    Pattern_Name.EVENING_STAR,
+    Pattern_Name.DOJI,
+    Pattern_Name.GAP_UP_DOWN,
+    Pattern_Name.INVERTED_HAMMER,
+    Pattern_Name.BULLISH_PIERCING_PATTERN,
+    Pattern_Name.BEARISH_PIERCING_PATTERN,
+    Pattern_Name.UPTREND,
+    Pattern_Name.DOWNTREND,
+]
+PATTERN_INDEX = {p: i for i, p in enumerate (PATTERNS)}
+
+PATTERN_ACTION = {
+    Pattern_Name.BULLISH_MARUBOZO: Action.LONG,
+    Pattern_Name.BEARISH_MARUBOZO: Action.SHORT,
+    Pattern_Name.HAMMER: Action.LONG,
+    Pattern_Name.HANGING_MAN: Action.SHORT,
+    Pattern_Name.SHOOTING_STAR: Action.SHORT,
+    Pattern_Name.BULLISH_ENGULFING: Action.LONG,
+    Pattern_Name.BEARISH_ENGULFING: Action.SHORT,
+    Pattern_Name.BULLISH_HARAMI: Action.LONG,
+    Pattern_Name.BEARISH_HARAMI: Action.SHORT,
+    Pattern_Name.MORNING_STAR: Action.LONG,
+    Pattern_Name.EVENING_STAR: Action.SHORT,
+    Pattern_Name.DOJI: Action.LONG,
+    Pattern_Name.GAP_UP_DOWN: Action.LONG,
+    Pattern_Name.INVERTED_HAMMER: Action.SHORT,
+    Pattern_Name.BULLISH_PIERCING_PATTERN: Action.LONG,
+    Pattern_Name.BEARISH_PIERCING_PATTERN: Action.SHORT,
+    Pattern_Name.UPTREND: Action.LONG,
+    Pattern_Name.DOWNTREND: Action.SHORT,
+}
+
+# Required previous trend (None => pattern does not check trend). Two-candle patterns
+# look at the trend ending 2 bars back, three-candle (stars) 3 bars back.
+PATTERN_TREND = {
+    Pattern_Name.HAMMER: (Trend.downtrend, 2),
+    Pattern_Name.INVERTED_HAMMER: (Trend.downtrend, 2),
+    Pattern_Name.BULLISH_PIERCING_PATTERN: (Trend.downtrend, 2),
+    Pattern_Name.BULLISH_HARAMI: (Trend.downtrend, 2),
+    Pattern_Name.MORNING_STAR: (Trend.downtrend, 3),
+    Pattern_Name.HANGING_MAN: (Trend.uptrend, 2),
+    Pattern_Name.SHOOTING_STAR: (Trend.uptrend, 2),
+    Pattern_Name.BEARISH_PIERCING_PATTERN: (Trend.uptrend, 2),
+    Pattern_Name.BEARISH_HARAMI: (Trend.uptrend, 2),
+    Pattern_Name.EVENING_STAR: (Trend.uptrend, 3),
+}
+
+no_of_sessions_for_average_volume = 10
+no_of_sessions_to_scan_for_RSI = 14
+min_bars_for_scan = no_of_sessions_for_average_volume + 3
+
+
+def nearly_equal(a, b, percent):
+    # Array form of util.nearly_equal: |a-b| within percent of a
+    return np.abs (a - b) <= np.abs (a) * (percent / 100.0)
+
+
+def _shift(arr, n):
+    out = np.full_like (arr, np.nan, dtype=np.float64)
+    if n < len (arr):
+        out[n:] = arr[:len (arr) - n]
+    return out
+
+
+def stock_data_to_arrays(stock_data):
+    o = np.fromiter ((d['open'] for d in stock_data), dtype=np.float64, count=len (stock_data))
+    h = np.fromiter ((d['high'] for d in stock_data), dtype=np.float64, count=len (stock_data))
+    l = np.fromiter ((d['low'] for d in stock_data), dtype=np.float64, count=len (stock_data))
+    c = np.fromiter ((d['close'] for d in stock_data), dtype=np.float64, count=len (stock_data))
+    v = np.fromiter ((d['volume'] for d in stock_data), dtype=np.float64, count=len (stock_data))
+    ts = np.array ([d.get ('timestamp') for d in stock_data], dtype=object)
+    return o, h, l, c, v, ts
+
+
+def previous_trend_codes(close, sessions=pr.no_of_sessions_for_previous_trend):
+    """
+    Vectorised check_previous_trend(): code[k] is the Trend value for the window of
+    `sessions` closes ENDING at bar k (inclusive). NaN where the window is incomplete.
+    """
+    n = len (close)
+    codes = np.full (n, np.nan)
+    if n < sessions:
+        return codes
+
+    win = np.lib.stride_tricks.sliding_window_view (close, sessions)  # (n-sessions+1, sessions)
+    last = win[:, -1:]
+    first = win[:, 0]
+    up_errors = (last < win[:, :-1]).sum (axis=1)
+    down_errors = (last > win[:, :-1]).sum (axis=1)
+
+    is_up = up_errors <= pr.no_of_trend_errors_to_ignore
+    is_down = (~is_up) & (down_errors <= pr.no_of_trend_errors_to_ignore)
+    weak = nearly_equal (first, last[:, 0], pr.up_down_trend_diff_percent)
+
+    out = np.full (len (win), Trend.notrend.value, dtype=np.float64)
+    out[is_up & weak] = Trend.weak_up_trend.value
+    out[is_up & ~weak] = Trend.uptrend.value
+    out[is_down & weak] = Trend.weak_down_trend.value
+    out[is_down & ~weak] = Trend.downtrend.value
+
+    codes[sessions - 1:] = out
+    return codes
+
+
+def compute_features(o, h, l, c, v):
+    """Shared per-bar features used by every pattern mask."""
+    f = {'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+
+    f['p_open'], f['p_high'], f['p_low'], f['p_close'] = _shift (o, 1), _shift (h, 1), _shift (l, 1), _shift (c, 1)
+    f['pp_open'], f['pp_close'] = _shift (o, 2), _shift (c, 2)
+
+    f['body'] = np.abs (c - o)
+    f['range'] = h - l
+    f['upper_shadow'] = h - np.maximum (o, c)
+    f['lower_shadow'] = np.minimum (o, c) - l
+    with np.errstate (divide='ignore', invalid='ignore'):
+        f['body_ratio'] = np.where (f['range'] > 0, f['body'] / f['range'], np.nan)
+
+    # Average of the previous N sessions (stock_data[-11:-1] for the current bar)
+    vol_s = pd.Series (v)
+    f['avg_volume'] = vol_s.rolling (no_of_sessions_for_average_volume,
+                                     min_periods=no_of_sessions_for_average_volume).mean ().shift (1).to_numpy ()
+
+    trend = previous_trend_codes (c)
+    f['trend_2'] = _shift (trend, 2)
+    f['trend_3'] = _shift (trend, 3)
+
+    f['rsi'] = ind.rsi (pd.Series (c), no_of_sessions_to_scan_for_RSI).to_numpy ()
+    return f
+
+
+def pattern_masks(f):
+    """Shape conditions of every Recognize_* function, as boolean arrays."""
+    o, h, l, c = f['open'], f['high'], f['low'], f['close']
+    po, ph, pl, pc = f['p_open'], f['p_high'], f['p_low'], f['p_close']
+    ppo, ppc = f['pp_open'], f['pp_close']
+
+    bull = c > o
+    bear = c < o
+    p_bull = pc > po
+    p_bear = pc < po
+
+    hl_var = pr.high_low_variation_percent
+    ss_var = pr.high_low_shooting_star_lower_body_variation_percent
+
+    hammer_shape = ((nearly_equal (c, h, hl_var) & (np.abs (o - l) > 2 * np.abs (c - o))) |
+                    (nearly_equal (o, h, hl_var) & (np.abs (c - l) > 2 * np.abs (o - c))))
+    hanging_shape = ((nearly_equal (c, h, hl_var) & (np.abs (o - l) > 2 * np.abs (h - o))) |
+                     (nearly_equal (o, h, hl_var) & (np.abs (c - l) > 2 * np.abs (h - c))))
+    star_shape = ((nearly_equal (o, l, ss_var) & (np.abs (h - c) > 2 * np.abs (c - l))) |
+                  (nearly_equal (l, c, ss_var) & (np.abs (h - o) > 2 * np.abs (o - c))))
+
+    p_mid_bear = pc + (po - pc) / 2
+    p_mid_bull = po + (pc - po) / 2
+    pp_mid_bear = ppc + (ppo - ppc) / 2
+    pp_mid_bull = ppo + (ppc - ppo) / 2
+    c_mid = o + (c - o) / 2
+
+    m = {
+        Pattern_Name.BULLISH_MARUBOZO: (o == l) & bull,
+        Pattern_Name.BEARISH_MARUBOZO: (o == h) & bear,
+        Pattern_Name.GAP_UP_DOWN: (((l > ph) & (h > ph) & (l > pl) & (h > pl)) |
+                                   ((l < ph) & (h < ph) & (l < pl) & (h < pl))),
+        Pattern_Name.DOJI: nearly_equal (c, o, pr.high_low_marubuzo_variation_percent) &
+                           (np.abs (l - h) > 5 * np.abs (c - o)),
+        Pattern_Name.HAMMER: p_bear & hammer_shape,
+        Pattern_Name.HANGING_MAN: p_bull & hanging_shape,
+        Pattern_Name.SHOOTING_STAR: p_bull & star_shape,
+        Pattern_Name.INVERTED_HAMMER: p_bear & star_shape,
+        Pattern_Name.BULLISH_ENGULFING: bull & p_bear & (c > po) & (o < pc),
+        Pattern_Name.BULLISH_PIERCING_PATTERN: bull & p_bear & (c > p_mid_bear) & (o < pc),
+        Pattern_Name.BEARISH_ENGULFING: bear & p_bull & (c < po) & (o >= pc),
+        Pattern_Name.BEARISH_PIERCING_PATTERN: bear & p_bull & (c < p_mid_bull) & (o > pc),
+        Pattern_Name.BULLISH_HARAMI: bull & p_bear & (c < po) & (o >= pc),
+        Pattern_Name.BEARISH_HARAMI: bear & p_bull & (c > po) & (o < pc),
+        Pattern_Name.MORNING_STAR: bull & (ppc < ppo) & (pc < pp_mid_bear) & (po < pp_mid_bear) &
+                                   (c > ppo) & (c_mid > pc) & (c_mid > po),
+        Pattern_Name.EVENING_STAR: bear & (ppc > ppo) & (pc > pp_mid_bull) & (po > pp_mid_bull) &
+                                   (c < ppo) & (c_mid < pc) & (c_mid < po),
+        Pattern_Name.UPTREND: bull & p_bull & (o > po),
+        Pattern_Name.DOWNTREND: bear & p_bear & (o < po),
+    }
+    return m
+
+
+def volume_mask(f):
+    v, avg = f['volume'], f['avg_volume']
+    return (((v >= pr.min_average_volume_to_consider_for_patterns) & (v > avg)) |
+            (v >= pr.min_volume_to_consider_for_patterns_ignore_prev_vol))
+
+
+def trend_mask(f, pattern):
+    if pattern not in PATTERN_TREND:
+        return np.ones (len (f['close']), dtype=bool)
+    trend, lag = PATTERN_TREND[pattern]
+    codes = f['trend_%d' % lag]
+    if trend == Trend.downtrend:
+        return (codes == Trend.downtrend.value) | (codes == Trend.weak_down_trend.value)
+    return (codes == Trend.uptrend.value) | (codes == Trend.weak_up_trend.value)
+
+
+def scan_patterns(stock_data, check_volume=True, check_trend=True):
+    """
+    stock_data: list of {'open','high','low','close','volume','timestamp'} (oldest first)
+    Returns (hits, features); hits is bool[n_bars, len(PATTERNS)].
+    """
+    o, h, l, c, v, ts = stock_data_to_arrays (stock_data)
+    f = compute_features (o, h, l, c, v)
+    f['timestamp'] = ts
+
+    n = len (c)
+    hits = np.zeros ((n, len (PATTERNS)), dtype=bool)
+    if n < min_bars_for_scan:
+        return hits, f
+
+    masks = pattern_masks (f)
+    vol_ok = volume_mask (f) if check_volume else np.ones (n, dtype=bool)
+
+    with np.errstate (invalid='ignore'):
+        for p, j in PATTERN_INDEX.items ():
+            col = masks[p] & vol_ok
+            if check_trend:
+                col &= trend_mask (f, p)
+            hits[:, j] = col
+
+    # Same minimum history the per-candle functions need (stock_data[-12:-2])
+    hits[:min_bars_for_scan - 1, :] = False
+    return hits, f
+
+
+def hits_to_frame(hits, features, symbol=None):
+    bars, cols = np.nonzero (hits)
+    if len (bars) == 0:
+        return pd.DataFrame (columns=['symbol', 'bar', 'timestamp', 'pattern', 'action', 'close', 'volume', 'rsi'])
+    return pd.DataFrame ({
+        'symbol': symbol,
+        'bar': bars,
+        'timestamp': features['timestamp'][bars],
+        'pattern': [PATTERNS[j].name for j in cols],
+        'action': [PATTERN_ACTION[PATTERNS[j]].name for j in cols],
+        'close': features['close'][bars],
+        'volume': features['volume'][bars],
+        'rsi': features['rsi'][bars],
+    })
+
+
+def scan_universe(stock_data_by_symbol, last_n_bars=None, check_volume=True, check_trend=True):
+    """Scan many symbols; returns one DataFrame of hits (optionally only the last N bars)."""
+    frames = []
+    for symbol, stock_data in stock_data_by_symbol.items ():
+        if not stock_data:
+            continue
+        hits, f = scan_patterns (stock_data, check_volume=check_volume, check_trend=check_trend)
+        if last_n_bars is not None:
+            hits[:-last_n_bars, :] = False
+        df = hits_to_frame (hits, f, symbol)
+        if len (df):
+            frames.append (df)
+    if not frames:
+        return hits_to_frame (np.zeros ((0, len (PATTERNS)), dtype=bool), {}, None)
+    return pd.concat (frames, ignore_index=True)
@@ -2,6 +2,7 @@ import numpy as np
 from scipy.signal import argrelmax, argrelmin
 
 import Utils as util
+from SupportResistanceIndex import SupportResistanceIndex
 
 min_duration_between_two_price_zones_in_days = 20
 max_support_resistance_variation_percent = 2
@@ -26,49 +27,75 @@ def get_supports_resistances(original_stock_data, sessions_to_scan=no_of_session
     #
     # supports_resistances = [{'close':_89_day_high_EMA_series.iloc[-1], 'timestamp':original_stock_data[-2]['timestamp']},{'close':_89_day_low_EMA_series.iloc[-1], 'timestamp':original_stock_data[-2]['timestamp']}]
 
-    stock_data = original_stock_data[-([len(original_stock_data), sessions_to_scan][len(original_stock_data) >= sessions_to_scan]):]
+    stock_data = _sessions_window (original_stock_data, sessions_to_scan)
 
-    stock_data_closing_prices = []
-    for stock in stock_data:
-        stock_data_closing_prices.append (stock['close'])
+    maximas_minimas = [stock_data[index] for index in _pivot_indices (stock_data)]
+    maximas_minimas.sort (key=lambda x: (-x['close']))
 
-    stock_data_closing_prices = np.array (stock_data_closing_prices)
+    return [{'close': level['close'], 'timestamp': level['timestamp']}
+            for level, _ in _price_zones (maximas_minimas)]
 
-    maximas = argrelmax (stock_data_closing_prices, order=min_no_surrounding_points_for_maxima_minima)
-    minimas = argrelmin (stock_data_closing_prices, order=min_no_surrounding_points_for_maxima_minima)
 
-    maximas_minimas = []
-    for maxima_index in maximas[0]:
-        maximas_minimas.append (stock_data[maxima_index])
+def get_supports_resistances_versioned(original_stock_data, sessions_to_scan=no_of_sessions_to_scan):
+    # Same clustering as get_supports_resistances, but each level also carries 'valid_from':
+    # the timestamp at which its last touch was confirmed (pivot + order bars), so a
+    # SupportResistanceIndex never exposes a level before it could have been known.
+    stock_data = _sessions_window (original_stock_data, sessions_to_scan)
 
-    for minima_index in minimas[0]:
-        maximas_minimas.append (stock_data[minima_index])
+    last_index = len (stock_data) - 1
+    maximas_minimas = []
+    for index in _pivot_indices (stock_data):
+        confirm_index = min (index + min_no_surrounding_points_for_maxima_minima, last_index)
+        maximas_minimas.append ({'close': stock_data[index]['close'], 'timestamp': stock_data[index]['timestamp'],
+                                 'confirmed': stock_data[confirm_index]['timestamp']})
 
     maximas_minimas.sort (key=lambda x: (-x['close']))
 
-    supports_resistances = []
+    return [{'close': level['close'], 'timestamp': level['timestamp'],
+             'valid_from': max (touch['confirmed'] for touch in touches)}
+            for level, touches in _price_zones (maximas_minimas)]
+
+
+def _sessions_window(original_stock_data, sessions_to_scan):
+    return original_stock_data[-([len(original_stock_data), sessions_to_scan][len(original_stock_data) >= sessions_to_scan]):]
+
 
+def _pivot_indices(stock_data):
+    stock_data_closing_prices = np.array ([stock['close'] for stock in stock_data])
+
+    maximas = argrelmax (stock_data_closing_prices, order=min_no_surrounding_points_for_maxima_minima)
+    minimas = argrelmin (stock_data_closing_prices, order=min_no_surrounding_points_for_maxima_minima)
+
+    return list (maximas[0]) + list (minimas[0])
+
+
+def _price_zones(maximas_minimas):
+    # maximas_minimas sorted by close, highest first. Yields (level, touches) for every pivot
+    # that has min_no_of_price_zones properly spaced touches within the variation band.
     for i in range (0, len (maximas_minimas)):
         supports_resistances_count = 1
-        temp_srs=[{'close':maximas_minimas[i]['close'],'timestamp':maximas_minimas[i]['timestamp']}]
+        temp_srs = [maximas_minimas[i]]
         for j in range (i + 1, len (maximas_minimas)):
             if (supports_resistances_count >= min_no_of_price_zones):
-                supports_resistances.append ({'close':maximas_minimas[i]['close'],'timestamp':maximas_minimas[i]['timestamp']})
+                yield maximas_minimas[i], temp_srs
                 break
 
             if (util.nearly_equal (maximas_minimas[i]['close'], maximas_minimas[j]['close'],
                               max_support_resistance_variation_percent)):
-                is_timestamps_properly_spaced=True
+                is_timestamps_properly_spaced = True
                 for temp_sr in temp_srs:
-                    if(are_timestamps_properly_spaced(temp_sr['timestamp'], maximas_minimas[j]['timestamp']))==False:
+                    if (are_timestamps_properly_spaced (temp_sr['timestamp'], maximas_minimas[j]['timestamp'])) == False:
                         is_timestamps_properly_spaced = False
-                        break;
-
+                        break
 
                 if is_timestamps_properly_spaced:
-                    temp_srs.append({'close':maximas_minimas[j]['close'], 'timestamp':maximas_minimas[j]['timestamp']})
+                    temp_srs.append (maximas_minimas[j])
                     supports_resistances_count += 1
             else:
                 break
 
-    return supports_resistances
+
+def get_support_resistance_index(original_stock_data, sessions_to_scan=no_of_sessions_to_scan):
+    # Build once per symbol (pass sessions_to_scan=len(data) for the whole history), then pass
+    # the index in place of the supports_resistances list to the PatternRecognition.Recognize_* functions.
+    return SupportResistanceIndex (get_supports_resistances_versioned (original_stock_data, sessions_to_scan))
@@ -0,0 +1,140 @@
+"""
+Per-symbol, time-versioned, price-sorted support/resistance index.
+
+find_nearest_resistance_support() / is_resistance_support_appropriate() scan the whole
+supports_resistances list for every candle and every pattern check. This index is
+built once per symbol and answers the same questions with bisect:
+
+    idx = SupportResistanceIndex (levels)            # levels = [{'close', 'timestamp'[, 'valid_from']}]
+    idx.nearest_support (price, ts)                   # == find_nearest_resistance_support(..., True)
+    idx.nearest_resistance (price, ts)                # == find_nearest_resistance_support(..., False)
+    idx.is_near_level (price, pct, ts)                # == is_resistance_support_appropriate()
+    idx.nearest_below (price, ts) / nearest_above     # price-nearest level
+
+Queries only see levels whose 'valid_from' (default 'timestamp') <= ts, so a backtest
+never uses a level that had not formed yet at that candle.
+
+Versions: levels sorted by valid_from; version k holds the first k+1 levels, kept
+sorted by price with prefix/suffix "most recent level" pointers. A query bisects the
+version by time, then the level by price -> O(log V + log L).
+"""
+
+import bisect
+
+
+class _Version:
+    __slots__ = ('closes', 'timestamps', 'prefix_recent', 'suffix_recent')
+
+    def __init__(self, closes, timestamps):
+        self.closes = closes
+        self.timestamps = timestamps
+
+        # prefix_recent[i]: position (in 0..i) of the most recent level, ties -> lower price
+        n = len (closes)
+        self.prefix_recent = [0] * n
+        best = 0
+        for i in range (n):
+            if timestamps[i] > timestamps[best]:
+                best = i
+            self.prefix_recent[i] = best
+
+        # suffix_recent[i]: position (in i..n-1) of the most recent level, ties -> lower price
+        self.suffix_recent = [0] * n
+        best = n - 1
+        for i in range (n - 1, -1, -1):
+            if timestamps[i] >= timestamps[best]:
+                best = i
+            self.suffix_recent[i] = best
+
+
+class SupportResistanceIndex:
+
+    def __init__(self, supports_resistances):
+        levels = sorted (supports_resistances, key=lambda x: (x.get ('valid_from', x['timestamp']), x['timestamp']))
+
+        self.valid_from = []
+        self.versions = []
+
+        closes, timestamps = [], []
+        for level in levels:
+            pos = bisect.bisect_right (closes, level['close'])
+            closes.insert (pos, level['close'])
+            timestamps.insert (pos, level['timestamp'])
+
+            vf = level.get ('valid_from', level['timestamp'])
+            version = _Version (list (closes), list (timestamps))
+            if self.valid_from and self.valid_from[-1] == vf:
+                self.versions[-1] = version
+            else:
+                self.valid_from.append (vf)
+                self.versions.append (version)
+
+    def __len__(self):
+        return len (self.versions[-1].closes) if self.versions else 0
+
+    def _version(self, as_of_timestamp):
+        if as_of_timestamp is None:
+            return self.versions[-1] if self.versions else None
+        k = bisect.bisect_right (self.valid_from, as_of_timestamp) - 1
+        return self.versions[k] if k >= 0 else None
+
+    def levels(self, as_of_timestamp=None):
+        v = self._version (as_of_timestamp)
+        return [] if v is None else list (v.closes)
+
+    # ---------- same semantics as PatternRecognition.find_nearest_resistance_support ----------
+
+    def nearest_support(self, price_to_scan, current_day_timestamp):
+        """Most recent level below price; falls back to the lowest level (as the list scan does)."""
+        v = self._version (current_day_timestamp)
+        if v is None:
+            return 0
+        k = bisect.bisect_left (v.closes, price_to_scan)
+        if k == 0:
+            return v.closes[0]
+        return v.closes[v.prefix_recent[k - 1]]
+
+    def nearest_resistance(self, price_to_scan, current_day_timestamp):
+        """Most recent level above price; falls back to the highest level."""
+        v = self._version (current_day_timestamp)
+        if v is None:
+            return 0
+        k = bisect.bisect_right (v.closes, price_to_scan)
+        if k == len (v.closes):
+            return v.closes[-1]
+        return v.closes[v.suffix_recent[k]]
+
+    def nearest_resistance_support(self, price_to_scan, current_day_timestamp, is_support=True):
+        if is_support:
+            return self.nearest_support (price_to_scan, current_day_timestamp)
+        return self.nearest_resistance (price_to_scan, current_day_timestamp)
+
+    # ---------- same semantics as PatternRecognition.is_resistance_support_appropriate ----------
+
+    def is_near_level(self, price_to_scan, variation_percent, as_of_timestamp=None):
+        """Any level L with |L - price| <= L * pct / 100 (util.nearly_equal(L, price, pct))."""
+        v = self._version (as_of_timestamp)
+        if v is None:
+            return False
+        frac = variation_percent / 100.0
+        lo = price_to_scan / (1 + frac)
+        hi = price_to_scan / (1 - frac) if frac < 1 else float ('inf')
+        k = bisect.bisect_left (v.closes, lo)
+        return k < len (v.closes) and v.closes[k] <= hi
+
+    # ---------- price-nearest helpers ----------
+
+    def nearest_below(self, price_to_scan, as_of_timestamp=None):
+        v = self._version (as_of_timestamp)
+        if v is None:
+            return None
+        k = bisect.bisect_left (v.closes, price_to_scan)
+        return v.closes[k - 1] if k > 0 else None
+
+    def nearest_above(self, price_to_scan, as_of_timestamp=None):
+        v = self._version (as_of_timestamp)
+        if v is None:
+            return None
+        k = bisect.bisect_right (v.closes, price_to_scan)
+        return v.closes[k] if k < len (v.closes) else None
+
@@ -50,6 +50,7 @@ Windows CMD:
     set ENTRY_START_IST=09:20
     set ENTRY_END_IST=13:30
     set ENTRY_STEP_MINUTES=1
+    set MINER_WORKERS=6
     python dhan_minute_straddle_pattern_miner.py
 
 PowerShell:
@@ -57,13 +58,19 @@ PowerShell:
     $env:ENTRY_START_IST="09:20"
     $env:ENTRY_END_IST="13:30"
     $env:ENTRY_STEP_MINUTES="1"
+    $env:MINER_WORKERS="6"
     python dhan_minute_straddle_pattern_miner.py
+
+Pickles are mined in a process pool (MINER_WORKERS, 0 = auto) and each day's
+candidate minutes are simulated together (SIMULATOR_MODE=batch). Set
+MINER_WORKERS=1 SIMULATOR_MODE=single for the original serial per-minute path.
 """
 
 import os
 import glob
 import time
-from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, fields
 from datetime import datetime, date, time as dtime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -129,6 +136,13 @@ DEDUP_ACROSS_PICKLES = os.getenv("DEDUP_ACROSS_PICKLES", "1").strip() not in ("0
 BIN_QUANTILES = int(os.getenv("BIN_QUANTILES", "5"))
 WRITE_PARQUET = os.getenv("WRITE_PARQUET", "1").strip() not in ("0", "false", "False")
 
+# Performance:
+#   MINER_WORKERS   -> 0 = auto (cpu_count - 1), 1 = serial, N = process pool of N
+#   SIMULATOR_MODE  -> batch  = all candidate minutes of a day in one array pass
+#                      single = simulate_single_candidate() per minute (reference)
+MINER_WORKERS = int(os.getenv("MINER_WORKERS", "0"))
+SIMULATOR_MODE = os.getenv("SIMULATOR_MODE", "batch").strip().lower()
+
 
 def _safe_fname_part(s: str) -> str:
     return "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in s)
@@ -727,6 +741,258 @@ def simulate_single_candidate(
     return row, None
 
 
+# =============================================================================
+# BATCHED CANDIDATE SIMULATION (all entry minutes of a day at once)
+# =============================================================================
+CANDIDATE_COLUMNS = [f.name for f in fields(CandidateTradeRow)]
+
+FEATURE_COLUMNS = [
+    "move_from_open_pts", "move_from_open_abs_pts", "move_from_open_pct", "range_from_open_pts",
+    "move_5m_pts", "move_10m_pts", "move_15m_pts",
+    "move_5m_abs_pts", "move_10m_abs_pts", "move_15m_abs_pts",
+    "range_5m_pts", "range_10m_pts", "range_15m_pts",
+    "rv_5_bps", "rv_10_bps", "rv_20_bps",
+    "path_len_5m", "path_len_10m", "path_len_15m",
+    "path_eff_5m", "path_eff_10m", "path_eff_15m",
+    "sign_changes_5m", "sign_changes_10m", "sign_changes_15m",
+    "close_loc_10m", "close_loc_15m",
+    "dist_from_ma_10_pts", "dist_from_ma_20_pts",
+    "chop_excess_10m", "chop_excess_15m",
+]
+
+
+def _suffix_max_nan_streak(x: np.ndarray) -> np.ndarray:
+    """out[p] == max_consecutive_nan(x[p:]) for every p, in one reverse pass."""
+    n = len(x)
+    out = np.zeros(n + 1, dtype=int)
+    run = 0
+    for t in range(n - 1, -1, -1):
+        run = run + 1 if np.isnan(x[t]) else 0
+        out[t] = max(out[t + 1], run)
+    return out[:n]
+
+
+def _first_true(mask: np.ndarray) -> np.ndarray:
+    """Column index of the first True per row, -1 if none."""
+    has = mask.any(axis=1)
+    return np.where(has, mask.argmax(axis=1), -1)
+
+
+def simulate_day_candidates(
+    *,
+    und: str,
+    dy: date,
+    expiry: date,
+    source_pickle: str,
+    day_opt: pd.DataFrame,
+    idx_all: pd.DatetimeIndex,
+    spot_s: pd.Series,
+    feat_s: pd.DataFrame,
+    strike_cache: Dict[int, Dict[str, pd.Series]],
+) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    Same result as calling simulate_single_candidate() for every minute of
+    build_candidate_index(dy), but each ATM strike is simulated as one
+    (candidates x session minutes) array: entries are masked in with t >= entry,
+    stop / profit-protect hits are first-True per row.
+    """
+    cand_idx = build_candidate_index(dy)
+    pos_all = idx_all.get_indexer(cand_idx)
+    qty = int(QTY_UNITS[und])
+    step = int(STRIKE_STEP[und])
+    spot_arr = spot_s.to_numpy(dtype=float)
+    n_t = len(idx_all)
+
+    skipped: List[Tuple[int, Dict[str, Any]]] = []
+
+    def _skip(k: int, reason: str, atm: Optional[int] = None) -> None:
+        rec = {"source_pickle": source_pickle, "day": dy, "underlying": und, "expiry": expiry, "entry_time": cand_idx[k].strftime("%H:%M")}
+        if atm is not None:
+            rec["atm_strike"] = atm
+        rec["reason"] = reason
+        skipped.append((k, rec))
+
+    # ---- candidate -> ATM strike ----
+    atm_of: Dict[int, int] = {}
+    for k, pos in enumerate(pos_all):
+        if pos < 0:
+            _skip(k, "Entry timestamp not in session grid")
+            continue
+        if np.isnan(spot_arr[pos]):
+            _skip(k, "No spot at candidate minute")
+            continue
+        atm_of[k] = round_to_step(float(spot_arr[pos]), step)
+
+    by_strike: Dict[int, List[int]] = {}
+    for k, atm in atm_of.items():
+        by_strike.setdefault(atm, []).append(k)
+
+    t_grid = np.arange(n_t)
+    parts: List[Dict[str, np.ndarray]] = []
+
+    for atm, ks_all in by_strike.items():
+        series = get_strike_cache(day_opt, idx_all, atm, strike_cache)
+        ce_close = series["ce_close"].to_numpy(dtype=float)
+        pe_close = series["pe_close"].to_numpy(dtype=float)
+        ce_high = series["ce_high"].to_numpy(dtype=float)
+        pe_high = series["pe_high"].to_numpy(dtype=float)
+
+        if STRICT_STRIKE_PRESENCE:
+            miss_ce = _suffix_max_nan_streak(ce_close)
+            miss_pe = _suffix_max_nan_streak(pe_close)
+
+        ks: List[int] = []
+        for k in ks_all:
+            pos = pos_all[k]
+            ce_e, pe_e = ce_close[pos], pe_close[pos]
+            if np.isnan(ce_e) or np.isnan(pe_e):
+                _skip(k, "No CE/PE price at candidate minute", atm)
+                continue
+            if STRICT_STRIKE_PRESENCE:
+                max_miss = int(max(miss_ce[pos], miss_pe[pos]))
+                if max_miss > MAX_MISSING_STREAK_MIN:
+                    _skip(k, f"Strike missing too much after entry (max_missing_streak={max_miss}m)", atm)
+                    continue
+            if ce_e <= 0 or pe_e <= 0:
+                _skip(k, "Non-positive CE/PE entry price", atm)
+                continue
+            ks.append(k)
+        if not ks:
+            continue
+
+        ks_arr = np.asarray(ks)
+        pos = pos_all[ks_arr]
+        ce_entry = ce_close[pos]
+        pe_entry = pe_close[pos]
+        premium_points = ce_entry + pe_entry
+        premium_rupees = premium_points * qty
+        loss_limit_rupees = premium_rupees * LOSS_LIMIT_PCT
+        sl_eff = np.minimum(loss_limit_rupees, MAX_STOPLOSS_RUPEES) if MAX_STOPLOSS_RUPEES > 0 else loss_limit_rupees
+        g_rupees = premium_rupees * PROFIT_PROTECT_TRIGGER_PCT
+
+        combined_close = ce_close + pe_close
+        combined_high = ce_high + pe_high
+        after = t_grid[None, :] >= pos[:, None]
+
+        pnl_close = (premium_points[:, None] - combined_close[None, :]) * qty
+        pnl_sl = (premium_points[:, None] - combined_high[None, :]) * qty
+        ok_close = after & ~np.isnan(pnl_close)
+        ok_sl = after & ~np.isnan(pnl_sl)
+
+        # Entry minute is always valid, so every row has at least one close point.
+        last_valid = n_t - 1 - ok_close[:, ::-1].argmax(axis=1)
+
+        stop_t = _first_true(ok_sl & (pnl_sl <= -sl_eff[:, None]))
+
+        masked = np.where(ok_close, pnl_close, -np.inf)
+        peak = np.maximum.accumulate(masked, axis=1)
+        protect_hit = ok_close & (peak >= g_rupees[:, None]) & (pnl_close <= peak - g_rupees[:, None])
+        protect_t = np.where(g_rupees > 0, _first_true(protect_hit), -1)
+
+        exit_t = last_valid.copy()
+        reason = np.full(len(ks), "EOD", dtype=object)
+        stop_first = (stop_t >= 0) & ((protect_t < 0) | (stop_t <= protect_t))
+        protect_first = (protect_t >= 0) & ~stop_first
+        exit_t[stop_first] = stop_t[stop_first]
+        exit_t[protect_first] = protect_t[protect_first]
+        reason[stop_first] = "STOPLOSS"
+        reason[protect_first] = "PROFIT_PROTECT"
+
+        rows_i = np.arange(len(ks))
+        exit_pnl_gross = pnl_close[rows_i, exit_t]
+        clamp = stop_first & (exit_pnl_gross < -sl_eff)
+        exit_pnl_gross = np.where(clamp, -sl_eff, exit_pnl_gross)
+
+        exit_ce = ce_close[exit_t]
+        exit_pe = pe_close[exit_t]
+        eod_pnl_gross = pnl_close[rows_i, last_valid]
+        eod_ce = np.nan_to_num(ce_close[last_valid], nan=0.0)
+        eod_pe = np.nan_to_num(pe_close[last_valid], nan=0.0)
+
+        txn = np.array([
+            compute_trade_charges(float(ce_entry[j]), float(pe_entry[j]),
+                                  0.0 if np.isnan(exit_ce[j]) else float(exit_ce[j]),
+                                  0.0 if np.isnan(exit_pe[j]) else float(exit_pe[j]), qty)
+            for j in rows_i
+        ])
+        eod_txn = np.array([
+            compute_trade_charges(float(ce_entry[j]), float(pe_entry[j]), float(eod_ce[j]), float(eod_pe[j]), qty)
+            for j in rows_i
+        ])
+        exit_pnl_net = exit_pnl_gross - txn
+
+        pnl_max = np.where(ok_close, pnl_close, -np.inf).max(axis=1)
+        pnl_min = np.where(ok_close, pnl_close, np.inf).min(axis=1)
+
+        def _premium_back(minutes: int) -> np.ndarray:
+            back = pos - minutes
+            safe = np.clip(back, 0, n_t - 1)
+            return np.where(back >= 0, combined_close[safe], np.nan)
+
+        prem_5 = _premium_back(5)
+        prem_10 = _premium_back(10)
+
+        part: Dict[str, Any] = {
+            "k": ks_arr,
+            "exit_time": idx_all[exit_t].strftime("%H:%M"),
+            "exit_reason": reason,
+            "atm_strike": np.full(len(ks), int(atm)),
+            "entry_underlying": spot_arr[pos],
+            "entry_ce": ce_entry,
+            "entry_pe": pe_entry,
+            "entry_premium_points": premium_points,
+            "entry_premium_rupees": premium_rupees,
+            "ce_pe_imbalance_pct": 100.0 * np.abs(ce_entry - pe_entry) / premium_points,
+            "premium_change_5m_points": premium_points - prem_5,
+            "premium_change_10m_points": premium_points - prem_10,
+            "exit_ce": exit_ce,
+            "exit_pe": exit_pe,
+            "exit_pnl_gross": exit_pnl_gross,
+            "txn_charges": txn,
+            "exit_pnl": exit_pnl_net,
+            "eod_pnl_gross": eod_pnl_gross,
+            "eod_pnl_net": eod_pnl_gross - eod_txn,
+            "max_profit_gross": np.maximum(0.0, pnl_max),
+            "max_loss_gross": np.minimum(0.0, pnl_min),
+            "sl_effective_rupees": sl_eff,
+            "profit_protect_rupees": g_rupees,
+            "is_profitable": (exit_pnl_net > 0).astype(int),
+            "stoploss_hit": stop_first.astype(int),
+            "profit_protect_hit": protect_first.astype(int),
+        }
+        parts.append(part)
+
+    skipped_rows = [rec for _, rec in sorted(skipped, key=lambda x: x[0])]
+    if not parts:
+        return pd.DataFrame(), skipped_rows
+
+    out = pd.DataFrame({c: np.concatenate([np.asarray(p[c]) for p in parts]) for c in parts[0]})
+    out = out.sort_values("k").reset_index(drop=True)
+    pos = pos_all[out["k"].to_numpy()]
+    fv = feat_s.iloc[pos].reset_index(drop=True)
+
+    out["day"] = dy
+    out["underlying"] = und
+    out["expiry"] = expiry
+    out["days_to_expiry"] = int((expiry - dy).days)
+    out["source_pickle"] = source_pickle
+    out["entry_time"] = cand_idx[out["k"].to_numpy()].strftime("%H:%M")
+    out["qty_units"] = qty
+
+    def _feat(col: str) -> np.ndarray:
+        return fv[col].to_numpy(dtype=float) if col in fv.columns else np.full(len(out), np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for col, rng in (("premium_vs_range_10", "range_10m_pts"), ("premium_vs_range_15", "range_15m_pts")):
+            r = _feat(rng)
+            out[col] = np.where((r == 0) | np.isnan(r), np.nan, out["entry_premium_points"].to_numpy() / r)
+    out["minutes_since_open"] = fv["minutes_since_open"].to_numpy(dtype=int)
+    for col in FEATURE_COLUMNS:
+        out[col] = _feat(col)
+
+    return out[CANDIDATE_COLUMNS], skipped_rows
+
+
 # =============================================================================
 # PER-PICKLE PROCESSING
 # =============================================================================
@@ -747,6 +1013,7 @@ def process_one_pickle(path: str, window_start: date, window_end: date) -> Tuple
     min_expiry_local: Dict[Tuple[str, date], date] = d.groupby(["underlying", "day"], sort=False)["expiry"].min().to_dict()
 
     rows: List[Dict[str, Any]] = []
+    day_frames: List[pd.DataFrame] = []
     skipped: List[Dict[str, Any]] = []
 
     for (und, dy, ex), g in d.groupby(["underlying", "day", "expiry"], sort=False):
@@ -758,6 +1025,23 @@ def process_one_pickle(path: str, window_start: date, window_end: date) -> Tuple
         feat_s = precompute_underlying_features(spot_s)
         strike_cache: Dict[int, Dict[str, pd.Series]] = {}
 
+        if SIMULATOR_MODE == "batch":
+            day_df, day_skips = simulate_day_candidates(
+                und=und,
+                dy=dy,
+                expiry=ex,
+                source_pickle=src,
+                day_opt=g,
+                idx_all=idx_all,
+                spot_s=spot_s,
+                feat_s=feat_s,
+                strike_cache=strike_cache,
+            )
+            if not day_df.empty:
+                day_frames.append(day_df)
+            skipped.extend(day_skips)
+            continue
+
         for entry_ts in build_candidate_index(dy):
             row, skip = simulate_single_candidate(
                 und=und,
@@ -776,9 +1060,25 @@ def process_one_pickle(path: str, window_start: date, window_end: date) -> Tuple
             if skip is not None:
                 skipped.append(skip)
 
+    if day_frames:
+        return pd.concat(day_frames, ignore_index=True), pd.DataFrame(skipped)
     return pd.DataFrame(rows), pd.DataFrame(skipped)
 
 
+def _mine_pickle_worker(path: str, window_start: date, window_end: date) -> Tuple[pd.DataFrame, pd.DataFrame, Optional[str]]:
+    """Process-pool entry point: never raises, so one bad pickle does not kill the pool."""
+    try:
+        cdf, sdf = process_one_pickle(path, window_start, window_end)
+        return cdf, sdf, None
+    except Exception as e:
+        return pd.DataFrame(), pd.DataFrame(), str(e)
+
+
+def resolve_worker_count(n_paths: int) -> int:
+    n = MINER_WORKERS if MINER_WORKERS > 0 else max(1, (os.cpu_count() or 2) - 1)
+    return max(1, min(n, n_paths))
+
+
 # =============================================================================
 # DEDUP AND SUMMARIES
 # =============================================================================
@@ -1061,28 +1361,55 @@ def main() -> None:
     skipped_parts: List[pd.DataFrame] = []
     t_start = time.time()
 
-    for i, p in enumerate(paths):
-        try:
-            cdf, sdf = process_one_pickle(p, window_start, end_day)
-            if cdf is not None and not cdf.empty:
-                candidate_parts.append(cdf)
-            if sdf is not None and not sdf.empty:
-                if "source_pickle" not in sdf.columns:
-                    sdf["source_pickle"] = os.path.basename(p)
-                skipped_parts.append(sdf)
-            elapsed = time.time() - t_start
-            done = i + 1
-            rate = elapsed / done if done > 0 else 1
-            eta = rate * (len(paths) - done) / 60
-            total_cands = sum(len(c) for c in candidate_parts)
-            print(f"[OK] {os.path.basename(p)}  cands={len(cdf) if cdf is not None else 0}  "
-                  f"[{done}/{len(paths)}  {elapsed/60:.1f}m  ETA={eta:.0f}m  total={total_cands:,}]")
-        except Exception as e:
-            msg = f"[WARN] {os.path.basename(p)} failed: {e}"
+    n_workers = resolve_worker_count(len(paths))
+    print(f"[INFO] Workers: {n_workers} | Simulator: {SIMULATOR_MODE}")
+
+    def _collect(p: str, cdf: pd.DataFrame, sdf: pd.DataFrame, err: Optional[str], done: int) -> None:
+        if err is not None:
+            msg = f"[WARN] {os.path.basename(p)} failed: {err}"
             if FAIL_ON_PICKLE_ERROR:
-                raise RuntimeError(msg) from e
+                raise RuntimeError(msg)
             print(msg)
-            skipped_parts.append(pd.DataFrame([{"source_pickle": os.path.basename(p), "reason": str(e)}]))
+            skipped_parts.append(pd.DataFrame([{"source_pickle": os.path.basename(p), "reason": err}]))
+            return
+        if cdf is not None and not cdf.empty:
+            candidate_parts.append(cdf)
+        if sdf is not None and not sdf.empty:
+            if "source_pickle" not in sdf.columns:
+                sdf["source_pickle"] = os.path.basename(p)
+            skipped_parts.append(sdf)
+        elapsed = time.time() - t_start
+        rate = elapsed / done if done > 0 else 1
+        eta = rate * (len(paths) - done) / 60
+        total_cands = sum(len(c) for c in candidate_parts)
+        print(f"[OK] {os.path.basename(p)}  cands={len(cdf) if cdf is not None else 0}  "
+              f"[{done}/{len(paths)}  {elapsed/60:.1f}m  ETA={eta:.0f}m  total={total_cands:,}]")
+
+    if n_workers <= 1:
+        for i, p in enumerate(paths):
+            try:
+                cdf, sdf = process_one_pickle(p, window_start, end_day)
+                err = None
+            except Exception as e:
+                if FAIL_ON_PICKLE_ERROR:
+                    raise RuntimeError(f"[WARN] {os.path.basename(p)} failed: {e}") from e
+                cdf, sdf, err = pd.DataFrame(), pd.DataFrame(), str(e)
+            _collect(p, cdf, sdf, err, i + 1)
+    else:
+        # Pickles are independent; results are re-ordered by path afterwards so
+        # the output does not depend on completion order.
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {pool.submit(_mine_pickle_worker, p, window_start, end_day): i for i, p in enumerate(paths)}
+            done = 0
+            for fut in as_completed(futures):
+                i = futures[fut]
+                cdf, sdf, err = fut.result()
+                done += 1
+                if cdf is not None and not cdf.empty:
+                    cdf = cdf.assign(_path_order=i)
+                _collect(paths[i], cdf, sdf, err, done)
+        candidate_parts.sort(key=lambda c: int(c["_path_order"].iloc[0]))
+        candidate_parts = [c.drop(columns="_path_order") for c in candidate_parts]
 
     candidate_df = pd.concat(candidate_parts, ignore_index=True) if candidate_parts else pd.DataFrame()
     skipped_df = pd.concat(skipped_parts, ignore_index=True) if skipped_parts else pd.DataFrame()
@@ -7,13 +7,19 @@
 # - Incremental minute fetching (cache) to cut API + speed refresh.
 # - Pivots as scatter lines (faster than shapes).
 # - Robust IST-naive datetime for Kite historical API (avoids invalid from date).
+# - Delta feed: the grid is rendered once; each refresh publishes only the new /
+#   revised minute bars as JSON which the page merges client-side (no reloads).
 
 import os
+import json
 import time
+import threading
 import datetime as dt
 from dataclasses import dataclass
 from collections import deque
-from typing import Dict, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import pandas as pd
 from kiteconnect import exceptions as kite_ex
@@ -57,6 +63,15 @@ NETWORK_JITTER_SEC = 0.10
 
 EXIT_AFTER_MARKET_CLOSE_SNAPSHOT = True
 
+# Live delta feed. The page is served from a local HTTP server and polls
+# /delta?since=<seq>; only bars fetched in later cycles are sent. Set False for the
+# old mode (rebuild the full grid + rewrite the HTML with meta-refresh each cycle).
+DELTA_FEED = True
+DELTA_HOST = "127.0.0.1"
+DELTA_PORT = 8765
+# Cycles kept for clients catching up; a client further behind gets a snapshot.
+DELTA_KEEP_CYCLES = 240
+
 # Make boxes near-square: reduced width + increased height
 FIG_WIDTH_PX = 1180
 FIG_HEIGHT_PX = 1550
@@ -253,7 +268,10 @@ def load_pivots_for_ref_day(kite, sym_to_token: Dict[str, int], ref_day: dt.date
 # =========================
 def build_plotly_grid(symbol_to_df: Dict[str, pd.DataFrame],
                       pivots: Dict[str, PivotLevels],
-                      title: str) -> go.Figure:
+                      title: str,
+                      placeholders: bool = False) -> go.Figure:
+    # placeholders=True keeps one (possibly empty) candle trace + pivot traces per
+    # symbol so the delta feed always has a trace to restyle.
     fig = go.Figure()
 
     cell_w = (1.0 - PAD_X * (GRID_COLS + 1)) / GRID_COLS
@@ -319,7 +337,9 @@ def build_plotly_grid(symbol_to_df: Dict[str, pd.DataFrame],
 
         df = symbol_to_df.get(sym)
         if df is None or df.empty:
-            continue
+            if not placeholders:
+                continue
+            df = pd.DataFrame(columns=["date", "open", "high", "low", "close", "volume"])
 
         # Candlestick
         fig.add_trace(go.Candlestick(
@@ -336,19 +356,20 @@ def build_plotly_grid(symbol_to_df: Dict[str, pd.DataFrame],
         # Pivots as fast line traces
         piv = pivots.get(sym)
         if piv:
-            x0 = df["date"].iloc[0]
-            x1 = df["date"].iloc[-1]
+            x = [df["date"].iloc[0], df["date"].iloc[-1]] if not df.empty else []
             levels = {"R1": piv.R1, "TC": piv.TC, "P": piv.P, "BC": piv.BC, "S1": piv.S1}
             for name, y in levels.items():
                 fig.add_trace(go.Scatter(
-                    x=[x0, x1],
-                    y=[y, y],
+                    x=x,
+                    y=[y, y] if x else [],
                     mode="lines",
                     line=dict(color=PIV_COLORS[name], width=PIV_WIDTH.get(name, 1.1)),
                     hoverinfo="skip",
                     xaxis=f"x{idx}",
                     yaxis=f"y{idx}",
-                    showlegend=False
+                    showlegend=False,
+                    name=f"{sym} {name}",
+                    meta=y
                 ))
 
     fig.update_layout(
@@ -366,13 +387,21 @@ def build_plotly_grid(symbol_to_df: Dict[str, pd.DataFrame],
     return fig
 
 
-def write_html(fig: go.Figure, out_html: str, refresh_sec: int):
-    plot_html = fig.to_html(include_plotlyjs="cdn", full_html=False)
-    html = f"""<!doctype html>
+def render_page_html(fig: go.Figure, refresh_sec: int, delta_feed: bool = False) -> str:
+    plot_html = fig.to_html(include_plotlyjs="cdn", full_html=False, div_id="grid")
+    if delta_feed:
+        refresh_meta = ""
+        mode_text = f"live delta feed {refresh_sec}s"
+        delta_js = DELTA_CLIENT_JS.replace("__POLL_MS__", str(int(refresh_sec * 1000)))
+    else:
+        refresh_meta = f'<meta http-equiv="refresh" content="{refresh_sec}">'
+        mode_text = f"auto-refresh {refresh_sec}s"
+        delta_js = ""
+    return f"""<!doctype html>
 <html>
 <head>
   <meta charset="utf-8"/>
-  <meta http-equiv="refresh" content="{refresh_sec}">
+  {refresh_meta}
   <title>Kite 20 Stocks 4x5</title>
   <style>
     body {{ margin:0; font-family: Arial, sans-serif; }}
@@ -387,7 +416,7 @@ def write_html(fig: go.Figure, out_html: str, refresh_sec: int):
 </head>
 <body>
   <div class="topbar">
-    <div><b>4×5 NSE Dashboard (20 stocks)</b> (auto-refresh {refresh_sec}s)</div>
+    <div><b>4×5 NSE Dashboard (20 stocks)</b> ({mode_text})</div>
     <div>Page zoom:
       <input id="zoom" type="range" min="60" max="180" value="100" />
       <span id="zv">100%</span>
@@ -414,14 +443,181 @@ def write_html(fig: go.Figure, out_html: str, refresh_sec: int):
   apply();
 }})();
 </script>
+{delta_js}
 </body>
 </html>"""
+
+
+def write_html(fig: go.Figure, out_html: str, refresh_sec: int):
+    html = render_page_html(fig, refresh_sec)
     tmp = out_html + ".tmp"
     with open(tmp, "w", encoding="utf-8") as f:
         f.write(html)
     os.replace(tmp, out_html)
 
 
+# =========================
+# Delta feed
+# =========================
+# Client side: keeps per-symbol bar arrays, merges each delta (same timestamp ->
+# revise, newer -> append), drops bars before the window start and restyles only
+# the touched traces. Timestamps are ISO strings with the IST offset, so string
+# comparison is time order.
+DELTA_CLIENT_JS = """<script>
+(function() {
+  var gd = document.getElementById('grid');
+  var KEYS = ['t', 'o', 'h', 'l', 'c'];
+  var seq = -1, busy = false, bars = {}, traces = {};
+
+  gd.data.forEach(function(tr, i) {
+    var parts = String(tr.name || '').split(' ');
+    var sym = parts[0];
+    traces[sym] = traces[sym] || {candle: null, pivots: []};
+    if (tr.type === 'candlestick') { traces[sym].candle = i; } else { traces[sym].pivots.push(i); }
+  });
+
+  function merge(sym, p) {
+    var s = bars[sym];
+    if (p.replace || !s) {
+      s = bars[sym] = {};
+      KEYS.forEach(function(k) { s[k] = p[k].slice(); });
+    } else {
+      for (var i = 0; i < p.t.length; i++) {
+        var j = s.t.length;
+        while (j > 0 && s.t[j - 1] > p.t[i]) { j--; }
+        if (j > 0 && s.t[j - 1] === p.t[i]) {
+          KEYS.forEach(function(k) { s[k][j - 1] = p[k][i]; });
+        } else {
+          KEYS.forEach(function(k) { s[k].splice(j, 0, p[k][i]); });
+        }
+      }
+    }
+    var cut = 0;
+    while (p.start && cut < s.t.length && s.t[cut] < p.start) { cut++; }
+    if (cut) { KEYS.forEach(function(k) { s[k].splice(0, cut); }); }
+  }
+
+  function draw(sym) {
+    var s = bars[sym], tr = traces[sym];
+    if (!s || !tr || tr.candle === null) { return; }
+    Plotly.restyle(gd, {x: [s.t], open: [s.o], high: [s.h], low: [s.l], close: [s.c]}, [tr.candle]);
+    if (tr.pivots.length) {
+      var x = s.t.length ? [s.t[0], s.t[s.t.length - 1]] : [];
+      var xs = [], ys = [];
+      tr.pivots.forEach(function(i) {
+        var y = gd.data[i].meta;
+        xs.push(x);
+        ys.push(x.length ? [y, y] : []);
+      });
+      Plotly.restyle(gd, {x: xs, y: ys}, tr.pivots);
+    }
+  }
+
+  function poll() {
+    if (busy) { return; }
+    busy = true;
+    fetch('/delta?since=' + seq, {cache: 'no-store'})
+      .then(function(r) { return r.json(); })
+      .then(function(msg) {
+        var touched = {};
+        (msg.deltas || []).forEach(function(d) {
+          Object.keys(d).forEach(function(sym) { merge(sym, d[sym]); touched[sym] = true; });
+        });
+        Object.keys(touched).forEach(draw);
+        if (msg.title) { Plotly.relayout(gd, {'title.text': msg.title}); }
+        seq = msg.seq;
+      })
+      .catch(function(e) { console.warn('delta poll failed', e); })
+      .then(function() { busy = false; });
+  }
+  poll();
+  setInterval(poll, __POLL_MS__);
+})();
+</script>"""
+
+
+def bars_payload(df: pd.DataFrame, replace: bool, start: Optional[str]) -> Dict[str, object]:
+    return {
+        "replace": replace,
+        "start": start,
+        "t": [ts.isoformat() for ts in df["date"]],
+        "o": [float(v) for v in df["open"]],
+        "h": [float(v) for v in df["high"]],
+        "l": [float(v) for v in df["low"]],
+        "c": [float(v) for v in df["close"]],
+    }
+
+
+class DeltaFeed:
+    """Per-cycle bar deltas for the page, plus a snapshot for (re)connecting clients."""
+
+    def __init__(self, keep_cycles: int):
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.deltas = deque(maxlen=keep_cycles)
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self.title = ""
+        self.page_html = b""
+
+    def publish(self, title: str, frames: Dict[str, pd.DataFrame],
+                changes: Dict[str, Tuple[pd.DataFrame, bool]]) -> int:
+        payload = {}
+        for sym, (bars, replace) in changes.items():
+            df = frames.get(sym)
+            start = df["date"].iloc[0].isoformat() if df is not None and not df.empty else None
+            payload[sym] = bars_payload(bars, replace, start)
+        with self.lock:
+            self.seq += 1
+            self.deltas.append((self.seq, payload))
+            self.frames = dict(frames)
+            self.title = title
+            return self.seq
+
+    def since(self, seq: int) -> Dict[str, object]:
+        with self.lock:
+            if seq >= 0 and seq <= self.seq and (not self.deltas or seq >= self.deltas[0][0] - 1):
+                deltas = [p for s, p in self.deltas if s > seq]
+            else:
+                # New page, restarted server or a client too far behind.
+                deltas = [{
+                    sym: bars_payload(df, True, None)
+                    for sym, df in self.frames.items() if df is not None and not df.empty
+                }]
+            return {"seq": self.seq, "title": self.title, "deltas": deltas}
+
+
+def start_delta_server(feed: DeltaFeed, host: str, port: int) -> str:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/delta":
+                try:
+                    since = int(parse_qs(url.query).get("since", ["-1"])[0])
+                except ValueError:
+                    since = -1
+                body = json.dumps(feed.since(since), separators=(",", ":")).encode("utf-8")
+                ctype = "application/json"
+            elif url.path in ("/", "/index.html"):
+                body = feed.page_html
+                ctype = "text/html; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="delta-feed", daemon=True).start()
+    return f"http://{host}:{port}/"
+
+
 # =========================
 # Main
 # =========================
@@ -451,7 +647,17 @@ def main():
     log("INFO", f"Pivots ready for {len(pivots)}/20 symbols.")
 
     import webbrowser
-    if OPEN_BROWSER:
+    feed: Optional[DeltaFeed] = None
+    if DELTA_FEED:
+        # Render the grid once with empty traces; the page fills itself from /delta.
+        feed = DeltaFeed(DELTA_KEEP_CYCLES)
+        page = build_plotly_grid({}, pivots, "Starting ...", placeholders=True)
+        feed.page_html = render_page_html(page, REFRESH_SECONDS, delta_feed=True).encode("utf-8")
+        page_url = start_delta_server(feed, DELTA_HOST, DELTA_PORT)
+        log("INFO", f"Delta feed serving {page_url}")
+        if OPEN_BROWSER:
+            webbrowser.open(page_url)
+    elif OPEN_BROWSER:
         if not os.path.exists(OUTPUT_HTML):
             with open(OUTPUT_HTML, "w", encoding="utf-8") as f:
                 f.write("<html><body>Starting...</body></html>")
@@ -477,11 +683,22 @@ def main():
             title = f"FULL DAY {last_td} | Pivots {ref_day} | {asof.strftime('%Y-%m-%d %H:%M IST')}"
             fig = build_plotly_grid(symbol_to_df, pivots, title)
             write_html(fig, OUTPUT_HTML, refresh_sec=9999)
+            if feed is not None:
+                feed.publish(title, symbol_to_df, {sym: (df, True) for sym, df in symbol_to_df.items()})
+                log("INFO", f"Rendered full-day snapshot. Still serving {page_url}; Ctrl+C to exit.")
+                try:
+                    while True:
+                        time.sleep(3600)
+                except KeyboardInterrupt:
+                    pass
+                return
             log("INFO", "Rendered full-day snapshot. Exiting.")
             return
 
         window_from, window_to = clamp_intraday_window(asof, LOOKBACK_MINUTES)
         symbol_to_df: Dict[str, pd.DataFrame] = {}
+        # Bars fetched this cycle per symbol (delta feed): (bars, replace_all).
+        changes: Dict[str, Tuple[pd.DataFrame, bool]] = {}
 
         for i, sym in enumerate(SYMBOLS_20, start=1):
             tok = sym_to_token[sym]
@@ -492,10 +709,13 @@ def main():
                     cache_df[sym] = df
                     if not df.empty:
                         last_dt[sym] = df["date"].iloc[-1]
+                        changes[sym] = (df, True)
                     symbol_to_df[sym] = df
                     continue
 
-                inc_from = (last_dt.get(sym) + dt.timedelta(minutes=1)) if last_dt.get(sym) else window_from
+                # Re-fetch from the last cached minute: it may still have been forming
+                # when it was fetched, so its final OHLC replaces the partial bar.
+                inc_from = last_dt.get(sym) or window_from
                 if inc_from < window_from:
                     inc_from = window_from
                 if inc_from >= window_to:
@@ -515,6 +735,7 @@ def main():
 
                     cache_df[sym] = df
                     last_dt[sym] = df["date"].iloc[-1]
+                    changes[sym] = (inc, False)
 
                 symbol_to_df[sym] = cache_df[sym]
 
@@ -523,8 +744,12 @@ def main():
                 symbol_to_df[sym] = cache_df.get(sym, pd.DataFrame(columns=["date","open","high","low","close","volume"]))
 
         title = f"INTRADAY LIVE | 4×5 | {LOOKBACK_MINUTES}m | Pivots {ref_day} | {asof.strftime('%H:%M:%S IST')}"
-        fig = build_plotly_grid(symbol_to_df, pivots, title)
-        write_html(fig, OUTPUT_HTML, refresh_sec=REFRESH_SECONDS)
+        if feed is not None:
+            seq = feed.publish(title, symbol_to_df, changes)
+            log("INFO", f"Delta #{seq}: {sum(len(b) for b, _ in changes.values())} bars for {len(changes)} symbols")
+        else:
+            fig = build_plotly_grid(symbol_to_df, pivots, title)
+            write_html(fig, OUTPUT_HTML, refresh_sec=REFRESH_SECONDS)
 
         elapsed = time.time() - t0
         sleep_for = max(1.0, REFRESH_SECONDS - elapsed)
@@ -7,6 +7,10 @@ Fixes / adds:
 - Safe non-blocking queue writes: prevents websocket callback from freezing if queue is full.
 - Backfiller throttling: caps historical calls per sweep for TOP_N=500.
 - Locking: thread-safe shared state between tick callbacks and heartbeat thread.
+- Optional memory-mapped columnar store (CANDLE_STORE_BACKEND="mmap"):
+  fixed (symbol x minute-of-session x OHLCV) float64 array per day; readers in
+  other processes attach with open_candle_store_ro() (zero copy, no locks) and
+  gap detection becomes an array scan instead of per-symbol SQL.
 """
 
 from __future__ import annotations
@@ -19,8 +23,9 @@ import threading
 import queue
 from dataclasses import dataclass
 from datetime import datetime, date, time as dtime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from kiteconnect import KiteConnect, KiteTicker
 
@@ -76,6 +81,11 @@ DROP_LOG_EVERY = 1000
 BACKFILL_MAX_FETCH_PER_SWEEP = 25     # <=25 historical calls per loop; prevents API hammering
 BACKFILL_LOOP_SLEEP_SEC = 5.0
 
+# ---- CANDLE STORE ----
+# "sqlite" => candles.sqlite (default, what scan_wm_live.py reads)
+# "mmap"   => candles_ohlcv.f8 + candles_ohlcv.json (fixed layout, zero-copy readers)
+CANDLE_STORE_BACKEND = os.environ.get("CANDLE_STORE_BACKEND", "sqlite").lower()
+
 
 # ===================== LOG =====================
 
@@ -134,6 +144,12 @@ def day_dir(d: date) -> str:
 def db_path(d: date) -> str:
     return os.path.join(day_dir(d), "candles.sqlite")
 
+def mmap_data_path(d: date) -> str:
+    return os.path.join(day_dir(d), "candles_ohlcv.f8")
+
+def mmap_meta_path(d: date) -> str:
+    return os.path.join(day_dir(d), "candles_ohlcv.json")
+
 def manifest_path(d: date) -> str:
     return os.path.join(day_dir(d), "manifest.json")
 
@@ -359,6 +375,236 @@ def db_count_since(conn: sqlite3.Connection, symbol: str, start_ts: datetime) ->
     return int(cur.fetchone()[0])
 
 
+# ===================== MEMORY-MAPPED STORE =====================
+
+MMAP_FIELDS = ("open", "high", "low", "close", "volume")
+F_OPEN, F_HIGH, F_LOW, F_CLOSE, F_VOLUME = range(len(MMAP_FIELDS))
+
+class MmapCandleStore:
+    """
+    Fixed-layout per-day candle array: float64[n_symbols, n_minutes, 5].
+
+    - Row order = symbol list in the JSON sidecar; column = minute-of-session.
+    - Missing candle => close is NaN. Writer stores close LAST, so a reader that
+      sees a finite close sees a complete candle (no locks needed).
+    - 500 symbols x 375 minutes x 5 x 8 bytes ~= 7.5 MB.
+    - A changed layout mid-day goes to candles_ohlcv.v<N>.f8 (named in the
+      sidecar); the previous file is left intact for readers still mapping it.
+    """
+
+    def __init__(self, d: date, symbols: List[str], arr: np.memmap, session_start: datetime, data_path: str = ""):
+        self.d = d
+        self.data_path = data_path or mmap_data_path(d)
+        self.symbols = list(symbols)
+        self.sym_idx: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+        self.arr = arr
+        self.session_start = session_start
+        self.n_minutes = int(arr.shape[1])
+
+    # ---------- open ----------
+
+    @staticmethod
+    def _data_file(d: date, meta: Dict[str, Any]) -> str:
+        """Data file named by the sidecar (layout changes get a new versioned file)."""
+        return os.path.join(day_dir(d), meta.get("data_file") or os.path.basename(mmap_data_path(d)))
+
+    @staticmethod
+    def _write_meta(meta_p: str, meta: Dict[str, Any]) -> None:
+        tmp = meta_p + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_p)
+
+    @classmethod
+    def create_or_open(cls, d: date, symbols: List[str]) -> "MmapCandleStore":
+        ensure_dir(day_dir(d))
+        ss, se, _ = session_bounds(d)
+        n_minutes = int((se - ss).total_seconds() // 60)
+        shape = (len(symbols), n_minutes, len(MMAP_FIELDS))
+        meta_p = mmap_meta_path(d)
+
+        old_meta: Optional[Dict[str, Any]] = None
+        if os.path.isfile(meta_p):
+            with open(meta_p, "r", encoding="utf-8") as f:
+                old_meta = json.load(f)
+            old_p = cls._data_file(d, old_meta)
+            if not os.path.isfile(old_p):
+                old_meta = None
+            # Re-use today's file only if the layout matches (restart mid-session)
+            elif old_meta.get("symbols") == list(symbols) and int(old_meta.get("n_minutes", -1)) == n_minutes:
+                arr = np.memmap(old_p, dtype=np.float64, mode="r+", shape=shape)
+                log("INFO", f"[MMAP] re-opened {old_p} shape={arr.shape}")
+                return cls(d, symbols, arr, ss, old_p)
+
+        version = int(old_meta.get("version", 0)) + 1 if old_meta else 0
+        data_p = mmap_data_path(d)
+        if version:
+            # Never truncate the live file: readers may still map it. Build the new
+            # layout in its own file, carry today's candles over, then swap the sidecar.
+            root, ext = os.path.splitext(data_p)
+            data_p = f"{root}.v{version}{ext}"
+
+        arr = np.memmap(data_p, dtype=np.float64, mode="w+", shape=shape)
+        arr[:] = np.nan
+
+        if old_meta:
+            carried = cls._carry_over(d, old_meta, arr, list(symbols), ss)
+            log("WARN", f"[MMAP] layout changed (symbols/minutes); carried {carried} symbols into {data_p}")
+        arr.flush()
+
+        cls._write_meta(
+            meta_p,
+            {
+                "day": d.isoformat(),
+                "session_start": ss.isoformat(),
+                "n_minutes": n_minutes,
+                "fields": list(MMAP_FIELDS),
+                "dtype": "float64",
+                "symbols": list(symbols),
+                "data_file": os.path.basename(data_p),
+                "version": version,
+            },
+        )
+
+        log("INFO", f"[MMAP] created {data_p} shape={arr.shape} ({arr.nbytes / 1e6:.1f} MB)")
+        return cls(d, symbols, arr, ss, data_p)
+
+    @classmethod
+    def _carry_over(cls, d: date, old_meta: Dict[str, Any], arr: np.memmap, symbols: List[str], ss: datetime) -> int:
+        """Copy candles of symbols present in both layouts, aligned on wall-clock minute."""
+        old_syms = list(old_meta.get("symbols") or [])
+        old_n = int(old_meta.get("n_minutes", 0))
+        if not old_syms or old_n <= 0:
+            return 0
+        old = np.memmap(cls._data_file(d, old_meta), dtype=np.float64, mode="r",
+                        shape=(len(old_syms), old_n, len(MMAP_FIELDS)))
+        old_ss = datetime.fromisoformat(old_meta.get("session_start") or ss.isoformat())
+        shift = int((old_ss - ss).total_seconds() // 60)  # new minute = old minute + shift
+        lo, hi = max(0, shift), min(arr.shape[1], old_n + shift)
+        if lo >= hi:
+            return 0
+
+        old_idx = {s: i for i, s in enumerate(old_syms)}
+        pairs = [(i, old_idx[s]) for i, s in enumerate(symbols) if s in old_idx]
+        if pairs:
+            new_rows, old_rows = (np.array(x, dtype=np.int64) for x in zip(*pairs))
+            arr[new_rows, lo:hi] = old[old_rows, lo - shift:hi - shift]
+        del old
+        return len(pairs)
+
+    @classmethod
+    def open_ro(cls, d: date) -> "MmapCandleStore":
+        meta_p = mmap_meta_path(d)
+        if not os.path.isfile(meta_p):
+            raise FileNotFoundError(f"MMAP store not found: {meta_p} (run live_market_cache.py with CANDLE_STORE_BACKEND=mmap)")
+        with open(meta_p, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        symbols = meta["symbols"]
+        data_p = cls._data_file(d, meta)
+        arr = np.memmap(data_p, dtype=np.float64, mode="r",
+                        shape=(len(symbols), int(meta["n_minutes"]), len(MMAP_FIELDS)))
+        return cls(d, symbols, arr, datetime.fromisoformat(meta["session_start"]), data_p)
+
+    # ---------- index helpers ----------
+
+    def minute_index(self, ts: datetime) -> int:
+        return int((floor_minute(ts) - self.session_start).total_seconds() // 60)
+
+    def ts_at(self, m_idx: int) -> datetime:
+        return self.session_start + timedelta(minutes=int(m_idx))
+
+    # ---------- write ----------
+
+    def write_rows(self, rows: List[CandleRow]) -> int:
+        written = 0
+        for r in rows:
+            si = self.sym_idx.get(r.symbol)
+            if si is None:
+                continue
+            mi = self.minute_index(r.ts)
+            if mi < 0 or mi >= self.n_minutes:
+                continue
+            cell = self.arr[si, mi]
+            cell[F_VOLUME] = r.volume
+            cell[F_OPEN] = r.open
+            cell[F_HIGH] = r.high
+            cell[F_LOW] = r.low
+            cell[F_CLOSE] = r.close  # commit marker: written last
+            written += 1
+        return written
+
+    def flush(self) -> None:
+        if self.arr.mode != "r":
+            self.arr.flush()
+
+    # ---------- read / gap scan ----------
+
+    def filled_mask(self) -> np.ndarray:
+        return ~np.isnan(self.arr[:, :, F_CLOSE])
+
+    def count_since(self, symbol: str, start_ts: datetime) -> int:
+        si = self.sym_idx.get(symbol)
+        if si is None:
+            return 0
+        mi = max(0, self.minute_index(start_ts))
+        return int(np.count_nonzero(~np.isnan(self.arr[si, mi:, F_CLOSE])))
+
+    def last_candle(self, symbol: str) -> Optional[Tuple[datetime, float]]:
+        si = self.sym_idx.get(symbol)
+        if si is None:
+            return None
+        idx = np.flatnonzero(~np.isnan(self.arr[si, :, F_CLOSE]))
+        if idx.size == 0:
+            return None
+        mi = int(idx[-1])
+        return self.ts_at(mi), float(self.arr[si, mi, F_CLOSE])
+
+    def last_ts(self, symbol: str) -> Optional[datetime]:
+        last = self.last_candle(symbol)
+        return last[0] if last else None
+
+    def last_candles_all(self) -> Dict[str, Tuple[datetime, float]]:
+        """One array pass: last filled minute + close for every symbol."""
+        filled = self.filled_mask()
+        has_any = filled.any(axis=1)
+        last_idx = self.n_minutes - 1 - np.argmax(filled[:, ::-1], axis=1)
+        out: Dict[str, Tuple[datetime, float]] = {}
+        for si in np.flatnonzero(has_any):
+            mi = int(last_idx[si])
+            out[self.symbols[si]] = (self.ts_at(mi), float(self.arr[si, mi, F_CLOSE]))
+        return out
+
+    def missing_counts(self, start_ts: datetime, end_ts: datetime) -> np.ndarray:
+        """Per-symbol count of missing minutes in [start_ts, end_ts] (inclusive)."""
+        a = max(0, self.minute_index(start_ts))
+        b = min(self.n_minutes - 1, self.minute_index(end_ts))
+        if b < a:
+            return np.zeros(len(self.symbols), dtype=np.int64)
+        return np.isnan(self.arr[:, a:b + 1, F_CLOSE]).sum(axis=1)
+
+    def symbol_frame(self, symbol: str, start_ts: Optional[datetime] = None, end_ts: Optional[datetime] = None) -> pd.DataFrame:
+        """Same columns as scan_wm_live.db_range(): date, open, high, low, close, volume."""
+        si = self.sym_idx.get(symbol)
+        if si is None:
+            return pd.DataFrame(columns=["date", "open", "high", "low", "close", "volume"])
+        a = 0 if start_ts is None else max(0, self.minute_index(start_ts))
+        b = self.n_minutes - 1 if end_ts is None else min(self.n_minutes - 1, self.minute_index(end_ts))
+        block = np.array(self.arr[si, a:b + 1, :])  # copy so caller can't see later writes mid-use
+        keep = ~np.isnan(block[:, F_CLOSE])
+        idx = np.arange(a, b + 1)[keep]
+        df = pd.DataFrame(block[keep], columns=list(MMAP_FIELDS))
+        df.insert(0, "date", pd.to_datetime(self.session_start) + pd.to_timedelta(idx, unit="min"))
+        df["volume"] = df["volume"].fillna(0).astype(int)
+        return df
+
+def open_candle_store_ro(d: date) -> MmapCandleStore:
+    """Attach to a live mmap store from another process (read-only, zero copy)."""
+    return MmapCandleStore.open_ro(d)
+
+def use_mmap_store() -> bool:
+    return CANDLE_STORE_BACKEND == "mmap"
+
+
 # ===================== CANDLE BUILDER =====================
 
 @dataclass
@@ -445,11 +691,13 @@ class CandleBuilder:
 # ===================== WRITER THREAD =====================
 
 class CandleWriter(threading.Thread):
-    def __init__(self, conn: sqlite3.Connection, q: "queue.Queue[CandleRow]", stop_event: threading.Event):
+    def __init__(self, conn: Optional[sqlite3.Connection], q: "queue.Queue[CandleRow]", stop_event: threading.Event,
+                 store: Optional[MmapCandleStore] = None):
         super().__init__(daemon=True)
         self.conn = conn
         self.q = q
         self.stop_event = stop_event
+        self.store = store
 
     def run(self) -> None:
         buf: List[CandleRow] = []
@@ -475,6 +723,10 @@ class CandleWriter(threading.Thread):
             self._flush(buf)
 
     def _flush(self, rows: List[CandleRow]) -> None:
+        if self.store is not None:
+            self.store.write_rows(rows)
+            self.store.flush()
+            return
         data = [(r.symbol, r.ts.isoformat(), r.open, r.high, r.low, r.close, int(r.volume)) for r in rows]
         self.conn.executemany("""
             INSERT OR REPLACE INTO candles(symbol, ts, open, high, low, close, volume)
@@ -515,6 +767,7 @@ class HistoricalBackfiller(threading.Thread):
         symbols: List[Tuple[str, int]],
         stop_event: threading.Event,
         manifest: Dict,
+        store: Optional[MmapCandleStore] = None,
     ):
         super().__init__(daemon=True)
         self.kite = kite
@@ -523,6 +776,7 @@ class HistoricalBackfiller(threading.Thread):
         self.symbols = symbols
         self.stop_event = stop_event
         self.manifest = manifest
+        self.store = store
 
         self._last_wait_log = 0.0
         self._last_sweep_log = 0.0
@@ -536,7 +790,7 @@ class HistoricalBackfiller(threading.Thread):
 
     def run(self) -> None:
         log("STEP", f"Historical backfiller started. target_bars={DISPLAY_BARS_TARGET} lookback_min={BACKFILL_LOOKBACK_MIN}")
-        conn = open_db(self.db_file, check_same_thread=True)
+        conn = None if self.store is not None else open_db(self.db_file, check_same_thread=True)
 
         ss, se, last_session_closed = session_bounds(self.d)
 
@@ -566,6 +820,13 @@ class HistoricalBackfiller(threading.Thread):
                 time.sleep(5.0)
                 continue
 
+            # MMAP: one array scan gives filled-minute counts for every symbol
+            have_by_sym: Dict[str, int] = {}
+            if self.store is not None:
+                fi = max(0, self.store.minute_index(floor))
+                counts = self.store.filled_mask()[:, fi:].sum(axis=1)
+                have_by_sym = {s: int(counts[i]) for i, s in enumerate(self.store.symbols)}
+
             # Round-robin over symbols; stop after BACKFILL_MAX_FETCH_PER_SWEEP calls
             for step in range(n):
                 if self.stop_event.is_set():
@@ -576,12 +837,15 @@ class HistoricalBackfiller(threading.Thread):
                 idx = (self._rr_idx + step) % n
                 sym, token = self.symbols[idx]
 
-                have = db_count_since(conn, sym, floor)
+                if self.store is not None:
+                    have = have_by_sym.get(sym, 0)
+                else:
+                    have = db_count_since(conn, sym, floor)
                 if have >= DISPLAY_BARS_TARGET:
                     skipped_have += 1
                     continue
 
-                last_ts = db_last_ts(conn, sym)
+                last_ts = self.store.last_ts(sym) if self.store is not None else db_last_ts(conn, sym)
                 start = floor if last_ts is None else max(floor, last_ts + timedelta(minutes=1))
                 end = last_closed
 
@@ -621,17 +885,21 @@ class HistoricalBackfiller(threading.Thread):
                 for c in candles:
                     ts = to_ist_naive_auto(c["date"])
                     ts = floor_minute(ts)
-                    rows.append((
-                        sym, ts.isoformat(),
+                    rows.append(CandleRow(
+                        sym, ts,
                         float(c["open"]), float(c["high"]), float(c["low"]), float(c["close"]),
                         int(c.get("volume") or 0),
                     ))
 
-                conn.executemany("""
-                    INSERT OR REPLACE INTO candles(symbol, ts, open, high, low, close, volume)
-                    VALUES (?, ?, ?, ?, ?, ?, ?);
-                """, rows)
-                conn.commit()
+                if self.store is not None:
+                    self.store.write_rows(rows)
+                    self.store.flush()
+                else:
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO candles(symbol, ts, open, high, low, close, volume)
+                        VALUES (?, ?, ?, ?, ?, ?, ?);
+                    """, [(r.symbol, r.ts.isoformat(), r.open, r.high, r.low, r.close, r.volume) for r in rows])
+                    conn.commit()
 
                 fetched += 1
                 self.manifest.setdefault("last_saved", {})[sym] = end.isoformat()
@@ -643,7 +911,8 @@ class HistoricalBackfiller(threading.Thread):
             time.sleep(BACKFILL_LOOP_SLEEP_SEC)
 
         try:
-            conn.close()
+            if conn is not None:
+                conn.close()
         except Exception:
             pass
 
@@ -673,10 +942,6 @@ class LiveCandleCache:
         self.d = d
         ensure_dir(day_dir(d))
 
-        self.db_file = db_path(d)
-        self.writer_conn = open_db(self.db_file, check_same_thread=False)
-        self.ro_conn = open_db_ro(self.db_file)
-
         self.manifest = load_manifest(d)
 
         symbols = [(r.exchange, r.tradingsymbol) for r in top_df.itertuples(index=False)]
@@ -693,6 +958,17 @@ class LiveCandleCache:
 
         log("INFO", f"Top liquid with tokens resolved: {len(self.symbols)} / {len(top_df)}")
 
+        self.store: Optional[MmapCandleStore] = None
+        self.writer_conn: Optional[sqlite3.Connection] = None
+        self.ro_conn: Optional[sqlite3.Connection] = None
+        if use_mmap_store():
+            self.store = MmapCandleStore.create_or_open(d, [sym for sym, _ in self.symbols])
+            self.db_file = self.store.data_path
+        else:
+            self.db_file = db_path(d)
+            self.writer_conn = open_db(self.db_file, check_same_thread=False)
+            self.ro_conn = open_db_ro(self.db_file)
+
         self.token_to_symbol: Dict[int, str] = {tok: sym for sym, tok in self.symbols}
         self.builders: Dict[int, CandleBuilder] = {tok: CandleBuilder() for (_, tok) in self.symbols}
 
@@ -706,7 +982,7 @@ class LiveCandleCache:
 
         self.stop_event = threading.Event()
         self.write_q: "queue.Queue[CandleRow]" = queue.Queue(maxsize=200000)
-        self.writer = CandleWriter(self.writer_conn, self.write_q, self.stop_event)
+        self.writer = CandleWriter(self.writer_conn, self.write_q, self.stop_event, store=self.store)
 
         self.backfiller = HistoricalBackfiller(
             kite=self.kite,
@@ -715,6 +991,7 @@ class LiveCandleCache:
             symbols=self.symbols,
             stop_event=self.stop_event,
             manifest=self.manifest,
+            store=self.store,
         )
 
         self.heartbeat_thread: Optional[MinuteHeartbeat] = None
@@ -745,6 +1022,14 @@ class LiveCandleCache:
     # ---------- Heartbeat helpers ----------
 
     def _bootstrap_last_state_from_db(self) -> None:
+        if self.store is not None:
+            for sym, (ts, close) in self.store.last_candles_all().items():
+                self.last_ts_by_symbol[sym] = ts
+                self.last_close_by_symbol[sym] = close
+            if HEARTBEAT_LOG:
+                log("INFO", f"[HEARTBEAT] bootstrapped {len(self.last_ts_by_symbol)} symbols from MMAP store")
+            return
+
         try:
             cur = self.ro_conn.execute("""
                 SELECT c.symbol, c.ts, c.close
@@ -783,6 +1068,8 @@ class LiveCandleCache:
             pass
 
     def _db_last_candle_for_symbol(self, sym: str) -> Optional[Tuple[datetime, float]]:
+        if self.store is not None:
+            return self.store.last_candle(sym)
         try:
             cur = self.ro_conn.execute(
                 "SELECT ts, close FROM candles WHERE symbol=? ORDER BY ts DESC LIMIT 1;",
@@ -957,7 +1244,7 @@ class LiveCandleCache:
     def start(self):
         log("STEP", f"Starting live cache for {self.d}")
         log("INFO", f"Universe CSV: {UNIVERSE_CSV}")
-        log("INFO", f"DB: {self.db_file}")
+        log("INFO", f"DB: {self.db_file} (backend={CANDLE_STORE_BACKEND})")
         self.kws.connect(threaded=False)
 
     def stop(self):
@@ -976,12 +1263,19 @@ class LiveCandleCache:
         except Exception:
             pass
         save_manifest(self.d, self.manifest)
+        if self.store is not None:
+            try:
+                self.store.flush()
+            except Exception:
+                pass
         try:
-            self.ro_conn.close()
+            if self.ro_conn is not None:
+                self.ro_conn.close()
         except Exception:
             pass
         try:
-            self.writer_conn.close()
+            if self.writer_conn is not None:
+                self.writer_conn.close()
         except Exception:
             pass
 
@@ -68,6 +68,9 @@ Use a different pickle folder:
 
 Reset already-shown history:
     python option_atm_candle_reveal_trainer.py --reset-shown-cache
+
+Re-scan every pickle instead of using the saved catalog index:
+    python option_atm_candle_reveal_trainer.py --rebuild-catalog
 """
 
 from __future__ import annotations
@@ -77,10 +80,12 @@ import glob
 import os
 import pickle
 import random
+import threading
 import time
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from datetime import date, datetime, time as dtime
-from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
 
 import numpy as np
 import pandas as pd
@@ -148,12 +153,22 @@ IGNORE_HELD_KEY_REPEAT = True
 # Random-search protection.
 MAX_RANDOM_ATTEMPTS = 350
 
-# Local cache: only shown selections. No candle data is written to disk.
+# Local cache: shown selections and the pickle-folder catalog index.
+# No candle data is written to disk.
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CACHE_DIR = os.path.join(BASE_DIR, "option_reveal_cache")
 SHOWN_CACHE_PATH = os.path.join(CACHE_DIR, "shown_option_sessions.pkl")
+CATALOG_CACHE_PATH = os.path.join(CACHE_DIR, "option_catalog_index.pkl")
+CATALOG_CACHE_VERSION = 1
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Background prefetch: number of random sessions kept ready for "New random".
+# 0 disables it. In-memory LRU sizes for prepared candles and underlying days.
+PREFETCH_DEPTH = int(os.getenv("OPTION_PREFETCH_DEPTH", "3"))
+PREFETCH_RETRY_SEC = 30
+CANDLE_LRU_SIZE = 24
+UNDERLYING_LRU_SIZE = 64
+
 TOP_RIBBON_STYLE = {
     "position": "sticky",
     "top": "0",
@@ -242,6 +257,39 @@ class Catalog:
         return out
 
 
+class LruCache:
+    """Small thread-safe LRU mapping shared by Dash callbacks and the prefetcher."""
+
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max(1, int(max_items))
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __getitem__(self, key: Any) -> Any:
+        with self._lock:
+            value = self._items[key]
+            self._items.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+
 # =============================================================================
 # CLI
 # =============================================================================
@@ -286,6 +334,17 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Clear already-shown option sessions before starting.",
     )
+    parser.add_argument(
+        "--rebuild-catalog",
+        action="store_true",
+        help="Ignore the saved catalog index and unpickle every option file again.",
+    )
+    parser.add_argument(
+        "--prefetch-depth",
+        type=int,
+        default=PREFETCH_DEPTH,
+        help=f"Random sessions prepared in the background for 'New random'. 0 disables. Default: {PREFETCH_DEPTH}",
+    )
     parser.add_argument(
         "--fail-on-pickle-error",
         action="store_true",
@@ -522,47 +581,126 @@ def normalize_option_frame_for_scan(df: pd.DataFrame, source_path: str) -> pd.Da
     return out
 
 
-def scan_option_pickles(pickle_paths: Sequence[str], fail_on_error: bool = False) -> Catalog:
-    """Pass-1 scan: identify available NIFTY/SENSEX days and nearest expiries."""
+def scan_option_file(path: str) -> Optional[Dict[str, object]]:
+    """Scan one pickle into its catalog entry, or None if it has no usable rows.
+
+    Entry keys:
+        min_day / max_day: option day range in the file
+        groups:            (underlying, day, expiry) present in the file
+        min_expiry:        (underlying, day) -> nearest expiry in the file
+    """
+    df = pd.read_pickle(path)
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        return None
+
+    d = normalize_option_frame_for_scan(df, path)
+    if d.empty:
+        return None
+
+    groups = [key for key, _g in d.groupby(["underlying", "day", "expiry_date"], sort=False)]
+    grp = d.groupby(["underlying", "day"], sort=False)["expiry_date"].min()
+    return {
+        "min_day": d["day"].min(),
+        "max_day": d["day"].max(),
+        "groups": groups,
+        "min_expiry": dict(grp.items()),
+        "option_days": int(d["day"].nunique()),
+    }
+
+
+def file_signature(path: str) -> Tuple[float, int]:
+    """(mtime, size) used to invalidate a file's catalog entry."""
+    st = os.stat(path)
+    return st.st_mtime, st.st_size
+
+
+def load_catalog_index() -> Dict[str, Dict[str, object]]:
+    """Load saved per-file catalog entries keyed by absolute pickle path."""
+    if not os.path.exists(CATALOG_CACHE_PATH):
+        return {}
+    try:
+        with open(CATALOG_CACHE_PATH, "rb") as f:
+            data = pickle.load(f)
+        if not isinstance(data, dict) or data.get("version") != CATALOG_CACHE_VERSION:
+            return {}
+        files = data.get("files", {})
+        return files if isinstance(files, dict) else {}
+    except Exception as exc:
+        print(f"[WARN] Could not read catalog index: {exc}")
+        return {}
+
+
+def save_catalog_index(files: Dict[str, Dict[str, object]]) -> None:
+    """Persist per-file catalog entries (atomic replace)."""
+    tmp = CATALOG_CACHE_PATH + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump({"version": CATALOG_CACHE_VERSION, "files": files}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, CATALOG_CACHE_PATH)
+
+
+def scan_option_pickles(
+    pickle_paths: Sequence[str],
+    fail_on_error: bool = False,
+    use_index: bool = True,
+) -> Catalog:
+    """Pass-1 scan: identify available NIFTY/SENSEX days and nearest expiries.
+
+    Per-file results are kept in CATALOG_CACHE_PATH. A file is unpickled again
+    only when its mtime/size changed, so an unchanged folder starts instantly.
+    """
     min_day_seen: Optional[date] = None
     max_day_seen: Optional[date] = None
     min_expiry_map: Dict[Tuple[str, date], date] = {}
     paths_by_key: Dict[Tuple[str, date, date], Set[str]] = {}
 
+    saved = load_catalog_index() if use_index else {}
+    index: Dict[str, Dict[str, object]] = {}
+    reused = 0
+
     for p in pickle_paths:
         try:
-            df = pd.read_pickle(p)
-            if not isinstance(df, pd.DataFrame) or df.empty:
+            abs_p = os.path.abspath(p)
+            sig = file_signature(p)
+            cached = saved.get(abs_p)
+            if cached is not None and tuple(cached["signature"]) == sig:
+                entry = cached["entry"]
+                reused += 1
+            else:
+                entry = scan_option_file(p)
+                if entry is not None:
+                    print(f"[SCAN OK] {os.path.basename(p)} option_days={entry['option_days']} groups={len(entry['min_expiry'])}")
+            index[abs_p] = {"signature": sig, "entry": entry}
+            if entry is None:
                 continue
 
-            d = normalize_option_frame_for_scan(df, p)
-            if d.empty:
-                continue
-
-            file_min = d["day"].min()
-            file_max = d["day"].max()
+            file_min = entry["min_day"]
+            file_max = entry["max_day"]
             min_day_seen = file_min if min_day_seen is None or file_min < min_day_seen else min_day_seen
             max_day_seen = file_max if max_day_seen is None or file_max > max_day_seen else max_day_seen
 
             # Map path membership for later exact day/expiry loading.
-            for (und, dy, ex), _g in d.groupby(["underlying", "day", "expiry_date"], sort=False):
+            for und, dy, ex in entry["groups"]:
                 paths_by_key.setdefault((und, dy, ex), set()).add(p)
 
             # Nearest expiry for each underlying/day.
-            grp = d.groupby(["underlying", "day"], sort=False)["expiry_date"].min()
-            for (und, dy), ex in grp.items():
-                key = (und, dy)
+            for key, ex in entry["min_expiry"].items():
                 if key not in min_expiry_map or ex < min_expiry_map[key]:
                     min_expiry_map[key] = ex
 
-            print(f"[SCAN OK] {os.path.basename(p)} option_days={d['day'].nunique()} groups={len(grp)}")
-
         except Exception as exc:
             msg = f"[SCAN WARN] {os.path.basename(p)} failed: {exc}"
             if fail_on_error:
                 raise RuntimeError(msg) from exc
             print(msg)
 
+    scanned = len(index) - reused
+    print(f"[SCAN] Catalog index: reused={reused} scanned={scanned}")
+    if scanned or len(index) != len(saved):
+        try:
+            save_catalog_index(index)
+        except Exception as exc:
+            print(f"[WARN] Could not save catalog index: {exc}")
+
     if min_day_seen is None or max_day_seen is None or not min_expiry_map:
         raise RuntimeError("No usable NIFTY/SENSEX option data found in the pickle folder.")
 
@@ -975,8 +1113,15 @@ def pick_session_with_constraints(
     fail_on_error: bool,
     instrument_cache: Dict[str, List[Dict]],
     underlying_cache: Dict[Tuple[str, date], pd.DataFrame],
+    exclude: Optional[Set[Tuple[str, str, str, int, str, str]]] = None,
+    mark_shown: bool = True,
 ) -> Tuple[OptionSelection, pd.DataFrame]:
-    """Pick a valid random/manual ATM option session."""
+    """Pick a valid random/manual ATM option session.
+
+    exclude:    extra selection keys to skip (sessions already prepared by the prefetcher)
+    mark_shown: False lets the prefetcher prepare a session without recording it;
+                it is recorded when actually displayed.
+    """
     candidates = catalog.candidates(fixed_underlying, fixed_date)
     if not candidates:
         fixed = []
@@ -1023,14 +1168,13 @@ def pick_session_with_constraints(
             failures.append(f"{und} {dy} {ex}: already shown")
             continue
 
-        mark_selection_shown(selection)
-        print(
-            f"[SELECTED] {selection.underlying} {selection.session_date} "
-            f"exp={selection.expiry_date} DTE={selection.days_to_expiry} "
-            f"open={selection.underlying_open:.2f}@{selection.underlying_open_time} "
-            f"ATM={selection.atm_strike} {selection.option_type} {selection.instrument} "
-            f"candles={len(option_df)}"
-        )
+        if exclude and selection.key() in exclude:
+            failures.append(f"{und} {dy} {ex}: already prepared")
+            continue
+
+        if mark_shown:
+            mark_selection_shown(selection)
+            log_selection(selection, option_df)
         return selection, option_df
 
     # If exact manual filter was used, it is better to show recent failures.
@@ -1043,6 +1187,75 @@ def pick_session_with_constraints(
     )
 
 
+def log_selection(selection: OptionSelection, option_df: pd.DataFrame) -> None:
+    print(
+        f"[SELECTED] {selection.underlying} {selection.session_date} "
+        f"exp={selection.expiry_date} DTE={selection.days_to_expiry} "
+        f"open={selection.underlying_open:.2f}@{selection.underlying_open_time} "
+        f"ATM={selection.atm_strike} {selection.option_type} {selection.instrument} "
+        f"candles={len(option_df)}"
+    )
+
+
+class SelectionPrefetcher:
+    """Background thread keeping the next few random sessions ready.
+
+    Each prepared item is (selection, option candles) built by the same path as
+    a click on "New random": underlying day from Kite, option pickles loaded and
+    normalised. Prepared sessions are not marked shown until take() hands one out.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[Set[Tuple[str, str, str, int, str, str]]], Tuple[OptionSelection, pd.DataFrame]],
+        depth: int,
+    ) -> None:
+        self._build = build
+        self.depth = max(0, int(depth))
+        self._ready: Deque[Tuple[OptionSelection, pd.DataFrame]] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start once; called lazily from the serving process (not the reloader parent)."""
+        if self.depth <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="option-prefetch", daemon=True)
+        self._thread.start()
+        print(f"[PREFETCH] Started, depth={self.depth}")
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while len(self._ready) >= self.depth:
+                    self._cond.wait()
+                exclude = {sel.key() for sel, _df in self._ready}
+
+            try:
+                selection, option_df = self._build(exclude)
+            except Exception as exc:
+                print(f"[PREFETCH WARN] {exc}")
+                time.sleep(PREFETCH_RETRY_SEC)
+                continue
+
+            with self._cond:
+                self._ready.append((selection, option_df))
+            print(f"[PREFETCH] Ready {len(self._ready)}/{self.depth}: {selection.underlying} {selection.session_date} {selection.instrument}")
+
+    def take(self) -> Optional[Tuple[OptionSelection, pd.DataFrame]]:
+        """Next prepared session not shown meanwhile, or None if nothing is ready."""
+        shown = load_shown_selections()
+        with self._cond:
+            item = None
+            while self._ready:
+                candidate = self._ready.popleft()
+                if candidate[0].key() not in shown:
+                    item = candidate
+                    break
+            self._cond.notify()
+        return item
+
+
 # =============================================================================
 # Plotting helpers
 # =============================================================================
@@ -1393,16 +1606,35 @@ def make_app(
     fail_on_error: bool,
     instrument_cache: Dict[str, List[Dict]],
     underlying_cache: Dict[Tuple[str, date], pd.DataFrame],
+    prefetch_depth: int = PREFETCH_DEPTH,
 ) -> Dash:
     """Create the Dash UI."""
-    candle_data_by_key: Dict[Tuple[str, str, str, int, str, str], pd.DataFrame] = {
-        initial_selection.key(): initial_df
-    }
+    candle_data_by_key = LruCache(CANDLE_LRU_SIZE)
+    candle_data_by_key[initial_selection.key()] = initial_df
+
+    # An exact manual request always resolves to the same session; nothing to prefetch.
+    exact_manual_request = fixed_underlying is not None and fixed_date is not None
+    prefetcher = SelectionPrefetcher(
+        lambda exclude: pick_session_with_constraints(
+            kite=kite,
+            catalog=catalog,
+            fixed_underlying=fixed_underlying,
+            fixed_date=fixed_date,
+            option_type_request=option_type_request,
+            fail_on_error=fail_on_error,
+            instrument_cache=instrument_cache,
+            underlying_cache=underlying_cache,
+            exclude=exclude,
+            mark_shown=False,
+        ),
+        depth=0 if exact_manual_request else prefetch_depth,
+    )
 
     def get_df_for_selection(selection: OptionSelection) -> pd.DataFrame:
-        """Get option candles from memory or reload from mapped source files."""
+        """Get option candles from the LRU or reload from mapped source files."""
         key = selection.key()
-        if key not in candle_data_by_key:
+        df = candle_data_by_key.get(key)
+        if df is None:
             day_opt = load_day_options_from_paths(
                 selection.source_files,
                 underlying=selection.underlying,
@@ -1410,13 +1642,14 @@ def make_app(
                 expiry_date=selection.expiry_date,
                 fail_on_error=fail_on_error,
             )
-            candle_data_by_key[key] = build_selected_option_candles(
+            df = build_selected_option_candles(
                 day_opt,
                 selection.atm_strike,
                 selection.option_type,
                 selection.instrument,
             )
-        return candle_data_by_key[key]
+            candle_data_by_key[key] = df
+        return df
 
     app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
     app.title = "ATM Option Candle Reveal Trainer"
@@ -1539,16 +1772,22 @@ def make_app(
     )
     def choose_new_random(_: Optional[int]) -> Dict[str, object]:
         """Choose a new session. Fixed CLI filters are respected."""
-        selection, option_df = pick_session_with_constraints(
-            kite=kite,
-            catalog=catalog,
-            fixed_underlying=fixed_underlying,
-            fixed_date=fixed_date,
-            option_type_request=option_type_request,
-            fail_on_error=fail_on_error,
-            instrument_cache=instrument_cache,
-            underlying_cache=underlying_cache,
-        )
+        prepared = prefetcher.take()
+        if prepared is not None:
+            selection, option_df = prepared
+            mark_selection_shown(selection)
+            log_selection(selection, option_df)
+        else:
+            selection, option_df = pick_session_with_constraints(
+                kite=kite,
+                catalog=catalog,
+                fixed_underlying=fixed_underlying,
+                fixed_date=fixed_date,
+                option_type_request=option_type_request,
+                fail_on_error=fail_on_error,
+                instrument_cache=instrument_cache,
+                underlying_cache=underlying_cache,
+            )
         candle_data_by_key[selection.key()] = option_df
         return selection.to_store(step=INITIAL_STEP)
 
@@ -1612,6 +1851,7 @@ def make_app(
     )
     def render_chart(store: Dict[str, object]) -> Tuple[str, go.Figure]:
         """Render status text and chart."""
+        prefetcher.start()
         if not store:
             return "No option selected.", go.Figure()
 
@@ -1660,7 +1900,11 @@ def main() -> None:
     print(f"[INFO] Fixed underlying: {fixed_underlying or 'RANDOM'}")
     print(f"[INFO] Fixed date: {fixed_date or 'RANDOM'}")
 
-    catalog = scan_option_pickles(pickle_paths, fail_on_error=args.fail_on_pickle_error)
+    catalog = scan_option_pickles(
+        pickle_paths,
+        fail_on_error=args.fail_on_pickle_error,
+        use_index=not args.rebuild_catalog,
+    )
     print(f"[INFO] Option data day-range seen: {catalog.min_day_seen} -> {catalog.max_day_seen}")
     print(f"[INFO] Candidate underlying/day groups: {len(catalog.min_expiry_map)}")
 
@@ -1669,7 +1913,7 @@ def main() -> None:
     print("[OK] Kite ready.")
 
     instrument_cache: Dict[str, List[Dict]] = {}
-    underlying_cache: Dict[Tuple[str, date], pd.DataFrame] = {}
+    underlying_cache = LruCache(UNDERLYING_LRU_SIZE)
 
     selection, option_df = pick_session_with_constraints(
         kite=kite,
@@ -1693,6 +1937,7 @@ def main() -> None:
         fail_on_error=args.fail_on_pickle_error,
         instrument_cache=instrument_cache,
         underlying_cache=underlying_cache,
+        prefetch_depth=args.prefetch_depth,
     )
 
     print("\nOpen this URL in your browser:")
@@ -1,12 +1,18 @@
 import os
 import glob
+import time
+from bisect import bisect_left, bisect_right
 import datetime as dt
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, date, time as dtime, timedelta
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Iterator, Tuple, Optional
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import webbrowser
 
 
@@ -57,6 +63,15 @@ PAGE_MAX_WIDTH_PX = 980
 # Collage count
 TOP_N = 10
 
+# ---- Scan engine ----
+# SCAN_WORKERS: 0 = auto (cpu_count - 1), 1 = serial in this process, N = process pool of N
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "0"))
+SCAN_CHUNK_SYMBOLS = int(os.getenv("SCAN_CHUNK_SYMBOLS", "16"))  # symbols per pool task
+# > 0: when scanning today, rescan every N seconds with cutoff = now (Ctrl+C to stop)
+RESCAN_INTERVAL_SEC = int(os.getenv("RESCAN_INTERVAL_SEC", "0"))
+
+PRICE_COLS = ["date", "open", "high", "low", "close", "volume"]
+
 
 # ================== LOGGING ==================
 
@@ -85,9 +100,13 @@ def parse_exchange_symbol_from_filename(path: str) -> Tuple[str, str]:
 
 def normalize_date_series(s: pd.Series, ctx: str = "") -> pd.Series:
     """
-    Convert any 'date' series into pandas datetime64[ns] (tz-naive).
-    Handles tz-aware objects safely (no deprecated checks).
+    Convert any 'date' series into pandas datetime64 (tz-naive).
+    tz-aware values keep their wall-clock time (tz dropped, not converted).
     """
+    if pd.api.types.is_datetime64_dtype(s.dtype):
+        return s
+    if isinstance(s.dtype, pd.DatetimeTZDtype):
+        return s.dt.tz_localize(None)
     s = s.astype("object")
     s = s.map(lambda x: x.replace(tzinfo=None) if isinstance(x, dt.datetime) and x.tzinfo else x)
     s = pd.to_datetime(s, errors="coerce")
@@ -129,26 +148,79 @@ def to_ist_naive(df: pd.DataFrame, session_date: date) -> pd.DataFrame:
     return df
 
 
+# Footer facts per file: (mtime, metadata, date column index, arrow type, per-row-group raw min/max).
+# Kept per process, so repeated intraday rescans skip footer parsing.
+_DATE_INDEX_CACHE: Dict[str, Tuple[float, object, int, pa.DataType, List[Tuple[Optional[int], Optional[int]]]]] = {}
+
+
+def _date_row_group_index(path: str):
+    mtime = os.path.getmtime(path)
+    cached = _DATE_INDEX_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached
+
+    meta = pq.read_metadata(path)
+    arrow_schema = meta.schema.to_arrow_schema()
+    col = arrow_schema.get_field_index("date")
+    dtype = arrow_schema.field(col).type if col >= 0 else None
+    ranges: List[Tuple[Optional[int], Optional[int]]] = []
+    if dtype is not None and pa.types.is_timestamp(dtype):
+        for g in range(meta.num_row_groups):
+            st = meta.row_group(g).column(col).statistics
+            if st is None or not st.has_min_max or not isinstance(st.min_raw, int):
+                ranges.append((None, None))  # INT96 / no stats: must read
+            else:
+                ranges.append((st.min_raw, st.max_raw))
+    entry = (mtime, meta, col, dtype, ranges)
+    _DATE_INDEX_CACHE[path] = entry
+    return entry
+
+
+def _raw_time(dtype: pa.DataType, value: datetime) -> int:
+    """Wall-clock datetime -> stored int64 of a timestamp column (unit, tz aware)."""
+    ts = pd.Timestamp(value)
+    if dtype.tz is not None:
+        ts = ts.tz_localize(dtype.tz).tz_convert("UTC").tz_localize(None)
+    return (ts - pd.Timestamp(0)) // pd.Timedelta(1, unit=dtype.unit)
+
+
+def read_date_range(path: str, start_dt: datetime, end_dt: datetime, end_inclusive: bool) -> pd.DataFrame:
+    """
+    Predicate pushdown on the 'date' column:
+      only row groups whose footer min/max overlap [start, end] are read,
+      then rows are filtered in Arrow before conversion to pandas.
+    Files without a timestamp 'date' column are read whole (caller filters).
+    """
+    _, meta, col, dtype, ranges = _date_row_group_index(path)
+    if dtype is None or not pa.types.is_timestamp(dtype):
+        return pd.read_parquet(path, columns=PRICE_COLS, engine="pyarrow")
+
+    lo = _raw_time(dtype, start_dt)
+    hi = _raw_time(dtype, end_dt)
+    groups = [
+        g for g, (mn, mx) in enumerate(ranges)
+        if mn is None or (mx >= lo and (mn <= hi if end_inclusive else mn < hi))
+    ]
+    if not groups:
+        return pd.DataFrame(columns=PRICE_COLS)
+
+    table = pq.ParquetFile(path, metadata=meta).read_row_groups(groups, columns=PRICE_COLS)
+    raw = table.column("date").cast(pa.int64())
+    upper = pc.less_equal(raw, hi) if end_inclusive else pc.less(raw, hi)
+    table = table.filter(pc.and_(pc.greater_equal(raw, lo), upper))
+    return table.to_pandas()
+
+
 def read_symbol_window(path: str, start_dt: datetime, end_dt: datetime, session_date_for_tz: date) -> pd.DataFrame:
     """
-    Read only a small window from a large per-stock Parquet using filters (pyarrow).
+    Read only a small window from a large per-stock Parquet (row-group pushdown).
     Big speed win vs reading full 3-year file.
     """
-    cols = ["date", "open", "high", "low", "close", "volume"]
-
     try:
-        df = pd.read_parquet(
-            path,
-            columns=cols,
-            engine="pyarrow",
-            filters=[
-                ("date", ">=", start_dt),
-                ("date", "<=", end_dt),
-            ],
-        )
+        df = read_date_range(path, start_dt, end_dt, end_inclusive=True)
     except Exception:
-        # Fallback to full read if filters fail in your environment
-        df = pd.read_parquet(path, columns=cols, engine="pyarrow")
+        # Fallback to full read if pushdown fails in your environment
+        df = pd.read_parquet(path, columns=PRICE_COLS, engine="pyarrow")
 
     df = df.copy()
     df["date"] = normalize_date_series(df["date"], ctx=f"read_symbol_window {os.path.basename(path)}")
@@ -162,21 +234,15 @@ def read_symbol_window(path: str, start_dt: datetime, end_dt: datetime, session_
 
 def read_symbol_day(path: str, session_date: date) -> pd.DataFrame:
     """
-    Efficiently read only the session date data (using filters), then normalize to IST-naive.
+    Efficiently read only the session date data (row-group pushdown), then normalize to IST-naive.
     """
-    cols = ["date", "open", "high", "low", "close", "volume"]
     start_dt = datetime.combine(session_date, dtime(0, 0))
     end_dt = datetime.combine(session_date + timedelta(days=1), dtime(0, 0))
 
     try:
-        df = pd.read_parquet(
-            path,
-            columns=cols,
-            engine="pyarrow",
-            filters=[("date", ">=", start_dt), ("date", "<", end_dt)],
-        )
+        df = read_date_range(path, start_dt, end_dt, end_inclusive=False)
     except Exception:
-        df = pd.read_parquet(path, columns=cols, engine="pyarrow")
+        df = pd.read_parquet(path, columns=PRICE_COLS, engine="pyarrow")
 
     if df.empty:
         return df
@@ -334,35 +400,87 @@ def _swing_points_from_smooth(x: np.ndarray, roll: int = 5) -> Tuple[List[int],
         return [], []
 
     s = pd.Series(x).rolling(roll, center=True, min_periods=max(2, roll // 2)).mean().to_numpy()
-    mins, maxs = [], []
-    for i in range(2, len(s) - 2):
-        if np.isnan(s[i - 2:i + 3]).any():
-            continue
-        if s[i] < s[i - 1] and s[i] < s[i + 1] and s[i] <= s[i - 2] and s[i] <= s[i + 2]:
-            mins.append(i)
-        if s[i] > s[i - 1] and s[i] > s[i + 1] and s[i] >= s[i - 2] and s[i] >= s[i + 2]:
-            maxs.append(i)
-    return mins, maxs
+    n = len(s)
+    # 5-bar neighbourhood around each i in [2, n-2), skipped if any value is NaN
+    l2, l1, c, r1, r2 = (s[k:n - 4 + k] for k in range(5))
+    nan = np.isnan(s)
+    valid = ~(nan[:n - 4] | nan[1:n - 3] | nan[2:n - 2] | nan[3:n - 1] | nan[4:])
+    mins = np.flatnonzero(valid & (c < l1) & (c < r1) & (c <= l2) & (c <= r2)) + 2
+    maxs = np.flatnonzero(valid & (c > l1) & (c > r1) & (c >= l2) & (c >= r2)) + 2
+    return mins.tolist(), maxs.tolist()
 
 
-def _dedup_occurrences(occ: List[Dict], new: Dict) -> bool:
+def _dedup_occurrences(by_p2: Dict[int, List[Dict]], new: Dict) -> bool:
     """
     Return True if 'new' is a near-duplicate of an existing occurrence.
     Duplicate heuristic: same type, p2 within 3 bars, level within tolerance band.
+    Occurrences are indexed by p2_idx, so only the 7 neighbouring p2 slots are checked;
+    a kept occurrence must be added with _index_occurrence().
     """
     typ = new["type"]
     p2 = new["p2_idx"]
     level = new["level"]
-    for o in occ:
-        if o["type"] != typ:
-            continue
-        if abs(o["p2_idx"] - p2) <= 3:
+    for k in range(p2 - 3, p2 + 4):
+        for o in by_p2.get(k, ()):
+            if o["type"] != typ:
+                continue
             # level closeness measured as % of level
             if abs(o["level"] - level) / max(level, 1e-9) * 100.0 <= BOTTOM_TOP_TOL_PCT:
                 return True
     return False
 
 
+def _index_occurrence(by_p2: Dict[int, List[Dict]], occ: Dict):
+    by_p2.setdefault(occ["p2_idx"], []).append(occ)
+
+
+def _candidate_pairs(swings: List[int], prices: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Swing pairs (a, b) that can pass the separation and bottom/top tolerance checks,
+    in the same order as the nested i < j loop (a ascending, then b ascending).
+
+    Separation: swings are sorted, so partners of a lie in one bisect window.
+    Tolerance: |p2 - p1| / mean <= T%  <=>  |ln(p2 / p1)| <= ln((200 + T) / (200 - T)),
+    so with log-price buckets of that width a partner is always in the same or an
+    adjacent bucket. Callers still apply the exact tolerance formula.
+    """
+    if len(swings) < 2:
+        return []
+
+    t = BOTTOM_TOP_TOL_PCT
+    width = np.log((200.0 + t) / (200.0 - t)) * (1.0 + 1e-9) if 0.0 < t < 200.0 else 0.0
+
+    # bucket -> positions into `swings` (ascending); non-positive prices never pass
+    buckets: Dict[int, List[int]] = {}
+    keys: List[Optional[int]] = []
+    for pos, idx in enumerate(swings):
+        px = float(prices[idx])
+        if px <= 0:
+            keys.append(None)
+            continue
+        key = int(np.floor(np.log(px) / width)) if width > 0 else 0
+        keys.append(key)
+        buckets.setdefault(key, []).append(pos)
+
+    pairs: List[Tuple[int, int]] = []
+    for i, a in enumerate(swings):
+        key = keys[i]
+        if key is None:
+            continue
+        lo = bisect_left(swings, a + MIN_SEP_BARS, i + 1)
+        hi = bisect_right(swings, a + MAX_SEP_BARS, lo)
+        if lo >= hi:
+            continue
+        partners: List[int] = []
+        for k in (key - 1, key, key + 1) if width > 0 else (key,):
+            members = buckets.get(k)
+            if members:
+                partners.extend(members[bisect_left(members, lo):bisect_left(members, hi)])
+        partners.sort()
+        pairs.extend((a, swings[j]) for j in partners)
+    return pairs
+
+
 def _quality_score(depth_or_height_avg: float, tol: float, dist_to_level_pct: float) -> float:
     """
     Higher is better quality; we will store score = -quality for sorting ascending.
@@ -388,109 +506,96 @@ def detect_best_WM_in_last_window(df_day_upto: pd.DataFrame, window: int) -> Opt
     best: Optional[Dict] = None
 
     # --- W candidates ---
-    if len(mins) >= 2:
-        for i in range(len(mins) - 1):
-            for j in range(i + 1, len(mins)):
-                a, b = mins[i], mins[j]
-                sep = b - a
-                if sep < MIN_SEP_BARS or sep > MAX_SEP_BARS:
-                    continue
-                b1, b2 = float(lows[a]), float(lows[b])
-                if b1 <= 0 or b2 <= 0:
-                    continue
-                tol = abs(b2 - b1) / ((b1 + b2) / 2.0) * 100.0
-                if tol > BOTTOM_TOP_TOL_PCT:
-                    continue
-
-                seg_highs = highs[a:b + 1]
-                level = float(np.max(seg_highs))
-                level_idx = a + int(np.argmax(seg_highs))
-
-                depth1 = (level - b1) / level * 100.0
-                depth2 = (level - b2) / level * 100.0
-                if min(depth1, depth2) < MIN_DEPTH_PCT:
-                    continue
-
-                post = closes[b:]
-                if len(post) < 3:
-                    continue
-                post_max = float(np.max(post))
-                rebound_pct = (post_max - b2) / max(b2, 1e-9) * 100.0
-                if rebound_pct < MIN_REBOUND_PCT:
-                    continue
-
-                dist_to_level_pct = abs(last_close - level) / level * 100.0
-                forming_ok = (last_close >= level) or (dist_to_level_pct <= FORMING_MAX_DIST_TO_LEVEL_PCT)
-                if not forming_ok:
-                    continue
-
-                q = _quality_score((depth1 + depth2) / 2.0, tol, dist_to_level_pct)
-                cand = {
-                    "type": "W",
-                    "score": -q,
-                    "tie": dist_to_level_pct,
-                    "level": level,
-                    "dist_to_level_pct": dist_to_level_pct,
-                    "tol_pct": tol,
-                    "p1_idx": a,
-                    "p2_idx": b,
-                    "level_idx": level_idx,
-                }
-                if best is None or (cand["score"], cand["tie"]) < (best["score"], best["tie"]):
-                    best = cand
+    for a, b in _candidate_pairs(mins, lows):
+        b1, b2 = float(lows[a]), float(lows[b])
+        if b1 <= 0 or b2 <= 0:
+            continue
+        tol = abs(b2 - b1) / ((b1 + b2) / 2.0) * 100.0
+        if tol > BOTTOM_TOP_TOL_PCT:
+            continue
+
+        seg_highs = highs[a:b + 1]
+        level = float(np.max(seg_highs))
+        level_idx = a + int(np.argmax(seg_highs))
+
+        depth1 = (level - b1) / level * 100.0
+        depth2 = (level - b2) / level * 100.0
+        if min(depth1, depth2) < MIN_DEPTH_PCT:
+            continue
+
+        post = closes[b:]
+        if len(post) < 3:
+            continue
+        post_max = float(np.max(post))
+        rebound_pct = (post_max - b2) / max(b2, 1e-9) * 100.0
+        if rebound_pct < MIN_REBOUND_PCT:
+            continue
+
+        dist_to_level_pct = abs(last_close - level) / level * 100.0
+        forming_ok = (last_close >= level) or (dist_to_level_pct <= FORMING_MAX_DIST_TO_LEVEL_PCT)
+        if not forming_ok:
+            continue
+
+        q = _quality_score((depth1 + depth2) / 2.0, tol, dist_to_level_pct)
+        cand = {
+            "type": "W",
+            "score": -q,
+            "tie": dist_to_level_pct,
+            "level": level,
+            "dist_to_level_pct": dist_to_level_pct,
+            "tol_pct": tol,
+            "p1_idx": a,
+            "p2_idx": b,
+            "level_idx": level_idx,
+        }
+        if best is None or (cand["score"], cand["tie"]) < (best["score"], best["tie"]):
+            best = cand
 
     # --- M candidates ---
-    if len(maxs) >= 2:
-        maxs2 = maxs
-        for i in range(len(maxs2) - 1):
-            for j in range(i + 1, len(maxs2)):
-                a, b = maxs2[i], maxs2[j]
-                sep = b - a
-                if sep < MIN_SEP_BARS or sep > MAX_SEP_BARS:
-                    continue
-                t1, t2 = float(highs[a]), float(highs[b])
-                if t1 <= 0 or t2 <= 0:
-                    continue
-                tol = abs(t2 - t1) / ((t1 + t2) / 2.0) * 100.0
-                if tol > BOTTOM_TOP_TOL_PCT:
-                    continue
-
-                seg_lows = lows[a:b + 1]
-                level = float(np.min(seg_lows))   # trough level
-                level_idx = a + int(np.argmin(seg_lows))
-
-                height1 = (t1 - level) / max(level, 1e-9) * 100.0
-                height2 = (t2 - level) / max(level, 1e-9) * 100.0
-                if min(height1, height2) < MIN_HEIGHT_PCT:
-                    continue
-
-                post = closes[b:]
-                if len(post) < 3:
-                    continue
-                post_min = float(np.min(post))
-                drop_pct = (t2 - post_min) / max(t2, 1e-9) * 100.0
-                if drop_pct < MIN_REBOUND_PCT:
-                    continue
-
-                dist_to_level_pct = abs(last_close - level) / max(level, 1e-9) * 100.0
-                forming_ok = (last_close <= level) or (dist_to_level_pct <= FORMING_MAX_DIST_TO_LEVEL_PCT)
-                if not forming_ok:
-                    continue
-
-                q = _quality_score((height1 + height2) / 2.0, tol, dist_to_level_pct)
-                cand = {
-                    "type": "M",
-                    "score": -q,
-                    "tie": dist_to_level_pct,
-                    "level": level,
-                    "dist_to_level_pct": dist_to_level_pct,
-                    "tol_pct": tol,
-                    "p1_idx": a,
-                    "p2_idx": b,
-                    "level_idx": level_idx,
-                }
-                if best is None or (cand["score"], cand["tie"]) < (best["score"], best["tie"]):
-                    best = cand
+    for a, b in _candidate_pairs(maxs, highs):
+        t1, t2 = float(highs[a]), float(highs[b])
+        if t1 <= 0 or t2 <= 0:
+            continue
+        tol = abs(t2 - t1) / ((t1 + t2) / 2.0) * 100.0
+        if tol > BOTTOM_TOP_TOL_PCT:
+            continue
+
+        seg_lows = lows[a:b + 1]
+        level = float(np.min(seg_lows))   # trough level
+        level_idx = a + int(np.argmin(seg_lows))
+
+        height1 = (t1 - level) / max(level, 1e-9) * 100.0
+        height2 = (t2 - level) / max(level, 1e-9) * 100.0
+        if min(height1, height2) < MIN_HEIGHT_PCT:
+            continue
+
+        post = closes[b:]
+        if len(post) < 3:
+            continue
+        post_min = float(np.min(post))
+        drop_pct = (t2 - post_min) / max(t2, 1e-9) * 100.0
+        if drop_pct < MIN_REBOUND_PCT:
+            continue
+
+        dist_to_level_pct = abs(last_close - level) / max(level, 1e-9) * 100.0
+        forming_ok = (last_close <= level) or (dist_to_level_pct <= FORMING_MAX_DIST_TO_LEVEL_PCT)
+        if not forming_ok:
+            continue
+
+        q = _quality_score((height1 + height2) / 2.0, tol, dist_to_level_pct)
+        cand = {
+            "type": "M",
+            "score": -q,
+            "tie": dist_to_level_pct,
+            "level": level,
+            "dist_to_level_pct": dist_to_level_pct,
+            "tol_pct": tol,
+            "p1_idx": a,
+            "p2_idx": b,
+            "level_idx": level_idx,
+        }
+        if best is None or (cand["score"], cand["tie"]) < (best["score"], best["tie"]):
+            best = cand
 
     return best
 
@@ -513,120 +618,109 @@ def detect_all_WM_in_day(df_day_upto: pd.DataFrame) -> List[Dict]:
     mins2, maxs2 = mins, _swing_points_from_smooth(highs, roll=SMOOTH_ROLL)[1]
 
     occ: List[Dict] = []
+    by_p2: Dict[int, List[Dict]] = {}
 
     # --- W occurrences ---
-    if len(mins2) >= 2:
-        for i in range(len(mins2) - 1):
-            for j in range(i + 1, len(mins2)):
-                a, b = mins2[i], mins2[j]
-                sep = b - a
-                if sep < MIN_SEP_BARS or sep > MAX_SEP_BARS:
-                    continue
-
-                b1, b2 = float(lows[a]), float(lows[b])
-                if b1 <= 0 or b2 <= 0:
-                    continue
-                tol = abs(b2 - b1) / ((b1 + b2) / 2.0) * 100.0
-                if tol > BOTTOM_TOP_TOL_PCT:
-                    continue
-
-                seg_highs = highs[a:b + 1]
-                level = float(np.max(seg_highs))  # neckline
-                level_idx = a + int(np.argmax(seg_highs))
-
-                depth1 = (level - b1) / level * 100.0
-                depth2 = (level - b2) / level * 100.0
-                if min(depth1, depth2) < MIN_DEPTH_PCT:
-                    continue
-
-                end = min(b + PATTERN_D_LOOKAHEAD, len(closes) - 1)
-                post = closes[b:end + 1]
-                if len(post) < 3:
-                    continue
-
-                post_max = float(np.max(post))
-                rebound_pct = (post_max - b2) / max(b2, 1e-9) * 100.0
-                if rebound_pct < MIN_REBOUND_PCT:
-                    continue
-
-                close_eval = float(closes[end])
-                dist_to_level_pct = abs(close_eval - level) / level * 100.0
-                forming_ok = (post_max >= level) or (dist_to_level_pct <= FORMING_MAX_DIST_TO_LEVEL_PCT)
-                if not forming_ok:
-                    continue
-
-                q = _quality_score((depth1 + depth2) / 2.0, tol, dist_to_level_pct)
-                new = {
-                    "type": "W",
-                    "score": -q,
-                    "tie": dist_to_level_pct,
-                    "level": level,
-                    "dist_to_level_pct": dist_to_level_pct,
-                    "tol_pct": tol,
-                    "p1_idx": a,
-                    "p2_idx": b,
-                    "level_idx": level_idx,
-                    "eval_end_idx": end,
-                }
-                if not _dedup_occurrences(occ, new):
-                    occ.append(new)
+    for a, b in _candidate_pairs(mins2, lows):
+        b1, b2 = float(lows[a]), float(lows[b])
+        if b1 <= 0 or b2 <= 0:
+            continue
+        tol = abs(b2 - b1) / ((b1 + b2) / 2.0) * 100.0
+        if tol > BOTTOM_TOP_TOL_PCT:
+            continue
+
+        seg_highs = highs[a:b + 1]
+        level = float(np.max(seg_highs))  # neckline
+        level_idx = a + int(np.argmax(seg_highs))
+
+        depth1 = (level - b1) / level * 100.0
+        depth2 = (level - b2) / level * 100.0
+        if min(depth1, depth2) < MIN_DEPTH_PCT:
+            continue
+
+        end = min(b + PATTERN_D_LOOKAHEAD, len(closes) - 1)
+        post = closes[b:end + 1]
+        if len(post) < 3:
+            continue
+
+        post_max = float(np.max(post))
+        rebound_pct = (post_max - b2) / max(b2, 1e-9) * 100.0
+        if rebound_pct < MIN_REBOUND_PCT:
+            continue
+
+        close_eval = float(closes[end])
+        dist_to_level_pct = abs(close_eval - level) / level * 100.0
+        forming_ok = (post_max >= level) or (dist_to_level_pct <= FORMING_MAX_DIST_TO_LEVEL_PCT)
+        if not forming_ok:
+            continue
+
+        q = _quality_score((depth1 + depth2) / 2.0, tol, dist_to_level_pct)
+        new = {
+            "type": "W",
+            "score": -q,
+            "tie": dist_to_level_pct,
+            "level": level,
+            "dist_to_level_pct": dist_to_level_pct,
+            "tol_pct": tol,
+            "p1_idx": a,
+            "p2_idx": b,
+            "level_idx": level_idx,
+            "eval_end_idx": end,
+        }
+        if not _dedup_occurrences(by_p2, new):
+            occ.append(new)
+            _index_occurrence(by_p2, new)
 
     # --- M occurrences ---
-    if len(maxs2) >= 2:
-        for i in range(len(maxs2) - 1):
-            for j in range(i + 1, len(maxs2)):
-                a, b = maxs2[i], maxs2[j]
-                sep = b - a
-                if sep < MIN_SEP_BARS or sep > MAX_SEP_BARS:
-                    continue
-
-                t1, t2 = float(highs[a]), float(highs[b])
-                if t1 <= 0 or t2 <= 0:
-                    continue
-                tol = abs(t2 - t1) / ((t1 + t2) / 2.0) * 100.0
-                if tol > BOTTOM_TOP_TOL_PCT:
-                    continue
-
-                seg_lows = lows[a:b + 1]
-                level = float(np.min(seg_lows))  # trough
-                level_idx = a + int(np.argmin(seg_lows))
-
-                height1 = (t1 - level) / max(level, 1e-9) * 100.0
-                height2 = (t2 - level) / max(level, 1e-9) * 100.0
-                if min(height1, height2) < MIN_HEIGHT_PCT:
-                    continue
-
-                end = min(b + PATTERN_D_LOOKAHEAD, len(closes) - 1)
-                post = closes[b:end + 1]
-                if len(post) < 3:
-                    continue
-
-                post_min = float(np.min(post))
-                drop_pct = (t2 - post_min) / max(t2, 1e-9) * 100.0
-                if drop_pct < MIN_REBOUND_PCT:
-                    continue
-
-                close_eval = float(closes[end])
-                dist_to_level_pct = abs(close_eval - level) / max(level, 1e-9) * 100.0
-                forming_ok = (post_min <= level) or (dist_to_level_pct <= FORMING_MAX_DIST_TO_LEVEL_PCT)
-                if not forming_ok:
-                    continue
-
-                q = _quality_score((height1 + height2) / 2.0, tol, dist_to_level_pct)
-                new = {
-                    "type": "M",
-                    "score": -q,
-                    "tie": dist_to_level_pct,
-                    "level": level,
-                    "dist_to_level_pct": dist_to_level_pct,
-                    "tol_pct": tol,
-                    "p1_idx": a,
-                    "p2_idx": b,
-                    "level_idx": level_idx,
-                    "eval_end_idx": end,
-                }
-                if not _dedup_occurrences(occ, new):
-                    occ.append(new)
+    for a, b in _candidate_pairs(maxs2, highs):
+        t1, t2 = float(highs[a]), float(highs[b])
+        if t1 <= 0 or t2 <= 0:
+            continue
+        tol = abs(t2 - t1) / ((t1 + t2) / 2.0) * 100.0
+        if tol > BOTTOM_TOP_TOL_PCT:
+            continue
+
+        seg_lows = lows[a:b + 1]
+        level = float(np.min(seg_lows))  # trough
+        level_idx = a + int(np.argmin(seg_lows))
+
+        height1 = (t1 - level) / max(level, 1e-9) * 100.0
+        height2 = (t2 - level) / max(level, 1e-9) * 100.0
+        if min(height1, height2) < MIN_HEIGHT_PCT:
+            continue
+
+        end = min(b + PATTERN_D_LOOKAHEAD, len(closes) - 1)
+        post = closes[b:end + 1]
+        if len(post) < 3:
+            continue
+
+        post_min = float(np.min(post))
+        drop_pct = (t2 - post_min) / max(t2, 1e-9) * 100.0
+        if drop_pct < MIN_REBOUND_PCT:
+            continue
+
+        close_eval = float(closes[end])
+        dist_to_level_pct = abs(close_eval - level) / max(level, 1e-9) * 100.0
+        forming_ok = (post_min <= level) or (dist_to_level_pct <= FORMING_MAX_DIST_TO_LEVEL_PCT)
+        if not forming_ok:
+            continue
+
+        q = _quality_score((height1 + height2) / 2.0, tol, dist_to_level_pct)
+        new = {
+            "type": "M",
+            "score": -q,
+            "tie": dist_to_level_pct,
+            "level": level,
+            "dist_to_level_pct": dist_to_level_pct,
+            "tol_pct": tol,
+            "p1_idx": a,
+            "p2_idx": b,
+            "level_idx": level_idx,
+            "eval_end_idx": end,
+        }
+        if not _dedup_occurrences(by_p2, new):
+            occ.append(new)
+            _index_occurrence(by_p2, new)
 
     # Sort by best quality first
     occ = sorted(occ, key=lambda r: (r["score"], r["tie"]))
@@ -778,7 +872,8 @@ def pattern_hint_text() -> str:
     )
 
 
-def build_collage_html(top_results: List[Dict], session_date: date, cutoff_dt: datetime, out_path: str, pattern_type: str):
+def build_collage_html(top_results: List[Dict], session_date: date, cutoff_dt: datetime, out_path: str, pattern_type: str,
+                       open_browser: bool = True):
     if not top_results:
         log("WARN", "No results to plot.")
         return
@@ -930,124 +1025,157 @@ body {{ font-family: Arial, sans-serif; }}
 
     abs_path = os.path.abspath(out_path)
     log("INFO", f"Saved collage HTML: {abs_path}")
+    if not open_browser:
+        return
     try:
         webbrowser.open(f"file:///{abs_path.replace(os.sep, '/')}")
     except Exception:
         pass
 
 
-# ================== MAIN ==================
-
-def main():
-    date_str = input("Enter analysis date (YYYY-MM-DD): ").strip()
-    time_str = input("Enter cutoff time (HH:MM, IST) [default 15:30]: ").strip() or "15:30"
-    pattern_type = input("Enter pattern type (A / B / C / D): ").strip().upper()
+# ================== SCAN ENGINE ==================
 
-    if pattern_type not in ("A", "B", "C", "D"):
-        log("ERROR", "Pattern type must be A, B, C or D.")
-        return
+def scan_symbol(path: str, pattern_type: str, session_date: date, cutoff_dt: datetime) -> Optional[Dict]:
+    """Read one symbol's session (plus pivot lookback for B) and run the chosen detector."""
+    ex, ts = parse_exchange_symbol_from_filename(path)
 
-    session_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-    cutoff_time = datetime.strptime(time_str, "%H:%M").time()
-    cutoff_dt = datetime.combine(session_date, cutoff_time)
+    if pattern_type == "B":
+        win_start = datetime.combine(session_date - timedelta(days=LOOKBACK_DAYS_FOR_PIVOT), dtime(0, 0))
+        win_end = datetime.combine(session_date + timedelta(days=1), dtime(0, 0))
+        df_win = read_symbol_window(path, win_start, win_end, session_date)
+        df_day = df_win[df_win["date"].dt.date == session_date].copy()
+        if df_day.empty:
+            return None
+        df_day = df_day.sort_values("date")
+        df_upto = df_day[df_day["date"] <= cutoff_dt].copy()
+        if df_upto.empty:
+            return None
+
+        piv = compute_pivots_from_prev_day(df_win, session_date)
+        if not piv:
+            return None
+        pr = detect_pattern_B(df_upto, piv)
+        if pr:
+            pr.update({"exchange": ex, "symbol": ts, "path": path})
+        return pr
+
+    df_day = read_symbol_day(path, session_date)
+    if df_day.empty:
+        return None
+    df_upto = df_day[df_day["date"] <= cutoff_dt].copy()
+    if df_upto.empty:
+        return None
 
-    files = list_parquet_files()
-    log("STEP", f"Found {len(files)} Parquet files.")
-    log("STEP", f"Scanning pattern {pattern_type} for {session_date} till {cutoff_dt.strftime('%H:%M')}")
+    if pattern_type == "A":
+        pr = detect_pattern_A(df_upto)
+        if pr:
+            pr.update({"exchange": ex, "symbol": ts, "path": path})
+        return pr
+
+    if pattern_type == "C":
+        pr = detect_best_WM_in_last_window(df_upto, PATTERN_C_WINDOW)
+        if pr:
+            pr.update({"exchange": ex, "symbol": ts, "path": path})
+            # store for plotting (full-day uses only one best, so keep occ list as [best])
+            pr["wm_occ"] = [pr]
+        return pr
+
+    occ = detect_all_WM_in_day(df_upto)
+    if not occ:
+        return None
+    best = occ[0]
+    # rank by best quality, then by more patterns
+    return {
+        "exchange": ex,
+        "symbol": ts,
+        "path": path,
+        "score": float(best["score"]),
+        "tie": float(best["tie"]),
+        "wm_occ": occ,  # all occurrences for full-day chart
+        "w_count": sum(1 for o in occ if o["type"] == "W"),
+        "m_count": sum(1 for o in occ if o["type"] == "M"),
+    }
 
-    # For B, precompute window bounds once
-    win_start_B = datetime.combine(session_date - timedelta(days=LOOKBACK_DAYS_FOR_PIVOT), dtime(0, 0))
-    win_end_B = datetime.combine(session_date + timedelta(days=1), dtime(0, 0))
 
+def _scan_chunk(paths: List[str], pattern_type: str, session_date: date,
+                cutoff_dt: datetime) -> Tuple[List[Dict], List[str]]:
+    """Pool task: scan a batch of symbols, returning matches and error lines (logged by the parent)."""
     results: List[Dict] = []
-    scanned = 0
-
-    for path in files:
-        ex, ts = parse_exchange_symbol_from_filename(path)
-        tag = f"{ex}:{ts}"
-
+    errors: List[str] = []
+    for path in paths:
         try:
-            if pattern_type == "B":
-                df_win = read_symbol_window(path, win_start_B, win_end_B, session_date)
-                df_day = df_win[df_win["date"].dt.date == session_date].copy()
-                if df_day.empty:
-                    continue
-                df_day = df_day.sort_values("date")
-                df_upto = df_day[df_day["date"] <= cutoff_dt].copy()
-                if df_upto.empty:
-                    continue
-
-                piv = compute_pivots_from_prev_day(df_win, session_date)
-                if not piv:
-                    continue
-                pr = detect_pattern_B(df_upto, piv)
-                if pr:
-                    pr.update({"exchange": ex, "symbol": ts, "path": path})
-                    results.append(pr)
+            pr = scan_symbol(path, pattern_type, session_date, cutoff_dt)
+            if pr:
+                results.append(pr)
+        except Exception as e:
+            ex, ts = parse_exchange_symbol_from_filename(path)
+            errors.append(f"{ex}:{ts}: failed: {e}")
+    return results, errors
 
-            else:
-                df_day = read_symbol_day(path, session_date)
-                if df_day.empty:
-                    continue
-                df_upto = df_day[df_day["date"] <= cutoff_dt].copy()
-                if df_upto.empty:
-                    continue
-
-                if pattern_type == "A":
-                    pr = detect_pattern_A(df_upto)
-                    if pr:
-                        pr.update({"exchange": ex, "symbol": ts, "path": path})
-                        results.append(pr)
-
-                elif pattern_type == "C":
-                    pr = detect_best_WM_in_last_window(df_upto, PATTERN_C_WINDOW)
-                    if pr:
-                        pr.update({"exchange": ex, "symbol": ts, "path": path})
-                        # store for plotting (full-day uses only one best, so keep occ list as [best])
-                        pr["wm_occ"] = [pr]
-                        results.append(pr)
-
-                elif pattern_type == "D":
-                    occ = detect_all_WM_in_day(df_upto)
-                    if not occ:
-                        continue
-                    best = occ[0]
-                    # rank by best quality, then by more patterns
-                    pr = {
-                        "exchange": ex,
-                        "symbol": ts,
-                        "path": path,
-                        "score": float(best["score"]),
-                        "tie": float(best["tie"]),
-                        "wm_occ": occ,  # all occurrences for full-day chart
-                        "w_count": sum(1 for o in occ if o["type"] == "W"),
-                        "m_count": sum(1 for o in occ if o["type"] == "M"),
-                    }
-                    results.append(pr)
 
-        except Exception as e:
-            log("ERROR", f"{tag}: failed: {e}")
+def scan_workers() -> int:
+    if SCAN_WORKERS > 0:
+        return SCAN_WORKERS
+    return max(1, (os.cpu_count() or 2) - 1)
 
-        scanned += 1
-        if scanned % 50 == 0:
-            log("STEP", f"Scanned {scanned}/{len(files)}; matches so far: {len(results)}")
 
-    if not results:
-        log("WARN", "No matches found.")
-        return
+def scan_universe(files: List[str], pattern_type: str, session_date: date, cutoff_dt: datetime,
+                  pool: Optional[ProcessPoolExecutor] = None) -> Iterator[Dict]:
+    """
+    Yield matches as soon as each chunk of symbols is scanned.
+    pool=None scans serially in this process (SCAN_WORKERS=1).
+    """
+    chunks = [files[i:i + SCAN_CHUNK_SYMBOLS] for i in range(0, len(files), SCAN_CHUNK_SYMBOLS)]
+    scanned = 0
+    matches = 0
+    next_report = 50
 
+    if pool is None:
+        done = (_scan_chunk(c, pattern_type, session_date, cutoff_dt) + (len(c),) for c in chunks)
+    else:
+        futs = {pool.submit(_scan_chunk, c, pattern_type, session_date, cutoff_dt): len(c) for c in chunks}
+        done = (fut.result() + (futs[fut],) for fut in as_completed(futs))
+
+    for results, errors, n in done:
+        for line in errors:
+            log("ERROR", line)
+        for pr in results:
+            matches += 1
+            yield pr
+        scanned += n
+        if scanned >= next_report:
+            log("STEP", f"Scanned {scanned}/{len(files)}; matches so far: {matches}")
+            next_report = (scanned // 50 + 1) * 50
+
+
+def rank_results(results: List[Dict], pattern_type: str) -> List[Dict]:
     # Sort results per pattern
     if pattern_type == "A":
-        results_sorted = sorted(results, key=lambda r: (r["score"], r["tie"]))
-    elif pattern_type == "B":
-        results_sorted = sorted(results, key=lambda r: (r["score"], r["tie1"], r["tie2"]))
-    elif pattern_type == "C":
-        results_sorted = sorted(results, key=lambda r: (r["score"], r["tie"]))
-    else:
-        # D: best score first, then more total patterns
-        results_sorted = sorted(results, key=lambda r: (r["score"], -(r["w_count"] + r["m_count"]), r["tie"]))
+        return sorted(results, key=lambda r: (r["score"], r["tie"]))
+    if pattern_type == "B":
+        return sorted(results, key=lambda r: (r["score"], r["tie1"], r["tie2"]))
+    if pattern_type == "C":
+        return sorted(results, key=lambda r: (r["score"], r["tie"]))
+    # D: best score first, then more total patterns
+    return sorted(results, key=lambda r: (r["score"], -(r["w_count"] + r["m_count"]), r["tie"]))
+
+
+def run_scan(files: List[str], pattern_type: str, session_date: date, cutoff_dt: datetime,
+             pool: Optional[ProcessPoolExecutor], open_browser: bool = True) -> bool:
+    t0 = time.perf_counter()
+    log("STEP", f"Scanning pattern {pattern_type} for {session_date} till {cutoff_dt.strftime('%H:%M')}")
 
-    top = results_sorted[:TOP_N]
+    # Symbol order is fixed so pool completion order never changes the ranking of ties
+    order = {p: i for i, p in enumerate(files)}
+    results = sorted(scan_universe(files, pattern_type, session_date, cutoff_dt, pool),
+                     key=lambda r: order[r["path"]])
+    log("STEP", f"Scan done in {time.perf_counter() - t0:.1f}s")
+
+    if not results:
+        log("WARN", "No matches found.")
+        return False
+
+    top = rank_results(results, pattern_type)[:TOP_N]
 
     log("INFO", f"Matches total: {len(results)} | Top selected: {len(top)}")
     for i, r in enumerate(top, start=1):
@@ -1060,7 +1188,50 @@ def main():
         else:
             log("INFO", f"#{i} {r['exchange']}:{r['symbol']} bestScore={r['score']:.4f} W={r['w_count']} M={r['m_count']}")
 
-    build_collage_html(top, session_date, cutoff_dt, OUTPUT_HTML, pattern_type)
+    build_collage_html(top, session_date, cutoff_dt, OUTPUT_HTML, pattern_type, open_browser=open_browser)
+    return True
+
+
+# ================== MAIN ==================
+
+def main():
+    date_str = input("Enter analysis date (YYYY-MM-DD): ").strip()
+    time_str = input("Enter cutoff time (HH:MM, IST) [default 15:30]: ").strip() or "15:30"
+    pattern_type = input("Enter pattern type (A / B / C / D): ").strip().upper()
+
+    if pattern_type not in ("A", "B", "C", "D"):
+        log("ERROR", "Pattern type must be A, B, C or D.")
+        return
+
+    session_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+    cutoff_time = datetime.strptime(time_str, "%H:%M").time()
+    cutoff_dt = datetime.combine(session_date, cutoff_time)
+
+    files = list_parquet_files()
+    workers = scan_workers()
+    log("STEP", f"Found {len(files)} Parquet files. Workers: {workers}")
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if RESCAN_INTERVAL_SEC <= 0 or session_date != date.today():
+            run_scan(files, pattern_type, session_date, cutoff_dt, pool)
+            return
+
+        # Live mode: same pool (and its warm footer caches) for every pass; browser opens once
+        opened = False
+        while True:
+            now_cutoff = min(datetime.now().replace(second=0, microsecond=0), cutoff_dt)
+            if run_scan(files, pattern_type, session_date, now_cutoff, pool, open_browser=not opened):
+                opened = True
+            if now_cutoff >= cutoff_dt:
+                break
+            log("INFO", f"Next rescan in {RESCAN_INTERVAL_SEC}s (Ctrl+C to stop)")
+            time.sleep(RESCAN_INTERVAL_SEC)
+    except KeyboardInterrupt:
+        log("INFO", "Stopped.")
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
 
 if __name__ == "__main__":
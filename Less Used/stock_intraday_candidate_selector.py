@@ -67,7 +67,7 @@ import re
 import sys
 import time
 import traceback
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime, time as dtime, timedelta
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
@@ -76,7 +76,12 @@ import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import pytz
-from dash import Dash, Input, Output, dcc, html
+from dash import Dash, Input, Output, State, dcc, html, no_update
+
+try:
+    from dash import Patch
+except ImportError:  # Dash < 2.9: every refresh sends full figures.
+    Patch = None  # type: ignore[assignment]
 
 
 # =============================================================================
@@ -190,6 +195,11 @@ class LiveState:
     # Last time CSV caches were flushed to disk.
     last_cache_save_ts: float
 
+    # Symbol -> counter bumped whenever candles change other than by updating the
+    # newest candle or appending new ones. Browser charts drawn from an older
+    # revision are redrawn in full instead of patched.
+    revision: Dict[str, int] = field(default_factory=dict)
+
 
 # =============================================================================
 # CLI parsing
@@ -914,14 +924,36 @@ def update_symbol_from_quote(state: LiveState, meta: StockMeta, q: Dict[str, Any
     state.last_cum_volume[symbol] = cum_volume
     state.errors.pop(symbol, None)
 
+    new_row = pd.DataFrame(
+        [{"date": minute_ts, "open": ltp, "high": ltp, "low": ltp, "close": ltp, "volume": volume_delta}]
+    )
     df = state.candles.get(symbol)
     if df is None or df.empty:
-        new_row = pd.DataFrame(
-            [{"date": minute_ts, "open": ltp, "high": ltp, "low": ltp, "close": ltp, "volume": volume_delta}]
-        )
         state.candles[symbol] = normalize_candle_df(new_row, day=market_day())
+        state.revision[symbol] = state.revision.get(symbol, 0) + 1
+        return
+
+    # Fast path: state frames are already normalized, so the usual snapshot either
+    # updates the newest candle in place or appends one row. This keeps the
+    # per-second cost flat through the session.
+    last_ts = df["date"].iat[-1]
+    if last_ts.date() != minute_ts.date():
+        last_ts = None
+    if last_ts is not None and minute_ts == last_ts:
+        idx = len(df) - 1
+        df.iat[idx, df.columns.get_loc("high")] = max(float(df["high"].iat[idx]), ltp)
+        df.iat[idx, df.columns.get_loc("low")] = min(float(df["low"].iat[idx]), ltp)
+        df.iat[idx, df.columns.get_loc("close")] = ltp
+        df.iat[idx, df.columns.get_loc("volume")] = float(df["volume"].iat[idx]) + float(volume_delta)
+        return
+    if last_ts is not None and minute_ts > last_ts:
+        state.candles[symbol] = pd.concat(
+            [df, normalize_candle_df(new_row, day=market_day())], ignore_index=True
+        )
         return
 
+    # Snapshot for an older minute (stale quote timestamp) or a new day: full rewrite.
+    state.revision[symbol] = state.revision.get(symbol, 0) + 1
     df = normalize_candle_df(df, day=market_day())
     match = df["date"] == minute_ts
 
@@ -933,9 +965,6 @@ def update_symbol_from_quote(state: LiveState, meta: StockMeta, q: Dict[str, Any
         df.loc[idx, "volume"] = float(df.loc[idx, "volume"]) + float(volume_delta)
     else:
         # New minute. Use LTP as O/H/L/C until additional snapshots arrive.
-        new_row = pd.DataFrame(
-            [{"date": minute_ts, "open": ltp, "high": ltp, "low": ltp, "close": ltp, "volume": volume_delta}]
-        )
         df = pd.concat([df, new_row], ignore_index=True)
 
     state.candles[symbol] = normalize_candle_df(df, day=market_day())
@@ -1027,6 +1056,20 @@ def visible_y_range(df: pd.DataFrame, pivots: Optional[PivotLevels], fallback_pr
     return max(0.0, lo - pad), hi + pad
 
 
+def pivot_line_levels(pivots: PivotLevels) -> List[Tuple[str, float, str, str]]:
+    """(label, price, color, dash) for each CPR/pivot line drawn on a mini chart."""
+    # Keep colors differentiated, but make every level a solid line.
+    # The fourth tuple value is retained as line_dash for clarity, but it is
+    # deliberately always "solid".
+    return [
+        ("R1", pivots.r1, "rgba(183, 28, 28, 0.62)", "solid"),
+        ("TC", pivots.tc, "rgba(30, 136, 229, 0.62)", "solid"),
+        ("P", pivots.p, "rgba(0, 0, 0, 0.70)", "solid"),
+        ("BC", pivots.bc, "rgba(30, 136, 229, 0.62)", "solid"),
+        ("S1", pivots.s1, "rgba(27, 94, 32, 0.62)", "solid"),
+    ]
+
+
 def add_pivot_lines(fig: go.Figure, pivots: Optional[PivotLevels], y_min: float, y_max: float) -> None:
     """Draw CPR/pivot lines on a mini chart.
 
@@ -1040,18 +1083,7 @@ def add_pivot_lines(fig: go.Figure, pivots: Optional[PivotLevels], y_min: float,
     if pivots is None:
         return
 
-    # Keep colors differentiated, but make every level a solid line.
-    # The fourth tuple value is retained as line_dash for clarity, but it is
-    # deliberately always "solid".
-    levels = [
-        ("R1", pivots.r1, "rgba(183, 28, 28, 0.62)", "solid"),
-        ("TC", pivots.tc, "rgba(30, 136, 229, 0.62)", "solid"),
-        ("P", pivots.p, "rgba(0, 0, 0, 0.70)", "solid"),
-        ("BC", pivots.bc, "rgba(30, 136, 229, 0.62)", "solid"),
-        ("S1", pivots.s1, "rgba(27, 94, 32, 0.62)", "solid"),
-    ]
-
-    for label, y, color, dash in levels:
+    for label, y, color, dash in pivot_line_levels(pivots):
         y_float = float(y)
         if y_float < y_min or y_float > y_max:
             continue
@@ -1092,6 +1124,54 @@ def make_error_figure(title: str, message: str, chart_height: int) -> go.Figure:
     return fig
 
 
+def chart_view(
+    meta: StockMeta,
+    df: pd.DataFrame,
+    pivots: Optional[PivotLevels],
+    state: LiveState,
+    max_candles_shown: int,
+) -> Dict[str, Any]:
+    """Everything a mini chart shows, derived from an already-normalized candle frame.
+
+    Shared by the full render and the incremental patch so both always agree.
+    ``start``/``end`` are the row positions of the shown window inside ``df``.
+    """
+    start = 0
+    if max_candles_shown > 0 and len(df) > max_candles_shown:
+        start = len(df) - max_candles_shown
+    window = df.iloc[start:]
+
+    if not window.empty:
+        last_close = float(window["close"].iloc[-1])
+    else:
+        last_close = last_price_from_state(meta, state)
+
+    y_min, y_max = visible_y_range(window, pivots, fallback_price=last_close)
+    pivot_labels = []
+    if pivots is not None:
+        pivot_labels = [label for label, y, _c, _d in pivot_line_levels(pivots) if y_min <= float(y) <= y_max]
+
+    q = state.last_quote.get(meta.symbol, {})
+    volume = integer(q.get("volume"), meta.initial_volume)
+    change = day_change_text(q)
+    error = state.errors.get(meta.symbol, "")
+    suffix = f" | Vol {volume:,}"
+    if change:
+        suffix += f" | {change}"
+    if error:
+        suffix += " | quote err"
+
+    return {
+        "window": window,
+        "start": start,
+        "end": len(df),
+        "last_close": last_close,
+        "y_range": [y_min, y_max],
+        "pivot_labels": pivot_labels,
+        "title": f"#{meta.rank} {meta.symbol}  {last_close:.2f}{suffix}",
+    }
+
+
 def make_stock_figure(
     meta: StockMeta,
     df_full: pd.DataFrame,
@@ -1101,10 +1181,9 @@ def make_stock_figure(
     max_candles_shown: int,
 ) -> go.Figure:
     """Create one compact candlestick figure for the 5x10 grid."""
-    q = state.last_quote.get(meta.symbol, {})
-    df = normalize_candle_df(df_full, day=market_day())
-    if max_candles_shown > 0 and len(df) > max_candles_shown:
-        df = df.tail(max_candles_shown).copy()
+    view = chart_view(meta, normalize_candle_df(df_full, day=market_day()), pivots, state, max_candles_shown)
+    df = view["window"]
+    last_close = view["last_close"]
 
     fig = go.Figure()
 
@@ -1126,9 +1205,7 @@ def make_stock_figure(
                 ),
             )
         )
-        last_close = float(df["close"].iloc[-1])
     else:
-        last_close = last_price_from_state(meta, state)
         # Add an invisible point so the chart renders cleanly even before market open.
         fig.add_trace(
             go.Scatter(
@@ -1141,22 +1218,11 @@ def make_stock_figure(
             )
         )
 
-    y_min, y_max = visible_y_range(df, pivots, fallback_price=last_close)
+    y_min, y_max = view["y_range"]
     add_pivot_lines(fig, pivots, y_min, y_max)
 
-    volume = integer(q.get("volume"), meta.initial_volume)
-    change = day_change_text(q)
-    error = state.errors.get(meta.symbol, "")
-    suffix = f" | Vol {volume:,}"
-    if change:
-        suffix += f" | {change}"
-    if error:
-        suffix += " | quote err"
-
-    title = f"#{meta.rank} {meta.symbol}  {last_close:.2f}{suffix}"
-
     fig.update_layout(
-        title=dict(text=title, font=dict(size=10), x=0.01, xanchor="left"),
+        title=dict(text=view["title"], font=dict(size=10), x=0.01, xanchor="left"),
         template="plotly_white",
         height=int(chart_height),
         margin=dict(l=6, r=42, t=34, b=18),
@@ -1192,6 +1258,106 @@ def make_stock_figure(
     return fig
 
 
+CANDLE_TRACE_COLUMNS = (("x", "date"), ("open", "open"), ("high", "high"), ("low", "low"), ("close", "close"))
+
+
+def candle_trace_values(rows: pd.DataFrame, column: str) -> List[Any]:
+    """Column values encoded the same way as in a full Candlestick trace."""
+    if column == "date":
+        return [pd.Timestamp(v).to_pydatetime() for v in rows["date"]]
+    return [float(v) for v in rows[column]]
+
+
+def update_stock_figure(
+    meta: StockMeta,
+    pivots: Optional[PivotLevels],
+    state: LiveState,
+    chart_height: int,
+    max_candles_shown: int,
+    rendered: Optional[Dict[str, Any]],
+) -> Tuple[Any, Dict[str, Any]]:
+    """Return (figure update, render signature) for one chart.
+
+    ``rendered`` is the signature of what this browser page currently shows.
+    The update is a dash Patch carrying only the changed newest candle, newly
+    appended candles, title and y-range when the page's copy can be patched,
+    ``no_update`` when nothing changed, or a full figure otherwise (first draw,
+    revision change, pivot lines entering/leaving the y-range, Dash < 2.9).
+    """
+    df = state.candles.get(meta.symbol)
+    if df is None or (not df.empty and df["date"].iat[-1].date() != market_day()):
+        df = normalize_candle_df(df, day=market_day())
+    view = chart_view(meta, df, pivots, state, max_candles_shown)
+    start, end = view["start"], view["end"]
+    last_bar = [float(df[c].iat[end - 1]) for c in ("open", "high", "low", "close")] if end > 0 else []
+    signature = {
+        "day": market_day().isoformat(),
+        "rev": state.revision.get(meta.symbol, 0),
+        "start": start,
+        "end": end,
+        "last": last_bar,
+        "title": view["title"],
+        "y": view["y_range"],
+        "labels": view["pivot_labels"],
+    }
+
+    patchable = (
+        Patch is not None
+        and rendered is not None
+        and rendered.get("day") == signature["day"]
+        and rendered.get("rev") == signature["rev"]
+        and rendered.get("labels") == signature["labels"]
+        and rendered.get("end", 0) > 0
+        and start >= rendered["start"]
+        and end >= rendered["end"]
+        and rendered["end"] > start
+    )
+    if not patchable:
+        figure = make_stock_figure(
+            meta=meta,
+            df_full=df,
+            pivots=pivots,
+            state=state,
+            chart_height=chart_height,
+            max_candles_shown=max_candles_shown,
+        )
+        return figure, signature
+
+    patch = Patch()
+    changed = False
+    trace = patch["data"][0]
+
+    # Candles that scrolled out of the --max-candles-shown window.
+    for _ in range(start - rendered["start"]):
+        for prop, _col in CANDLE_TRACE_COLUMNS:
+            del trace[prop][0]
+        changed = True
+
+    # The page's newest candle may have been updated since it was drawn.
+    old_last = rendered["end"] - 1
+    current = [float(df[c].iat[old_last]) for c in ("open", "high", "low", "close")]
+    if current != rendered["last"]:
+        pos = old_last - start
+        for (prop, _col), value in zip(CANDLE_TRACE_COLUMNS[1:], current):
+            trace[prop][pos] = value
+        changed = True
+
+    if end > rendered["end"]:
+        new_rows = df.iloc[rendered["end"]:end]
+        for prop, col in CANDLE_TRACE_COLUMNS:
+            trace[prop].extend(candle_trace_values(new_rows, col))
+        changed = True
+
+    if view["title"] != rendered["title"]:
+        patch["layout"]["title"]["text"] = view["title"]
+        changed = True
+    if view["y_range"] != rendered["y"]:
+        patch["layout"]["yaxis"]["range"] = view["y_range"]
+        changed = True
+
+    return (patch if changed else no_update), signature
+
+
 # =============================================================================
 # Dash application
 # =============================================================================
@@ -1460,6 +1626,9 @@ def make_app(
     app.layout = html.Div(
         [
             dcc.Interval(id="live-interval", interval=int(refresh_ms), n_intervals=0),
+            # Per-page signature of what each chart currently shows. Lets the refresh
+            # callback patch only new/changed candles instead of resending figures.
+            dcc.Store(id="render-store", data=[None] * len(selected)),
             html.Div(
                 [
                     html.Div(
@@ -1511,14 +1680,21 @@ def make_app(
         ]
     )
 
-    outputs = [Output("status-line", "children")] + [Output(f"chart-{i}", "figure") for i in range(len(selected))]
+    outputs = (
+        [Output("status-line", "children")]
+        + [Output(f"chart-{i}", "figure") for i in range(len(selected))]
+        + [Output("render-store", "data")]
+    )
 
-    @app.callback(outputs, Input("live-interval", "n_intervals"))
-    def refresh_dashboard(n_intervals: int):
-        """Poll quote once, update in-memory candles, and redraw all charts.
+    @app.callback(outputs, Input("live-interval", "n_intervals"), State("render-store", "data"))
+    def refresh_dashboard(n_intervals: int, rendered: Optional[List[Optional[Dict[str, Any]]]]):
+        """Poll quote once, update in-memory candles, and patch changed charts.
 
         This is the only Dash callback in the app. Expand/minify is client-side
         only and never changes the server callback signature.
+
+        Charts are patched incrementally (see update_stock_figure), so a refresh
+        late in the session costs about the same as one just after the open.
         """
         try:
             updated, quote_error = poll_top50_once(kite, selected, state)
@@ -1542,18 +1718,23 @@ def make_app(
                     f"charts with candles: {non_empty}/{len(selected)} | selected by startup live volume"
                 )
 
-            figures = [
-                make_stock_figure(
+            if not rendered or len(rendered) != len(selected):
+                rendered = [None] * len(selected)
+
+            figures = []
+            signatures = []
+            for meta, page_sig in zip(selected, rendered):
+                figure, sig = update_stock_figure(
                     meta=meta,
-                    df_full=state.candles.get(meta.symbol, pd.DataFrame()),
                     pivots=pivots.get(meta.symbol),
                     state=state,
                     chart_height=chart_height,
                     max_candles_shown=max_candles_shown,
+                    rendered=page_sig,
                 )
-                for meta in selected
-            ]
-            return [status] + figures
+                figures.append(figure)
+                signatures.append(sig)
+            return [status] + figures + [signatures]
 
         except Exception as exc:
             tb = traceback.format_exc()
@@ -1561,7 +1742,7 @@ def make_app(
             now_str = now_ist().strftime("%Y-%m-%d %H:%M:%S IST")
             status = f"Last refresh: {now_str} | DASH CALLBACK ERROR: {exc}. See PyCharm terminal."
             err_figs = [make_error_figure(f"#{m.rank} {m.symbol}", str(exc), chart_height) for m in selected]
-            return [status] + err_figs
+            return [status] + err_figs + [[None] * len(selected)]
 
     return app
 
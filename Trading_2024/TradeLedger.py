@@ -8,6 +8,8 @@
 #      within STRADDLE_TIME_WINDOW_SEC.
 #   5. Match later BUY orders as exits using FIFO quantity consumption.
 #   6. Export an Excel ledger in the exact format requested.
+#   7. Append new orders (by order_id) to a SQLite ledger store and add
+#      year-to-date ledger + monthly P/L/charges sheets from it.
 #
 # Notes:
 #   - P/L and Expiry PL are gross values before brokerage/taxes.
@@ -21,11 +23,13 @@ from __future__ import annotations
 
 import os
 import re
+import sqlite3
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, datetime
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 # Keep the same import style as your reference DirectionalTradeLedger.py
@@ -51,6 +55,23 @@ DOWNLOAD_INSTRUMENT_MASTER = True
 # the final ledger. Set True only if you want open trades marked with LTP exits.
 INCLUDE_OPEN_TRADES = False
 
+# Persistent multi-day ledger (SQLite in the Downloads folder). Each run ingests
+# only orders whose order_id is not yet stored and re-pairs trades from the entry
+# day of the earliest SELL still open (or the oldest new order, if earlier), so
+# NRML / monthly straddles held for weeks pair exactly as in a full rebuild.
+USE_LEDGER_STORE = True
+LEDGER_DB_FILE = "short_straddle_ledger.sqlite"
+# Compare the store against a full rebuild from every stored order after updating.
+VERIFY_LEDGER_STORE = False
+
+# Zerodha-like per-order charge estimate stored with each order (options).
+BROKERAGE_PER_ORDER = 20.0
+STT_SELL_PCT = 0.001
+EXCHANGE_TXN_PCT = {"NFO": 0.0003553, "BFO": 0.000325}
+SEBI_PER_CRORE = 10.0
+STAMP_BUY_PCT = 0.00003
+GST_PCT = 0.18
+
 # Exact output format requested by you.
 OUTPUT_COLUMNS = [
     "S. NO.",
@@ -73,6 +94,17 @@ OUTPUT_COLUMNS = [
     "Expiry PL",
 ]
 
+# Extra identity columns kept by the ledger store (not part of the Excel format).
+STORE_KEY_COLUMNS = [
+    "UNDERLYING",
+    "PRODUCT",
+    "CALL SYMBOL",
+    "PUT SYMBOL",
+    "CALL ORDER ID",
+    "PUT ORDER ID",
+    "QTY",
+]
+
 
 # -------------------------------------------------------------
 # Data containers
@@ -541,6 +573,132 @@ def get_exit_details(
     )
 
 
+@dataclass
+class ExitBook:
+    """BUY orders of one (Instrument, Product), time-sorted, with remaining qty."""
+    times: np.ndarray            # int64 ns
+    stamps: List[pd.Timestamp]
+    prices: List[Optional[float]]
+    order_indices: List[int]
+    remaining: List[int]
+    next_open: List[int]         # union-find "next row with remaining > 0"
+
+
+def _time_ns(times: pd.Series) -> np.ndarray:
+    return pd.to_datetime(times).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def build_exit_books(orders: pd.DataFrame) -> Dict[Tuple[str, str], ExitBook]:
+    """Group BUY orders once so exit matching does not re-filter the whole frame per leg."""
+    books: Dict[Tuple[str, str], ExitBook] = {}
+    buys = orders[orders["Type"] == "BUY"]
+    if buys.empty:
+        return books
+
+    for (instrument, product), b in buys.groupby(["Instrument", "Product"], sort=False):
+        b = b.sort_values("Time", kind="mergesort")
+        prices = [safe_float(x) for x in b["Avg. price"]]
+        remaining = [int(q) if prices[i] is not None else 0 for i, q in enumerate(b["FilledQty"])]
+        books[(instrument, product)] = ExitBook(
+            times=_time_ns(b["Time"]),
+            stamps=list(b["Time"]),
+            prices=prices,
+            order_indices=[int(i) for i in b.index],
+            remaining=remaining,
+            next_open=list(range(len(b) + 1)),
+        )
+    return books
+
+
+def _next_open(book: ExitBook, pos: int) -> int:
+    """First position >= pos with remaining qty (path-compressed)."""
+    root = pos
+    while book.next_open[root] != root:
+        root = book.next_open[root]
+    while book.next_open[pos] != root:
+        book.next_open[pos], pos = root, book.next_open[pos]
+    return root
+
+
+def _close_position(book: ExitBook, pos: int) -> None:
+    book.next_open[pos] = pos + 1
+
+
+def match_exit_fifo(book: Optional[ExitBook], after_ns: int, qty_required: int) -> Optional[Tuple[ExitDetails, List[int]]]:
+    """
+    Same FIFO rule as get_exit_details(): BUYs strictly after the entry, earliest
+    first, weighted average price. Returns (details, book positions used) without
+    consuming anything.
+    """
+    if book is None or qty_required <= 0:
+        return None
+
+    pos = _next_open(book, int(np.searchsorted(book.times, after_ns, side="right")))
+    n = len(book.times)
+
+    qty_left = qty_required
+    value = 0.0
+    used: List[Tuple[int, int]] = []
+    used_pos: List[int] = []
+    last_pos: Optional[int] = None
+
+    while pos < n and qty_left > 0:
+        take = min(qty_left, book.remaining[pos])
+        value += take * book.prices[pos]
+        qty_left -= take
+        used.append((book.order_indices[pos], take))
+        used_pos.append(pos)
+        last_pos = pos
+        pos = _next_open(book, pos + 1)
+
+    if qty_left > 0 or last_pos is None:
+        return None
+
+    details = ExitDetails(
+        qty=qty_required,
+        avg_price=value / qty_required,
+        last_time=book.stamps[last_pos],
+        used_order_indices=used,
+    )
+    return details, used_pos
+
+
+def consume_exit(book: ExitBook, details: ExitDetails, used_pos: List[int]) -> None:
+    for pos, (_, q) in zip(used_pos, details.used_order_indices):
+        book.remaining[pos] -= q
+        if book.remaining[pos] <= 0:
+            _close_position(book, pos)
+
+
+def _pick_opposite_sell(
+    times: np.ndarray,
+    remaining: List[int],
+    opp_positions: np.ndarray,
+    this_pos: int,
+    window_ns: int,
+) -> Optional[int]:
+    """
+    Nearest-in-time opposite-type SELL with open qty inside the straddle window.
+    Ties: smaller gap, then earlier time, then earlier row (the original sort order).
+    """
+    if len(opp_positions) == 0:
+        return None
+    t = times[this_pos]
+    opp_times = times[opp_positions]
+    lo = int(np.searchsorted(opp_times, t - window_ns, side="left"))
+    hi = int(np.searchsorted(opp_times, t + window_ns, side="right"))
+
+    best: Optional[Tuple[int, int, int]] = None
+    for k in range(lo, hi):
+        pos = int(opp_positions[k])
+        if remaining[pos] <= 0:
+            continue
+        key = (abs(int(opp_times[k]) - int(t)), int(opp_times[k]), pos)
+        if best is None or key < best:
+            best = key
+    return None if best is None else best[2]
+
+
 # -------------------------------------------------------------
 # Straddle ledger builder
 # -------------------------------------------------------------
@@ -557,10 +715,11 @@ def calculate_lots(qty: int, call_lot_size: Any, put_lot_size: Any, position_lot
     return int(lots) if abs(lots - int(lots)) < 1e-9 else round(lots, 2)
 
 
-def build_short_straddle_ledger(orders: pd.DataFrame, positions: pd.DataFrame) -> pd.DataFrame:
+def build_short_straddle_ledger(orders: pd.DataFrame, positions: pd.DataFrame, with_keys: bool = False) -> pd.DataFrame:
     """
     Build requested short-straddle ledger from completed Zerodha orders.
     Only trades with SELL CE + SELL PE at same strike/expiry are included.
+    with_keys=True also returns STORE_KEY_COLUMNS (used by the ledger store).
     """
     if orders.empty:
         return pd.DataFrame(columns=OUTPUT_COLUMNS)
@@ -573,88 +732,69 @@ def build_short_straddle_ledger(orders: pd.DataFrame, positions: pd.DataFrame) -
         return pd.DataFrame(columns=OUTPUT_COLUMNS)
 
     # Track remaining quantities so partial fills/exits are handled properly.
+    sells = opts[opts["Type"] == "SELL"]
     sell_remaining: Dict[int, int] = {
-        int(idx): int(r["FilledQty"])
-        for idx, r in opts[opts["Type"] == "SELL"].iterrows()
-    }
-    buy_remaining: Dict[int, int] = {
-        int(idx): int(r["FilledQty"])
-        for idx, r in opts[opts["Type"] == "BUY"].iterrows()
+        int(idx): int(q) for idx, q in zip(sells.index, sells["FilledQty"])
     }
 
     rows: List[Dict[str, Any]] = []
+    exit_books = build_exit_books(opts)
+    window_ns = int(STRADDLE_TIME_WINDOW_SEC * 1_000_000_000)
 
+    # Pairing runs over time-sorted arrays per series group: the opposite leg is
+    # found with searchsorted inside +/- STRADDLE_TIME_WINDOW_SEC, exits with a
+    # FIFO pointer per (Instrument, Product) book. Near-linear instead of
+    # re-scanning every SELL/BUY row for every SELL row.
     group_cols = ["Exchange", "SeriesKey", "Strike", "Product"]
     for _, g in opts[opts["Type"] == "SELL"].groupby(group_cols, dropna=False):
         g = g.sort_values("Time")
 
-        for idx, r in g.iterrows():
-            idx = int(idx)
-            if sell_remaining.get(idx, 0) <= 0:
-                continue
-
-            while sell_remaining.get(idx, 0) > 0:
-                this_type = str(r["OptionType"])
-                opposite_type = "PE" if this_type == "CE" else "CE"
+        g_times = _time_ns(g["Time"])
+        g_types = g["OptionType"].astype(str).to_numpy()
+        g_index = [int(i) for i in g.index]
+        g_remaining = [int(sell_remaining.get(i, 0)) for i in g_index]
+        g_rows = [r for _, r in g.iterrows()]
+        positions_by_type = {
+            "CE": np.flatnonzero(g_types == "CE"),
+            "PE": np.flatnonzero(g_types == "PE"),
+        }
 
-                candidates = []
-                for cidx, c in g.iterrows():
-                    cidx = int(cidx)
-                    if cidx == idx or sell_remaining.get(cidx, 0) <= 0:
-                        continue
-                    if str(c["OptionType"]) != opposite_type:
-                        continue
+        for pos in range(len(g_index)):
+            r = g_rows[pos]
 
-                    diff_sec = abs((pd.to_datetime(c["Time"]) - pd.to_datetime(r["Time"])).total_seconds())
-                    if diff_sec <= STRADDLE_TIME_WINDOW_SEC:
-                        candidates.append((diff_sec, c["Time"], cidx, c))
+            while g_remaining[pos] > 0:
+                this_type = str(g_types[pos])
+                opposite_type = "PE" if this_type == "CE" else "CE"
 
-                if not candidates:
+                opp_pos = _pick_opposite_sell(
+                    g_times, g_remaining, positions_by_type[opposite_type], pos, window_ns
+                )
+                if opp_pos is None or opp_pos == pos:
                     break
+                opp = g_rows[opp_pos]
 
-                candidates.sort(key=lambda x: (x[0], x[1]))
-                _, _, opp_idx, opp = candidates[0]
-
-                matched_qty = min(int(sell_remaining[idx]), int(sell_remaining[opp_idx]))
+                matched_qty = min(g_remaining[pos], g_remaining[opp_pos])
                 if matched_qty <= 0:
                     break
 
                 if this_type == "CE":
-                    call_entry = r
-                    call_idx = idx
-                    put_entry = opp
-                    put_idx = opp_idx
+                    call_entry, call_pos = r, pos
+                    put_entry, put_pos = opp, opp_pos
                 else:
-                    call_entry = opp
-                    call_idx = opp_idx
-                    put_entry = r
-                    put_idx = idx
+                    call_entry, call_pos = opp, opp_pos
+                    put_entry, put_pos = r, pos
 
                 call_symbol = str(call_entry["Instrument"])
                 put_symbol = str(put_entry["Instrument"])
                 product = str(call_entry["Product"])
+                call_book = exit_books.get((call_symbol, product))
+                put_book = exit_books.get((put_symbol, product))
 
                 # First preview both exits. Consume BUY quantities only if both legs have exits.
-                call_exit = get_exit_details(
-                    opts,
-                    call_symbol,
-                    product,
-                    pd.to_datetime(call_entry["Time"]),
-                    matched_qty,
-                    buy_remaining,
-                    consume=False,
-                )
-                put_exit = get_exit_details(
-                    opts,
-                    put_symbol,
-                    product,
-                    pd.to_datetime(put_entry["Time"]),
-                    matched_qty,
-                    buy_remaining,
-                    consume=False,
-                )
+                call_match = match_exit_fifo(call_book, int(g_times[call_pos]), matched_qty)
+                put_match = match_exit_fifo(put_book, int(g_times[put_pos]), matched_qty)
 
-                if call_exit is None or put_exit is None:
+                if call_match is None or put_match is None:
                     if not INCLUDE_OPEN_TRADES:
                         # Do not consume entry quantity if the straddle is not fully closed.
                         break
@@ -669,12 +809,16 @@ def build_short_straddle_ledger(orders: pd.DataFrame, positions: pd.DataFrame) -
                     put_exit = ExitDetails(matched_qty, float(put_ltp), now_ts, [])
                 else:
                     # Now consume exits because both legs are valid.
-                    get_exit_details(opts, call_symbol, product, pd.to_datetime(call_entry["Time"]), matched_qty, buy_remaining, consume=True)
-                    get_exit_details(opts, put_symbol, product, pd.to_datetime(put_entry["Time"]), matched_qty, buy_remaining, consume=True)
+                    call_exit, call_used = call_match
+                    put_exit, put_used = put_match
+                    consume_exit(call_book, call_exit, call_used)
+                    consume_exit(put_book, put_exit, put_used)
 
                 # Consume SELL entry quantities.
-                sell_remaining[call_idx] = int(sell_remaining.get(call_idx, 0)) - matched_qty
-                sell_remaining[put_idx] = int(sell_remaining.get(put_idx, 0)) - matched_qty
+                g_remaining[call_pos] -= matched_qty
+                g_remaining[put_pos] -= matched_qty
+                sell_remaining[g_index[call_pos]] = g_remaining[call_pos]
+                sell_remaining[g_index[put_pos]] = g_remaining[put_pos]
 
                 entry_ts = min(pd.to_datetime(call_entry["Time"]), pd.to_datetime(put_entry["Time"]))
                 exit_ts = max(pd.to_datetime(call_exit.last_time), pd.to_datetime(put_exit.last_time))
@@ -735,25 +879,445 @@ def build_short_straddle_ledger(orders: pd.DataFrame, positions: pd.DataFrame) -
                         "SELL PUT EXPIRY PRICE": round2(put_expiry_price),
                         "P/L": round2(gross_pl),
                         "Expiry PL": round2(expiry_pl),
+                        "UNDERLYING": call_entry.get("Underlying") or put_entry.get("Underlying"),
+                        "PRODUCT": product,
+                        "CALL SYMBOL": call_symbol,
+                        "PUT SYMBOL": put_symbol,
+                        "CALL ORDER ID": str(call_entry.get("OrderID", "")),
+                        "PUT ORDER ID": str(put_entry.get("OrderID", "")),
+                        "QTY": matched_qty,
                     }
                 )
 
-    ledger = pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+    out_cols = OUTPUT_COLUMNS + STORE_KEY_COLUMNS if with_keys else OUTPUT_COLUMNS
+    ledger = pd.DataFrame(rows, columns=OUTPUT_COLUMNS + STORE_KEY_COLUMNS)
     if ledger.empty:
-        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+        return pd.DataFrame(columns=out_cols)
 
     ledger = ledger.sort_values(["ENTRY DATE", "Entry Time"]).reset_index(drop=True)
     ledger["S. NO."] = range(1, len(ledger) + 1)
+    return ledger[out_cols]
+
+
+# -------------------------------------------------------------
+# Persistent ledger store
+# -------------------------------------------------------------
+_ORDER_COLUMNS = [
+    ("order_id", "TEXT PRIMARY KEY"),
+    ("time", "TEXT NOT NULL"),
+    ("day", "TEXT NOT NULL"),
+    ("type", "TEXT"),
+    ("instrument", "TEXT"),
+    ("product", "TEXT"),
+    ("exchange", "TEXT"),
+    ("filled_qty", "INTEGER"),
+    ("avg_price", "REAL"),
+    ("status", "TEXT"),
+    ("underlying", "TEXT"),
+    ("expiry_date", "TEXT"),
+    ("strike", "REAL"),
+    ("option_type", "TEXT"),
+    ("lot_size", "INTEGER"),
+    ("root", "TEXT"),
+    ("series_key", "TEXT"),
+    ("charges", "REAL"),
+    ("ingested_at", "TEXT"),
+]
+
+# trades: one row per paired straddle, keyed by its two SELL order ids.
+_TRADE_COLUMNS = [
+    ("trade_key", "TEXT PRIMARY KEY"),
+    ("entry_date", "TEXT NOT NULL"),
+    ("exit_date", "TEXT"),
+    ("expiry_date", "TEXT"),
+    ("underlying", "TEXT"),
+    ("product", "TEXT"),
+    ("lots", "REAL"),
+    ("days_to_expiry", "INTEGER"),
+    ("entry_time", "TEXT"),
+    ("exit_time", "TEXT"),
+    ("call_symbol", "TEXT"),
+    ("put_symbol", "TEXT"),
+    ("call_strike", "INTEGER"),
+    ("call_entry_price", "REAL"),
+    ("call_exit_price", "REAL"),
+    ("put_strike", "INTEGER"),
+    ("put_entry_price", "REAL"),
+    ("put_exit_price", "REAL"),
+    ("call_expiry_price", "REAL"),
+    ("put_expiry_price", "REAL"),
+    ("pl", "REAL"),
+    ("expiry_pl", "REAL"),
+    ("call_order_id", "TEXT"),
+    ("put_order_id", "TEXT"),
+    ("qty", "INTEGER"),
+]
+
+# ledger column -> trades column
+_TRADE_FROM_LEDGER = {
+    "ENTRY DATE": "entry_date",
+    "EXIT DATE": "exit_date",
+    "EXPIRY DATE": "expiry_date",
+    "UNDERLYING": "underlying",
+    "PRODUCT": "product",
+    "LOTS": "lots",
+    "Days to Expiry": "days_to_expiry",
+    "Entry Time": "entry_time",
+    "Time of exit": "exit_time",
+    "CALL SYMBOL": "call_symbol",
+    "PUT SYMBOL": "put_symbol",
+    "SELL CALL STRIKE": "call_strike",
+    "SELL CALL ENTRY PRICE": "call_entry_price",
+    "SELL CALL EXIT PRICE": "call_exit_price",
+    "SELL PUT STRIKE": "put_strike",
+    "SELL PUT ENTRY PRICE": "put_entry_price",
+    "SELL PUT EXIT  PRICE": "put_exit_price",
+    "SELL CALL EXPIRY PRICE": "call_expiry_price",
+    "SELL PUT EXPIRY PRICE": "put_expiry_price",
+    "P/L": "pl",
+    "Expiry PL": "expiry_pl",
+    "CALL ORDER ID": "call_order_id",
+    "PUT ORDER ID": "put_order_id",
+    "QTY": "qty",
+}
+
+
+def estimate_order_charges(side: str, qty: int, price: float, exchange: str) -> float:
+    """Approximate statutory + brokerage charges of one option order (gross P/L excludes these)."""
+    turnover = float(qty) * float(price)
+    brokerage = BROKERAGE_PER_ORDER
+    stt = turnover * STT_SELL_PCT if side == "SELL" else 0.0
+    txn = turnover * EXCHANGE_TXN_PCT.get(exchange, EXCHANGE_TXN_PCT["NFO"])
+    sebi = turnover * SEBI_PER_CRORE / 1_00_00_000
+    stamp = turnover * STAMP_BUY_PCT if side == "BUY" else 0.0
+    gst = (brokerage + txn + sebi) * GST_PCT
+    return round(brokerage + stt + txn + sebi + stamp + gst, 2)
+
+
+def open_ledger_store(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS orders ({', '.join(f'{c} {t}' for c, t in _ORDER_COLUMNS)})")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS trades ({', '.join(f'{c} {t}' for c, t in _TRADE_COLUMNS)})")
+    # Stores created before trades.qty existed: add it; NULL rows force one full re-pair.
+    trade_cols = {r[1] for r in conn.execute("PRAGMA table_info(trades)")}
+    for c, t in _TRADE_COLUMNS:
+        if c not in trade_cols:
+            conn.execute(f"ALTER TABLE trades ADD COLUMN {c} {t}")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS instrument_prices ("
+        "instrument TEXT PRIMARY KEY, ltp REAL, lot_size INTEGER, updated_at TEXT)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_day ON orders(day)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_series ON orders(underlying, expiry_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_entry ON trades(entry_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_series ON trades(underlying, expiry_date)")
+    conn.commit()
+    return conn
+
+
+def _db_value(x: Any) -> Any:
+    if x is None:
+        return None
+    if isinstance(x, (pd.Timestamp, datetime)):
+        return None if pd.isna(x) else x.isoformat()
+    if isinstance(x, np.generic):
+        x = x.item()
+    try:
+        if pd.isna(x):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return x
+
+
+def ingest_orders(conn: sqlite3.Connection, orders: pd.DataFrame) -> pd.DataFrame:
+    """
+    Append enriched orders whose order_id is not stored yet.
+    Returns the newly inserted orders (empty if nothing new).
+    """
+    if orders.empty:
+        return orders
+
+    known = {r[0] for r in conn.execute("SELECT order_id FROM orders")}
+    new = orders[~orders["OrderID"].astype(str).isin(known)]
+    if new.empty:
+        return new
+
+    now = datetime.now().isoformat(timespec="seconds")
+    records = []
+    for rd in new.to_dict("records"):
+        t = pd.Timestamp(rd["Time"])
+        expiry = rd.get("ExpiryDate")
+        records.append(
+            (
+                str(rd["OrderID"]),
+                t.isoformat(),
+                t.date().isoformat(),
+                rd["Type"],
+                rd["Instrument"],
+                rd["Product"],
+                rd["Exchange"],
+                int(rd["FilledQty"]),
+                float(rd["Avg. price"]),
+                rd.get("Status"),
+                _db_value(rd.get("Underlying")),
+                pd.Timestamp(expiry).date().isoformat() if pd.notna(expiry) else None,
+                _db_value(rd.get("Strike")),
+                _db_value(rd.get("OptionType")),
+                safe_int(rd.get("LotSize")),
+                _db_value(rd.get("Root")),
+                _db_value(rd.get("SeriesKey")),
+                estimate_order_charges(rd["Type"], int(rd["FilledQty"]), float(rd["Avg. price"]), rd["Exchange"]),
+                now,
+            )
+        )
+
+    cols = [c for c, _ in _ORDER_COLUMNS]
+    conn.executemany(
+        f"INSERT OR IGNORE INTO orders ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+        records,
+    )
+    conn.commit()
+    return new
+
+
+def upsert_instrument_prices(conn: sqlite3.Connection, positions: pd.DataFrame) -> None:
+    """Remember the latest LTP / lot size per instrument so later rebuilds still have expiry prices."""
+    if positions.empty:
+        return
+    now = datetime.now().isoformat(timespec="seconds")
+    records = []
+    for symbol, ltp in build_ltp_lookup(positions).items():
+        records.append((symbol, ltp, None, now))
+    lots = build_position_lot_lookup(positions)
+    conn.executemany(
+        "INSERT INTO instrument_prices (instrument, ltp, lot_size, updated_at) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(instrument) DO UPDATE SET ltp=excluded.ltp, updated_at=excluded.updated_at",
+        records,
+    )
+    conn.executemany(
+        "INSERT INTO instrument_prices (instrument, ltp, lot_size, updated_at) VALUES (?, NULL, ?, ?) "
+        "ON CONFLICT(instrument) DO UPDATE SET lot_size=excluded.lot_size",
+        [(symbol, lot, now) for symbol, lot in lots.items()],
+    )
+    conn.commit()
+
+
+def load_store_orders(conn: sqlite3.Connection, since_day: Optional[date] = None) -> pd.DataFrame:
+    """Stored orders in the enriched shape expected by build_short_straddle_ledger()."""
+    sql = "SELECT * FROM orders"
+    params: Tuple[Any, ...] = ()
+    if since_day is not None:
+        sql += " WHERE day >= ?"
+        params = (since_day.isoformat(),)
+    df = pd.read_sql_query(sql + " ORDER BY time, order_id", conn, params=params)
+    if df.empty:
+        return df
+
+    out = pd.DataFrame(
+        {
+            "Time": pd.to_datetime(df["time"]),
+            "Type": df["type"],
+            "Instrument": df["instrument"],
+            "Product": df["product"],
+            "Exchange": df["exchange"],
+            "FilledQty": df["filled_qty"].astype(int),
+            "Avg. price": df["avg_price"].astype(float),
+            "OrderID": df["order_id"],
+            "Status": df["status"],
+            "Underlying": df["underlying"],
+            "ExpiryDate": pd.to_datetime(df["expiry_date"]),
+            "Strike": df["strike"],
+            "OptionType": df["option_type"],
+            "LotSize": df["lot_size"],
+            "Root": df["root"],
+            "SeriesKey": df["series_key"],
+        }
+    )
+    out["IsOption"] = out["OptionType"].isin(["CE", "PE"]) & out["Strike"].notna()
+    return out.reset_index(drop=True)
+
+
+def load_store_positions(conn: sqlite3.Connection) -> pd.DataFrame:
+    df = pd.read_sql_query("SELECT instrument, ltp, lot_size FROM instrument_prices", conn)
+    return df.rename(columns={"instrument": "Instrument", "ltp": "LTP", "lot_size": "LotSize"})
+
+
+def rebuild_store_trades(conn: sqlite3.Connection, since_day: date) -> int:
+    """Re-pair every stored order from since_day and replace the trades that start there."""
+    orders = load_store_orders(conn, since_day)
+    ledger = build_short_straddle_ledger(orders, load_store_positions(conn), with_keys=True)
+
+    cols = [c for c, _ in _TRADE_COLUMNS]
+    records = []
+    for r in ledger.to_dict("records"):
+        rec = {db_col: _db_value(r.get(col)) for col, db_col in _TRADE_FROM_LEDGER.items()}
+        rec["trade_key"] = f"{rec['call_order_id']}|{rec['put_order_id']}"
+        records.append(tuple(rec[c] for c in cols))
+
+    with conn:
+        conn.execute("DELETE FROM trades WHERE entry_date >= ?", (since_day.isoformat(),))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO trades ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            records,
+        )
+    return len(records)
+
+
+def repair_start_day(conn: sqlite3.Connection, oldest_new: date) -> date:
+    """
+    First day that has to be re-paired so the result equals a full rebuild.
+
+    Starts at the oldest new order and moves back to the entry day of the
+    earliest SELL that is not fully paired yet (unexpired as of oldest_new, so a
+    new BUY can still close it). Then moves back further while some stored trade
+    entered before that day but exited on/after it: its exit BUYs lie inside the
+    window and must stay consumed by it rather than close a newer SELL.
+    """
+    if conn.execute("SELECT 1 FROM trades WHERE qty IS NULL LIMIT 1").fetchone():
+        first = conn.execute("SELECT MIN(day) FROM orders").fetchone()[0]
+        return min(oldest_new, date.fromisoformat(first))
+
+    since = oldest_new
+    open_sell_day = conn.execute(
+        "SELECT MIN(o.day) FROM orders o "
+        "LEFT JOIN ("
+        "  SELECT order_id, SUM(qty) AS used FROM ("
+        "    SELECT call_order_id AS order_id, qty FROM trades"
+        "    UNION ALL SELECT put_order_id AS order_id, qty FROM trades"
+        "  ) GROUP BY order_id"
+        ") u ON u.order_id = o.order_id "
+        "WHERE o.type = 'SELL' AND o.option_type IN ('CE', 'PE') "
+        "AND o.filled_qty > COALESCE(u.used, 0) "
+        "AND (o.expiry_date IS NULL OR o.expiry_date >= ?)",
+        (oldest_new.isoformat(),),
+    ).fetchone()[0]
+    if open_sell_day:
+        since = min(since, date.fromisoformat(open_sell_day))
+
+    while True:
+        straddling = conn.execute(
+            "SELECT MIN(entry_date) FROM trades WHERE entry_date < ? AND exit_date >= ?",
+            (since.isoformat(), since.isoformat()),
+        ).fetchone()[0]
+        if not straddling:
+            return since
+        since = date.fromisoformat(straddling)
+
+
+def update_ledger_store(conn: sqlite3.Connection, orders: pd.DataFrame, positions: pd.DataFrame) -> Tuple[int, int]:
+    """One incremental run: ingest new orders, refresh prices, re-pair from repair_start_day()."""
+    upsert_instrument_prices(conn, positions)
+    new = ingest_orders(conn, orders)
+    if new.empty:
+        return 0, 0
+    oldest = pd.to_datetime(new["Time"]).min().date()
+    return len(new), rebuild_store_trades(conn, repair_start_day(conn, oldest))
+
+
+def verify_ledger_store(conn: sqlite3.Connection) -> bool:
+    """True if the stored trades equal a full re-pair of every stored order."""
+    full = build_short_straddle_ledger(load_store_orders(conn), load_store_positions(conn), with_keys=True)
+    stored = pd.read_sql_query("SELECT call_order_id, put_order_id, qty, exit_date, exit_time FROM trades", conn)
+    want = {
+        (str(r["CALL ORDER ID"]), str(r["PUT ORDER ID"]), int(r["QTY"]), r["EXIT DATE"], r["Time of exit"])
+        for r in full.to_dict("records")
+    }
+    have = {
+        (str(r["call_order_id"]), str(r["put_order_id"]), int(r["qty"]), r["exit_date"], r["exit_time"])
+        for r in stored.to_dict("records")
+    }
+    if want != have:
+        print(f"[WARN] Ledger store differs from a full rebuild: missing={len(want - have)} extra={len(have - want)}")
+        return False
+    return True
+
+
+def query_store_ledger(
+    conn: sqlite3.Connection,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    underlying: Optional[str] = None,
+    expiry: Optional[date] = None,
+) -> pd.DataFrame:
+    """Stored trades in the Excel ledger format, filtered on indexed columns."""
+    where: List[str] = []
+    params: List[Any] = []
+    if start_day is not None:
+        where.append("entry_date >= ?")
+        params.append(start_day.isoformat())
+    if end_day is not None:
+        where.append("entry_date <= ?")
+        params.append(end_day.isoformat())
+    if underlying:
+        where.append("underlying = ?")
+        params.append(underlying.upper())
+    if expiry is not None:
+        where.append("expiry_date = ?")
+        params.append(expiry.isoformat())
+
+    sql = "SELECT * FROM trades"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    df = pd.read_sql_query(sql + " ORDER BY entry_date, entry_time", conn, params=params)
+
+    ledger = pd.DataFrame({col: df[db_col] for col, db_col in _TRADE_FROM_LEDGER.items() if col in OUTPUT_COLUMNS})
+    # Same whole-lot display as calculate_lots() (SQLite returns REAL).
+    ledger["LOTS"] = ledger["LOTS"].astype(object).map(lambda v: int(v) if pd.notna(v) and float(v).is_integer() else v)
+    ledger.insert(0, "S. NO.", range(1, len(ledger) + 1))
     return ledger[OUTPUT_COLUMNS]
 
 
+def monthly_rollup(conn: sqlite3.Connection, start_day: Optional[date] = None) -> pd.DataFrame:
+    """Monthly gross P/L from trades plus estimated charges from orders."""
+    params: Tuple[Any, ...] = ()
+    trade_where = order_where = ""
+    if start_day is not None:
+        trade_where = "WHERE entry_date >= ?"
+        order_where = "WHERE day >= ?"
+        params = (start_day.isoformat(),)
+
+    trades = pd.read_sql_query(
+        f"""
+        SELECT substr(entry_date, 1, 7) AS month,
+               COUNT(*) AS trades,
+               SUM(CASE WHEN pl > 0 THEN 1 ELSE 0 END) AS winning_trades,
+               ROUND(SUM(pl), 2) AS gross_pl,
+               ROUND(SUM(expiry_pl), 2) AS expiry_pl
+        FROM trades {trade_where}
+        GROUP BY month
+        """,
+        conn,
+        params=params,
+    )
+    charges = pd.read_sql_query(
+        f"""
+        SELECT substr(day, 1, 7) AS month,
+               COUNT(*) AS orders,
+               ROUND(SUM(charges), 2) AS est_charges
+        FROM orders {order_where}
+        GROUP BY month
+        """,
+        conn,
+        params=params,
+    )
+    out = trades.merge(charges, on="month", how="outer").fillna(0).sort_values("month")
+    out["net_pl"] = (out["gross_pl"] - out["est_charges"]).round(2)
+    return out.reset_index(drop=True)
+
+
 # -------------------------------------------------------------
 # Excel writer
 # -------------------------------------------------------------
-def write_excel(ledger: pd.DataFrame, output_path: Path) -> None:
+def write_excel(ledger: pd.DataFrame, output_path: Path, extra_sheets: Optional[Dict[str, pd.DataFrame]] = None) -> None:
     """Write ledger to Excel with simple formatting and column autosizing."""
     with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
         ledger.to_excel(writer, sheet_name="Trade Ledger", index=False)
+        for sheet_name, df in (extra_sheets or {}).items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            writer.sheets[sheet_name].freeze_panes = "A2"
         ws = writer.sheets["Trade Ledger"]
         ws.freeze_panes = "A2"
 
@@ -819,9 +1383,25 @@ def main() -> None:
     print("[STEP] Building short-straddle ledger ...")
     ledger = build_short_straddle_ledger(orders, positions)
 
+    extra_sheets: Dict[str, pd.DataFrame] = {}
+    if USE_LEDGER_STORE:
+        db_path = get_downloads_folder() / LEDGER_DB_FILE
+        print(f"[STEP] Updating ledger store: {db_path}")
+        conn = open_ledger_store(db_path)
+        try:
+            n_new, n_trades = update_ledger_store(conn, orders, positions)
+            print(f"[INFO] New orders stored: {n_new} | trades re-paired: {n_trades}")
+            if VERIFY_LEDGER_STORE and verify_ledger_store(conn):
+                print("[INFO] Ledger store matches a full rebuild.")
+            year_start = date(date.today().year, 1, 1)
+            extra_sheets["Ledger YTD"] = query_store_ledger(conn, start_day=year_start)
+            extra_sheets["Monthly"] = monthly_rollup(conn, start_day=year_start)
+        finally:
+            conn.close()
+
     out_path = get_downloads_folder() / OUTPUT_XLSX
     print("[STEP] Writing Excel report ...")
-    write_excel(ledger, out_path)
+    write_excel(ledger, out_path, extra_sheets)
 
     print(f"✅ Short-straddle trade ledger written to: {out_path}")
     print(f"[INFO] Ledger rows: {len(ledger)}")
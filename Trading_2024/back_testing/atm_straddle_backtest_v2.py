@@ -31,7 +31,7 @@ import glob
 import time
 from dataclasses import dataclass
 from datetime import datetime, date, time as dtime, timedelta
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, NamedTuple, Tuple, Optional, Any
 
 import pandas as pd
 
@@ -731,6 +731,304 @@ def _build_leg_series(day_opt: pd.DataFrame, idx_all: pd.DatetimeIndex,
     s = sub[price_col].astype(float).reindex(idx_all)
     return s.ffill() if do_ffill else s
 
+
+class AttemptOutcome(NamedTuple):
+    """Everything one straddle attempt produces that does not depend on earlier attempts."""
+
+    u_px: float
+    atm: int
+    ce_sym: str
+    pe_sym: str
+    ce_entry: float
+    pe_entry: float
+    exit_ts: pd.Timestamp
+    exit_reason: str
+    exit_pnl_gross: float
+    exit_ce: float
+    exit_pe: float
+    txn_charges: float
+    eod_pnl: float
+    max_profit: float
+    max_loss: float
+    max_profit_before_exit: float
+    entry_premium_sum: float
+    stop_pct: float
+    uncapped_stop_rupees: float
+    stop_cap_rupees: float
+    stop_rupees: float
+    profit_protect_trigger_pct: float
+    profit_protect_trigger_rupees: float
+
+
+def first_attempt_key() -> Tuple[Any, ...]:
+    """
+    Every global that can change the day's first attempt, and nothing else.
+
+    Re-entry, daily-loss and day-trail settings only act after the first exit.
+    Optimizers use this to memoise first attempts across trials; settings a
+    branch never reads are normalised so equivalent trials share one key.
+    """
+    protect = float(PROFIT_PROTECT_ARM_PCT) > 0.0
+    ratchet = BREAKEVEN_ARM_PCT > 0
+    return (
+        ENTRY_TIME,
+        EXIT_TIME,
+        loss_limit_pct_for_attempt(0),
+        float(MAX_LOSS_LIMIT_RUPEES_BY_ATTEMPT),
+        float(PROFIT_PROTECT_TRIGGER_RUPEES),
+        float(PROFIT_PROTECT_ARM_PCT) if protect else None,
+        float(PROFIT_PROTECT_GIVEBACK_PCT) if protect else None,
+        float(BREAKEVEN_ARM_PCT) if ratchet else None,
+        float(BREAKEVEN_LOCK_PCT) if ratchet else None,
+        float(PROFIT_TARGET_PCT),
+    )
+
+
+def simulate_attempt(
+    *,
+    und: str,
+    dy: date,
+    day_opt: pd.DataFrame,
+    underlying_day: pd.DataFrame,
+    idx_all: pd.DatetimeIndex,
+    cur_entry_ts: pd.Timestamp,
+    trade_seq: int,
+    trade_end_ts: pd.Timestamp,
+    prev_entry_premium_per_unit: Optional[float] = None,
+) -> Tuple[Optional[AttemptOutcome], Optional[Dict[str, Any]]]:
+    """
+    Enter the ATM straddle at cur_entry_ts and run it to its first exit.
+
+    Returns (outcome, None) for a completed attempt, (None, skip_fields) when the
+    attempt cannot be taken, or (None, None) when there is no minute left to
+    monitor. Day-level state (daily loss, re-entry timing) stays with
+    simulate_day_multi_trades.
+    """
+    session_end_ts = idx_all[-1]
+    qty = int(QTY_UNITS[und])
+    step = int(STRIKE_STEP[und])
+
+    # Profit-protect is now percentage-based, so the actual rupee value is not
+    # known until CE/PE entry prices are available for the current attempt.
+    profit_protect_pct = float(PROFIT_PROTECT_TRIGGER_RUPEES)
+    profit_protect_enabled = float(PROFIT_PROTECT_ARM_PCT) > 0.0
+
+    u_px = asof_close(underlying_day, cur_entry_ts)
+    if pd.isna(u_px):
+        return None, {"reason": f"No underlying price at entry {cur_entry_ts.strftime('%H:%M')}"}
+
+    atm = round_to_step(float(u_px), step)
+
+    ce_sym = _pick_symbol(day_opt, atm, "CE")
+    pe_sym = _pick_symbol(day_opt, atm, "PE")
+    if not ce_sym or not pe_sym:
+        return None, {"atm_strike": atm, "reason": "ATM CE/PE not available in pickle band"}
+
+    # Close series (used for entry pricing, profit-protect tracking, and reporting)
+    # Raw close series for exact entry validation
+    ce_close_raw = _build_leg_series(day_opt, idx_all, atm, "CE", ce_sym, "close", do_ffill=False)
+    pe_close_raw = _build_leg_series(day_opt, idx_all, atm, "PE", pe_sym, "close", do_ffill=False)
+
+    # Forward-filled close series for post-entry tracking/reporting
+    ce_close = ce_close_raw.ffill()
+    pe_close = pe_close_raw.ffill()
+
+    # High/Low series (used only to detect STOPLOSS intraminute extremes)
+    ce_high = _build_leg_series(day_opt, idx_all, atm, "CE", ce_sym, "high", do_ffill=False)
+    ce_low = _build_leg_series(day_opt, idx_all, atm, "CE", ce_sym, "low", do_ffill=False)
+    pe_high = _build_leg_series(day_opt, idx_all, atm, "PE", pe_sym, "high", do_ffill=False)
+    pe_low = _build_leg_series(day_opt, idx_all, atm, "PE", pe_sym, "low", do_ffill=False)
+
+    if cur_entry_ts not in idx_all:
+        return None, {"reason": "Entry timestamp not in session index"}
+
+    ce_entry = ce_close_raw.loc[cur_entry_ts]
+    pe_entry = pe_close_raw.loc[cur_entry_ts]
+    monitor_start_ts = pd.Timestamp(cur_entry_ts) + pd.Timedelta(minutes=1)
+    if monitor_start_ts > trade_end_ts:
+        return None, None
+
+    if pd.isna(ce_entry) or pd.isna(pe_entry):
+        return None, {"atm_strike": atm, "reason": "No CE/PE price at entry (after ffill)"}
+
+    # --- v2: do not re-sell into still-expanding volatility ---
+    if (trade_seq > 1 and REENTRY_MAX_PREMIUM_RATIO > 0
+            and prev_entry_premium_per_unit):
+        if (float(ce_entry) + float(pe_entry)) > (
+                prev_entry_premium_per_unit * REENTRY_MAX_PREMIUM_RATIO):
+            return None, {
+                "atm_strike": atm,
+                "reason": (
+                    f"No re-entry: ATM premium {float(ce_entry)+float(pe_entry):.2f} "
+                    f"> {REENTRY_MAX_PREMIUM_RATIO:.2f}x previous "
+                    f"{prev_entry_premium_per_unit:.2f}"),
+            }
+
+    # ---------------------------------------------------------------------
+    # Percentage-based risk basis for THIS attempt
+    # ---------------------------------------------------------------------
+    # For every entry/re-entry, compute the premium collected in rupees.
+    # Stop-loss and profit-protect thresholds are derived from this value.
+    #
+    # Example:
+    #   entry_ce=70, entry_pe=50, qty=325
+    #   entry_premium_sum = (70 + 50) * 325 = 39,000
+    #   10% stop-loss = 3,900
+    #   30% profit-protect threshold/giveback = 11,700
+    # ---------------------------------------------------------------------
+    entry_premium_sum = (float(ce_entry) + float(pe_entry)) * qty
+
+    loss_limit_pct = loss_limit_pct_for_attempt(trade_seq - 1)
+    uncapped_loss_limit_rupees = float(loss_limit_pct * entry_premium_sum)
+
+    # Absolute cap on the percentage-based stop-loss.
+    # Example: 10% of premium may be Rs. 4,500, but with a Rs. 3,000 cap
+    # the effective stop used by the simulator is Rs. 3,000.
+    stop_cap_rupees = float(MAX_LOSS_LIMIT_RUPEES_BY_ATTEMPT)
+    if stop_cap_rupees > 0:
+        loss_limit_rupees = float(min(uncapped_loss_limit_rupees, stop_cap_rupees))
+    else:
+        loss_limit_rupees = float(uncapped_loss_limit_rupees)
+
+    # G is the same variable used by the existing profit-protect logic:
+    #   - profit-protect arms when peak P&L >= G
+    #   - profit-protect exits when current P&L <= peak - G
+    G = float(profit_protect_pct * entry_premium_sum)
+
+    # Close-based PnL (same as before)
+    pnl_close_all = (float(ce_entry) - ce_close) * qty + (float(pe_entry) - pe_close) * qty
+    pnl = pnl_close_all.loc[monitor_start_ts:trade_end_ts].dropna()  # keep 'pnl' as close-based for profit-protect
+
+    # STOPLOSS worst-case PnL candidates within each minute:
+    #  A) CE high, PE low
+    pnl_ceHigh_peLow_all = (float(ce_entry) - ce_high) * qty + (float(pe_entry) - pe_low) * qty
+    #  B) CE low, PE high
+    pnl_ceLow_peHigh_all = (float(ce_entry) - ce_low) * qty + (float(pe_entry) - pe_high) * qty
+
+    # Worst-case PnL per minute among (close, A, B)
+    pnl_sl_all = pd.concat([pnl_close_all, pnl_ceHigh_peLow_all, pnl_ceLow_peHigh_all], axis=1).min(axis=1)
+    pnl_sl = pnl_sl_all.loc[monitor_start_ts:trade_end_ts].dropna()
+
+    if pnl.empty:
+        return None, {"atm_strike": atm, "reason": "PnL series empty after entry"}
+
+    eod_ts = pnl.index[-1]
+    eod_pnl = float(pnl.iloc[-1])
+
+    # If EXIT_TIME_IST is earlier than market close and no risk/profit event
+    # triggers before that, the attempt is closed at the configured cutoff.
+    # The old "EOD" label is retained only when the monitoring horizon is
+    # the real session end.
+    default_exit_reason = "TIME_EXIT" if trade_end_ts < session_end_ts else "EOD"
+
+    max_profit = float(max(0.0, pnl.max()))
+    max_loss = float(min(0.0, pnl.min()))
+
+    # STOPLOSS uses the attempt-specific rupee value after applying the
+    # absolute per-attempt cap.
+    # --- v2: breakeven ratchet ---------------------------------------
+    # The stop floor starts at -loss_limit_rupees. Once the running peak of
+    # the close-based P&L reaches BREAKEVEN_ARM_PCT of premium, the floor is
+    # lifted to BREAKEVEN_LOCK_PCT of premium for the rest of the trade.
+    stop_floor = pd.Series(-float(loss_limit_rupees), index=pnl_sl.index)
+    if BREAKEVEN_ARM_PCT > 0:
+        running_peak = pnl.cummax().reindex(pnl_sl.index).ffill()
+        be_armed = running_peak >= (BREAKEVEN_ARM_PCT * entry_premium_sum)
+        be_floor = float(BREAKEVEN_LOCK_PCT * entry_premium_sum)
+        stop_floor = stop_floor.mask(be_armed.fillna(False),
+                                     max(-float(loss_limit_rupees), be_floor))
+
+    stop_hit = pnl_sl <= stop_floor
+    stop_ts = pnl_sl.index[stop_hit.to_numpy().argmax()] if stop_hit.any() else None
+
+    protect_ts = None
+    if profit_protect_enabled:
+        peak = pnl.cummax()
+        arm_rupees = float(PROFIT_PROTECT_ARM_PCT * entry_premium_sum)
+        give_rupees = float(PROFIT_PROTECT_GIVEBACK_PCT * entry_premium_sum)
+        armed = peak >= arm_rupees
+        trail = peak - give_rupees
+        protect_hit = armed & (pnl <= trail)
+        protect_ts = pnl.index[protect_hit.to_numpy().argmax()] if protect_hit.any() else None
+
+    # --- Per-day PROFIT TARGET: % of premium collected on this attempt ---
+    # When reached, this trade exits at the target AND no further trades are
+    # taken for the day (PROFIT_TARGET is excluded from the re-entry rule below).
+    target_ts = None
+    target_rupees = None
+    if PROFIT_TARGET_PCT > 0.0:
+        target_rupees = PROFIT_TARGET_PCT * entry_premium_sum
+        # best-case (favourable) intrabar profit: both legs bought back at their lows
+        pnl_best_all = (float(ce_entry) - ce_low) * qty + (float(pe_entry) - pe_low) * qty
+        pnl_tp = pd.concat([pnl_close_all, pnl_best_all], axis=1).max(axis=1)
+        pnl_tp = pnl_tp.loc[monitor_start_ts:trade_end_ts].dropna()
+        tp_hit = pnl_tp >= float(target_rupees)
+        target_ts = pnl_tp.index[tp_hit.to_numpy().argmax()] if tp_hit.any() else None
+
+    # Earliest triggered exit wins; on identical timestamps prefer the more
+    # conservative outcome: STOPLOSS, then PROFIT_TARGET, then PROFIT_PROTECT.
+    exit_ts = eod_ts
+    exit_reason = default_exit_reason
+    _candidates = []
+    if stop_ts is not None:
+        _candidates.append((stop_ts, 0, "STOPLOSS"))
+    if target_ts is not None:
+        _candidates.append((target_ts, 1, "PROFIT_TARGET"))
+    if protect_ts is not None:
+        _candidates.append((protect_ts, 2, "PROFIT_PROTECT"))
+    if _candidates:
+        _candidates.sort(key=lambda c: (c[0], c[1]))
+        exit_ts, _, exit_reason = _candidates[0]
+
+    if exit_reason == "STOPLOSS":
+        # v2: with the ratchet armed this may be a small PROFIT, not a loss.
+        exit_pnl_gross = float(stop_floor.loc[exit_ts])
+    elif exit_reason == "PROFIT_TARGET":
+        exit_pnl_gross = float(target_rupees)
+    else:
+        exit_pnl_gross = float(pnl.loc[exit_ts])
+
+    # Peak (close-based) profit reached during this trade's life, up to its exit
+    pnl_pre_exit = pnl.loc[:exit_ts]
+    max_profit_before_exit = float(max(0.0, pnl_pre_exit.max())) if len(pnl_pre_exit) else 0.0
+
+    exit_ce = float(ce_close.loc[exit_ts]) if pd.notna(ce_close.loc[exit_ts]) else float("nan")
+    exit_pe = float(pe_close.loc[exit_ts]) if pd.notna(pe_close.loc[exit_ts]) else float("nan")
+
+    txn_charges = compute_trade_charges(
+        entry_ce=float(ce_entry), entry_pe=float(pe_entry),
+        exit_ce=exit_ce if not pd.isna(exit_ce) else 0.0,
+        exit_pe=exit_pe if not pd.isna(exit_pe) else 0.0,
+        qty=qty,
+    )
+
+    return AttemptOutcome(
+        u_px=float(u_px),
+        atm=int(atm),
+        ce_sym=ce_sym,
+        pe_sym=pe_sym,
+        ce_entry=float(ce_entry),
+        pe_entry=float(pe_entry),
+        exit_ts=exit_ts,
+        exit_reason=exit_reason,
+        exit_pnl_gross=exit_pnl_gross,
+        exit_ce=exit_ce,
+        exit_pe=exit_pe,
+        txn_charges=txn_charges,
+        eod_pnl=eod_pnl,
+        max_profit=max_profit,
+        max_loss=max_loss,
+        max_profit_before_exit=max_profit_before_exit,
+        entry_premium_sum=float(entry_premium_sum),
+        stop_pct=float(loss_limit_pct),
+        uncapped_stop_rupees=float(uncapped_loss_limit_rupees),
+        stop_cap_rupees=float(stop_cap_rupees),
+        stop_rupees=float(loss_limit_rupees),
+        profit_protect_trigger_pct=float(profit_protect_pct),
+        profit_protect_trigger_rupees=float(G),
+    ), None
+
+
 def simulate_day_multi_trades(
     *,
     und: str,
@@ -763,12 +1061,6 @@ def simulate_day_multi_trades(
     trade_end_ts = min(session_end_ts, configured_exit_cutoff_ts)
 
     qty = int(QTY_UNITS[und])
-    step = int(STRIKE_STEP[und])
-
-    # Profit-protect is now percentage-based, so the actual rupee value is not
-    # known until CE/PE entry prices are available for the current attempt.
-    profit_protect_pct = float(PROFIT_PROTECT_TRIGGER_RUPEES)
-    profit_protect_enabled = float(PROFIT_PROTECT_ARM_PCT) > 0.0
 
     cur_entry_ts = pd.Timestamp(datetime.combine(dy, ENTRY_TIME), tz=ist_tz())
     trade_seq = 1
@@ -810,208 +1102,28 @@ def simulate_day_multi_trades(
             })
             break
 
-        u_px = asof_close(underlying_day, cur_entry_ts)
-        if pd.isna(u_px):
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "reason": f"No underlying price at entry {cur_entry_ts.strftime('%H:%M')}"})
-            break
-
-        atm = round_to_step(float(u_px), step)
-
-        ce_sym = _pick_symbol(day_opt, atm, "CE")
-        pe_sym = _pick_symbol(day_opt, atm, "PE")
-        if not ce_sym or not pe_sym:
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "atm_strike": atm, "reason": "ATM CE/PE not available in pickle band"})
-            break
-
-        # Close series (used for entry pricing, profit-protect tracking, and reporting)
-        # Raw close series for exact entry validation
-        ce_close_raw = _build_leg_series(day_opt, idx_all, atm, "CE", ce_sym, "close", do_ffill=False)
-        pe_close_raw = _build_leg_series(day_opt, idx_all, atm, "PE", pe_sym, "close", do_ffill=False)
-
-        # Forward-filled close series for post-entry tracking/reporting
-        ce_close = ce_close_raw.ffill()
-        pe_close = pe_close_raw.ffill()
-
-        # High/Low series (used only to detect STOPLOSS intraminute extremes)
-        ce_high = _build_leg_series(day_opt, idx_all, atm, "CE", ce_sym, "high", do_ffill=False)
-        ce_low = _build_leg_series(day_opt, idx_all, atm, "CE", ce_sym, "low", do_ffill=False)
-        pe_high = _build_leg_series(day_opt, idx_all, atm, "PE", pe_sym, "high", do_ffill=False)
-        pe_low = _build_leg_series(day_opt, idx_all, atm, "PE", pe_sym, "low", do_ffill=False)
-
-        if cur_entry_ts not in idx_all:
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "reason": "Entry timestamp not in session index"})
-            break
-
-        ce_entry = ce_close_raw.loc[cur_entry_ts]
-        pe_entry = pe_close_raw.loc[cur_entry_ts]
-        monitor_start_ts = pd.Timestamp(cur_entry_ts) + pd.Timedelta(minutes=1)
-        if monitor_start_ts > trade_end_ts:
-            break
-
-        if pd.isna(ce_entry) or pd.isna(pe_entry):
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "atm_strike": atm, "reason": "No CE/PE price at entry (after ffill)"})
-            break
-
-        # --- v2: do not re-sell into still-expanding volatility ---
-        if (trade_seq > 1 and REENTRY_MAX_PREMIUM_RATIO > 0
-                and prev_entry_premium_per_unit):
-            if (float(ce_entry) + float(pe_entry)) > (
-                    prev_entry_premium_per_unit * REENTRY_MAX_PREMIUM_RATIO):
-                skipped.append({
-                    "day": dy, "underlying": und, "expiry": expiry,
-                    "trade_seq": trade_seq, "atm_strike": atm,
-                    "reason": (
-                        f"No re-entry: ATM premium {float(ce_entry)+float(pe_entry):.2f} "
-                        f"> {REENTRY_MAX_PREMIUM_RATIO:.2f}x previous "
-                        f"{prev_entry_premium_per_unit:.2f}"),
-                })
-                break
-        prev_entry_premium_per_unit = float(ce_entry) + float(pe_entry)
-
-        # ---------------------------------------------------------------------
-        # Percentage-based risk basis for THIS attempt
-        # ---------------------------------------------------------------------
-        # For every entry/re-entry, compute the premium collected in rupees.
-        # Stop-loss and profit-protect thresholds are derived from this value.
-        #
-        # Example:
-        #   entry_ce=70, entry_pe=50, qty=325
-        #   entry_premium_sum = (70 + 50) * 325 = 39,000
-        #   10% stop-loss = 3,900
-        #   30% profit-protect threshold/giveback = 11,700
-        # ---------------------------------------------------------------------
-        entry_premium_sum = (float(ce_entry) + float(pe_entry)) * qty
-
-        loss_limit_pct = loss_limit_pct_for_attempt(trade_seq - 1)
-        uncapped_loss_limit_rupees = float(loss_limit_pct * entry_premium_sum)
-
-        # Absolute cap on the percentage-based stop-loss.
-        # Example: 10% of premium may be Rs. 4,500, but with a Rs. 3,000 cap
-        # the effective stop used by the simulator is Rs. 3,000.
-        stop_cap_rupees = float(MAX_LOSS_LIMIT_RUPEES_BY_ATTEMPT)
-        if stop_cap_rupees > 0:
-            loss_limit_rupees = float(min(uncapped_loss_limit_rupees, stop_cap_rupees))
-        else:
-            loss_limit_rupees = float(uncapped_loss_limit_rupees)
-
-        # G is the same variable used by the existing profit-protect logic:
-        #   - profit-protect arms when peak P&L >= G
-        #   - profit-protect exits when current P&L <= peak - G
-        G = float(profit_protect_pct * entry_premium_sum)
-
-        # Close-based PnL (same as before)
-        pnl_close_all = (float(ce_entry) - ce_close) * qty + (float(pe_entry) - pe_close) * qty
-        pnl = pnl_close_all.loc[monitor_start_ts:trade_end_ts].dropna()  # keep 'pnl' as close-based for profit-protect
-
-        # STOPLOSS worst-case PnL candidates within each minute:
-        #  A) CE high, PE low
-        pnl_ceHigh_peLow_all = (float(ce_entry) - ce_high) * qty + (float(pe_entry) - pe_low) * qty
-        #  B) CE low, PE high
-        pnl_ceLow_peHigh_all = (float(ce_entry) - ce_low) * qty + (float(pe_entry) - pe_high) * qty
-
-        # Worst-case PnL per minute among (close, A, B)
-        pnl_sl_all = pd.concat([pnl_close_all, pnl_ceHigh_peLow_all, pnl_ceLow_peHigh_all], axis=1).min(axis=1)
-        pnl_sl = pnl_sl_all.loc[monitor_start_ts:trade_end_ts].dropna()
-
-        if pnl.empty:
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "atm_strike": atm, "reason": "PnL series empty after entry"})
+        # Looked up at call time so optimizers can install a memoising wrapper.
+        outcome, skip = simulate_attempt(
+            und=und,
+            dy=dy,
+            day_opt=day_opt,
+            underlying_day=underlying_day,
+            idx_all=idx_all,
+            cur_entry_ts=cur_entry_ts,
+            trade_seq=trade_seq,
+            trade_end_ts=trade_end_ts,
+            prev_entry_premium_per_unit=prev_entry_premium_per_unit,
+        )
+        if outcome is None:
+            if skip is not None:
+                skipped.append({"day": dy, "underlying": und, "expiry": expiry,
+                                "trade_seq": trade_seq, **skip})
             break
+        prev_entry_premium_per_unit = outcome.ce_entry + outcome.pe_entry
 
-        eod_ts = pnl.index[-1]
-        eod_pnl = float(pnl.iloc[-1])
-
-        # If EXIT_TIME_IST is earlier than market close and no risk/profit event
-        # triggers before that, the attempt is closed at the configured cutoff.
-        # The old "EOD" label is retained only when the monitoring horizon is
-        # the real session end.
-        default_exit_reason = "TIME_EXIT" if trade_end_ts < session_end_ts else "EOD"
-
-        max_profit = float(max(0.0, pnl.max()))
-        max_loss = float(min(0.0, pnl.min()))
-
-        # STOPLOSS uses the attempt-specific rupee value after applying the
-        # absolute per-attempt cap.
-        # --- v2: breakeven ratchet ---------------------------------------
-        # The stop floor starts at -loss_limit_rupees. Once the running peak of
-        # the close-based P&L reaches BREAKEVEN_ARM_PCT of premium, the floor is
-        # lifted to BREAKEVEN_LOCK_PCT of premium for the rest of the trade.
-        stop_floor = pd.Series(-float(loss_limit_rupees), index=pnl_sl.index)
-        if BREAKEVEN_ARM_PCT > 0:
-            running_peak = pnl.cummax().reindex(pnl_sl.index).ffill()
-            be_armed = running_peak >= (BREAKEVEN_ARM_PCT * entry_premium_sum)
-            be_floor = float(BREAKEVEN_LOCK_PCT * entry_premium_sum)
-            stop_floor = stop_floor.mask(be_armed.fillna(False),
-                                         max(-float(loss_limit_rupees), be_floor))
-
-        stop_hit = pnl_sl <= stop_floor
-        stop_ts = pnl_sl.index[stop_hit.to_numpy().argmax()] if stop_hit.any() else None
-
-        protect_ts = None
-        if profit_protect_enabled:
-            peak = pnl.cummax()
-            arm_rupees = float(PROFIT_PROTECT_ARM_PCT * entry_premium_sum)
-            give_rupees = float(PROFIT_PROTECT_GIVEBACK_PCT * entry_premium_sum)
-            armed = peak >= arm_rupees
-            trail = peak - give_rupees
-            protect_hit = armed & (pnl <= trail)
-            protect_ts = pnl.index[protect_hit.to_numpy().argmax()] if protect_hit.any() else None
-
-        # --- Per-day PROFIT TARGET: % of premium collected on this attempt ---
-        # When reached, this trade exits at the target AND no further trades are
-        # taken for the day (PROFIT_TARGET is excluded from the re-entry rule below).
-        target_ts = None
-        target_rupees = None
-        if PROFIT_TARGET_PCT > 0.0:
-            target_rupees = PROFIT_TARGET_PCT * entry_premium_sum
-            # best-case (favourable) intrabar profit: both legs bought back at their lows
-            pnl_best_all = (float(ce_entry) - ce_low) * qty + (float(pe_entry) - pe_low) * qty
-            pnl_tp = pd.concat([pnl_close_all, pnl_best_all], axis=1).max(axis=1)
-            pnl_tp = pnl_tp.loc[monitor_start_ts:trade_end_ts].dropna()
-            tp_hit = pnl_tp >= float(target_rupees)
-            target_ts = pnl_tp.index[tp_hit.to_numpy().argmax()] if tp_hit.any() else None
-
-        # Earliest triggered exit wins; on identical timestamps prefer the more
-        # conservative outcome: STOPLOSS, then PROFIT_TARGET, then PROFIT_PROTECT.
-        exit_ts = eod_ts
-        exit_reason = default_exit_reason
-        _candidates = []
-        if stop_ts is not None:
-            _candidates.append((stop_ts, 0, "STOPLOSS"))
-        if target_ts is not None:
-            _candidates.append((target_ts, 1, "PROFIT_TARGET"))
-        if protect_ts is not None:
-            _candidates.append((protect_ts, 2, "PROFIT_PROTECT"))
-        if _candidates:
-            _candidates.sort(key=lambda c: (c[0], c[1]))
-            exit_ts, _, exit_reason = _candidates[0]
-
-        if exit_reason == "STOPLOSS":
-            # v2: with the ratchet armed this may be a small PROFIT, not a loss.
-            exit_pnl_gross = float(stop_floor.loc[exit_ts])
-        elif exit_reason == "PROFIT_TARGET":
-            exit_pnl_gross = float(target_rupees)
-        else:
-            exit_pnl_gross = float(pnl.loc[exit_ts])
-
-        # Peak (close-based) profit reached during this trade's life, up to its exit
-        pnl_pre_exit = pnl.loc[:exit_ts]
-        max_profit_before_exit = float(max(0.0, pnl_pre_exit.max())) if len(pnl_pre_exit) else 0.0
-
-        exit_ce = float(ce_close.loc[exit_ts]) if pd.notna(ce_close.loc[exit_ts]) else float("nan")
-        exit_pe = float(pe_close.loc[exit_ts]) if pd.notna(pe_close.loc[exit_ts]) else float("nan")
-
-        txn_charges = compute_trade_charges(
-            entry_ce=float(ce_entry), entry_pe=float(pe_entry),
-            exit_ce=exit_ce if not pd.isna(exit_ce) else 0.0,
-            exit_pe=exit_pe if not pd.isna(exit_pe) else 0.0,
-            qty=qty,
-        )
-        exit_pnl = exit_pnl_gross - txn_charges
+        exit_ts = outcome.exit_ts
+        exit_reason = outcome.exit_reason
+        exit_pnl = outcome.exit_pnl_gross - outcome.txn_charges
 
         # Update cumulative realized NET P&L for the day. This is checked
         # before allowing any further re-entry.
@@ -1029,32 +1141,32 @@ def simulate_day_multi_trades(
                 trade_seq=trade_seq,
                 expiry=expiry,
                 days_to_expiry=dte,
-                atm_strike=int(atm),
+                atm_strike=outcome.atm,
                 qty_units=qty,
                 entry_time=pd.Timestamp(cur_entry_ts).strftime("%H:%M"),
                 exit_time=pd.Timestamp(exit_ts).strftime("%H:%M"),
                 exit_reason=exit_reason,
-                entry_underlying=float(u_px),
-                ce_symbol=ce_sym,
-                pe_symbol=pe_sym,
-                entry_ce=float(ce_entry),
-                entry_pe=float(pe_entry),
-                exit_ce=exit_ce,
-                exit_pe=exit_pe,
-                exit_pnl_gross=exit_pnl_gross,
-                txn_charges=txn_charges,
+                entry_underlying=outcome.u_px,
+                ce_symbol=outcome.ce_sym,
+                pe_symbol=outcome.pe_sym,
+                entry_ce=outcome.ce_entry,
+                entry_pe=outcome.pe_entry,
+                exit_ce=outcome.exit_ce,
+                exit_pe=outcome.exit_pe,
+                exit_pnl_gross=outcome.exit_pnl_gross,
+                txn_charges=outcome.txn_charges,
                 exit_pnl=exit_pnl,
-                eod_pnl=eod_pnl,
-                max_profit=max_profit,
-                max_loss=max_loss,
-                max_profit_before_exit=max_profit_before_exit,
-                entry_premium_sum=float(entry_premium_sum),
-                stop_pct=float(loss_limit_pct),
-                uncapped_stop_rupees=float(uncapped_loss_limit_rupees),
-                stop_cap_rupees=float(stop_cap_rupees),
-                stop_rupees=float(loss_limit_rupees),
-                profit_protect_trigger_pct=float(profit_protect_pct),
-                profit_protect_trigger_rupees=float(G),
+                eod_pnl=outcome.eod_pnl,
+                max_profit=outcome.max_profit,
+                max_loss=outcome.max_loss,
+                max_profit_before_exit=outcome.max_profit_before_exit,
+                entry_premium_sum=outcome.entry_premium_sum,
+                stop_pct=outcome.stop_pct,
+                uncapped_stop_rupees=outcome.uncapped_stop_rupees,
+                stop_cap_rupees=outcome.stop_cap_rupees,
+                stop_rupees=outcome.stop_rupees,
+                profit_protect_trigger_pct=outcome.profit_protect_trigger_pct,
+                profit_protect_trigger_rupees=outcome.profit_protect_trigger_rupees,
                 daily_realized_pnl_after_trade=float(daily_realized_pnl),
                 daily_loss_limit_rupees=float(MAX_DAILY_LOSS_RUPEES),
                 daily_loss_limit_hit=bool(daily_loss_limit_hit),
@@ -111,6 +111,12 @@ SAMPLE_MAX_DAY_GROUPS: Optional[int] = None  # example: 20
 OPT_CACHE_LEG_SERIES = True
 OPT_CACHE_UNDERLYING_ASOF = True
 
+# Remember each day's first attempt under strategy.first_attempt_key(), so trials
+# that differ only in re-entry / daily-loss settings skip straight to the
+# re-entries.  At most this many keys are kept per day-group (oldest dropped).
+OPT_CACHE_FIRST_ATTEMPT = True
+OPT_FIRST_ATTEMPT_CACHE_PER_DAY = 4096
+
 
 # =============================================================================
 # FILE LOCATIONS
@@ -731,11 +737,14 @@ def build_day_groups(
 # =============================================================================
 _ORIGINAL_BUILD_LEG_SERIES = strategy._build_leg_series
 _ORIGINAL_ASOF_CLOSE = strategy.asof_close
+_ORIGINAL_SIMULATE_ATTEMPT = strategy.simulate_attempt
 
 # The key includes id(day_opt), which is stable because every DayGroup retains
 # the same DataFrame object throughout the optimiser run.
 _LEG_SERIES_CACHE: Dict[Tuple[int, int, str, str, str, bool], pd.Series] = {}
 _UNDERLYING_INDEX_CACHE: Dict[int, pd.Series] = {}
+_FIRST_ATTEMPT_CACHE: Dict[int, Dict[Tuple[Any, ...], Any]] = {}
+_FIRST_ATTEMPT_STATS: Dict[str, int] = {"hits": 0, "misses": 0}
 
 
 def _cached_build_leg_series(
@@ -791,12 +800,34 @@ def _cached_asof_close(df: pd.DataFrame, ts: pd.Timestamp) -> float:
     return float(indexed.iloc[location[0]])
 
 
+def _cached_simulate_attempt(**kwargs: Any):
+    """Reuse a day's first attempt across trials with the same first-attempt key."""
+    if kwargs["trade_seq"] != 1:
+        return _ORIGINAL_SIMULATE_ATTEMPT(**kwargs)
+
+    per_day = _FIRST_ATTEMPT_CACHE.setdefault(id(kwargs["day_opt"]), {})
+    key = strategy.first_attempt_key()
+    cached = per_day.get(key)
+    if cached is not None:
+        _FIRST_ATTEMPT_STATS["hits"] += 1
+        return cached
+
+    _FIRST_ATTEMPT_STATS["misses"] += 1
+    cached = _ORIGINAL_SIMULATE_ATTEMPT(**kwargs)
+    if len(per_day) >= OPT_FIRST_ATTEMPT_CACHE_PER_DAY:
+        per_day.pop(next(iter(per_day)))
+    per_day[key] = cached
+    return cached
+
+
 def _install_performance_caches() -> None:
-    """Monkey-patch only the two pure data-access helpers used by simulation."""
+    """Monkey-patch the pure data-access helpers and the first-attempt memo."""
     if OPT_CACHE_LEG_SERIES:
         strategy._build_leg_series = _cached_build_leg_series
     if OPT_CACHE_UNDERLYING_ASOF:
         strategy.asof_close = _cached_asof_close
+    if OPT_CACHE_FIRST_ATTEMPT and OPT_FIRST_ATTEMPT_CACHE_PER_DAY > 0:
+        strategy.simulate_attempt = _cached_simulate_attempt
 
 
 # =============================================================================
@@ -1322,6 +1353,13 @@ def optimize(
         )
     finally:
         csv_file.close()
+        lookups = _FIRST_ATTEMPT_STATS["hits"] + _FIRST_ATTEMPT_STATS["misses"]
+        if lookups:
+            print(
+                f"[OPT] First-attempt cache: {_FIRST_ATTEMPT_STATS['hits']}/{lookups} "
+                f"day lookups reused ({_FIRST_ATTEMPT_STATS['hits'] / lookups:.1%})",
+                flush=True,
+            )
         try:
             study.trials_dataframe().to_csv(full_csv_path, index=False)
             print(f"[OPT] Full Optuna table: {full_csv_path}")
@@ -56,6 +56,13 @@ still occur at different milliseconds. The one-second low-low model is much
 more tightly synchronized than one-minute low-low, but it is not an order-book
 or guaranteed-fill simulation.
 
+Archived days
+-------------
+Finished days can be folded into monthly Parquet files with ``spike_archive.py``.
+With ``SPIKE_ARCHIVE_DIR`` set, those days are catalogued from the archive
+footers and loaded from one row group each; only databases not yet archived are
+opened through SQLite.
+
 Run
 ---
     python atm_straddle_backtest_v3_1sec_sqlite.py
@@ -81,6 +88,8 @@ from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 import pandas as pd
 
+from Trading_2024.back_testing import report_writer, spike_archive
+
 try:
     from zoneinfo import ZoneInfo
 except ImportError as exc:  # pragma: no cover
@@ -252,6 +261,10 @@ SQLITE_DIR = os.path.abspath(
 )
 SQLITE_GLOB = os.getenv("SQLITE_GLOB", "kite_option_spikes_v3_*.sqlite3")
 SQLITE_RECURSIVE = _parse_bool(os.getenv("SQLITE_RECURSIVE"), True)
+# Monthly Parquet archive written by spike_archive.py. Days found there are
+# catalogued from the file footer and their SQLite sources are not reopened.
+# Blank disables the archive.
+SPIKE_ARCHIVE_DIR = os.getenv("SPIKE_ARCHIVE_DIR", "").strip()
 FAIL_ON_DB_ERROR = _parse_bool(
     os.getenv("FAIL_ON_DB_ERROR", os.getenv("FAIL_ON_PICKLE_ERROR", "0")),
     False,
@@ -469,6 +482,8 @@ class DatabaseRecord:
     last_second: Optional[int]
     reconnect_events: int
     error_events: int
+    archive_path: str = ""
+    archive_row_group: int = -1
 
 
 @dataclass
@@ -660,6 +675,83 @@ def _parse_bool_metadata(value: Optional[str], default: bool = False) -> bool:
     return str(value).strip().lower() in {"1", "true", "yes", "on"}
 
 
+def build_database_record(
+    path: str,
+    metadata: Mapping[str, str],
+    instrument_rows: Sequence[Sequence[Any]],
+    bar_count: int,
+    first_second: Optional[int],
+    last_second: Optional[int],
+    reconnect_events: int,
+    error_events: int,
+    archive_path: str = "",
+    archive_row_group: int = -1,
+) -> DatabaseRecord:
+    """Catalogue rules shared by SQLite files and archived days.
+
+    instrument_rows: (token,index_name,symbol,kind,option_type,strike,expiry,strike_step).
+    """
+
+    trading_day_raw = metadata.get("trading_day")
+    if not trading_day_raw:
+        raise RuntimeError("run_metadata.trading_day is missing")
+    trading_day = _parse_date(trading_day_raw)
+
+    schema_version = int(metadata.get("schema_version", "0") or 0)
+    if REQUIRE_COLLECTOR_SCHEMA_VERSION > 0 and schema_version != REQUIRE_COLLECTOR_SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Unsupported collector schema_version={schema_version}; "
+            f"required={REQUIRE_COLLECTOR_SCHEMA_VERSION}"
+        )
+
+    if not instrument_rows:
+        raise RuntimeError("instruments table is empty")
+
+    underlying = _normalise_underlying(metadata.get("target_index"))
+    if underlying is None:
+        for row in instrument_rows:
+            underlying = _normalise_underlying(row[1])
+            if underlying:
+                break
+    if underlying not in TRADEABLE:
+        raise RuntimeError(f"Unsupported target index: {underlying!r}")
+
+    expiries = sorted(
+        {
+            _parse_date(row[6])
+            for row in instrument_rows
+            if int(row[3]) == 2 and row[6]
+        }
+    )
+    expiries = [expiry for expiry in expiries if expiry >= trading_day]
+    if not expiries:
+        raise RuntimeError("No non-expired option expiry in instruments table")
+    expiry = expiries[0]
+
+    return DatabaseRecord(
+        path=os.path.abspath(path),
+        filename=os.path.basename(path),
+        trading_day=trading_day,
+        underlying=underlying,
+        expiry=expiry,
+        days_to_expiry=(expiry - trading_day).days,
+        schema_version=schema_version,
+        script_version=metadata.get("script_version", ""),
+        time_basis=metadata.get("time_basis", "unknown"),
+        save_only_price_changes=_parse_bool_metadata(
+            metadata.get("save_only_price_changes"), True
+        ),
+        bar_count=bar_count,
+        option_count=sum(1 for row in instrument_rows if int(row[3]) == 2),
+        first_second=first_second,
+        last_second=last_second,
+        reconnect_events=reconnect_events,
+        error_events=error_events,
+        archive_path=archive_path,
+        archive_row_group=archive_row_group,
+    )
+
+
 def catalog_database(path: str) -> DatabaseRecord:
     connection = _connect_readonly(path)
     try:
@@ -669,18 +761,6 @@ def catalog_database(path: str) -> DatabaseRecord:
             raise RuntimeError(f"Missing collector tables: {missing}")
 
         metadata = _read_metadata(connection)
-        trading_day_raw = metadata.get("trading_day")
-        if not trading_day_raw:
-            raise RuntimeError("run_metadata.trading_day is missing")
-        trading_day = _parse_date(trading_day_raw)
-
-        schema_version = int(metadata.get("schema_version", "0") or 0)
-        if REQUIRE_COLLECTOR_SCHEMA_VERSION > 0 and schema_version != REQUIRE_COLLECTOR_SCHEMA_VERSION:
-            raise RuntimeError(
-                f"Unsupported collector schema_version={schema_version}; "
-                f"required={REQUIRE_COLLECTOR_SCHEMA_VERSION}"
-            )
-
         instrument_rows = connection.execute(
             """
             SELECT token,index_name,symbol,kind,option_type,strike,expiry,strike_step
@@ -688,29 +768,6 @@ def catalog_database(path: str) -> DatabaseRecord:
             ORDER BY token
             """
         ).fetchall()
-        if not instrument_rows:
-            raise RuntimeError("instruments table is empty")
-
-        underlying = _normalise_underlying(metadata.get("target_index"))
-        if underlying is None:
-            for row in instrument_rows:
-                underlying = _normalise_underlying(row[1])
-                if underlying:
-                    break
-        if underlying not in TRADEABLE:
-            raise RuntimeError(f"Unsupported target index: {underlying!r}")
-
-        expiries = sorted(
-            {
-                _parse_date(row[6])
-                for row in instrument_rows
-                if int(row[3]) == 2 and row[6]
-            }
-        )
-        expiries = [expiry for expiry in expiries if expiry >= trading_day]
-        if not expiries:
-            raise RuntimeError("No non-expired option expiry in instruments table")
-        expiry = expiries[0]
 
         bar_stats = connection.execute(
             """
@@ -720,13 +777,6 @@ def catalog_database(path: str) -> DatabaseRecord:
             FROM bars
             """
         ).fetchone()
-        bar_count = int(bar_stats[0] or 0)
-        first_second = int(bar_stats[1]) if bar_stats[1] is not None else None
-        last_second = int(bar_stats[2]) if bar_stats[2] is not None else None
-
-        option_count = int(
-            connection.execute("SELECT COUNT(*) FROM instruments WHERE kind=2").fetchone()[0]
-        )
 
         reconnect_events = 0
         error_events = 0
@@ -742,23 +792,13 @@ def catalog_database(path: str) -> DatabaseRecord:
                 ).fetchone()[0]
             )
 
-        return DatabaseRecord(
-            path=os.path.abspath(path),
-            filename=os.path.basename(path),
-            trading_day=trading_day,
-            underlying=underlying,
-            expiry=expiry,
-            days_to_expiry=(expiry - trading_day).days,
-            schema_version=schema_version,
-            script_version=metadata.get("script_version", ""),
-            time_basis=metadata.get("time_basis", "unknown"),
-            save_only_price_changes=_parse_bool_metadata(
-                metadata.get("save_only_price_changes"), True
-            ),
-            bar_count=bar_count,
-            option_count=option_count,
-            first_second=first_second,
-            last_second=last_second,
+        return build_database_record(
+            path,
+            metadata,
+            instrument_rows,
+            bar_count=int(bar_stats[0] or 0),
+            first_second=int(bar_stats[1]) if bar_stats[1] is not None else None,
+            last_second=int(bar_stats[2]) if bar_stats[2] is not None else None,
             reconnect_events=reconnect_events,
             error_events=error_events,
         )
@@ -766,6 +806,65 @@ def catalog_database(path: str) -> DatabaseRecord:
         connection.close()
 
 
+def scan_archive_catalog() -> Tuple[List[DatabaseRecord], List[Dict[str, Any]], set]:
+    """Catalogue archived days from the month-file footers.
+
+    Returns records, skip rows and the archived source filenames, which
+    discover_sqlite_paths() callers use to avoid reopening those databases.
+    """
+
+    records: List[DatabaseRecord] = []
+    skipped: List[Dict[str, Any]] = []
+    archived_sources: set = set()
+    if not SPIKE_ARCHIVE_DIR:
+        return records, skipped, archived_sources
+    archives = spike_archive.discover_archives(SPIKE_ARCHIVE_DIR)
+    print(f"[INFO] Spike archives found: {len(archives)} under {SPIKE_ARCHIVE_DIR}")
+    for archive_path in archives:
+        try:
+            days = spike_archive.archive_day_catalog(archive_path)
+        except Exception as exc:
+            row = {"source_db": archive_path, "reason": f"Archive catalogue failure: {exc}"}
+            skipped.append(row)
+            if FAIL_ON_DB_ERROR:
+                raise RuntimeError(row["reason"]) from exc
+            print(f"[CATALOG WARN] {os.path.basename(archive_path)}: {exc}")
+            continue
+        for day in days:
+            archived_sources.add(day["source_file"])
+            try:
+                # Archive rows follow spike_archive.INSTRUMENT_FIELDS; drop exchange/lot_size.
+                instrument_rows = [
+                    (row[0], row[1], row[3], row[4], row[5], row[6], row[7], row[8])
+                    for row in day["instrument_rows"]
+                ]
+                record = build_database_record(
+                    day["source_path"],
+                    day["metadata"],
+                    instrument_rows,
+                    bar_count=int(day["bar_count"]),
+                    first_second=day["first_second"],
+                    last_second=day["last_second"],
+                    reconnect_events=int(day["reconnect_events"]),
+                    error_events=int(day["error_events"]),
+                    archive_path=archive_path,
+                    archive_row_group=-1 if day["row_group"] is None else int(day["row_group"]),
+                )
+                records.append(record)
+                print(
+                    f"[CATALOG OK] {record.filename} (archived): {record.trading_day} "
+                    f"{record.underlying} expiry={record.expiry} DTE={record.days_to_expiry} "
+                    f"bars={record.bar_count}"
+                )
+            except Exception as exc:
+                row = {"source_db": day["source_path"], "reason": f"Catalogue failure: {exc}"}
+                skipped.append(row)
+                if FAIL_ON_DB_ERROR:
+                    raise RuntimeError(row["reason"]) from exc
+                print(f"[CATALOG WARN] {day['source_file']} (archived): {exc}")
+    return records, skipped, archived_sources
+
+
 def discover_sqlite_paths() -> List[str]:
     base = Path(SQLITE_DIR)
     if not base.exists():
@@ -793,7 +892,10 @@ def discover_sqlite_paths() -> List[str]:
     return paths
 
 
-def scan_database_catalog(paths: Sequence[str]) -> Tuple[List[DatabaseRecord], List[Dict[str, Any]]]:
+def scan_database_catalog(
+    paths: Sequence[str],
+    require_records: bool = True,
+) -> Tuple[List[DatabaseRecord], List[Dict[str, Any]]]:
     records: List[DatabaseRecord] = []
     skipped: List[Dict[str, Any]] = []
     for path in paths:
@@ -812,11 +914,16 @@ def scan_database_catalog(paths: Sequence[str]) -> Tuple[List[DatabaseRecord], L
                 raise RuntimeError(row["reason"]) from exc
             print(f"[CATALOG WARN] {os.path.basename(path)}: {exc}")
 
-    if not records:
+    if require_records and not records:
         raise RuntimeError("No usable collector databases were found")
     return records, skipped
 
 
+def _record_mtime(record: DatabaseRecord) -> float:
+    # Archived sources may have been moved or deleted; the month file stands in.
+    return os.path.getmtime(record.archive_path or record.path)
+
+
 def choose_unique_records(records: Sequence[DatabaseRecord]) -> Tuple[List[DatabaseRecord], List[Dict[str, Any]]]:
     """Avoid double-counting duplicate databases for the same day/index/expiry.
 
@@ -838,7 +945,7 @@ def choose_unique_records(records: Sequence[DatabaseRecord]) -> Tuple[List[Datab
             group,
             key=lambda item: (
                 item.bar_count,
-                os.path.getmtime(item.path),
+                _record_mtime(item),
                 item.path,
             ),
             reverse=True,
@@ -925,7 +1032,7 @@ def _deduplicated_sparse_series(rows: pd.DataFrame, column: str) -> pd.Series:
     return pd.to_numeric(data[column], errors="coerce")
 
 
-def load_day_data(record: DatabaseRecord) -> Tuple[DayData, DataQualityRow]:
+def _read_sqlite_day(record: DatabaseRecord) -> Tuple[pd.DataFrame, pd.DataFrame]:
     connection = _connect_readonly(record.path)
     try:
         frame = pd.read_sql_query(_decode_rows_query(), connection)
@@ -940,6 +1047,18 @@ def load_day_data(record: DatabaseRecord) -> Tuple[DayData, DataQualityRow]:
             )
     finally:
         connection.close()
+    return frame, feed_events
+
+
+def load_day_data(record: DatabaseRecord) -> Tuple[DayData, DataQualityRow]:
+    if record.archive_path:
+        if record.archive_row_group < 0:
+            raise RuntimeError("bars table is empty")
+        frame, feed_events = spike_archive.read_day_rows(
+            record.archive_path, record.archive_row_group
+        )
+    else:
+        frame, feed_events = _read_sqlite_day(record)
 
     if frame.empty:
         raise RuntimeError("bars table is empty")
@@ -1668,42 +1787,6 @@ def build_actual_trades_df(
 # =============================================================================
 
 
-def _autosize_columns_safe(worksheet: Any) -> None:
-    try:
-        max_column = worksheet.max_column or 0
-        max_row = worksheet.max_row or 0
-        for column_index in range(1, max_column + 1):
-            letter = worksheet.cell(row=1, column=column_index).column_letter
-            width = 0
-            for row_index in range(1, min(max_row, 2000) + 1):
-                value = worksheet.cell(row=row_index, column=column_index).value
-                if value is not None:
-                    width = max(width, len(str(value)))
-            worksheet.column_dimensions[letter].width = min(60, max(10, width + 2))
-    except Exception:
-        return
-
-
-def _colour_actual_trades_by_date(workbook: Any, actual_trades: pd.DataFrame) -> None:
-    if actual_trades.empty or "actual_trades" not in workbook.sheetnames:
-        return
-    from openpyxl.styles import PatternFill
-
-    worksheet = workbook["actual_trades"]
-    fills = [
-        PatternFill(fill_type="solid", fgColor="E8F0FE"),
-        PatternFill(fill_type="solid", fgColor="FFF3E0"),
-    ]
-    colour_index = 0
-    previous_day: Any = None
-    for row_offset, day_value in enumerate(actual_trades["day"].tolist(), start=2):
-        if previous_day is not None and day_value != previous_day:
-            colour_index ^= 1
-        previous_day = day_value
-        for column_index in range(1, len(actual_trades.columns) + 1):
-            worksheet.cell(row=row_offset, column=column_index).fill = fills[colour_index]
-
-
 def _monthwise_summary(actual_trades: pd.DataFrame) -> pd.DataFrame:
     if actual_trades.empty:
         return pd.DataFrame()
@@ -1820,22 +1903,21 @@ def write_excel(
 
     monthwise = _monthwise_summary(actual_trades)
 
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        all_trades.to_excel(writer, sheet_name="all_trades_backtested", index=False)
-        actual_trades.to_excel(writer, sheet_name="actual_trades", index=False)
-        monthwise.to_excel(writer, sheet_name="monthwise_summary", index=False)
-        exit_pivot.to_excel(writer, sheet_name="exit_pnl_pivot", index=False)
-        eod_pivot.to_excel(writer, sheet_name="eod_pnl_first_trade_pivot", index=False)
-        instrument_summary.to_excel(writer, sheet_name="instrument_summary", index=False)
-        catalog.to_excel(writer, sheet_name="db_catalog", index=False)
-        quality.to_excel(writer, sheet_name="data_quality", index=False)
-        skipped.to_excel(writer, sheet_name="skipped", index=False)
-
-        workbook = writer.book
-        for worksheet in workbook.worksheets:
-            worksheet.freeze_panes = "A2"
-            _autosize_columns_safe(worksheet)
-        _colour_actual_trades_by_date(workbook, actual_trades)
+    report_writer.write_report(
+        output,
+        [
+            ("all_trades_backtested", all_trades),
+            ("actual_trades", actual_trades),
+            ("monthwise_summary", monthwise),
+            ("exit_pnl_pivot", exit_pivot),
+            ("eod_pnl_first_trade_pivot", eod_pivot),
+            ("instrument_summary", instrument_summary),
+            ("db_catalog", catalog),
+            ("data_quality", quality),
+            ("skipped", skipped),
+        ],
+        band_sheets={"actual_trades": "day"},
+    )
 
     print(f"[DONE] Excel written: {output}")
 
@@ -1883,6 +1965,7 @@ def main() -> int:
     print(f"Config: {PROPERTY_FILE_PATH}")
     print(f"SQLite directory: {SQLITE_DIR}")
     print(f"SQLite glob: {SQLITE_GLOB} | recursive={SQLITE_RECURSIVE}")
+    print(f"Spike archive: {SPIKE_ARCHIVE_DIR or 'disabled'}")
     print(f"Entry/exit: {ENTRY_TIME_IST} -> {EXIT_TIME_IST}")
     print(f"Allowed DTE: {ALLOWED_DTE}")
     print(f"Profit target: {PROFIT_TARGET_PCT:.2%} | re-enter target={REENTRY_ON_PROFIT_TARGET}")
@@ -1890,10 +1973,21 @@ def main() -> int:
     print(f"Output: {OUTPUT_XLSX}")
     print("=" * 92)
 
-    paths = discover_sqlite_paths()
+    archive_records, archive_skips, archived_sources = scan_archive_catalog()
+    try:
+        paths = discover_sqlite_paths()
+    except FileNotFoundError:
+        if not archive_records:
+            raise
+        paths = []
     print(f"[INFO] SQLite databases found: {len(paths)}")
+    if archived_sources:
+        paths = [path for path in paths if os.path.basename(path) not in archived_sources]
+        print(f"[INFO] SQLite databases not yet archived: {len(paths)}")
 
-    records, catalog_skips = scan_database_catalog(paths)
+    records, catalog_skips = scan_database_catalog(paths, require_records=not archive_records)
+    records = archive_records + records
+    catalog_skips = archive_skips + catalog_skips
     records, duplicate_skips = choose_unique_records(records)
 
     min_day = min(record.trading_day for record in records)
@@ -33,6 +33,7 @@ from typing import Dict, List, Tuple, Optional, Any
 import pandas as pd
 
 import Trading_2024.OptionTradeUtils as oUtils
+from Trading_2024.back_testing import report_writer
 
 try:
     from zoneinfo import ZoneInfo  # py3.9+
@@ -1336,58 +1337,6 @@ def build_actual_trades_df(all_trades_df: pd.DataFrame, min_expiry_map: Dict[Tup
 # =============================================================================
 # Excel output
 # =============================================================================
-def _autosize_columns_safe(ws) -> None:
-    # Safe autosize even when the sheet is "empty-ish"
-    try:
-        max_col = ws.max_column or 0
-        if max_col <= 0:
-            return
-        for col_idx in range(1, max_col + 1):
-            col_letter = ws.cell(row=1, column=col_idx).column_letter
-            max_len = 0
-            for row_idx in range(1, min(ws.max_row or 1, 2000) + 1):
-                v = ws.cell(row=row_idx, column=col_idx).value
-                if v is None:
-                    continue
-                max_len = max(max_len, len(str(v)))
-            ws.column_dimensions[col_letter].width = min(60, max(10, max_len + 2))
-    except Exception:
-        # Never fail the whole run just because autosize misbehaved
-        return
-
-def _color_actual_trades_by_date(wb, actual_trades_df) -> None:
-    """Shade rows so all attempts on the same calendar date share one colour,
-    alternating between two soft fills as the date changes (visual grouping)."""
-    if actual_trades_df is None or actual_trades_df.empty:
-        return
-    if "actual_trades" not in wb.sheetnames:
-        return
-    cols = list(actual_trades_df.columns)
-    if "day" not in cols:
-        return
-    from openpyxl.styles import PatternFill
-    ws = wb["actual_trades"]
-    ncols = len(cols)
-    fills = [
-        PatternFill(fill_type="solid", fgColor="E8F0FE"),  # light blue
-        PatternFill(fill_type="solid", fgColor="FFF3E0"),  # light amber
-    ]
-    days = actual_trades_df["day"].tolist()
-    color_idx = 0
-    prev_day = None
-    first = True
-    for i, d in enumerate(days):
-        if first:
-            first = False
-        elif d != prev_day:
-            color_idx ^= 1
-        prev_day = d
-        fill = fills[color_idx]
-        excel_row = i + 2  # header occupies row 1
-        for c in range(1, ncols + 1):
-            ws.cell(row=excel_row, column=c).fill = fill
-
-
 def write_excel(all_trades_df: pd.DataFrame, actual_trades_df: pd.DataFrame, skipped_df: pd.DataFrame) -> None:
     out_dir = os.path.dirname(os.path.abspath(OUTPUT_XLSX))
     if out_dir and not os.path.exists(out_dir):
@@ -1517,21 +1466,20 @@ def write_excel(all_trades_df: pd.DataFrame, actual_trades_df: pd.DataFrame, ski
     else:
         monthwise_summary = pd.DataFrame()
 
-    with pd.ExcelWriter(OUTPUT_XLSX, engine="openpyxl") as xw:
-        all_trades_df.to_excel(xw, sheet_name="all_trades_backtested", index=False)
-        actual_trades_df.to_excel(xw, sheet_name="actual_trades", index=False)
-        monthwise_summary.to_excel(xw, sheet_name="monthwise_summary", index=False)
-        piv_exit.to_excel(xw, sheet_name="exit_pnl_pivot", index=False)
-        piv_eod_first.to_excel(xw, sheet_name="eod_pnl_first_trade_pivot", index=False)
-        instrument_summary.to_excel(xw, sheet_name="instrument_summary", index=False)
-        skipped_df.to_excel(xw, sheet_name="skipped", index=False)
-
-        wb = xw.book
-        for ws in wb.worksheets:
-            ws.freeze_panes = "A2"
-            _autosize_columns_safe(ws)
-
-        _color_actual_trades_by_date(wb, actual_trades_df)
+    # Streamed write-only workbook; actual_trades rows shaded by day.
+    report_writer.write_report(
+        OUTPUT_XLSX,
+        [
+            ("all_trades_backtested", all_trades_df),
+            ("actual_trades", actual_trades_df),
+            ("monthwise_summary", monthwise_summary),
+            ("exit_pnl_pivot", piv_exit),
+            ("eod_pnl_first_trade_pivot", piv_eod_first),
+            ("instrument_summary", instrument_summary),
+            ("skipped", skipped_df),
+        ],
+        band_sheets={"actual_trades": "day"},
+    )
 
     print(f"[DONE] Excel written: {OUTPUT_XLSX}")
 
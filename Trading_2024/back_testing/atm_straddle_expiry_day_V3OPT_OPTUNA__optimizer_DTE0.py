@@ -54,13 +54,15 @@ from pathlib import Path
 import glob
 import time
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, date, time as dtime, timedelta
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, NamedTuple, Tuple, Optional, Any
 
+import numpy as np
 import pandas as pd
 
 import Trading_2024.OptionTradeUtils as oUtils
+from Trading_2024.back_testing import report_writer
 
 try:
     from zoneinfo import ZoneInfo  # py3.9+
@@ -153,6 +155,17 @@ OPT_OUTPUT_DIR = os.getenv(
 OPT_STUDY_NAME = os.getenv("OPT_STUDY_NAME", "short_straddle_v3opt_profit")
 OPT_SAVE_DB = os.getenv("OPT_SAVE_DB", "1").strip() == "1"
 
+# The first attempt of a day depends only on entry/exit time, the momentum gate,
+# the first stop-loss %, the stop cap and the underlying's target/protect
+# profile. Each day-group remembers that attempt for up to this many distinct
+# parameter keys, so later trials re-simulate only the re-entries. 0 = off.
+FIRST_ATTEMPT_CACHE_PER_DAY = int(float(os.getenv("FIRST_ATTEMPT_CACHE_PER_DAY", "4096")))
+
+# Trials evaluated together: Optuna ask()s this many, simulate_groups_batch()
+# runs them in one pass over the cached days, then every result is told back.
+# 1 = the original one-trial-at-a-time study.optimize() loop.
+OPT_BATCH_SIZE = max(1, int(float(os.getenv("OPT_BATCH_SIZE", "8"))))
+
 # Smoke-test controls. Leave blank/0 for the full data set.
 _SAMPLE_PICKLES_RAW = os.getenv("SAMPLE_MAX_PICKLES", "").strip()
 _SAMPLE_DAYS_RAW = os.getenv("SAMPLE_MAX_DAYS", "").strip()
@@ -977,6 +990,31 @@ class Params:
         except KeyError as exc:
             raise KeyError(f"No strategy profile configured for {underlying}") from exc
 
+    def first_attempt_key(self, underlying: str) -> Tuple[Any, ...]:
+        """
+        Every parameter that can change the day's first attempt, and nothing else.
+
+        Settings a branch never reads are normalised (e.g. the late-target time
+        when no late target is set) so equivalent trials share one key.
+        """
+        prof = self.profile_for(underlying)
+        late_target = prof.profit_target_pct_late > 0.0
+        protect = prof.profit_protect_pct > 0.0
+        late_giveback = protect and prof.profit_protect_late_giveback_pct > 0.0
+        return (
+            self.entry_time,
+            self.exit_time,
+            self.momentum_lookback_min if self.entry_momentum_gate else None,
+            self.loss_limit_pct_for_attempt(0),
+            self.max_loss_limit_cap_rupees,
+            prof.profit_target_pct,
+            prof.profit_target_pct_late if late_target else None,
+            prof.profit_target_late_from if late_target else None,
+            prof.profit_protect_pct,
+            prof.profit_protect_late_giveback_pct if late_giveback else None,
+            prof.profit_protect_late_from if late_giveback else None,
+        )
+
 
 def default_params() -> Params:
     """Build a parameter object from the loaded V3 property file."""
@@ -1025,6 +1063,269 @@ class DayGroup:
     price_book: Optional[Dict[Tuple[int, str, str], pd.Series]] = None
     symbols: Optional[Dict[Tuple[int, str], str]] = None
     idx_all: Optional[pd.DatetimeIndex] = None
+    first_attempts: Dict[Tuple[Any, ...], Any] = field(default_factory=dict)
+    arrays: Optional["DayArrays"] = None
+
+
+# Hit/miss counters for DayGroup.first_attempts, reported by the optimizer.
+_FIRST_ATTEMPT_STATS: Dict[str, int] = {"hits": 0, "misses": 0}
+
+
+class AttemptOutcome(NamedTuple):
+    """Everything one straddle attempt produces that does not depend on earlier attempts."""
+
+    u_px: float
+    atm: int
+    ce_sym: str
+    pe_sym: str
+    ce_entry: float
+    pe_entry: float
+    exit_ts: pd.Timestamp
+    exit_reason: str
+    exit_pnl_gross: float
+    exit_ce: float
+    exit_pe: float
+    txn_charges: float
+    eod_pnl: float
+    max_profit: float
+    max_loss: float
+    max_profit_before_exit: float
+    entry_premium_sum: float
+    stop_pct: float
+    uncapped_stop_rupees: float
+    stop_cap_rupees: float
+    stop_rupees: float
+    profit_protect_trigger_pct: float
+    profit_protect_trigger_rupees: float
+
+
+def simulate_attempt(
+    *,
+    und: str,
+    dy: date,
+    underlying_day: pd.DataFrame,
+    params: Params,
+    price_book: Dict[Tuple[int, str, str], pd.Series],
+    symbols: Dict[Tuple[int, str], str],
+    idx_all: pd.DatetimeIndex,
+    cur_entry_ts: pd.Timestamp,
+    trade_seq: int,
+    trade_end_ts: pd.Timestamp,
+) -> Tuple[Optional[AttemptOutcome], Optional[Dict[str, Any]]]:
+    """
+    Enter the ATM straddle at cur_entry_ts and run it to its first exit.
+
+    Returns (outcome, None) for a completed attempt, (None, skip_fields) when the
+    attempt cannot be taken, or (None, None) when there is no minute left to
+    monitor. Day-level state (daily loss, re-entry decisions) stays with the caller.
+    """
+    session_end_ts = idx_all[-1]
+    qty = int(QTY_UNITS[und])
+    step = int(STRIKE_STEP[und])
+    _prof = params.profile_for(und)
+
+    # Profit-protect is now percentage-based, so the actual rupee value is not
+    # known until CE/PE entry prices are available for the current attempt.
+    profit_protect_pct = float(_prof.profit_protect_pct)
+    profit_protect_enabled = profit_protect_pct > 0.0
+
+    u_px = asof_close(underlying_day, cur_entry_ts)
+    if pd.isna(u_px):
+        return None, {"reason": f"No underlying price at entry {cur_entry_ts.strftime('%H:%M')}"}
+
+    atm = round_to_step(float(u_px), step)
+
+    ce_sym = symbols.get((int(atm), "CE"))
+    pe_sym = symbols.get((int(atm), "PE"))
+    if not ce_sym or not pe_sym:
+        return None, {"atm_strike": atm, "reason": "ATM CE/PE not available in pickle band"}
+
+    # Raw entry series and forward-filled close series come from the
+    # parameter-independent day cache.
+    ce_close_raw = _leg_from_book(price_book, idx_all, atm, "CE", "close")
+    pe_close_raw = _leg_from_book(price_book, idx_all, atm, "PE", "close")
+    ce_close = ce_close_raw.ffill()
+    pe_close = pe_close_raw.ffill()
+
+    # High/low are intentionally not forward-filled: they are used only for
+    # intraminute stop-loss and profit-target detection.
+    ce_high = _leg_from_book(price_book, idx_all, atm, "CE", "high")
+    ce_low = _leg_from_book(price_book, idx_all, atm, "CE", "low")
+    pe_high = _leg_from_book(price_book, idx_all, atm, "PE", "high")
+    pe_low = _leg_from_book(price_book, idx_all, atm, "PE", "low")
+
+    if cur_entry_ts not in idx_all:
+        return None, {"reason": "Entry timestamp not in session index"}
+
+    ce_entry = ce_close_raw.loc[cur_entry_ts]
+    pe_entry = pe_close_raw.loc[cur_entry_ts]
+    monitor_start_ts = pd.Timestamp(cur_entry_ts) + pd.Timedelta(minutes=1)
+    if monitor_start_ts > trade_end_ts:
+        return None, None
+
+    if pd.isna(ce_entry) or pd.isna(pe_entry):
+        return None, {"atm_strike": atm, "reason": "No CE/PE price at entry (after ffill)"}
+
+    # ---------------------------------------------------------------------
+    # Percentage-based risk basis for THIS attempt
+    # ---------------------------------------------------------------------
+    # For every entry/re-entry, compute the premium collected in rupees.
+    # Stop-loss and profit-protect thresholds are derived from this value.
+    #
+    # Example:
+    #   entry_ce=70, entry_pe=50, qty=325
+    #   entry_premium_sum = (70 + 50) * 325 = 39,000
+    #   10% stop-loss = 3,900
+    #   30% profit-protect threshold/giveback = 11,700
+    # ---------------------------------------------------------------------
+    entry_premium_sum = (float(ce_entry) + float(pe_entry)) * qty
+
+    loss_limit_pct = params.loss_limit_pct_for_attempt(trade_seq - 1)
+    uncapped_loss_limit_rupees = float(loss_limit_pct * entry_premium_sum)
+
+    # Absolute cap on the percentage-based stop-loss.
+    # Example: 10% of premium may be Rs. 4,500, but with a Rs. 3,000 cap
+    # the effective stop used by the simulator is Rs. 3,000.
+    stop_cap_rupees = float(params.max_loss_limit_cap_rupees)
+    if stop_cap_rupees > 0:
+        loss_limit_rupees = float(min(uncapped_loss_limit_rupees, stop_cap_rupees))
+    else:
+        loss_limit_rupees = float(uncapped_loss_limit_rupees)
+
+    # G is the same variable used by the existing profit-protect logic:
+    #   - profit-protect arms when peak P&L >= G
+    #   - profit-protect exits when current P&L <= peak - G
+    G = float(profit_protect_pct * entry_premium_sum)
+
+    # Close-based PnL (same as before)
+    pnl_close_all = (float(ce_entry) - ce_close) * qty + (float(pe_entry) - pe_close) * qty
+    pnl = pnl_close_all.loc[monitor_start_ts:trade_end_ts].dropna()  # keep 'pnl' as close-based for profit-protect
+
+    # STOPLOSS worst-case PnL candidates within each minute:
+    #  A) CE high, PE low
+    pnl_ceHigh_peLow_all = (float(ce_entry) - ce_high) * qty + (float(pe_entry) - pe_low) * qty
+    #  B) CE low, PE high
+    pnl_ceLow_peHigh_all = (float(ce_entry) - ce_low) * qty + (float(pe_entry) - pe_high) * qty
+
+    # Worst-case PnL per minute among (close, A, B)
+    pnl_sl_all = pd.concat([pnl_close_all, pnl_ceHigh_peLow_all, pnl_ceLow_peHigh_all], axis=1).min(axis=1)
+    pnl_sl = pnl_sl_all.loc[monitor_start_ts:trade_end_ts].dropna()
+
+    if pnl.empty:
+        return None, {"atm_strike": atm, "reason": "PnL series empty after entry"}
+
+    eod_ts = pnl.index[-1]
+    eod_pnl = float(pnl.iloc[-1])
+
+    # If EXIT_TIME_IST is earlier than market close and no risk/profit event
+    # triggers before that, the attempt is closed at the configured cutoff.
+    # The old "EOD" label is retained only when the monitoring horizon is
+    # the real session end.
+    default_exit_reason = "TIME_EXIT" if trade_end_ts < session_end_ts else "EOD"
+
+    max_profit = float(max(0.0, pnl.max()))
+    max_loss = float(min(0.0, pnl.min()))
+
+    # STOPLOSS uses the attempt-specific rupee value after applying the
+    # absolute per-attempt cap.
+    stop_hit = pnl_sl <= -loss_limit_rupees
+    stop_ts = pnl_sl.index[stop_hit.to_numpy().argmax()] if stop_hit.any() else None
+
+    protect_ts = None
+    if profit_protect_enabled:
+        peak = pnl.cummax()
+        armed = peak >= G
+        trail = peak - G
+        # V3-OPT: tighter giveback from PROFIT_PROTECT_LATE_FROM_IST onward
+        if _prof.profit_protect_late_giveback_pct > 0.0:
+            _g2_ts = pd.Timestamp(datetime.combine(dy, _prof.profit_protect_late_from), tz=ist_tz())
+            _late_mask = pnl.index >= _g2_ts
+            if _late_mask.any():
+                _trail_late = peak - float(_prof.profit_protect_late_giveback_pct) * entry_premium_sum
+                trail = trail.where(~_late_mask, trail.combine(_trail_late, max))
+        protect_hit = armed & (pnl <= trail)
+        protect_ts = pnl.index[protect_hit.to_numpy().argmax()] if protect_hit.any() else None
+
+    # --- Per-day PROFIT TARGET: % of premium collected on this attempt ---
+    # When reached, this trade exits at the target AND no further trades are
+    # taken for the day (PROFIT_TARGET is excluded from the re-entry rule below).
+    target_ts = None
+    target_rupees = None
+    # V2-OPT: attempts entered at/after PROFIT_TARGET_LATE_FROM_IST use
+    # the (smaller) late-session profit target.
+    _pt_pct_eff = _prof.profit_target_pct
+    if _prof.profit_target_pct_late > 0.0 and cur_entry_ts.timetz().replace(tzinfo=None) >= _prof.profit_target_late_from:
+        _pt_pct_eff = _prof.profit_target_pct_late
+    if _pt_pct_eff > 0.0:
+        target_rupees = _pt_pct_eff * entry_premium_sum
+        # best-case (favourable) intrabar profit: both legs bought back at their lows
+        pnl_best_all = (float(ce_entry) - ce_low) * qty + (float(pe_entry) - pe_low) * qty
+        pnl_tp = pd.concat([pnl_close_all, pnl_best_all], axis=1).max(axis=1)
+        pnl_tp = pnl_tp.loc[monitor_start_ts:trade_end_ts].dropna()
+        tp_hit = pnl_tp >= float(target_rupees)
+        target_ts = pnl_tp.index[tp_hit.to_numpy().argmax()] if tp_hit.any() else None
+
+    # Earliest triggered exit wins; on identical timestamps prefer the more
+    # conservative outcome: STOPLOSS, then PROFIT_TARGET, then PROFIT_PROTECT.
+    exit_ts = eod_ts
+    exit_reason = default_exit_reason
+    _candidates = []
+    if stop_ts is not None:
+        _candidates.append((stop_ts, 0, "STOPLOSS"))
+    if target_ts is not None:
+        _candidates.append((target_ts, 1, "PROFIT_TARGET"))
+    if protect_ts is not None:
+        _candidates.append((protect_ts, 2, "PROFIT_PROTECT"))
+    if _candidates:
+        _candidates.sort(key=lambda c: (c[0], c[1]))
+        exit_ts, _, exit_reason = _candidates[0]
+
+    if exit_reason == "STOPLOSS":
+        exit_pnl_gross = -float(loss_limit_rupees)
+    elif exit_reason == "PROFIT_TARGET":
+        exit_pnl_gross = float(target_rupees)
+    else:
+        exit_pnl_gross = float(pnl.loc[exit_ts])
+
+    # Peak (close-based) profit reached during this trade's life, up to its exit
+    pnl_pre_exit = pnl.loc[:exit_ts]
+    max_profit_before_exit = float(max(0.0, pnl_pre_exit.max())) if len(pnl_pre_exit) else 0.0
+
+    exit_ce = float(ce_close.loc[exit_ts]) if pd.notna(ce_close.loc[exit_ts]) else float("nan")
+    exit_pe = float(pe_close.loc[exit_ts]) if pd.notna(pe_close.loc[exit_ts]) else float("nan")
+
+    txn_charges = compute_trade_charges(
+        entry_ce=float(ce_entry), entry_pe=float(pe_entry),
+        exit_ce=exit_ce if not pd.isna(exit_ce) else 0.0,
+        exit_pe=exit_pe if not pd.isna(exit_pe) else 0.0,
+        qty=qty,
+    )
+
+    return AttemptOutcome(
+        u_px=float(u_px),
+        atm=int(atm),
+        ce_sym=ce_sym,
+        pe_sym=pe_sym,
+        ce_entry=float(ce_entry),
+        pe_entry=float(pe_entry),
+        exit_ts=exit_ts,
+        exit_reason=exit_reason,
+        exit_pnl_gross=exit_pnl_gross,
+        exit_ce=exit_ce,
+        exit_pe=exit_pe,
+        txn_charges=txn_charges,
+        eod_pnl=eod_pnl,
+        max_profit=max_profit,
+        max_loss=max_loss,
+        max_profit_before_exit=max_profit_before_exit,
+        entry_premium_sum=float(entry_premium_sum),
+        stop_pct=float(loss_limit_pct),
+        uncapped_stop_rupees=float(uncapped_loss_limit_rupees),
+        stop_cap_rupees=float(stop_cap_rupees),
+        stop_rupees=float(loss_limit_rupees),
+        profit_protect_trigger_pct=float(profit_protect_pct),
+        profit_protect_trigger_rupees=float(G),
+    ), None
 
 
 def simulate_day_multi_trades(
@@ -1038,7 +1339,15 @@ def simulate_day_multi_trades(
     price_book: Optional[Dict[Tuple[int, str, str], pd.Series]] = None,
     symbols: Optional[Dict[Tuple[int, str], str]] = None,
     idx_all: Optional[pd.DatetimeIndex] = None,
+    first_attempts: Optional[Dict[Tuple[Any, ...], Any]] = None,
 ) -> Tuple[List[TradeRow], List[Dict[str, Any]]]:
+    """
+    Simulate every attempt of one underlying/day.
+
+    first_attempts (DayGroup.first_attempts) memoises the gated first entry and
+    its attempt outcome under params.first_attempt_key(); trials that share those
+    parameters only re-simulate the re-entries.
+    """
 
     results: List[TradeRow] = []
     skipped: List[Dict[str, Any]] = []
@@ -1112,16 +1421,21 @@ def simulate_day_multi_trades(
             ts = ts + pd.Timedelta(minutes=1)
         return ts
 
-    # Profit-protect is now percentage-based, so the actual rupee value is not
-    # known until CE/PE entry prices are available for the current attempt.
-    profit_protect_pct = float(_prof.profit_protect_pct)
-    profit_protect_enabled = profit_protect_pct > 0.0
+    # First attempt memo: (gated entry ts, (outcome, skip)) per parameter key.
+    first_key = None
+    first_cached = None
+    if first_attempts is not None and FIRST_ATTEMPT_CACHE_PER_DAY > 0:
+        first_key = params.first_attempt_key(und)
+        first_cached = first_attempts.get(first_key)
+        _FIRST_ATTEMPT_STATS["hits" if first_cached is not None else "misses"] += 1
 
-    cur_entry_ts = pd.Timestamp(datetime.combine(dy, params.entry_time), tz=ist_tz())
     trade_seq = 1
-
-    # V2-OPT: momentum-gate the FIRST entry of the day.
-    cur_entry_ts = _momentum_wait(cur_entry_ts)
+    if first_cached is not None:
+        cur_entry_ts = first_cached[0]
+    else:
+        cur_entry_ts = pd.Timestamp(datetime.combine(dy, params.entry_time), tz=ist_tz())
+        # V2-OPT: momentum-gate the FIRST entry of the day.
+        cur_entry_ts = _momentum_wait(cur_entry_ts)
 
     # If the configured first entry itself is at/after EXIT_TIME_IST, the day
     # is skipped cleanly. This is intentional: EXIT_TIME_IST is the hard strategy
@@ -1160,188 +1474,35 @@ def simulate_day_multi_trades(
             })
             break
 
-        u_px = asof_close(underlying_day, cur_entry_ts)
-        if pd.isna(u_px):
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "reason": f"No underlying price at entry {cur_entry_ts.strftime('%H:%M')}"})
-            break
-
-        atm = round_to_step(float(u_px), step)
-
-        ce_sym = symbols.get((int(atm), "CE"))
-        pe_sym = symbols.get((int(atm), "PE"))
-        if not ce_sym or not pe_sym:
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "atm_strike": atm, "reason": "ATM CE/PE not available in pickle band"})
-            break
-
-        # Raw entry series and forward-filled close series come from the
-        # parameter-independent day cache.
-        ce_close_raw = _leg_from_book(price_book, idx_all, atm, "CE", "close")
-        pe_close_raw = _leg_from_book(price_book, idx_all, atm, "PE", "close")
-        ce_close = ce_close_raw.ffill()
-        pe_close = pe_close_raw.ffill()
-
-        # High/low are intentionally not forward-filled: they are used only for
-        # intraminute stop-loss and profit-target detection.
-        ce_high = _leg_from_book(price_book, idx_all, atm, "CE", "high")
-        ce_low = _leg_from_book(price_book, idx_all, atm, "CE", "low")
-        pe_high = _leg_from_book(price_book, idx_all, atm, "PE", "high")
-        pe_low = _leg_from_book(price_book, idx_all, atm, "PE", "low")
-
-        if cur_entry_ts not in idx_all:
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "reason": "Entry timestamp not in session index"})
-            break
-
-        ce_entry = ce_close_raw.loc[cur_entry_ts]
-        pe_entry = pe_close_raw.loc[cur_entry_ts]
-        monitor_start_ts = pd.Timestamp(cur_entry_ts) + pd.Timedelta(minutes=1)
-        if monitor_start_ts > trade_end_ts:
-            break
-
-        if pd.isna(ce_entry) or pd.isna(pe_entry):
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "atm_strike": atm, "reason": "No CE/PE price at entry (after ffill)"})
-            break
-
-        # ---------------------------------------------------------------------
-        # Percentage-based risk basis for THIS attempt
-        # ---------------------------------------------------------------------
-        # For every entry/re-entry, compute the premium collected in rupees.
-        # Stop-loss and profit-protect thresholds are derived from this value.
-        #
-        # Example:
-        #   entry_ce=70, entry_pe=50, qty=325
-        #   entry_premium_sum = (70 + 50) * 325 = 39,000
-        #   10% stop-loss = 3,900
-        #   30% profit-protect threshold/giveback = 11,700
-        # ---------------------------------------------------------------------
-        entry_premium_sum = (float(ce_entry) + float(pe_entry)) * qty
-
-        loss_limit_pct = params.loss_limit_pct_for_attempt(trade_seq - 1)
-        uncapped_loss_limit_rupees = float(loss_limit_pct * entry_premium_sum)
-
-        # Absolute cap on the percentage-based stop-loss.
-        # Example: 10% of premium may be Rs. 4,500, but with a Rs. 3,000 cap
-        # the effective stop used by the simulator is Rs. 3,000.
-        stop_cap_rupees = float(params.max_loss_limit_cap_rupees)
-        if stop_cap_rupees > 0:
-            loss_limit_rupees = float(min(uncapped_loss_limit_rupees, stop_cap_rupees))
+        if trade_seq == 1 and first_cached is not None:
+            outcome, skip = first_cached[1]
         else:
-            loss_limit_rupees = float(uncapped_loss_limit_rupees)
-
-        # G is the same variable used by the existing profit-protect logic:
-        #   - profit-protect arms when peak P&L >= G
-        #   - profit-protect exits when current P&L <= peak - G
-        G = float(profit_protect_pct * entry_premium_sum)
-
-        # Close-based PnL (same as before)
-        pnl_close_all = (float(ce_entry) - ce_close) * qty + (float(pe_entry) - pe_close) * qty
-        pnl = pnl_close_all.loc[monitor_start_ts:trade_end_ts].dropna()  # keep 'pnl' as close-based for profit-protect
-
-        # STOPLOSS worst-case PnL candidates within each minute:
-        #  A) CE high, PE low
-        pnl_ceHigh_peLow_all = (float(ce_entry) - ce_high) * qty + (float(pe_entry) - pe_low) * qty
-        #  B) CE low, PE high
-        pnl_ceLow_peHigh_all = (float(ce_entry) - ce_low) * qty + (float(pe_entry) - pe_high) * qty
-
-        # Worst-case PnL per minute among (close, A, B)
-        pnl_sl_all = pd.concat([pnl_close_all, pnl_ceHigh_peLow_all, pnl_ceLow_peHigh_all], axis=1).min(axis=1)
-        pnl_sl = pnl_sl_all.loc[monitor_start_ts:trade_end_ts].dropna()
-
-        if pnl.empty:
-            skipped.append({"day": dy, "underlying": und, "expiry": expiry, "trade_seq": trade_seq,
-                            "atm_strike": atm, "reason": "PnL series empty after entry"})
+            outcome, skip = simulate_attempt(
+                und=und,
+                dy=dy,
+                underlying_day=underlying_day,
+                params=params,
+                price_book=price_book,
+                symbols=symbols,
+                idx_all=idx_all,
+                cur_entry_ts=cur_entry_ts,
+                trade_seq=trade_seq,
+                trade_end_ts=trade_end_ts,
+            )
+            if trade_seq == 1 and first_key is not None:
+                if len(first_attempts) >= FIRST_ATTEMPT_CACHE_PER_DAY:
+                    first_attempts.pop(next(iter(first_attempts)))
+                first_attempts[first_key] = (cur_entry_ts, (outcome, skip))
+
+        if outcome is None:
+            if skip is not None:
+                skipped.append({"day": dy, "underlying": und, "expiry": expiry,
+                                "trade_seq": trade_seq, **skip})
             break
 
-        eod_ts = pnl.index[-1]
-        eod_pnl = float(pnl.iloc[-1])
-
-        # If EXIT_TIME_IST is earlier than market close and no risk/profit event
-        # triggers before that, the attempt is closed at the configured cutoff.
-        # The old "EOD" label is retained only when the monitoring horizon is
-        # the real session end.
-        default_exit_reason = "TIME_EXIT" if trade_end_ts < session_end_ts else "EOD"
-
-        max_profit = float(max(0.0, pnl.max()))
-        max_loss = float(min(0.0, pnl.min()))
-
-        # STOPLOSS uses the attempt-specific rupee value after applying the
-        # absolute per-attempt cap.
-        stop_hit = pnl_sl <= -loss_limit_rupees
-        stop_ts = pnl_sl.index[stop_hit.to_numpy().argmax()] if stop_hit.any() else None
-
-        protect_ts = None
-        if profit_protect_enabled:
-            peak = pnl.cummax()
-            armed = peak >= G
-            trail = peak - G
-            # V3-OPT: tighter giveback from PROFIT_PROTECT_LATE_FROM_IST onward
-            if _prof.profit_protect_late_giveback_pct > 0.0:
-                _g2_ts = pd.Timestamp(datetime.combine(dy, _prof.profit_protect_late_from), tz=ist_tz())
-                _late_mask = pnl.index >= _g2_ts
-                if _late_mask.any():
-                    _trail_late = peak - float(_prof.profit_protect_late_giveback_pct) * entry_premium_sum
-                    trail = trail.where(~_late_mask, trail.combine(_trail_late, max))
-            protect_hit = armed & (pnl <= trail)
-            protect_ts = pnl.index[protect_hit.to_numpy().argmax()] if protect_hit.any() else None
-
-        # --- Per-day PROFIT TARGET: % of premium collected on this attempt ---
-        # When reached, this trade exits at the target AND no further trades are
-        # taken for the day (PROFIT_TARGET is excluded from the re-entry rule below).
-        target_ts = None
-        target_rupees = None
-        # V2-OPT: attempts entered at/after PROFIT_TARGET_LATE_FROM_IST use
-        # the (smaller) late-session profit target.
-        _pt_pct_eff = _prof.profit_target_pct
-        if _prof.profit_target_pct_late > 0.0 and cur_entry_ts.timetz().replace(tzinfo=None) >= _prof.profit_target_late_from:
-            _pt_pct_eff = _prof.profit_target_pct_late
-        if _pt_pct_eff > 0.0:
-            target_rupees = _pt_pct_eff * entry_premium_sum
-            # best-case (favourable) intrabar profit: both legs bought back at their lows
-            pnl_best_all = (float(ce_entry) - ce_low) * qty + (float(pe_entry) - pe_low) * qty
-            pnl_tp = pd.concat([pnl_close_all, pnl_best_all], axis=1).max(axis=1)
-            pnl_tp = pnl_tp.loc[monitor_start_ts:trade_end_ts].dropna()
-            tp_hit = pnl_tp >= float(target_rupees)
-            target_ts = pnl_tp.index[tp_hit.to_numpy().argmax()] if tp_hit.any() else None
-
-        # Earliest triggered exit wins; on identical timestamps prefer the more
-        # conservative outcome: STOPLOSS, then PROFIT_TARGET, then PROFIT_PROTECT.
-        exit_ts = eod_ts
-        exit_reason = default_exit_reason
-        _candidates = []
-        if stop_ts is not None:
-            _candidates.append((stop_ts, 0, "STOPLOSS"))
-        if target_ts is not None:
-            _candidates.append((target_ts, 1, "PROFIT_TARGET"))
-        if protect_ts is not None:
-            _candidates.append((protect_ts, 2, "PROFIT_PROTECT"))
-        if _candidates:
-            _candidates.sort(key=lambda c: (c[0], c[1]))
-            exit_ts, _, exit_reason = _candidates[0]
-
-        if exit_reason == "STOPLOSS":
-            exit_pnl_gross = -float(loss_limit_rupees)
-        elif exit_reason == "PROFIT_TARGET":
-            exit_pnl_gross = float(target_rupees)
-        else:
-            exit_pnl_gross = float(pnl.loc[exit_ts])
-
-        # Peak (close-based) profit reached during this trade's life, up to its exit
-        pnl_pre_exit = pnl.loc[:exit_ts]
-        max_profit_before_exit = float(max(0.0, pnl_pre_exit.max())) if len(pnl_pre_exit) else 0.0
-
-        exit_ce = float(ce_close.loc[exit_ts]) if pd.notna(ce_close.loc[exit_ts]) else float("nan")
-        exit_pe = float(pe_close.loc[exit_ts]) if pd.notna(pe_close.loc[exit_ts]) else float("nan")
-
-        txn_charges = compute_trade_charges(
-            entry_ce=float(ce_entry), entry_pe=float(pe_entry),
-            exit_ce=exit_ce if not pd.isna(exit_ce) else 0.0,
-            exit_pe=exit_pe if not pd.isna(exit_pe) else 0.0,
-            qty=qty,
-        )
-        exit_pnl = exit_pnl_gross - txn_charges
+        exit_ts = outcome.exit_ts
+        exit_reason = outcome.exit_reason
+        exit_pnl = outcome.exit_pnl_gross - outcome.txn_charges
 
         # Update cumulative realized NET P&L for the day. This is checked
         # before allowing any further re-entry.
@@ -1359,32 +1520,32 @@ def simulate_day_multi_trades(
                 trade_seq=trade_seq,
                 expiry=expiry,
                 days_to_expiry=dte,
-                atm_strike=int(atm),
+                atm_strike=outcome.atm,
                 qty_units=qty,
                 entry_time=pd.Timestamp(cur_entry_ts).strftime("%H:%M"),
                 exit_time=pd.Timestamp(exit_ts).strftime("%H:%M"),
                 exit_reason=exit_reason,
-                entry_underlying=float(u_px),
-                ce_symbol=ce_sym,
-                pe_symbol=pe_sym,
-                entry_ce=float(ce_entry),
-                entry_pe=float(pe_entry),
-                exit_ce=exit_ce,
-                exit_pe=exit_pe,
-                exit_pnl_gross=exit_pnl_gross,
-                txn_charges=txn_charges,
+                entry_underlying=outcome.u_px,
+                ce_symbol=outcome.ce_sym,
+                pe_symbol=outcome.pe_sym,
+                entry_ce=outcome.ce_entry,
+                entry_pe=outcome.pe_entry,
+                exit_ce=outcome.exit_ce,
+                exit_pe=outcome.exit_pe,
+                exit_pnl_gross=outcome.exit_pnl_gross,
+                txn_charges=outcome.txn_charges,
                 exit_pnl=exit_pnl,
-                eod_pnl=eod_pnl,
-                max_profit=max_profit,
-                max_loss=max_loss,
-                max_profit_before_exit=max_profit_before_exit,
-                entry_premium_sum=float(entry_premium_sum),
-                stop_pct=float(loss_limit_pct),
-                uncapped_stop_rupees=float(uncapped_loss_limit_rupees),
-                stop_cap_rupees=float(stop_cap_rupees),
-                stop_rupees=float(loss_limit_rupees),
-                profit_protect_trigger_pct=float(profit_protect_pct),
-                profit_protect_trigger_rupees=float(G),
+                eod_pnl=outcome.eod_pnl,
+                max_profit=outcome.max_profit,
+                max_loss=outcome.max_loss,
+                max_profit_before_exit=outcome.max_profit_before_exit,
+                entry_premium_sum=outcome.entry_premium_sum,
+                stop_pct=outcome.stop_pct,
+                uncapped_stop_rupees=outcome.uncapped_stop_rupees,
+                stop_cap_rupees=outcome.stop_cap_rupees,
+                stop_rupees=outcome.stop_rupees,
+                profit_protect_trigger_pct=outcome.profit_protect_trigger_pct,
+                profit_protect_trigger_rupees=outcome.profit_protect_trigger_rupees,
                 daily_realized_pnl_after_trade=float(daily_realized_pnl),
                 daily_loss_limit_rupees=float(max_daily_loss_rupees),
                 daily_loss_limit_hit=bool(daily_loss_limit_hit),
@@ -1643,6 +1804,7 @@ def simulate_groups(
             price_book=item.price_book,
             symbols=item.symbols,
             idx_all=item.idx_all,
+            first_attempts=item.first_attempts,
         )
         all_trades.extend(trade.__dict__ for trade in trades)
         skipped_rows.extend(skips)
@@ -1656,6 +1818,446 @@ def simulate_groups(
     return all_df, pd.DataFrame(skipped_rows)
 
 
+# =============================================================================
+# BATCHED SIMULATION: K PARAMETER SETS PER PASS OVER A DAY
+# =============================================================================
+# simulate_day_multi_trades() walks one Params through one day with pandas
+# Series, so an Optuna trial pays Python/pandas overhead per attempt per day.
+# The batched engine below keeps each day as plain NumPy minute arrays and runs
+# K strategy state machines together: every round takes the next pending
+# attempt of every still-active parameter set, gathers their ATM legs as a
+# (K, minutes) block and finds stop/target/protect hits with array masks.
+# The rules and arithmetic are the same as simulate_attempt(); only the trade
+# bookkeeping (TradeRow, daily loss, re-entry timing) stays per parameter set.
+
+_SESSION_START_MIN = SESSION_START_IST.hour * 60 + SESSION_START_IST.minute
+_NO_HIT = np.iinfo(np.int64).max
+
+
+@dataclass
+class DayArrays:
+    """Parameter-independent NumPy view of one DayGroup, one column per session minute."""
+
+    labels: List[str]            # "HH:MM" of every minute
+    clock: List[dtime]           # wall-clock time of every minute
+    und_px: np.ndarray           # as-of underlying close at every minute
+    atm: np.ndarray              # ATM strike at every minute (0 when und_px is NaN)
+    row: np.ndarray              # row of the ATM strike in the leg blocks, -1 if CE/PE missing
+    ce_sym: List[str]
+    pe_sym: List[str]
+    ce_close_raw: np.ndarray     # (strikes, minutes) blocks below
+    pe_close_raw: np.ndarray
+    ce_close: np.ndarray         # forward-filled
+    pe_close: np.ndarray
+    ce_high: np.ndarray
+    ce_low: np.ndarray
+    pe_high: np.ndarray
+    pe_low: np.ndarray
+    next_decay: Dict[int, np.ndarray] = field(default_factory=dict)
+
+
+def build_day_arrays(item: DayGroup) -> DayArrays:
+    """Flatten a DayGroup's price book into the arrays simulate_day_batch() reads."""
+    idx_all = item.idx_all
+    step = int(STRIKE_STEP[item.und])
+    n_min = len(idx_all)
+
+    und_px = np.full(n_min, np.nan)
+    u = item.underlying_day[["date", "close"]].dropna().copy()
+    if not u.empty:
+        u["date"] = ensure_ist(u["date"])
+        u = u.sort_values("date").set_index("date")
+        loc = u.index.get_indexer(idx_all, method="pad")
+        found = loc >= 0
+        und_px[found] = u["close"].to_numpy(dtype=float)[loc[found]]
+
+    strikes = sorted(
+        strike for (strike, opt_type) in item.symbols
+        if opt_type == "CE" and (strike, "PE") in item.symbols
+    )
+    strike_row = {strike: r for r, strike in enumerate(strikes)}
+
+    atm = np.zeros(n_min, dtype=np.int64)
+    row = np.full(n_min, -1, dtype=np.int64)
+    for i, px in enumerate(und_px):
+        if not np.isnan(px):
+            atm[i] = round_to_step(float(px), step)
+            row[i] = strike_row.get(int(atm[i]), -1)
+
+    def block(opt_type: str, col: str, ffill: bool = False) -> np.ndarray:
+        out = np.full((len(strikes), n_min), np.nan)
+        for r, strike in enumerate(strikes):
+            s = _leg_from_book(item.price_book, idx_all, strike, opt_type, col)
+            out[r] = (s.ffill() if ffill else s).to_numpy(dtype=float)
+        return out
+
+    return DayArrays(
+        labels=[ts.strftime("%H:%M") for ts in idx_all],
+        clock=[ts.timetz().replace(tzinfo=None) for ts in idx_all],
+        und_px=und_px,
+        atm=atm,
+        row=row,
+        ce_sym=[item.symbols[(strike, "CE")] for strike in strikes],
+        pe_sym=[item.symbols[(strike, "PE")] for strike in strikes],
+        ce_close_raw=block("CE", "close"),
+        pe_close_raw=block("PE", "close"),
+        ce_close=block("CE", "close", ffill=True),
+        pe_close=block("PE", "close", ffill=True),
+        ce_high=block("CE", "high"),
+        ce_low=block("CE", "low"),
+        pe_high=block("PE", "high"),
+        pe_low=block("PE", "low"),
+    )
+
+
+def _next_decay_minute(arrays: DayArrays, lookback_min: int) -> np.ndarray:
+    """
+    For every minute i, the first minute >= i at which the momentum gate opens
+    (len(minutes) if it never does). Same test as _momentum_wait(): the gate is
+    open when the ATM straddle premium is below its value lookback_min minutes
+    earlier, or when there is no underlying price / ATM pair to test.
+    """
+    cached = arrays.next_decay.get(lookback_min)
+    if cached is not None:
+        return cached
+
+    n_min = len(arrays.labels)
+    minutes = np.arange(n_min)
+    r = np.maximum(arrays.row, 0)
+    prem = arrays.ce_close + arrays.pe_close
+    if prem.shape[0]:
+        now = prem[r, minutes]
+        before = prem[r, np.maximum(minutes - lookback_min, 0)]
+        decaying = now < before
+    else:
+        decaying = np.zeros(n_min, dtype=bool)
+    gate_open = (arrays.row < 0) | decaying
+
+    nxt = np.full(n_min + 1, n_min, dtype=np.int64)
+    for i in range(n_min - 1, -1, -1):
+        nxt[i] = i if gate_open[i] else nxt[i + 1]
+    arrays.next_decay[lookback_min] = nxt
+    return nxt
+
+
+def _minute_of(value: dtime) -> float:
+    """Session-minute offset of a wall-clock time (fractional for seconds)."""
+    seconds = value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+    return seconds / 60.0 - _SESSION_START_MIN
+
+
+def batch_supported(params: Params) -> bool:
+    """Whole-minute entry/exit times from the session start; anything else takes the scalar path."""
+    whole = all(t.second == 0 and t.microsecond == 0 for t in (params.entry_time, params.exit_time))
+    return whole and params.entry_time >= SESSION_START_IST
+
+
+def _first_hit(hits: np.ndarray) -> np.ndarray:
+    """Column of the first True per row, _NO_HIT where a row has none."""
+    return np.where(hits.any(axis=1), hits.argmax(axis=1), _NO_HIT)
+
+
+def simulate_day_batch(
+    item: DayGroup,
+    params_list: List[Params],
+) -> List[Tuple[List[TradeRow], List[Dict[str, Any]]]]:
+    """
+    Run every parameter set in params_list over one day-group at once.
+
+    Returns (trades, skipped) per parameter set, identical to what
+    simulate_day_multi_trades() returns for that set alone.
+    """
+    arrays = item.arrays
+    und, dy, expiry = item.und, item.dy, item.expiry
+    qty = int(QTY_UNITS[und])
+    dte = int((expiry - dy).days)
+    n_min = len(arrays.labels)
+    minutes = np.arange(n_min)
+    base_ts = item.idx_all[0]
+
+    def label(i: int) -> str:
+        return arrays.labels[i] if i < n_min else (base_ts + pd.Timedelta(minutes=int(i))).strftime("%H:%M")
+
+    n = len(params_list)
+    out: List[Tuple[List[TradeRow], List[Dict[str, Any]]]] = [([], []) for _ in range(n)]
+    profiles = [p.profile_for(und) for p in params_list]
+
+    # trade_end: last monitored minute (EXIT_TIME_IST or session end).
+    end = np.array(
+        [min(n_min - 1, int(np.floor(_minute_of(p.exit_time)))) for p in params_list],
+        dtype=np.int64,
+    )
+    default_reason = ["TIME_EXIT" if _minute_of(p.exit_time) < n_min - 1 else "EOD" for p in params_list]
+    protect_late_from = np.array(
+        [np.ceil(_minute_of(prof.profit_protect_late_from)) for prof in profiles], dtype=float,
+    )
+
+    def momentum_wait(k: int, i: int) -> int:
+        p = params_list[k]
+        if not p.entry_momentum_gate or i >= end[k]:
+            return i
+        return int(min(_next_decay_minute(arrays, p.momentum_lookback_min)[i], end[k]))
+
+    cur = np.zeros(n, dtype=np.int64)
+    seq = np.ones(n, dtype=np.int64)
+    realized = [0.0] * n
+    active: List[int] = []
+    for k, p in enumerate(params_list):
+        cur[k] = momentum_wait(k, int(_minute_of(p.entry_time)))
+        if cur[k] >= end[k]:
+            out[k][1].append({
+                "day": dy, "underlying": und, "expiry": expiry, "trade_seq": 1,
+                "reason": (
+                    f"No entry: entry {p.entry_time.strftime('%H:%M')} is at/after "
+                    f"exit cutoff {p.exit_time.strftime('%H:%M')}"
+                ),
+            })
+        else:
+            active.append(k)
+
+    while active:
+        ks = np.array(active, dtype=np.int64)
+        i = cur[ks]
+        u_px = arrays.und_px[i]
+        rows = arrays.row[i]
+        has_legs = rows >= 0
+        ce_entry = np.full(len(ks), np.nan)
+        pe_entry = np.full(len(ks), np.nan)
+        if has_legs.any():
+            ce_entry[has_legs] = arrays.ce_close_raw[rows[has_legs], i[has_legs]]
+            pe_entry[has_legs] = arrays.pe_close_raw[rows[has_legs], i[has_legs]]
+        ok = has_legs & ~np.isnan(u_px) & ~np.isnan(ce_entry) & ~np.isnan(pe_entry)
+
+        for j in np.flatnonzero(~ok):
+            k = int(ks[j])
+            skip = {"day": dy, "underlying": und, "expiry": expiry, "trade_seq": int(seq[k])}
+            if np.isnan(u_px[j]):
+                skip["reason"] = f"No underlying price at entry {label(int(i[j]))}"
+            elif rows[j] < 0:
+                skip["atm_strike"] = int(arrays.atm[i[j]])
+                skip["reason"] = "ATM CE/PE not available in pickle band"
+            else:
+                skip["atm_strike"] = int(arrays.atm[i[j]])
+                skip["reason"] = "No CE/PE price at entry (after ffill)"
+            out[k][1].append(skip)
+
+        v = np.flatnonzero(ok)
+        if not len(v):
+            break
+        ks, i, r = ks[v], i[v], rows[v]
+        ce_e, pe_e = ce_entry[v], pe_entry[v]
+        ends = end[ks]
+
+        # --- per-attempt risk basis (vectorised across parameter sets) ------
+        eps = (ce_e + pe_e) * qty
+        stop_pct = np.array([params_list[k].loss_limit_pct_for_attempt(int(seq[k]) - 1) for k in ks])
+        cap = np.array([float(params_list[k].max_loss_limit_cap_rupees) for k in ks])
+        uncapped = stop_pct * eps
+        stop_r = np.where(cap > 0, np.minimum(uncapped, cap), uncapped)
+        protect_pct = np.array([float(profiles[k].profit_protect_pct) for k in ks])
+        g_rupees = protect_pct * eps
+        late_give = np.array([float(profiles[k].profit_protect_late_giveback_pct) for k in ks])
+        pt_eff = np.array([
+            profiles[k].profit_target_pct_late
+            if profiles[k].profit_target_pct_late > 0.0
+            and arrays.clock[int(cur[k])] >= profiles[k].profit_target_late_from
+            else profiles[k].profit_target_pct
+            for k in ks
+        ], dtype=float)
+        target_r = pt_eff * eps
+
+        # --- (attempts, minutes) P&L blocks ---------------------------------
+        window = (minutes > i[:, None]) & (minutes <= ends[:, None])
+        ce_e2, pe_e2 = ce_e[:, None], pe_e[:, None]
+        pnl = (ce_e2 - arrays.ce_close[r]) * qty + (pe_e2 - arrays.pe_close[r]) * qty
+        ce_high, ce_low = arrays.ce_high[r], arrays.ce_low[r]
+        pe_high, pe_low = arrays.pe_high[r], arrays.pe_low[r]
+        pnl_sl = np.fmin(
+            np.fmin(pnl, (ce_e2 - ce_high) * qty + (pe_e2 - pe_low) * qty),
+            (ce_e2 - ce_low) * qty + (pe_e2 - pe_high) * qty,
+        )
+        pnl_tp = np.fmax(pnl, (ce_e2 - ce_low) * qty + (pe_e2 - pe_low) * qty)
+
+        stop_at = _first_hit(window & (pnl_sl <= -stop_r[:, None]))
+        target_at = _first_hit(window & (pt_eff > 0.0)[:, None] & (pnl_tp >= target_r[:, None]))
+
+        pnl_in = np.where(window, pnl, -np.inf)
+        peak = np.maximum.accumulate(pnl_in, axis=1)
+        trail = peak - g_rupees[:, None]
+        late = (late_give > 0.0)[:, None] & (minutes >= protect_late_from[ks][:, None])
+        trail = np.where(late, np.maximum(trail, peak - (late_give * eps)[:, None]), trail)
+        protect_at = _first_hit(
+            window & (protect_pct > 0.0)[:, None] & (peak >= g_rupees[:, None]) & (pnl <= trail)
+        )
+
+        exit_at = np.minimum(np.minimum(stop_at, target_at), np.minimum(protect_at, ends))
+        nr = np.arange(len(ks))
+        exit_close = pnl[nr, exit_at]
+        max_pnl = pnl_in.max(axis=1)
+        min_pnl = np.where(window, pnl, np.inf).min(axis=1)
+        eod_pnl = pnl[nr, ends]
+        peak_at_exit = peak[nr, exit_at]
+        exit_ce = arrays.ce_close[r, exit_at]
+        exit_pe = arrays.pe_close[r, exit_at]
+
+        still_active: List[int] = []
+        for j, k in enumerate(ks.tolist()):
+            p, prof = params_list[k], profiles[k]
+            x = int(exit_at[j])
+            if stop_at[j] == x:
+                reason, gross = "STOPLOSS", -float(stop_r[j])
+            elif target_at[j] == x:
+                reason, gross = "PROFIT_TARGET", float(target_r[j])
+            elif protect_at[j] == x:
+                reason, gross = "PROFIT_PROTECT", float(exit_close[j])
+            else:
+                reason, gross = default_reason[k], float(exit_close[j])
+
+            xce, xpe = float(exit_ce[j]), float(exit_pe[j])
+            charges = compute_trade_charges(
+                entry_ce=float(ce_e[j]), entry_pe=float(pe_e[j]),
+                exit_ce=xce if not np.isnan(xce) else 0.0,
+                exit_pe=xpe if not np.isnan(xpe) else 0.0,
+                qty=qty,
+            )
+            exit_pnl = gross - charges
+            trade_seq = int(seq[k])
+            max_daily_loss = float(prof.max_daily_loss_rupees)
+            realized[k] += float(exit_pnl)
+            loss_hit = bool(max_daily_loss > 0 and realized[k] <= -max_daily_loss)
+
+            out[k][0].append(TradeRow(
+                day=dy,
+                underlying=und,
+                trade_seq=trade_seq,
+                expiry=expiry,
+                days_to_expiry=dte,
+                atm_strike=int(arrays.atm[i[j]]),
+                qty_units=qty,
+                entry_time=arrays.labels[int(i[j])],
+                exit_time=arrays.labels[x],
+                exit_reason=reason,
+                entry_underlying=float(arrays.und_px[i[j]]),
+                ce_symbol=arrays.ce_sym[int(r[j])],
+                pe_symbol=arrays.pe_sym[int(r[j])],
+                entry_ce=float(ce_e[j]),
+                entry_pe=float(pe_e[j]),
+                exit_ce=xce,
+                exit_pe=xpe,
+                exit_pnl_gross=gross,
+                txn_charges=charges,
+                exit_pnl=exit_pnl,
+                eod_pnl=float(eod_pnl[j]),
+                max_profit=float(max(0.0, max_pnl[j])),
+                max_loss=float(min(0.0, min_pnl[j])),
+                max_profit_before_exit=float(max(0.0, peak_at_exit[j])),
+                entry_premium_sum=float(eps[j]),
+                stop_pct=float(stop_pct[j]),
+                uncapped_stop_rupees=float(uncapped[j]),
+                stop_cap_rupees=float(cap[j]),
+                stop_rupees=float(stop_r[j]),
+                profit_protect_trigger_pct=float(protect_pct[j]),
+                profit_protect_trigger_rupees=float(g_rupees[j]),
+                daily_realized_pnl_after_trade=float(realized[k]),
+                daily_loss_limit_rupees=max_daily_loss,
+                daily_loss_limit_hit=loss_hit,
+            ))
+
+            skipped = out[k][1]
+            if loss_hit:
+                skipped.append({
+                    "day": dy, "underlying": und, "expiry": expiry,
+                    "trade_seq": trade_seq + 1,
+                    "reason": (
+                        f"No re-entry: daily loss limit hit after trade_seq={trade_seq}; "
+                        f"realized_pnl={realized[k]:.2f}, limit={max_daily_loss:.2f}"
+                    ),
+                })
+                continue
+
+            if reason in ("STOPLOSS", "PROFIT_PROTECT") and (trade_seq - 1) < p.max_reattempts:
+                delay, prefix = p.reentry_delay_for_attempt(trade_seq - 1), "No re-entry"
+            elif (reason == "PROFIT_TARGET" and p.profit_target_reentry_enabled
+                    and (trade_seq - 1) < p.max_reattempts):
+                delay, prefix = p.profit_target_reentry_delay_min, "No target re-entry"
+            else:
+                continue
+
+            seq[k] = trade_seq + 1
+            cur[k] = momentum_wait(k, x + int(delay))
+            if cur[k] >= end[k]:
+                skipped.append({
+                    "day": dy, "underlying": und, "expiry": expiry,
+                    "trade_seq": int(seq[k]),
+                    "reason": (
+                        f"{prefix}: next entry time {label(int(cur[k]))} is at/after "
+                        f"exit cutoff {p.exit_time.strftime('%H:%M')}"
+                    ),
+                })
+                continue
+            still_active.append(k)
+
+        active = still_active
+
+    return out
+
+
+def simulate_groups_batch(
+    params_list: List[Params],
+    groups: List[DayGroup],
+) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    simulate_groups() for several parameter sets in one pass over the day-groups.
+
+    Each day's arrays are read once per batch instead of once per trial. Results
+    are returned in params_list order; sets batch_supported() rejects fall back
+    to simulate_day_multi_trades().
+    """
+    batched = [k for k, p in enumerate(params_list) if batch_supported(p)]
+    batch_params = [params_list[k] for k in batched]
+    scalar = [k for k in range(len(params_list)) if k not in set(batched)]
+    trades: List[List[Dict[str, Any]]] = [[] for _ in params_list]
+    skips: List[List[Dict[str, Any]]] = [[] for _ in params_list]
+
+    for item in groups:
+        if item.idx_all is None or item.price_book is None or item.symbols is None:
+            item.idx_all = build_minute_index(item.dy, SESSION_START_IST, SESSION_END_IST)
+            item.price_book, item.symbols = build_price_book(item.day_opt, item.idx_all)
+        if item.arrays is None:
+            item.arrays = build_day_arrays(item)
+
+        results = simulate_day_batch(item, batch_params) if batch_params else []
+        for k, (day_trades, day_skips) in zip(batched, results):
+            trades[k].extend(trade.__dict__ for trade in day_trades)
+            skips[k].extend(day_skips)
+
+        for k in scalar:
+            day_trades, day_skips = simulate_day_multi_trades(
+                und=item.und,
+                dy=item.dy,
+                expiry=item.expiry,
+                day_opt=item.day_opt,
+                underlying_day=item.underlying_day,
+                params=params_list[k],
+                price_book=item.price_book,
+                symbols=item.symbols,
+                idx_all=item.idx_all,
+                first_attempts=item.first_attempts,
+            )
+            trades[k].extend(trade.__dict__ for trade in day_trades)
+            skips[k].extend(day_skips)
+
+    out: List[Tuple[pd.DataFrame, pd.DataFrame]] = []
+    for k in range(len(params_list)):
+        all_df = pd.DataFrame(trades[k])
+        if not all_df.empty:
+            all_df = all_df.sort_values(
+                ["day", "underlying", "trade_seq"]
+            ).reset_index(drop=True)
+        out.append((all_df, pd.DataFrame(skips[k])))
+    return out
+
+
 def process_pickles_generate_trades(
     params: Params,
     pickle_paths: List[str],
@@ -1747,58 +2349,6 @@ def build_actual_trades_df(all_trades_df: pd.DataFrame, min_expiry_map: Dict[Tup
 # =============================================================================
 # Excel output
 # =============================================================================
-def _autosize_columns_safe(ws) -> None:
-    # Safe autosize even when the sheet is "empty-ish"
-    try:
-        max_col = ws.max_column or 0
-        if max_col <= 0:
-            return
-        for col_idx in range(1, max_col + 1):
-            col_letter = ws.cell(row=1, column=col_idx).column_letter
-            max_len = 0
-            for row_idx in range(1, min(ws.max_row or 1, 2000) + 1):
-                v = ws.cell(row=row_idx, column=col_idx).value
-                if v is None:
-                    continue
-                max_len = max(max_len, len(str(v)))
-            ws.column_dimensions[col_letter].width = min(60, max(10, max_len + 2))
-    except Exception:
-        # Never fail the whole run just because autosize misbehaved
-        return
-
-def _color_actual_trades_by_date(wb, actual_trades_df) -> None:
-    """Shade rows so all attempts on the same calendar date share one colour,
-    alternating between two soft fills as the date changes (visual grouping)."""
-    if actual_trades_df is None or actual_trades_df.empty:
-        return
-    if "actual_trades" not in wb.sheetnames:
-        return
-    cols = list(actual_trades_df.columns)
-    if "day" not in cols:
-        return
-    from openpyxl.styles import PatternFill
-    ws = wb["actual_trades"]
-    ncols = len(cols)
-    fills = [
-        PatternFill(fill_type="solid", fgColor="E8F0FE"),  # light blue
-        PatternFill(fill_type="solid", fgColor="FFF3E0"),  # light amber
-    ]
-    days = actual_trades_df["day"].tolist()
-    color_idx = 0
-    prev_day = None
-    first = True
-    for i, d in enumerate(days):
-        if first:
-            first = False
-        elif d != prev_day:
-            color_idx ^= 1
-        prev_day = d
-        fill = fills[color_idx]
-        excel_row = i + 2  # header occupies row 1
-        for c in range(1, ncols + 1):
-            ws.cell(row=excel_row, column=c).fill = fill
-
-
 def write_excel(all_trades_df: pd.DataFrame, actual_trades_df: pd.DataFrame, skipped_df: pd.DataFrame) -> None:
     out_dir = os.path.dirname(os.path.abspath(OUTPUT_XLSX))
     if out_dir and not os.path.exists(out_dir):
@@ -1928,21 +2478,20 @@ def write_excel(all_trades_df: pd.DataFrame, actual_trades_df: pd.DataFrame, ski
     else:
         monthwise_summary = pd.DataFrame()
 
-    with pd.ExcelWriter(OUTPUT_XLSX, engine="openpyxl") as xw:
-        all_trades_df.to_excel(xw, sheet_name="all_trades_backtested", index=False)
-        actual_trades_df.to_excel(xw, sheet_name="actual_trades", index=False)
-        monthwise_summary.to_excel(xw, sheet_name="monthwise_summary", index=False)
-        piv_exit.to_excel(xw, sheet_name="exit_pnl_pivot", index=False)
-        piv_eod_first.to_excel(xw, sheet_name="eod_pnl_first_trade_pivot", index=False)
-        instrument_summary.to_excel(xw, sheet_name="instrument_summary", index=False)
-        skipped_df.to_excel(xw, sheet_name="skipped", index=False)
-
-        wb = xw.book
-        for ws in wb.worksheets:
-            ws.freeze_panes = "A2"
-            _autosize_columns_safe(ws)
-
-        _color_actual_trades_by_date(wb, actual_trades_df)
+    # Streamed write-only workbook; actual_trades rows shaded by day.
+    report_writer.write_report(
+        OUTPUT_XLSX,
+        [
+            ("all_trades_backtested", all_trades_df),
+            ("actual_trades", actual_trades_df),
+            ("monthwise_summary", monthwise_summary),
+            ("exit_pnl_pivot", piv_exit),
+            ("eod_pnl_first_trade_pivot", piv_eod_first),
+            ("instrument_summary", instrument_summary),
+            ("skipped", skipped_df),
+        ],
+        band_sheets={"actual_trades": "day"},
+    )
 
     print(f"[DONE] Excel written: {OUTPUT_XLSX}")
 
@@ -2757,6 +3306,9 @@ def optimize(
     sampler = optuna.samplers.TPESampler(
         seed=seed,
         n_startup_trials=max(1, OPT_STARTUP_TRIALS),
+        # Trials of one batch are asked before any is told; the constant liar
+        # keeps TPE from proposing the same point K times.
+        constant_liar=OPT_BATCH_SIZE > 1,
     )
     study = optuna.create_study(
         direction="maximize",
@@ -2823,16 +3375,14 @@ def optimize(
     print(f"[OPT] trial log: {trial_csv_path}", flush=True)
     print(
         f"[OPT] starting {n_trials} trial(s), day-groups={len(groups)}, "
-        f"cv_folds={cv_folds}",
+        f"cv_folds={cv_folds}, batch={OPT_BATCH_SIZE}",
         flush=True,
     )
 
     start_time = time_module.time()
     completed_this_run = {"count": 0}
 
-    def objective(trial):
-        params = _params_from_trial(trial, base)
-        all_df, _ = simulate_groups(params, groups)
+    def score_trial(trial, all_df: pd.DataFrame) -> float:
         actual_df = build_actual_trades_df(all_df, min_expiry_map)
         metrics = robustness_metrics(actual_df)
 
@@ -2851,6 +3401,30 @@ def optimize(
             return _cv_score(actual_df, cv_folds)
         return _score_from_metrics(metrics)
 
+    def objective(trial):
+        params = _params_from_trial(trial, base)
+        all_df, _ = simulate_groups(params, groups)
+        return score_trial(trial, all_df)
+
+    def optimize_in_batches() -> None:
+        remaining = n_trials
+        while remaining > 0:
+            trials = [study.ask() for _ in range(min(OPT_BATCH_SIZE, remaining))]
+            remaining -= len(trials)
+            try:
+                batch_params = [_params_from_trial(trial, base) for trial in trials]
+                results = simulate_groups_batch(batch_params, groups)
+                values = [
+                    score_trial(trial, all_df)
+                    for trial, (all_df, _) in zip(trials, results)
+                ]
+            except BaseException:
+                for trial in trials:
+                    study.tell(trial, state=optuna.trial.TrialState.FAIL)
+                raise
+            for trial, value in zip(trials, values):
+                progress_callback(study, study.tell(trial, value))
+
     def progress_callback(study_obj, trial):
         completed_this_run["count"] += 1
         run_index = completed_this_run["count"]
@@ -2910,14 +3484,24 @@ def optimize(
                     print("       " + "   ".join(cells[start:start + 4]), flush=True)
 
     try:
-        study.optimize(
-            objective,
-            n_trials=n_trials,
-            callbacks=[progress_callback],
-            show_progress_bar=False,
-        )
+        if OPT_BATCH_SIZE > 1:
+            optimize_in_batches()
+        else:
+            study.optimize(
+                objective,
+                n_trials=n_trials,
+                callbacks=[progress_callback],
+                show_progress_bar=False,
+            )
     finally:
         csv_file.close()
+        lookups = _FIRST_ATTEMPT_STATS["hits"] + _FIRST_ATTEMPT_STATS["misses"]
+        if lookups:
+            print(
+                f"[OPT] first-attempt cache: {_FIRST_ATTEMPT_STATS['hits']}/{lookups} "
+                f"day lookups reused ({_FIRST_ATTEMPT_STATS['hits'] / lookups:.1%})",
+                flush=True,
+            )
         try:
             full_csv_path = os.path.join(
                 OPT_OUTPUT_DIR,
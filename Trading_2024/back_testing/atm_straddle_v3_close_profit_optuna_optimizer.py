@@ -108,6 +108,12 @@ OPT_MIN_MONTHS = 3
 OPT_MAX_ALLOWED_DRAWDOWN = 0.0  # 0 disables; otherwise disqualify worse DD.
 DISQUALIFIED_SCORE = -1.0e15
 
+# A day's first attempt depends only on strategy.first_attempt_key() (entry/exit
+# time, first stop %, stop cap, protect/ratchet/target settings). Each day-group
+# remembers that attempt for up to this many distinct keys, so trials sharing
+# them re-simulate only the re-entries. 0 disables the memo.
+FIRST_ATTEMPT_CACHE_PER_DAY = 4096
+
 
 # =============================================================================
 # 2. SOURCE FILE RESOLUTION
@@ -446,9 +452,13 @@ _PRICE_BOOK_BY_FRAME_ID: Dict[int, Dict[Tuple[int, str, str, str], pd.Series]] =
 _SYMBOLS_BY_FRAME_ID: Dict[int, Dict[Tuple[int, str], str]] = {}
 _UNDERLYING_CLOSE_BY_FRAME_ID: Dict[int, pd.Series] = {}
 
+_FIRST_ATTEMPT_BY_FRAME_ID: Dict[int, Dict[Tuple[Any, ...], Any]] = {}
+_FIRST_ATTEMPT_STATS: Dict[str, int] = {"hits": 0, "misses": 0}
+
 _ORIGINAL_BUILD_LEG_SERIES = strategy._build_leg_series
 _ORIGINAL_PICK_SYMBOL = strategy._pick_symbol
 _ORIGINAL_ASOF_CLOSE = strategy.asof_close
+_ORIGINAL_SIMULATE_ATTEMPT = strategy.simulate_attempt
 
 
 def _build_price_book(
@@ -539,10 +549,29 @@ def _cached_asof_close(df: pd.DataFrame, ts: pd.Timestamp) -> float:
     return float(series.iloc[int(loc[0])])
 
 
+def _cached_simulate_attempt(**kwargs: Any):
+    """Reuse a day's first attempt across trials that share its parameter key."""
+    memo = _FIRST_ATTEMPT_BY_FRAME_ID.get(id(kwargs["day_opt"]))
+    if memo is None or kwargs["trade_seq"] != 1 or FIRST_ATTEMPT_CACHE_PER_DAY <= 0:
+        return _ORIGINAL_SIMULATE_ATTEMPT(**kwargs)
+    key = strategy.first_attempt_key()
+    cached = memo.get(key)
+    if cached is not None:
+        _FIRST_ATTEMPT_STATS["hits"] += 1
+        return cached
+    _FIRST_ATTEMPT_STATS["misses"] += 1
+    result = _ORIGINAL_SIMULATE_ATTEMPT(**kwargs)
+    if len(memo) >= FIRST_ATTEMPT_CACHE_PER_DAY:
+        memo.pop(next(iter(memo)))
+    memo[key] = result
+    return result
+
+
 # Install the performance wrappers once. They do not alter numerical rules.
 strategy._build_leg_series = _cached_build_leg_series
 strategy._pick_symbol = _cached_pick_symbol
 strategy.asof_close = _cached_asof_close
+strategy.simulate_attempt = _cached_simulate_attempt
 
 
 def _prepare_option_frame(df: pd.DataFrame) -> pd.DataFrame:
@@ -684,6 +713,7 @@ def build_day_groups(
         _UNDERLYING_CLOSE_BY_FRAME_ID[id(group.underlying_day)] = (
             group.underlying_close
         )
+        _FIRST_ATTEMPT_BY_FRAME_ID[id(group.day_opt)] = {}
 
         if idx % 50 == 0 or idx == len(groups):
             print(f"[CACHE] {idx}/{len(groups)}", flush=True)
@@ -1490,6 +1520,13 @@ def optimize(
         )
     finally:
         csv_handle.close()
+        lookups = _FIRST_ATTEMPT_STATS["hits"] + _FIRST_ATTEMPT_STATS["misses"]
+        if lookups:
+            print(
+                f"[OPT] First-attempt cache: {_FIRST_ATTEMPT_STATS['hits']}/{lookups} "
+                f"day lookups reused ({_FIRST_ATTEMPT_STATS['hits'] / lookups:.1%})",
+                flush=True,
+            )
         try:
             study.trials_dataframe().to_csv(full_csv, index=False)
             print(f"[OPT] Full Optuna table: {full_csv}", flush=True)
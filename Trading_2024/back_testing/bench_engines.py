@@ -0,0 +1,451 @@
+"""
+Benchmark harness for the backtest engines on deterministic synthetic data.
+
+Generates (or reuses) a synthetic_market data set for the given seed/size, runs
+each engine's own main() against it and records per-phase wall time:
+
+    load       pickle / SQLite reads, pass-1 scans, underlying download, day prep
+    simulate   the engine's per-day simulation function(s)
+    report     write_excel (Excel / Parquet output)
+    other      everything else inside main() (aggregation, actual-trade selection)
+
+Phases are timed exclusively: a read_pickle inside process_pickles_generate_trades
+counts as load, not simulate. Each engine runs in its own subprocess because every
+engine reads its configuration from the environment / property files at import and
+the property loaders write into os.environ.
+
+Kite is replaced by a stand-in that serves instruments() and minute
+historical_data() for the synthetic underlyings, so nothing touches the network.
+
+Results are appended as JSON lines to BENCH_RESULTS (one record per engine per
+run, tagged with the git commit) so runs on different commits can be compared:
+
+    python -m Trading_2024.back_testing.bench_engines                      # all engines
+    python -m Trading_2024.back_testing.bench_engines --engines v3 v3_1sec_sqlite --repeat 3
+    python -m Trading_2024.back_testing.bench_engines --compare            # vs previous commit's run
+    python -m Trading_2024.back_testing.bench_engines --compare 6adcaf9
+
+--compare exits 1 when any phase is slower than the reference by more than
+BENCH_REGRESSION_PCT (and by more than BENCH_REGRESSION_MIN_SEC in absolute terms).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from Trading_2024.back_testing.synthetic_market import MarketSpec, generate_all  # noqa: E402
+
+BENCH_DATA_DIR = Path(os.getenv("BENCH_DATA_DIR", str(REPO_ROOT / "bench_data")))
+BENCH_RESULTS = Path(os.getenv("BENCH_RESULTS", str(REPO_ROOT / "bench_data" / "bench_results.jsonl")))
+BENCH_REGRESSION_PCT = float(os.getenv("BENCH_REGRESSION_PCT", "15"))
+BENCH_REGRESSION_MIN_SEC = float(os.getenv("BENCH_REGRESSION_MIN_SEC", "0.05"))
+ENGINE_TIMEOUT_SEC = int(os.getenv("BENCH_ENGINE_TIMEOUT_SEC", "1800"))
+
+PHASES = ("load", "simulate", "report", "other")
+
+# Every engine sees every DTE so the synthetic week is fully exercised.
+_ALL_DTE = "0,1,2,3,4,5,6"
+
+
+# =============================================================================
+# Engine registry
+# =============================================================================
+@dataclass(frozen=True)
+class EngineSpec:
+    path: str                                   # relative to the repo root
+    data: str                                   # "kite" | "dhan" | "sqlite"
+    env: Dict[str, str] = field(default_factory=dict)
+    load: Tuple[str, ...] = ()
+    simulate: Tuple[str, ...] = ()
+    report: Tuple[str, ...] = ("write_excel",)
+
+
+_KITE_LOAD = ("scan_pickles_pass1", "download_underlyings")
+
+ENGINES: Dict[str, EngineSpec] = {
+    "v2": EngineSpec(
+        "Trading_2024/back_testing/atm_straddle_backtest_v2.py", "kite",
+        env={"ALLOWED_DTE": _ALL_DTE},
+        load=_KITE_LOAD, simulate=("simulate_day_multi_trades",),
+    ),
+    "v3": EngineSpec(
+        "Trading_2024/back_testing/atm_straddle_backtest_v3.py", "kite",
+        env={"ALLOWED_DTE": _ALL_DTE},
+        load=_KITE_LOAD, simulate=("simulate_day_multi_trades",),
+    ),
+    "v3_1sec_sqlite": EngineSpec(
+        "Trading_2024/back_testing/atm_straddle_backtest_v3_1sec_sqlite.py", "sqlite",
+        env={"ALLOWED_DTE": _ALL_DTE},
+        load=("scan_database_catalog", "load_day_data"), simulate=("simulate_day_multi_trades",),
+    ),
+    "straddle_legwise_reattempt": EngineSpec(
+        "Backtesting/straddle_legwise_reattempt.py", "kite",
+        load=_KITE_LOAD + ("prepare_option_day_frame",), simulate=("simulate_day_legwise",),
+    ),
+    "iron_butterfly_prem_jump_reattempt": EngineSpec(
+        "Backtesting/iron_butterfly_prem_jump_reattempt.py", "kite",
+        load=_KITE_LOAD, simulate=("simulate_day_multi_trades",),
+    ),
+    "dhan_atm_straddle_prem_perc": EngineSpec(
+        "Backtesting/dhan_atm_straddle_prem_jump_reattempt_prem_perc.py", "dhan",
+        env={"WINDOW_END_MODE": "data"},
+        load=("discover_data_max_day", "_normalize_dhan_df"), simulate=("simulate_day_multi_trades_dhan",),
+    ),
+    "dhan_otm_legwise": EngineSpec(
+        "Backtesting/dhan_otm_straddle_legwise_final_commented.py", "dhan",
+        env={"WINDOW_END_MODE": "data"},
+        load=("discover_data_max_day", "scan_pickles_pass1_dhan"),
+        simulate=("simulate_day_multi_trades_dhan_legwise",),
+    ),
+}
+
+
+# =============================================================================
+# Phase clock (runs inside the engine subprocess)
+# =============================================================================
+class PhaseClock:
+    """Exclusive wall time per phase; nested calls charge the innermost phase only."""
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {p: 0.0 for p in PHASES}
+        self.calls: Dict[str, int] = {p: 0 for p in PHASES}
+        self._stack: List[str] = ["other"]
+        self._mark = time.perf_counter()
+
+    def _switch(self, phase: Optional[str]) -> None:
+        now = time.perf_counter()
+        self.totals[self._stack[-1]] += now - self._mark
+        self._mark = now
+        if phase is None:
+            self._stack.pop()
+        else:
+            self._stack.append(phase)
+
+    def wrap(self, phase: str, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            self.calls[phase] += 1
+            self._switch(phase)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._switch(None)
+        timed.__wrapped__ = fn
+        return timed
+
+    def finish(self) -> Dict[str, float]:
+        self._switch("other")
+        return {p: round(v, 4) for p, v in self.totals.items()}
+
+
+class SyntheticKite:
+    """instruments() / historical_data() over synthetic_market's underlying_minute.pkl."""
+
+    def __init__(self, underlying_pickle: Path) -> None:
+        import pandas as pd
+        from Trading_2024.back_testing import synthetic_market as sm
+
+        self._minutes = pd.read_pickle(underlying_pickle)
+        self._by_token = {
+            sm.INDEX_TOKEN[und]: g.drop(columns=["underlying"]).reset_index(drop=True)
+            for und, g in self._minutes.groupby("underlying")
+        }
+        self._instruments: Dict[str, List[Dict[str, Any]]] = {}
+        for und in self._minutes["underlying"].unique():
+            self._instruments.setdefault(sm.INDEX_EXCHANGE[und], []).append({
+                "instrument_token": sm.INDEX_TOKEN[und],
+                "tradingsymbol": sm.INDEX_SYMBOL[und],
+                "name": sm.INDEX_SYMBOL[und],
+                "exchange": sm.INDEX_EXCHANGE[und],
+                "segment": "INDICES",
+                "instrument_type": "EQ",
+            })
+
+    def instruments(self, exchange: Optional[str] = None) -> List[Dict[str, Any]]:
+        if exchange is None:
+            return [r for rows in self._instruments.values() for r in rows]
+        return list(self._instruments.get(exchange.upper(), []))
+
+    def historical_data(self, instrument_token, from_date, to_date, interval="minute",
+                        continuous=False, oi=False) -> List[Dict[str, Any]]:
+        import pandas as pd
+
+        df = self._by_token.get(int(instrument_token))
+        if df is None:
+            return []
+        lo = pd.Timestamp(from_date)
+        hi = pd.Timestamp(to_date)
+        tz = df["date"].dt.tz
+        lo = lo.tz_localize(tz) if lo.tzinfo is None else lo.tz_convert(tz)
+        hi = hi.tz_localize(tz) if hi.tzinfo is None else hi.tz_convert(tz)
+        sub = df[(df["date"] >= lo) & (df["date"] <= hi)]
+        return sub.to_dict("records")
+
+
+def _data_env(data_dir: Path, spec: EngineSpec, out_xlsx: Path) -> Dict[str, str]:
+    env = {
+        "PICKLES_DIR": str(data_dir / "kite"),
+        "DHAN_PICKLES_DIR": str(data_dir / "dhan"),
+        "SQLITE_DIR": str(data_dir / "sqlite"),
+        "OUTPUT_XLSX": str(out_xlsx),
+    }
+    env.update(spec.env)
+    return env
+
+
+def _import_engine(path: Path):
+    name = "bench_engine_" + path.stem
+    module_spec = importlib.util.spec_from_file_location(name, str(path))
+    module = importlib.util.module_from_spec(module_spec)
+    sys.modules[name] = module
+    module_spec.loader.exec_module(module)
+    return module
+
+
+def run_engine_in_process(engine: str, data_dir: Path, out_dir: Path) -> Dict[str, Any]:
+    """Import and run one engine in this process; meant to be called via --run-engine."""
+    import pandas as pd
+
+    spec = ENGINES[engine]
+    out_xlsx = out_dir / f"bench_{engine}.xlsx"
+    env = _data_env(data_dir, spec, out_xlsx)
+    os.environ.update(env)
+    engine_path = REPO_ROOT / spec.path
+    sys.argv = [str(engine_path)]
+
+    t0 = time.perf_counter()
+    module = _import_engine(engine_path)
+    import_sec = time.perf_counter() - t0
+
+    # Hardcoded module-level paths (some engines do not read them from env).
+    for attr, key in (("PICKLES_DIR", "DHAN_PICKLES_DIR" if spec.data == "dhan" else
+                       "SQLITE_DIR" if spec.data == "sqlite" else "PICKLES_DIR"),
+                      ("SQLITE_DIR", "SQLITE_DIR"), ("OUTPUT_XLSX", "OUTPUT_XLSX")):
+        if hasattr(module, attr):
+            setattr(module, attr, env[key])
+    if hasattr(module, "SLEEP_BETWEEN_CALLS_SEC"):
+        module.SLEEP_BETWEEN_CALLS_SEC = 0.0
+
+    kite = SyntheticKite(data_dir / "underlying_minute.pkl")
+    o_utils = getattr(module, "oUtils", None)
+    if o_utils is not None:
+        o_utils.intialize_kite_api = lambda: kite
+
+    clock = PhaseClock()
+    for phase in ("load", "simulate", "report"):
+        for fn_name in getattr(spec, phase):
+            fn = getattr(module, fn_name, None)
+            if fn is None:
+                print(f"[WARN] {engine}: {fn_name} not found; not timed")
+                continue
+            setattr(module, fn_name, clock.wrap(phase, fn))
+
+    rows: Dict[str, int] = {}
+    write_excel = getattr(module, "write_excel", None)
+    if write_excel is not None:
+        def capture(*args, **kwargs):
+            named = [(f"arg{i}", a) for i, a in enumerate(args)] + list(kwargs.items())
+            for key, a in named[:3]:
+                if isinstance(a, pd.DataFrame):
+                    rows[key] = int(len(a))
+            return write_excel(*args, **kwargs)
+        module.write_excel = capture
+
+    pd.read_pickle, orig_read_pickle = clock.wrap("load", pd.read_pickle), pd.read_pickle
+    pd.read_sql_query, orig_read_sql = clock.wrap("load", pd.read_sql_query), pd.read_sql_query
+
+    log = io.StringIO()
+    t0 = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            module.main()
+    finally:
+        pd.read_pickle, pd.read_sql_query = orig_read_pickle, orig_read_sql
+    total = time.perf_counter() - t0
+    phases = clock.finish()
+
+    return {
+        "engine": engine,
+        "import_sec": round(import_sec, 4),
+        "total_sec": round(total, 4),
+        "phases": phases,
+        "calls": clock.calls,
+        "rows": rows,
+        "log_tail": log.getvalue().splitlines()[-5:],
+    }
+
+
+# =============================================================================
+# Parent: data, subprocesses, results file, comparison
+# =============================================================================
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True,
+                              timeout=60).stdout.strip()
+    except Exception:
+        return ""
+
+
+def _versions() -> Dict[str, str]:
+    out = {"python": platform.python_version()}
+    for mod in ("pandas", "numpy", "openpyxl"):
+        try:
+            out[mod] = __import__(mod).__version__
+        except Exception:
+            out[mod] = "n/a"
+    return out
+
+
+def run_engine_subprocess(engine: str, data_dir: Path, out_dir: Path) -> Dict[str, Any]:
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--run-engine", engine,
+           "--data-dir", str(data_dir), "--out-dir", str(out_dir)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, timeout=ENGINE_TIMEOUT_SEC, cwd=REPO_ROOT)
+    marker = "BENCH_RESULT "
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(marker):
+            return json.loads(line[len(marker):])
+    tail = "\n".join((proc.stderr or proc.stdout).splitlines()[-15:])
+    raise RuntimeError(f"{engine} failed (exit {proc.returncode}):\n{tail}")
+
+
+def _best_of(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    best = dict(results[0])
+    best["phases"] = {p: min(r["phases"][p] for r in results) for p in PHASES}
+    best["total_sec"] = min(r["total_sec"] for r in results)
+    best["repeat"] = len(results)
+    return best
+
+
+def load_results(path: Path = BENCH_RESULTS) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    out = []
+    with path.open() as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                out.append(json.loads(line))
+    return out
+
+
+def _reference(records: List[Dict[str, Any]], engine: str, spec_key: Dict[str, Any],
+               commit: str, ref: Optional[str]) -> Optional[Dict[str, Any]]:
+    same = [r for r in records if r["engine"] == engine and r["spec"] == spec_key]
+    if ref:
+        same = [r for r in same if r["commit"].startswith(ref)]
+    else:
+        same = [r for r in same if r["commit"] != commit]
+    return same[-1] if same else None
+
+
+def compare(current: List[Dict[str, Any]], records: List[Dict[str, Any]], ref: Optional[str]) -> bool:
+    """Print a phase table vs the reference run; True when a regression is found."""
+    regressed = False
+    print(f"\n{'engine':<36}{'phase':<10}{'ref s':>10}{'now s':>10}{'delta':>9}")
+    for rec in current:
+        base = _reference(records, rec["engine"], rec["spec"], rec["commit"], ref)
+        if base is None:
+            print(f"{rec['engine']:<36}(no reference run)")
+            continue
+        for phase in PHASES + ("total",):
+            old = base["total_sec"] if phase == "total" else base["phases"][phase]
+            new = rec["total_sec"] if phase == "total" else rec["phases"][phase]
+            pct = (new - old) / old * 100 if old > 0 else 0.0
+            flag = ""
+            if pct > BENCH_REGRESSION_PCT and new - old > BENCH_REGRESSION_MIN_SEC:
+                flag, regressed = "  REGRESSION", True
+            print(f"{rec['engine']:<36}{phase:<10}{old:>10.3f}{new:>10.3f}{pct:>+8.1f}%{flag}")
+        print(f"{'':<36}(ref {base['commit'][:10]} @ {base['timestamp']})")
+    return regressed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark backtest engines on synthetic option days.")
+    ap.add_argument("--engines", nargs="*", default=list(ENGINES), choices=list(ENGINES))
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--days", type=int, default=20)
+    ap.add_argument("--sqlite-days", type=int, default=2)
+    ap.add_argument("--repeat", type=int, default=1, help="runs per engine; best time per phase is kept")
+    ap.add_argument("--compare", nargs="?", const="", default=None, metavar="COMMIT",
+                    help="compare with the latest run on COMMIT (default: latest run on another commit)")
+    ap.add_argument("--no-save", action="store_true", help="do not append to BENCH_RESULTS")
+    ap.add_argument("--regenerate", action="store_true", help="rebuild the synthetic data set")
+    # internal: child process entry
+    ap.add_argument("--run-engine", help=argparse.SUPPRESS)
+    ap.add_argument("--data-dir", help=argparse.SUPPRESS)
+    ap.add_argument("--out-dir", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.run_engine:
+        result = run_engine_in_process(args.run_engine, Path(args.data_dir), Path(args.out_dir))
+        print("BENCH_RESULT " + json.dumps(result, default=str))
+        return 0
+
+    spec = MarketSpec(seed=args.seed, days=args.days, sqlite_days=args.sqlite_days)
+    data_dir = BENCH_DATA_DIR / f"seed{spec.seed}_d{spec.days}_s{spec.sqlite_days}"
+    print(f"[STEP] Synthetic data -> {data_dir}")
+    t0 = time.perf_counter()
+    manifest = generate_all(spec, data_dir, force=args.regenerate)
+    print(f"[INFO] kite={manifest['kite_pickles']} dhan={manifest['dhan_pickles']} "
+          f"sqlite={manifest['sqlite_dbs']} ({manifest['bytes'] / 1e6:.1f} MB) in {time.perf_counter() - t0:.1f}s")
+
+    commit = _git("rev-parse", "HEAD")
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    stamp = datetime.now().isoformat(timespec="seconds")
+    versions = _versions()
+
+    current: List[Dict[str, Any]] = []
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="bench_out_") as out_dir:
+        for engine in args.engines:
+            print(f"[STEP] {engine} x{args.repeat}")
+            try:
+                runs = [run_engine_subprocess(engine, data_dir, Path(out_dir)) for _ in range(args.repeat)]
+            except Exception as e:
+                print(f"[WARN] {e}")
+                failed = True
+                continue
+            rec = _best_of(runs)
+            rec.update({
+                "timestamp": stamp, "commit": commit, "dirty": dirty,
+                "spec": spec.key(), "versions": versions,
+            })
+            rec.pop("log_tail", None)
+            current.append(rec)
+            ph = rec["phases"]
+            print(f"[OK] {engine}: total={rec['total_sec']:.2f}s load={ph['load']:.2f} "
+                  f"simulate={ph['simulate']:.2f} report={ph['report']:.2f} other={ph['other']:.2f} "
+                  f"rows={rec['rows']}")
+
+    records = load_results()
+    if current and not args.no_save:
+        BENCH_RESULTS.parent.mkdir(parents=True, exist_ok=True)
+        with BENCH_RESULTS.open("a") as fh:
+            for rec in current:
+                fh.write(json.dumps(rec, default=str) + "\n")
+        print(f"[INFO] Results appended to {BENCH_RESULTS}")
+
+    if args.compare is not None and compare(current, records, args.compare or None):
+        return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,525 @@
+"""
+Shared cache of per-instrument minute series and aligned pairs for the pair testers.
+
+NiftySensexTradeabilityTester, NiftySensexPrevDayRatioBacktester, the two
+DeepDeviation4Y testers and IndexStockCorrelationScanner each used to hunt for old
+pickles/CSVs (or re-download everything) and then re-align the two closes
+themselves. They now share one store:
+
+    <PAIR_STORE_DIR>/series/<EXCHANGE>__<SYMBOL>__<interval>.parquet
+        One file per instrument + interval: date (IST, tz-naive), OHLCV, sorted.
+        The footer records which calendar dates were already fetched, so a later
+        run only asks the fetcher for the missing days before/after/between them
+        (incremental top-up). Today only counts as covered after the close.
+
+    <PAIR_STORE_DIR>/aligned/<A>__<B>__<interval>__<start>_<end>.parquet
+        Inner join of the two closes for one (pair, interval, range), tagged with
+        the size/mtime of both series files; rebuilt only when a series changed.
+        The newest PAIR_STORE_ALIGNED_KEEP ranges per pair are kept.
+
+A warm aligned_pair() call is two footer reads plus one Parquet read, so a tester
+starts from aligned arrays in milliseconds instead of re-downloading/re-aligning.
+
+Usage:
+    from Trading_2024.back_testing import pair_store
+
+    nifty = pair_store.InstrumentKey("NSE", "NIFTY 50")
+    sensex = pair_store.InstrumentKey("BSE", "SENSEX")
+
+    def fetch(key, from_d, to_d):          # only called for days not in the store
+        return my_kite_download(key, from_d, to_d)   # DataFrame with date + OHLCV
+        # or (DataFrame, [(from_d, to_d), ...]) listing sub-ranges it gave up on
+
+    aligned = pair_store.aligned_pair(nifty, sensex, start_d, end_d, fetch=fetch)
+    aligned.columns -> date, left_close, right_close
+
+Environment:
+    PAIR_STORE=0                 testers skip the store and use their old loaders
+    PAIR_STORE_DIR               store root (default ./pair_store)
+    PAIR_STORE_ALIGNED_KEEP      aligned ranges kept per pair + interval (default 6)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+IST = ZoneInfo("Asia/Kolkata")
+
+PAIR_STORE_ENABLED = os.getenv("PAIR_STORE", "1").strip().lower() not in ("0", "false", "no")
+PAIR_STORE_DIR = os.path.abspath(os.path.expanduser(os.getenv("PAIR_STORE_DIR", "./pair_store")))
+PAIR_STORE_COMPRESSION = os.getenv("PAIR_STORE_COMPRESSION", "zstd")
+PAIR_STORE_ALIGNED_KEEP = int(os.getenv("PAIR_STORE_ALIGNED_KEEP", "6"))
+
+# After this IST time today's candles are final and the day can be marked covered.
+DAY_COMPLETE_AFTER = dtime(15, 45)
+
+FOOTER_KEY = b"pair_store"
+FORMAT_VERSION = 1
+OHLCV_COLUMNS = ("date", "open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class InstrumentKey:
+    exchange: str
+    tradingsymbol: str
+
+    @property
+    def slug(self) -> str:
+        text = f"{self.exchange.strip().upper()}__{self.tradingsymbol.strip().upper()}"
+        for old, new in ((" ", "_"), ("/", "_"), ("\\", "_"), (":", "_"), ("&", "AND")):
+            text = text.replace(old, new)
+        return text
+
+    def __str__(self) -> str:
+        return f"{self.exchange}:{self.tradingsymbol}"
+
+
+# fetch(key, from_date, to_date) -> DataFrame with a date column and OHLCV, or
+# (DataFrame, failed) where failed lists the (from_date, to_date) sub-ranges the
+# fetcher gave up on. Failed sub-ranges are not marked covered, so the next run
+# asks for them again.
+FetchResult = Union[pd.DataFrame, Tuple[pd.DataFrame, Sequence[Tuple[date, date]]]]
+Fetcher = Callable[[InstrumentKey, date, date], FetchResult]
+
+
+# ---------------------------------------------------------------------------
+# Paths / footers
+# ---------------------------------------------------------------------------
+def series_path(key: InstrumentKey, interval: str, store_dir: Optional[str] = None) -> Path:
+    return Path(store_dir or PAIR_STORE_DIR) / "series" / f"{key.slug}__{interval}.parquet"
+
+
+def aligned_path(
+    left: InstrumentKey,
+    right: InstrumentKey,
+    interval: str,
+    start_d: date,
+    end_d: date,
+    store_dir: Optional[str] = None,
+) -> Path:
+    name = f"{left.slug}__{right.slug}__{interval}__{start_d:%Y%m%d}_{end_d:%Y%m%d}.parquet"
+    return Path(store_dir or PAIR_STORE_DIR) / "aligned" / name
+
+
+def read_footer(path: Path) -> Dict[str, Any]:
+    """Store metadata from a Parquet footer, or {} for missing/foreign files."""
+    try:
+        metadata = pq.read_schema(str(path)).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return {}
+    raw = metadata.get(FOOTER_KEY)
+    if not raw:
+        return {}
+    footer = json.loads(raw.decode("utf-8"))
+    return footer if footer.get("version") == FORMAT_VERSION else {}
+
+
+def _write_table(path: Path, df: pd.DataFrame, footer: Dict[str, Any]) -> None:
+    """Atomic Parquet write (tmp + os.replace) with the store footer attached."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[FOOTER_KEY] = json.dumps({"version": FORMAT_VERSION, **footer}).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    tmp = path.with_name(path.name + ".tmp")
+    pq.write_table(table, str(tmp), compression=PAIR_STORE_COMPRESSION)
+    os.replace(tmp, path)
+
+
+def _file_signature(path: Path) -> List[int]:
+    st = path.stat()
+    return [int(st.st_size), int(st.st_mtime_ns)]
+
+
+# ---------------------------------------------------------------------------
+# Coverage bookkeeping (calendar-date intervals, inclusive)
+# ---------------------------------------------------------------------------
+def last_complete_day(now: Optional[datetime] = None) -> date:
+    now = now or datetime.now(IST)
+    return now.date() if now.time() >= DAY_COMPLETE_AFTER else now.date() - timedelta(days=1)
+
+
+def _parse_covered(footer: Dict[str, Any]) -> List[Tuple[date, date]]:
+    return [(date.fromisoformat(a), date.fromisoformat(b)) for a, b in footer.get("covered", [])]
+
+
+def add_covered(covered: Sequence[Tuple[date, date]], start_d: date, end_d: date) -> List[Tuple[date, date]]:
+    """Union of covered intervals with [start_d, end_d]; adjacent intervals are merged."""
+    spans = sorted(list(covered) + ([(start_d, end_d)] if start_d <= end_d else []))
+    merged: List[Tuple[date, date]] = []
+    for lo, hi in spans:
+        if merged and lo <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def remove_covered(covered: Sequence[Tuple[date, date]], start_d: date, end_d: date) -> List[Tuple[date, date]]:
+    """Covered intervals with [start_d, end_d] cut out."""
+    out: List[Tuple[date, date]] = []
+    for lo, hi in sorted(covered):
+        if hi < start_d or lo > end_d:
+            out.append((lo, hi))
+            continue
+        if lo < start_d:
+            out.append((lo, start_d - timedelta(days=1)))
+        if hi > end_d:
+            out.append((end_d + timedelta(days=1), hi))
+    return out
+
+
+def _has_weekday(start_d: date, end_d: date) -> bool:
+    return any((start_d + timedelta(days=i)).weekday() < 5 for i in range(min((end_d - start_d).days + 1, 7)))
+
+
+def missing_ranges(covered: Sequence[Tuple[date, date]], start_d: date, end_d: date) -> List[Tuple[date, date]]:
+    """Parts of [start_d, end_d] not inside any covered interval."""
+    gaps: List[Tuple[date, date]] = []
+    cursor = start_d
+    for lo, hi in sorted(covered):
+        if hi < cursor:
+            continue
+        if lo > end_d:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo - timedelta(days=1)))
+        cursor = max(cursor, hi + timedelta(days=1))
+        if cursor > end_d:
+            break
+    if cursor <= end_d:
+        gaps.append((cursor, end_d))
+    return gaps
+
+
+# ---------------------------------------------------------------------------
+# Per-instrument series
+# ---------------------------------------------------------------------------
+def normalize_candles(df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """date -> tz-naive IST minute, numeric OHLCV, one row per date, sorted."""
+    if df is None or df.empty or "date" not in df.columns:
+        out = pd.DataFrame({c: pd.Series(dtype="float64") for c in OHLCV_COLUMNS})
+        out["date"] = pd.Series(dtype="datetime64[ns]")
+        return out
+
+    out = pd.DataFrame({"date": df["date"]})
+    s = pd.to_datetime(out["date"], errors="coerce")
+    if not pd.api.types.is_datetime64_any_dtype(s):
+        # Mixed tz-aware values come back as object dtype.
+        s = pd.to_datetime(out["date"], errors="coerce", utc=True)
+    if s.dt.tz is not None:
+        s = s.dt.tz_convert(IST).dt.tz_localize(None)
+    out["date"] = s.dt.floor("min").astype("datetime64[ns]")
+
+    for col in OHLCV_COLUMNS[1:]:
+        out[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else np.nan
+        out[col] = out[col].astype("float64")
+
+    out = out.dropna(subset=["date", "close"])
+    out = out.drop_duplicates(subset=["date"], keep="last").sort_values("date")
+    return out.reset_index(drop=True)
+
+
+def _date_filters(start_d: Optional[date], end_d: Optional[date]) -> Optional[List[Tuple[str, str, Any]]]:
+    filters: List[Tuple[str, str, Any]] = []
+    if start_d is not None:
+        filters.append(("date", ">=", pd.Timestamp(start_d)))
+    if end_d is not None:
+        filters.append(("date", "<", pd.Timestamp(end_d + timedelta(days=1))))
+    return filters or None
+
+
+def read_series(
+    key: InstrumentKey,
+    interval: str = "minute",
+    start_d: Optional[date] = None,
+    end_d: Optional[date] = None,
+    store_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """Stored candles for [start_d, end_d] (no fetching); empty frame if none."""
+    path = series_path(key, interval, store_dir)
+    if not path.exists():
+        return normalize_candles(None)
+    table = pq.read_table(str(path), filters=_date_filters(start_d, end_d), memory_map=True)
+    return table.to_pandas().reset_index(drop=True)
+
+
+def ensure_series(
+    key: InstrumentKey,
+    start_d: date,
+    end_d: date,
+    interval: str = "minute",
+    fetch: Optional[Fetcher] = None,
+    force: bool = False,
+    store_dir: Optional[str] = None,
+) -> Path:
+    """
+    Top up one instrument's series so it covers [start_d, end_d].
+
+    Only the missing calendar ranges are passed to fetch(); force=True refetches the
+    whole range and replaces stored rows inside it. Without a fetcher this is a
+    no-op and whatever is stored is used.
+
+    A range is only marked covered once the fetcher actually returned candles for
+    it: a fetch that raised, returned nothing for a range with weekdays in it, or
+    reported failed sub-ranges leaves those dates missing so the next run retries.
+    If a fetch raised, the other gaps are still saved and the first error is then
+    re-raised.
+    """
+    path = series_path(key, interval, store_dir)
+    covered = _parse_covered(read_footer(path)) if path.exists() else []
+    gaps = [(start_d, end_d)] if force else missing_ranges(covered, start_d, end_d)
+    if not gaps or fetch is None:
+        return path
+
+    existing = read_series(key, interval, store_dir=store_dir)
+    complete_until = last_complete_day()
+    before = list(covered)
+    errors: List[Exception] = []
+    parts = [existing]
+    for from_d, to_d in gaps:
+        print(f"[PAIR_STORE] {key} {interval}: fetching {from_d} -> {to_d}")
+        try:
+            result = fetch(key, from_d, to_d)
+        except Exception as e:
+            print(f"[WARN] [PAIR_STORE] {key} {interval}: fetch {from_d} -> {to_d} failed ({e}); will retry next run")
+            covered = remove_covered(covered, from_d, to_d) if force else covered
+            errors.append(e)
+            continue
+        failed: Sequence[Tuple[date, date]] = []
+        if isinstance(result, tuple):
+            result, failed = result
+        fetched = normalize_candles(result)
+
+        if fetched.empty and _has_weekday(from_d, to_d):
+            # An empty answer for a range with sessions in it is a failed download
+            # (or an instrument with no data yet), never "nothing to fetch".
+            print(f"[WARN] [PAIR_STORE] {key} {interval}: no rows for {from_d} -> {to_d}; not marking covered")
+            covered = remove_covered(covered, from_d, to_d) if force else covered
+            continue
+
+        if force and not failed:
+            inside = (existing["date"] >= pd.Timestamp(from_d)) & (
+                existing["date"] < pd.Timestamp(to_d + timedelta(days=1))
+            )
+            parts[0] = existing = existing[~inside]
+        parts.append(fetched)
+        covered = add_covered(covered, from_d, min(to_d, complete_until))
+        for lo, hi in failed:
+            print(f"[WARN] [PAIR_STORE] {key} {interval}: fetch gave up on {lo} -> {hi}; will retry next run")
+            covered = remove_covered(covered, lo, hi)
+
+    if len(parts) == 1 and covered == before:
+        if errors:
+            raise errors[0]
+        return path  # nothing new; leave the file as it was
+    non_empty = [p for p in parts if not p.empty]
+    merged = pd.concat(non_empty, ignore_index=True) if non_empty else normalize_candles(None)
+    merged = merged.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
+
+    _write_table(
+        path,
+        merged[list(OHLCV_COLUMNS)],
+        {
+            "exchange": key.exchange,
+            "tradingsymbol": key.tradingsymbol,
+            "interval": interval,
+            "covered": [[lo.isoformat(), hi.isoformat()] for lo, hi in covered],
+        },
+    )
+    print(f"[PAIR_STORE] {key} {interval}: {len(merged):,} rows stored -> {path}")
+    if errors:
+        raise errors[0]
+    return path
+
+
+def load_series(
+    key: InstrumentKey,
+    start_d: date,
+    end_d: date,
+    interval: str = "minute",
+    fetch: Optional[Fetcher] = None,
+    force: bool = False,
+    store_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """ensure_series() + read_series() for [start_d, end_d]."""
+    ensure_series(key, start_d, end_d, interval, fetch=fetch, force=force, store_dir=store_dir)
+    return read_series(key, interval, start_d, end_d, store_dir=store_dir)
+
+
+def stored_span(key: InstrumentKey, interval: str = "minute", store_dir: Optional[str] = None) -> Optional[Tuple[date, date]]:
+    """(first, last) covered date of a stored series, or None if not stored."""
+    path = series_path(key, interval, store_dir)
+    covered = _parse_covered(read_footer(path)) if path.exists() else []
+    if not covered:
+        return None
+    return covered[0][0], covered[-1][1]
+
+
+# ---------------------------------------------------------------------------
+# Aligned pairs
+# ---------------------------------------------------------------------------
+def align_closes(left_df: pd.DataFrame, right_df: pd.DataFrame) -> pd.DataFrame:
+    """Inner join of two candle frames on date -> date, left_close, right_close (both > 0)."""
+    left = left_df[["date", "close"]].rename(columns={"close": "left_close"})
+    right = right_df[["date", "close"]].rename(columns={"close": "right_close"})
+    out = pd.merge(left, right, on="date", how="inner").dropna(subset=["left_close", "right_close"])
+    out = out[(out["left_close"] > 0) & (out["right_close"] > 0)]
+    out = out.drop_duplicates(subset=["date"], keep="last").sort_values("date")
+    return out.reset_index(drop=True)
+
+
+def _prune_aligned(left: InstrumentKey, right: InstrumentKey, interval: str, store_dir: Optional[str]) -> None:
+    folder = Path(store_dir or PAIR_STORE_DIR) / "aligned"
+    files = sorted(
+        folder.glob(f"{left.slug}__{right.slug}__{interval}__*.parquet"),
+        key=lambda p: p.stat().st_mtime_ns,
+        reverse=True,
+    )
+    for stale in files[max(1, PAIR_STORE_ALIGNED_KEEP):]:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+
+def aligned_pair(
+    left: InstrumentKey,
+    right: InstrumentKey,
+    start_d: Optional[date] = None,
+    end_d: Optional[date] = None,
+    interval: str = "minute",
+    fetch: Optional[Fetcher] = None,
+    force: bool = False,
+    store_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Aligned closes (date, left_close, right_close) for one pair and date range.
+
+    Both series are topped up first (when a fetcher is given). start_d/end_d default
+    to the overlap of what is already stored; FileNotFoundError if the store has
+    nothing for the pair.
+    """
+    if start_d is None or end_d is None:
+        spans = [stored_span(left, interval, store_dir), stored_span(right, interval, store_dir)]
+        if None in spans:
+            raise FileNotFoundError(f"Pair store has no {interval} series for {left} and {right}")
+        start_d = start_d or max(s[0] for s in spans)  # type: ignore[index]
+        end_d = end_d or min(s[1] for s in spans)  # type: ignore[index]
+
+    left_path = ensure_series(left, start_d, end_d, interval, fetch=fetch, force=force, store_dir=store_dir)
+    right_path = ensure_series(right, start_d, end_d, interval, fetch=fetch, force=force, store_dir=store_dir)
+    if not left_path.exists() or not right_path.exists():
+        raise FileNotFoundError(f"Pair store has no {interval} series for {left} and {right}")
+
+    sources = {"left": _file_signature(left_path), "right": _file_signature(right_path)}
+    path = aligned_path(left, right, interval, start_d, end_d, store_dir)
+    if path.exists() and read_footer(path).get("sources") == sources:
+        aligned = pq.read_table(str(path), memory_map=True).to_pandas()
+        print(f"[PAIR_STORE] {left} / {right} {interval} {start_d} -> {end_d}: {len(aligned):,} aligned rows (cached)")
+        return aligned
+
+    aligned = align_closes(
+        read_series(left, interval, start_d, end_d, store_dir),
+        read_series(right, interval, start_d, end_d, store_dir),
+    )
+    _write_table(
+        path,
+        aligned,
+        {
+            "left": str(left),
+            "right": str(right),
+            "interval": interval,
+            "start": start_d.isoformat(),
+            "end": end_d.isoformat(),
+            "sources": sources,
+        },
+    )
+    _prune_aligned(left, right, interval, store_dir)
+    print(f"[PAIR_STORE] {left} / {right} {interval} {start_d} -> {end_d}: {len(aligned):,} aligned rows -> {path}")
+    return aligned
+
+
+# ---------------------------------------------------------------------------
+# Self-check (python -m Trading_2024.back_testing.pair_store)
+# ---------------------------------------------------------------------------
+def _self_check() -> None:
+    """Failed or empty fetches must not be recorded as covered."""
+    import tempfile
+
+    key = InstrumentKey("NSE", "SELFCHECK")
+    start_d, end_d = date(2024, 1, 1), date(2024, 3, 31)
+    calls: List[Tuple[date, date]] = []
+
+    def candles(from_d: date, to_d: date) -> pd.DataFrame:
+        days = pd.bdate_range(from_d, to_d)
+        return pd.DataFrame({"date": days + pd.Timedelta(hours=9, minutes=15), "close": 1.0})
+
+    def empty(k: InstrumentKey, from_d: date, to_d: date) -> pd.DataFrame:
+        calls.append((from_d, to_d))
+        return pd.DataFrame()
+
+    def broken(k: InstrumentKey, from_d: date, to_d: date) -> pd.DataFrame:
+        calls.append((from_d, to_d))
+        raise RuntimeError("simulated outage")
+
+    def partial(k: InstrumentKey, from_d: date, to_d: date) -> FetchResult:
+        calls.append((from_d, to_d))
+        failed = (date(2024, 2, 1), date(2024, 2, 29))
+        df = candles(from_d, to_d)
+        keep = (df["date"] < pd.Timestamp(failed[0])) | (df["date"] >= pd.Timestamp(failed[1] + timedelta(days=1)))
+        return df[keep], [failed]
+
+    def full(k: InstrumentKey, from_d: date, to_d: date) -> pd.DataFrame:
+        calls.append((from_d, to_d))
+        return candles(from_d, to_d)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = series_path(key, "minute", tmp)
+
+        def attempt(fetcher: Fetcher, force: bool = False) -> Optional[pd.DataFrame]:
+            try:
+                return load_series(key, start_d, end_d, fetch=fetcher, force=force, store_dir=tmp)
+            except RuntimeError:
+                return None
+
+        for fetcher in (empty, broken):
+            calls.clear()
+            df = attempt(fetcher)
+            assert (df is None) == (fetcher is broken) and (df is None or df.empty)
+            assert not path.exists() or not _parse_covered(read_footer(path))
+            attempt(fetcher)
+            assert calls == [(start_d, end_d)] * 2, calls
+
+        calls.clear()
+        load_series(key, start_d, end_d, fetch=partial, store_dir=tmp)
+        assert missing_ranges(_parse_covered(read_footer(path)), start_d, end_d) == [
+            (date(2024, 2, 1), date(2024, 2, 29))
+        ]
+        df = load_series(key, start_d, end_d, fetch=full, store_dir=tmp)
+        assert calls == [(start_d, end_d), (date(2024, 2, 1), date(2024, 2, 29))], calls
+        assert len(df) == len(pd.bdate_range(start_d, end_d))
+        assert missing_ranges(_parse_covered(read_footer(path)), start_d, end_d) == []
+
+        calls.clear()
+        assert attempt(broken, force=True) is None
+        assert len(read_series(key, store_dir=tmp)) == len(df), "a failed refetch must keep stored rows"
+        assert missing_ranges(_parse_covered(read_footer(path)), start_d, end_d) == [(start_d, end_d)]
+
+    print("[INFO] pair_store self-check passed.")
+
+
+if __name__ == "__main__":
+    _self_check()
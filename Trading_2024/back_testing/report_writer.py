@@ -0,0 +1,209 @@
+"""
+Shared Excel/Parquet report writer for the backtest scripts.
+
+The backtesters used to build every sheet in a normal openpyxl workbook, then walk
+each cell again to autosize columns and to shade actual_trades by date. With
+100k-row all_trades sheets that took longer than the simulation itself.
+
+write_report() instead:
+    - streams each sheet through an openpyxl write-only workbook (constant memory)
+    - computes column widths from the DataFrame (vectorised, first WIDTH_SAMPLE_ROWS rows)
+    - writes a bold, frozen header row
+    - shades rows in alternating bands whenever the band column (e.g. "day") changes
+    - optionally writes every sheet as Parquet next to the workbook
+      (<workbook stem>__<sheet>.parquet) so big runs can skip Excel entirely
+
+Usage:
+    from Trading_2024.back_testing import report_writer
+
+    report_writer.write_report(
+        OUTPUT_XLSX,
+        [("all_trades_backtested", all_trades_df), ("actual_trades", actual_trades_df)],
+        band_sheets={"actual_trades": "day"},
+    )
+
+Environment:
+    REPORT_PARQUET=1        also write Parquet files
+    REPORT_EXCEL=0          skip the workbook (Parquet only)
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+REPORT_PARQUET = os.getenv("REPORT_PARQUET", "0").strip().lower() in ("1", "true", "yes")
+REPORT_EXCEL = os.getenv("REPORT_EXCEL", "1").strip().lower() not in ("0", "false", "no")
+
+WIDTH_SAMPLE_ROWS = 2500
+MIN_COL_WIDTH = 10
+MAX_COL_WIDTH = 70
+
+# Same soft fills the backtesters used for date grouping.
+BAND_COLOURS = ("E8F0FE", "FFF3E0")  # light blue, light amber
+
+EXCEL_MAX_ROWS = 1_048_575  # excluding header
+EXCEL_CHUNK_ROWS = 10_000  # rows converted per slice while streaming
+
+
+def column_widths(
+    df: pd.DataFrame,
+    sample_rows: int = WIDTH_SAMPLE_ROWS,
+    min_width: int = MIN_COL_WIDTH,
+    max_width: int = MAX_COL_WIDTH,
+) -> List[float]:
+    """Width per column = longest str() of header / first sample_rows values + 2, clamped."""
+    head = df.head(sample_rows)
+    widths: List[float] = []
+    for i, col in enumerate(df.columns):
+        values = head.iloc[:, i]
+        values = values[values.notna()]
+        longest = int(values.astype(str).str.len().max()) if len(values) else 0
+        longest = max(longest, len(str(col)))
+        widths.append(min(max_width, max(min_width, longest + 2)))
+    return widths
+
+
+def band_index(values: pd.Series) -> np.ndarray:
+    """0/1 per row, flipping every time the value changes from the previous row."""
+    if values.empty:
+        return np.zeros(0, dtype=np.int8)
+    changed = (values != values.shift()).to_numpy().copy()
+    changed[0] = False
+    return (np.cumsum(changed) % 2).astype(np.int8)
+
+
+def _excel_value(value: Any) -> Any:
+    """None for missing values, tz-naive datetimes (openpyxl rejects tz)."""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, float):
+        return None if value != value else value
+    if getattr(value, "tzinfo", None) is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def _excel_rows(df: pd.DataFrame, chunk_rows: int = EXCEL_CHUNK_ROWS):
+    """Yield cleaned row tuples slice by slice, without copying the whole frame."""
+    tz_cols = [i for i, dtype in enumerate(df.dtypes) if isinstance(dtype, pd.DatetimeTZDtype)]
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        if tz_cols:
+            chunk = chunk.copy()
+            for i in tz_cols:
+                chunk.isetitem(i, chunk.iloc[:, i].dt.tz_localize(None))
+        for row in chunk.itertuples(index=False, name=None):
+            yield tuple(_excel_value(v) for v in row)
+
+
+def _column_letter(idx: int) -> str:
+    from openpyxl.utils import get_column_letter
+    return get_column_letter(idx)
+
+
+def _write_sheet(wb: Any, name: str, df: pd.DataFrame, band_col: Optional[str]) -> None:
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+
+    ws = wb.create_sheet(title=name[:31])
+    ws.freeze_panes = "A2"
+
+    if df.shape[1] == 0:
+        return
+
+    for i, width in enumerate(column_widths(df), start=1):
+        ws.column_dimensions[_column_letter(i)].width = width
+
+    if len(df) > EXCEL_MAX_ROWS:
+        print(f"  [NOTE] {name} capped at {EXCEL_MAX_ROWS:,} rows in Excel (full: {len(df):,})")
+        df = df.head(EXCEL_MAX_ROWS)
+
+    header_font = Font(bold=True)
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font = header_font
+        header.append(cell)
+    ws.append(header)
+
+    rows = _excel_rows(df)
+    if band_col is None or band_col not in df.columns:
+        for row in rows:
+            ws.append(row)
+        return
+
+    fills = [PatternFill(fill_type="solid", fgColor=c) for c in BAND_COLOURS]
+    bands = band_index(df[band_col])
+    for band, row in zip(bands, rows):
+        fill = fills[band]
+        cells = []
+        for value in row:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.fill = fill
+            cells.append(cell)
+        ws.append(cells)
+
+
+def parquet_path(xlsx_path: Path, sheet: str) -> Path:
+    return xlsx_path.with_name(f"{xlsx_path.stem}__{sheet}.parquet")
+
+
+def _write_parquet(path: Path, df: pd.DataFrame) -> None:
+    try:
+        df.to_parquet(path, index=False)
+    except Exception:
+        # Mixed-type object columns (e.g. date + "TOTAL") are not valid Arrow columns.
+        fixed = df.copy()
+        for col in fixed.columns:
+            if fixed[col].dtype == object:
+                fixed[col] = fixed[col].map(lambda v: None if v is None or (isinstance(v, float) and np.isnan(v)) else str(v))
+        fixed.columns = [str(c) for c in fixed.columns]
+        fixed.to_parquet(path, index=False)
+
+
+def write_report(
+    output_xlsx: Any,
+    sheets: Sequence[Tuple[str, pd.DataFrame]],
+    band_sheets: Optional[Mapping[str, str]] = None,
+    parquet: Optional[bool] = None,
+    excel: Optional[bool] = None,
+) -> Dict[str, Path]:
+    """
+    Write sheets (in order) to output_xlsx and/or Parquet. Returns the files written.
+
+    band_sheets maps sheet name -> column whose changes flip the row shading.
+    parquet / excel default to REPORT_PARQUET / REPORT_EXCEL.
+    """
+    out = Path(output_xlsx)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    parquet = REPORT_PARQUET if parquet is None else parquet
+    excel = REPORT_EXCEL if excel is None else excel
+    band_sheets = dict(band_sheets or {})
+    written: Dict[str, Path] = {}
+
+    if excel:
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        for name, df in sheets:
+            _write_sheet(wb, name, df if df is not None else pd.DataFrame(), band_sheets.get(name))
+        wb.save(out)
+        written["xlsx"] = out
+
+    if parquet:
+        for name, df in sheets:
+            if df is None or df.shape[1] == 0:
+                continue
+            p = parquet_path(out, name)
+            try:
+                _write_parquet(p, df)
+                written[name] = p
+            except Exception as e:
+                print(f"[WARN] Parquet not written for {name}: {e}")
+
+    return written
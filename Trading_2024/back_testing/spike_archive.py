@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Monthly columnar archive of KiteOptions1SecSpikeCollector SQLite days.
+
+Each collector day is a ``kite_option_spikes_v3_<INDEX>_<YYYYMMDD>.sqlite3``
+file. atm_straddle_backtest_v3_1sec_sqlite.py used to open every one of them on
+every run: catalogue queries first, then a JOIN over ``bars`` decoded through
+``pd.read_sql_query``. Finished days never change, so this module moves them
+into one compressed Parquet file per month:
+
+    kite_option_spikes_v3_<YYYYMM>.parquet
+
+Layout
+------
+* one row group per archived collector database (one day of one target),
+  rows sorted by (day, instrument, second);
+* columns: day (date32), inst (uint16 code), second (int32), p/o/h/l/c (int32
+  paise, p nullable), off (int16), f (uint8); integer columns delta-encoded,
+  then zstd compressed;
+* instruments are dictionary-encoded: ``inst`` indexes the month's instrument
+  table, ordered by token, so the sort order is also (day, token, second);
+* the Parquet footer (schema metadata key ``spike_archive``) holds the
+  instrument table and, per day, everything the backtester's catalogue reads:
+  run_metadata, the day's instrument codes, bar count, first/last second,
+  reconnect/error counts and the feed_events rows.
+
+Cataloguing a month therefore reads only the footer. Loading a day reads one
+row group through a memory map; the integer columns convert to NumPy without a
+copy and no SQL decoding happens.
+
+Archival is idempotent: re-running with the same databases leaves the month
+unchanged, and a day whose source database grew (restart after archival) is
+replaced. The month file is rewritten to a temp file and swapped in atomically.
+Source databases are never deleted here.
+
+Usage:
+    python -m Trading_2024.back_testing.spike_archive --sqlite-dir ./kite_spike_data --archive-dir ./kite_spike_archive
+
+    # in the backtester
+    SPIKE_ARCHIVE_DIR=./kite_spike_archive python atm_straddle_backtest_v3_1sec_sqlite.py
+
+Environment:
+    SQLITE_DIR / SQLITE_GLOB      collector databases to archive (same as the backtester)
+    SPIKE_ARCHIVE_DIR             archive folder (default ./kite_spike_archive)
+    SPIKE_ARCHIVE_COMPRESSION     Parquet codec (default zstd)
+    SPIKE_ARCHIVE_LEVEL           codec level (default 9)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError as exc:  # pragma: no cover
+    raise RuntimeError("Python 3.9+ is required") from exc
+
+IST = ZoneInfo("Asia/Kolkata")
+
+SQLITE_DIR = os.path.abspath(os.path.expanduser(os.getenv("SQLITE_DIR", "./kite_spike_data")))
+SQLITE_GLOB = os.getenv("SQLITE_GLOB", "kite_option_spikes_v3_*.sqlite3")
+SPIKE_ARCHIVE_DIR = os.path.abspath(
+    os.path.expanduser(os.getenv("SPIKE_ARCHIVE_DIR", "./kite_spike_archive"))
+)
+SPIKE_ARCHIVE_GLOB = "kite_option_spikes_v3_??????.parquet"
+SPIKE_ARCHIVE_COMPRESSION = os.getenv("SPIKE_ARCHIVE_COMPRESSION", "zstd")
+SPIKE_ARCHIVE_LEVEL = int(os.getenv("SPIKE_ARCHIVE_LEVEL", "9"))
+
+FOOTER_KEY = b"spike_archive"
+FORMAT_VERSION = 1
+
+INSTRUMENT_FIELDS = (
+    "token",
+    "index_name",
+    "exchange",
+    "symbol",
+    "kind",
+    "option_type",
+    "strike",
+    "expiry",
+    "strike_step",
+    "lot_size",
+)
+FEED_EVENT_FIELDS = ("id", "event_time", "event_type", "details")
+
+SCHEMA = pa.schema(
+    [
+        ("day", pa.date32()),
+        ("inst", pa.uint16()),
+        ("second", pa.int32()),
+        ("p", pa.int32()),
+        ("o", pa.int32()),
+        ("h", pa.int32()),
+        ("l", pa.int32()),
+        ("c", pa.int32()),
+        ("off", pa.int16()),
+        ("f", pa.uint8()),
+    ]
+)
+BAR_COLUMNS = ("p", "o", "h", "l", "c", "off", "f")
+# Rows run per instrument in second order, so seconds and paise move in small
+# steps: delta encoding before zstd roughly halves the file again.
+DELTA_COLUMNS = ("second", "p", "o", "h", "l", "c", "off")
+DICTIONARY_COLUMNS = ("day", "inst", "f")
+
+
+# =============================================================================
+# SOURCE DAYS (collector SQLite)
+# =============================================================================
+
+
+@dataclass
+class SourceDay:
+    """One collector database held in memory, instrument codes not yet assigned."""
+
+    source_file: str
+    source_path: str
+    source_mtime: float
+    trading_day: date
+    metadata: Dict[str, str]
+    instruments: List[Tuple[Any, ...]]      # INSTRUMENT_FIELDS order
+    feed_events: List[Tuple[Any, ...]]      # FEED_EVENT_FIELDS order
+    reconnect_events: int
+    error_events: int
+    tokens: np.ndarray                      # uint32, per bar
+    seconds: np.ndarray                     # int32, per bar
+    bars: Dict[str, np.ndarray]             # BAR_COLUMNS; p as float64 with NaN
+
+
+def _connect_readonly(path: str) -> sqlite3.Connection:
+    uri = Path(path).resolve().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, timeout=30.0)
+
+
+def _table_exists(connection: sqlite3.Connection, name: str) -> bool:
+    row = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table','view') AND name=?",
+        (name,),
+    ).fetchone()
+    return row is not None
+
+
+def read_source_day(path: str) -> SourceDay:
+    connection = _connect_readonly(path)
+    try:
+        for name in ("run_metadata", "instruments", "bars"):
+            if not _table_exists(connection, name):
+                raise RuntimeError(f"Missing collector table: {name}")
+        metadata = {
+            str(key): str(value)
+            for key, value in connection.execute("SELECT key,value FROM run_metadata")
+        }
+        if not metadata.get("trading_day"):
+            raise RuntimeError("run_metadata.trading_day is missing")
+        instruments = [
+            tuple(row)
+            for row in connection.execute(
+                f"SELECT {','.join(INSTRUMENT_FIELDS)} FROM instruments ORDER BY token"
+            )
+        ]
+        feed_events: List[Tuple[Any, ...]] = []
+        if _table_exists(connection, "feed_events"):
+            feed_events = [
+                tuple(row)
+                for row in connection.execute(
+                    f"SELECT {','.join(FEED_EVENT_FIELDS)} FROM feed_events ORDER BY id"
+                )
+            ]
+        # Sorted by (token, second) straight from SQLite; p stays nullable.
+        bars = pd.read_sql_query(
+            "SELECT (k & 4294967295) AS token, (k >> 32) AS second, p,o,h,l,c,off,f "
+            "FROM bars ORDER BY token, second",
+            connection,
+        )
+    finally:
+        connection.close()
+
+    event_types = [str(row[2]) for row in feed_events]
+    return SourceDay(
+        source_file=os.path.basename(path),
+        source_path=os.path.abspath(path),
+        source_mtime=os.path.getmtime(path),
+        trading_day=datetime.fromisoformat(metadata["trading_day"].strip()).date(),
+        metadata=metadata,
+        instruments=instruments,
+        feed_events=feed_events,
+        reconnect_events=sum(kind in ("RECONNECT", "CLOSE") for kind in event_types),
+        error_events=sum(kind in ("ERROR", "NORECONNECT") for kind in event_types),
+        tokens=bars["token"].to_numpy(dtype=np.uint32),
+        seconds=bars["second"].to_numpy(dtype=np.int32),
+        bars={
+            "p": pd.to_numeric(bars["p"], errors="coerce").to_numpy(dtype=np.float64),
+            **{
+                column: bars[column].to_numpy(dtype=np.int64)
+                for column in BAR_COLUMNS[1:]
+            },
+        },
+    )
+
+
+# =============================================================================
+# MONTH FILES
+# =============================================================================
+
+
+def month_archive_path(archive_dir: str, day_value: date) -> Path:
+    return Path(archive_dir) / f"kite_option_spikes_v3_{day_value:%Y%m}.parquet"
+
+
+def read_footer(path: Path) -> Dict[str, Any]:
+    """Footer only: instrument table and per-day catalogue. No row data is read."""
+    return _read_footer_cached(str(path), path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _read_footer_cached(path: str, mtime_ns: int) -> Dict[str, Any]:
+    metadata = pq.read_schema(path).metadata or {}
+    raw = metadata.get(FOOTER_KEY)
+    if raw is None:
+        raise RuntimeError(f"{os.path.basename(path)} has no {FOOTER_KEY.decode()} footer")
+    footer = json.loads(raw)
+    if footer.get("format") != FORMAT_VERSION:
+        raise RuntimeError(
+            f"{os.path.basename(path)}: unsupported archive format {footer.get('format')!r}"
+        )
+    return footer
+
+
+def _day_entry(day: SourceDay, codes: Sequence[int]) -> Dict[str, Any]:
+    return {
+        "source_file": day.source_file,
+        "source_path": day.source_path,
+        "source_mtime": day.source_mtime,
+        "trading_day": day.trading_day.isoformat(),
+        "metadata": day.metadata,
+        "instrument_codes": list(codes),
+        "bar_count": int(len(day.tokens)),
+        "first_second": int(day.seconds.min()) if len(day.seconds) else None,
+        "last_second": int(day.seconds.max()) if len(day.seconds) else None,
+        "reconnect_events": day.reconnect_events,
+        "error_events": day.error_events,
+        "feed_events": [list(row) for row in day.feed_events],
+    }
+
+
+def _existing_days(path: Path) -> List[SourceDay]:
+    """Decode a month file back into SourceDay objects so it can be rewritten."""
+    footer = read_footer(path)
+    instruments = [tuple(row) for row in footer["instruments"]]
+    tokens_by_code = np.array([row[0] for row in instruments], dtype=np.uint32)
+    parquet = pq.ParquetFile(str(path), memory_map=True)
+    days: List[SourceDay] = []
+    for entry in footer["days"]:
+        group = entry.get("row_group")
+        if group is None:
+            table = SCHEMA.empty_table()
+        else:
+            table = parquet.read_row_group(group)
+        codes = table.column("inst").to_numpy()
+        days.append(
+            SourceDay(
+                source_file=entry["source_file"],
+                source_path=entry["source_path"],
+                source_mtime=float(entry["source_mtime"]),
+                trading_day=date.fromisoformat(entry["trading_day"]),
+                metadata=dict(entry["metadata"]),
+                instruments=[instruments[code] for code in entry["instrument_codes"]],
+                feed_events=[tuple(row) for row in entry["feed_events"]],
+                reconnect_events=int(entry["reconnect_events"]),
+                error_events=int(entry["error_events"]),
+                tokens=tokens_by_code[codes],
+                seconds=table.column("second").to_numpy(),
+                bars={
+                    "p": table.column("p").to_numpy(zero_copy_only=False).astype(np.float64),
+                    **{
+                        column: table.column(column).to_numpy().astype(np.int64)
+                        for column in BAR_COLUMNS[1:]
+                    },
+                },
+            )
+        )
+    return days
+
+
+def write_month(path: Path, days: Sequence[SourceDay]) -> int:
+    """Write days (any order) as one month file; returns bytes written."""
+    days = sorted(days, key=lambda item: (item.trading_day, item.source_file))
+
+    # Month-wide instrument dictionary, ordered by token so that sorting rows by
+    # code is the same as sorting by token. Kite can recycle a token for a new
+    # contract, hence the full tuple as the key.
+    distinct = sorted(
+        {row for day in days for row in day.instruments},
+        key=lambda row: (int(row[0]), str(row[3]), str(row[7] or "")),
+    )
+    if len(distinct) > np.iinfo(np.uint16).max:
+        raise RuntimeError(f"{path.name}: {len(distinct)} instruments exceed the uint16 code space")
+    code_of = {row: code for code, row in enumerate(distinct)}
+
+    entries: List[Dict[str, Any]] = []
+    tables: List[pa.Table] = []
+    for day in days:
+        day_codes = [code_of[row] for row in day.instruments]
+        entry = _day_entry(day, day_codes)
+        if len(day.tokens):
+            lookup = {int(row[0]): code_of[row] for row in day.instruments}
+            unique_tokens, inverse = np.unique(day.tokens, return_inverse=True)
+            missing = [int(token) for token in unique_tokens if int(token) not in lookup]
+            if missing:
+                raise RuntimeError(
+                    f"{day.source_file}: bars reference tokens missing from instruments: {missing[:5]}"
+                )
+            codes = np.array([lookup[int(token)] for token in unique_tokens], dtype=np.uint16)[inverse]
+            order = np.lexsort((day.seconds, codes))
+            previous = day.bars["p"][order]
+            tables.append(
+                pa.table(
+                    {
+                        "day": pa.array(np.full(len(order), day.trading_day), pa.date32()),
+                        "inst": pa.array(codes[order], pa.uint16()),
+                        "second": pa.array(day.seconds[order].astype(np.int32), pa.int32()),
+                        "p": pa.array(
+                            np.nan_to_num(previous, nan=0).astype(np.int32),
+                            pa.int32(),
+                            mask=np.isnan(previous),
+                        ),
+                        **{
+                            column: pa.array(
+                                day.bars[column][order].astype(SCHEMA.field(column).type.to_pandas_dtype()),
+                                SCHEMA.field(column).type,
+                            )
+                            for column in ("o", "h", "l", "c", "off", "f")
+                        },
+                    },
+                    schema=SCHEMA,
+                )
+            )
+            entry["row_group"] = len(tables) - 1
+        else:
+            entry["row_group"] = None
+        entries.append(entry)
+
+    footer = {
+        "format": FORMAT_VERSION,
+        "instrument_fields": list(INSTRUMENT_FIELDS),
+        "instruments": [list(row) for row in distinct],
+        "days": entries,
+    }
+    schema = SCHEMA.with_metadata({FOOTER_KEY: json.dumps(footer, separators=(",", ":"))})
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with pq.ParquetWriter(
+        str(temp_path),
+        schema,
+        compression=SPIKE_ARCHIVE_COMPRESSION,
+        compression_level=SPIKE_ARCHIVE_LEVEL,
+        use_dictionary=list(DICTIONARY_COLUMNS),
+        column_encoding={column: "DELTA_BINARY_PACKED" for column in DELTA_COLUMNS},
+    ) as writer:
+        for table in tables:
+            writer.write_table(table.replace_schema_metadata(schema.metadata), row_group_size=len(table))
+    os.replace(temp_path, path)
+    return path.stat().st_size
+
+
+# =============================================================================
+# ARCHIVAL
+# =============================================================================
+
+
+def discover_source_databases(sqlite_dir: str = SQLITE_DIR, pattern: str = SQLITE_GLOB) -> List[str]:
+    base = Path(sqlite_dir)
+    if not base.exists():
+        return []
+    candidates = [base] if base.is_file() else base.rglob(pattern)
+    return sorted(
+        str(path.resolve())
+        for path in candidates
+        if path.is_file() and not str(path).endswith(("-wal", "-shm", ".lock"))
+    )
+
+
+def _source_is_finished(path: str, trading_day: date, include_today: bool) -> bool:
+    """A day is archived once it is over and no collector holds it open."""
+    if trading_day < datetime.now(IST).date():
+        return True
+    if not include_today:
+        return False
+    return not (os.path.exists(path + "-wal") or os.path.exists(path + ".lock"))
+
+
+def archive_databases(
+    paths: Iterable[str],
+    archive_dir: str = SPIKE_ARCHIVE_DIR,
+    include_today: bool = False,
+) -> List[Dict[str, Any]]:
+    """Fold finished collector days into their month files. Returns a per-source log."""
+    by_month: Dict[Path, List[SourceDay]] = {}
+    log_rows: List[Dict[str, Any]] = []
+    for path in paths:
+        try:
+            day = read_source_day(path)
+        except Exception as exc:
+            log_rows.append({"source_db": path, "status": "error", "note": str(exc)})
+            print(f"[ARCHIVE WARN] {os.path.basename(path)}: {exc}")
+            continue
+        if not _source_is_finished(path, day.trading_day, include_today):
+            log_rows.append({"source_db": path, "status": "skipped", "note": "day not finished"})
+            continue
+        by_month.setdefault(month_archive_path(archive_dir, day.trading_day), []).append(day)
+
+    for month_path, new_days in sorted(by_month.items()):
+        existing = _existing_days(month_path) if month_path.exists() else []
+        kept = {day.source_file: day for day in existing}
+        changed = False
+        for day in new_days:
+            old = kept.get(day.source_file)
+            if old is not None and len(old.tokens) == len(day.tokens) and old.metadata == day.metadata:
+                status = "unchanged"
+            else:
+                status = "replaced" if old is not None else "added"
+                kept[day.source_file] = day
+                changed = True
+            log_rows.append(
+                {
+                    "source_db": day.source_path,
+                    "archive": str(month_path),
+                    "day": day.trading_day,
+                    "bars": int(len(day.tokens)),
+                    "status": status,
+                }
+            )
+        if not changed:
+            print(f"[ARCHIVE] {month_path.name}: up to date ({len(kept)} days)")
+            continue
+        source_bytes = sum(os.path.getsize(day.source_path) for day in new_days)
+        size = write_month(month_path, list(kept.values()))
+        print(
+            f"[ARCHIVE] {month_path.name}: {len(kept)} days, {size / 1e6:.2f} MB "
+            f"(new sources {source_bytes / 1e6:.2f} MB)"
+        )
+    return log_rows
+
+
+# =============================================================================
+# READING (backtester side)
+# =============================================================================
+
+
+def discover_archives(archive_dir: str = SPIKE_ARCHIVE_DIR) -> List[str]:
+    base = Path(archive_dir)
+    if not base.exists():
+        return []
+    return sorted(str(path.resolve()) for path in base.glob(SPIKE_ARCHIVE_GLOB))
+
+
+def archive_day_catalog(path: str) -> List[Dict[str, Any]]:
+    """Per-day catalogue entries from the footer, each with its instrument rows."""
+    footer = read_footer(Path(path))
+    instruments = footer["instruments"]
+    rows: List[Dict[str, Any]] = []
+    for entry in footer["days"]:
+        item = dict(entry)
+        item["archive_path"] = os.path.abspath(path)
+        item["instrument_rows"] = [tuple(instruments[code]) for code in entry["instrument_codes"]]
+        rows.append(item)
+    return rows
+
+
+def read_day_rows(path: str, row_group: Optional[int]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """One archived day as the backtester's decoded bar frame plus its feed_events.
+
+    Columns and row order match the backtester's SQLite decode query (ORDER BY
+    second_of_day, instrument_token). The row group is read through a memory
+    map; null-free integer columns reach NumPy without a copy.
+    """
+    footer = read_footer(Path(path))
+    entry = next((item for item in footer["days"] if item.get("row_group") == row_group), None)
+    if entry is None or row_group is None:
+        raise RuntimeError(f"{os.path.basename(path)} has no row group {row_group!r}")
+    feed_events = pd.DataFrame(entry["feed_events"], columns=list(FEED_EVENT_FIELDS))
+
+    table = pq.ParquetFile(path, memory_map=True).read_row_group(
+        row_group, columns=["inst", "second", *BAR_COLUMNS]
+    )
+    codes = table.column("inst").to_numpy()
+    seconds = table.column("second").to_numpy()
+    instruments = footer["instruments"]
+    lookup = {
+        field: np.array([row[position] for row in instruments], dtype=object)
+        for position, field in enumerate(INSTRUMENT_FIELDS)
+    }
+    tokens = lookup["token"].astype(np.int64)[codes]
+    order = np.lexsort((tokens, seconds))
+
+    frame = pd.DataFrame(
+        {
+            "second_of_day": seconds[order].astype(np.int64),
+            "instrument_token": tokens[order],
+            "index_name": lookup["index_name"][codes][order],
+            "exchange": lookup["exchange"][codes][order],
+            "symbol": lookup["symbol"][codes][order],
+            "kind": lookup["kind"].astype(np.int64)[codes][order],
+            "option_type": lookup["option_type"][codes][order],
+            "strike": pd.to_numeric(pd.Series(lookup["strike"][codes][order]), errors="coerce").to_numpy(),
+            "expiry": lookup["expiry"][codes][order],
+            "strike_step": lookup["strike_step"].astype(np.int64)[codes][order],
+            "lot_size": pd.to_numeric(pd.Series(lookup["lot_size"][codes][order]), errors="coerce").to_numpy(),
+            "previous_paise": table.column("p").to_numpy(zero_copy_only=False)[order],
+            "open_paise": table.column("o").to_numpy()[order],
+            "high_paise": table.column("h").to_numpy()[order],
+            "low_paise": table.column("l").to_numpy()[order],
+            "close_paise": table.column("c").to_numpy()[order],
+            "strike_offset": table.column("off").to_numpy()[order],
+            "flags": table.column("f").to_numpy()[order],
+        }
+    )
+    return frame, feed_events
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sqlite-dir", default=SQLITE_DIR, help="collector database folder or file")
+    parser.add_argument("--glob", default=SQLITE_GLOB, help="collector database file pattern")
+    parser.add_argument("--archive-dir", default=SPIKE_ARCHIVE_DIR, help="monthly archive folder")
+    parser.add_argument(
+        "--include-today",
+        action="store_true",
+        help="also archive today's databases once the collector has closed them",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    paths = discover_source_databases(args.sqlite_dir, args.glob)
+    print(f"[STEP] Collector databases found: {len(paths)} under {args.sqlite_dir}")
+    if not paths:
+        return 1
+    rows = archive_databases(paths, args.archive_dir, include_today=args.include_today)
+    summary = pd.DataFrame(rows)
+    if not summary.empty:
+        print(summary["status"].value_counts().to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,434 @@
+"""
+Deterministic synthetic option-market generator for the backtest benchmarks.
+
+Writes the three on-disk formats the backtesters consume, from one seeded
+random walk per underlying/day, so every engine sees the same market:
+
+    kite/     <UND>_<YYYYMMDD>_minute.pkl
+              OptionsExpiryHistorical1minDataDownloader layout: one file per
+              expiry, UNDERLYING rows + every strike of the period's band,
+              columns instrument/exchange/name/type/option_type/strike/expiry/
+              date/open/high/low/close/volume (read by atm_straddle_backtest_v2/v3,
+              straddle_legwise_reattempt, iron_butterfly_prem_jump_reattempt)
+    dhan/     <UND>_W_EXP1_ATMpm<W>_<YYYYMMDD>.pkl
+              DhanExpiredOptionsDataFetcher layout: rolling ATM±W strikes for the
+              D-1 and D0 sessions of each expiry (read by the dhan_* backtesters)
+    sqlite/   kite_option_spikes_v3_<UND>_<YYYYMMDD>.sqlite3
+              KiteOptions1SecSpikeCollector schema: sparse one-second bars in paise
+              for ATM±W options + the underlying (read by the 1-second backtester)
+    underlying_minute.pkl
+              minute candles per underlying, served by bench_engines' stand-in Kite
+
+Option premiums are Black-Scholes (r = 0) on the simulated spot, rounded to the
+0.05 tick. The spot walk has a small open gap, per-second noise and a couple of
+jumps a day so stop-loss / target / re-entry branches all get exercised.
+
+Usage:
+    from Trading_2024.back_testing.synthetic_market import MarketSpec, generate_all
+    manifest = generate_all(MarketSpec(seed=7, days=20), "bench_data/seed7_d20")
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time as dtime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+IST = "Asia/Kolkata"
+SESSION_START = dtime(9, 15)
+SESSION_SECONDS = 375 * 60          # 09:15:00 .. 15:29:59
+SESSION_MINUTES = 375
+
+SPOT0 = {"NIFTY": 23500.0, "SENSEX": 77500.0}
+STRIKE_STEP = {"NIFTY": 50, "SENSEX": 100}
+LOT_SIZE = {"NIFTY": 75, "SENSEX": 20}
+EXPIRY_WEEKDAY = {"NIFTY": 3, "SENSEX": 1}          # Thu / Tue
+INDEX_SYMBOL = {"NIFTY": "NIFTY 50", "SENSEX": "SENSEX"}
+INDEX_EXCHANGE = {"NIFTY": "NSE", "SENSEX": "BSE"}
+OPTION_EXCHANGE = {"NIFTY": "NFO", "SENSEX": "BFO"}
+DHAN_SEGMENT = {"NIFTY": "NSE_FNO", "SENSEX": "BSE_FNO"}
+INDEX_TOKEN = {"NIFTY": 256265, "SENSEX": 265}
+
+ANNUAL_VOL = 0.13
+DAILY_VOL = 0.008
+OPTION_TICK = 0.05
+MANIFEST = "manifest.json"
+
+
+@dataclass
+class MarketSpec:
+    seed: int = 7
+    days: int = 20
+    start: str = "2025-01-06"                  # a Monday
+    underlyings: Tuple[str, ...] = ("NIFTY", "SENSEX")
+    wings: int = 10                            # Dhan strike band / collector ATM±W
+    sqlite_days: int = 2                       # last N days also written as 1-second DBs
+    tick_prob: float = 0.6                     # chance the spot ticks in a given second
+    jumps_per_day: float = 1.5
+
+    def key(self) -> Dict[str, object]:
+        d = asdict(self)
+        d["underlyings"] = list(self.underlyings)
+        return d
+
+
+@dataclass
+class DayPath:
+    und: str
+    day: date
+    expiry: date
+    seconds: np.ndarray                        # spot per second, SESSION_SECONDS long
+    minute: pd.DataFrame = field(default=None)  # date/open/high/low/close/volume
+
+
+# =============================================================================
+# Calendar / spot paths
+# =============================================================================
+def trading_days(spec: MarketSpec) -> List[date]:
+    d = date.fromisoformat(spec.start)
+    out: List[date] = []
+    while len(out) < spec.days:
+        if d.weekday() < 5:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+
+def next_expiry(und: str, day: date) -> date:
+    return day + timedelta(days=(EXPIRY_WEEKDAY[und] - day.weekday()) % 7)
+
+
+def _minute_index(day: date) -> pd.DatetimeIndex:
+    start = pd.Timestamp(datetime.combine(day, SESSION_START), tz=IST)
+    return pd.date_range(start, periods=SESSION_MINUTES, freq="min")
+
+
+def _minute_frame(day: date, seconds: np.ndarray, rng: np.random.Generator) -> pd.DataFrame:
+    m = seconds.reshape(SESSION_MINUTES, 60)
+    return pd.DataFrame({
+        "date": _minute_index(day),
+        "open": m[:, 0].round(2),
+        "high": m.max(axis=1).round(2),
+        "low": m.min(axis=1).round(2),
+        "close": m[:, -1].round(2),
+        "volume": rng.integers(0, 1, SESSION_MINUTES),   # index candles carry no volume
+    })
+
+
+def spot_paths(spec: MarketSpec) -> Dict[str, List[DayPath]]:
+    rng = np.random.default_rng(spec.seed)
+    days = trading_days(spec)
+    sigma = DAILY_VOL / math.sqrt(SESSION_SECONDS / spec.tick_prob)
+    out: Dict[str, List[DayPath]] = {}
+    for und in spec.underlyings:
+        spot = SPOT0[und]
+        paths: List[DayPath] = []
+        for day in days:
+            spot *= math.exp(rng.normal(0.0, 0.003))                       # open gap
+            ticks = rng.random(SESSION_SECONDS) < spec.tick_prob
+            r = np.where(ticks, rng.normal(0.0, sigma, SESSION_SECONDS), 0.0)
+            for _ in range(rng.poisson(spec.jumps_per_day)):
+                at = rng.integers(600, SESSION_SECONDS - 600)
+                r[at] += rng.choice([-1.0, 1.0]) * rng.uniform(0.002, 0.005)
+            r[0] = 0.0
+            secs = spot * np.exp(np.cumsum(r))
+            spot = float(secs[-1])
+            paths.append(DayPath(und, day, next_expiry(und, day), secs,
+                                 _minute_frame(day, secs, rng)))
+        out[und] = paths
+    return out
+
+
+# =============================================================================
+# Option pricing
+# =============================================================================
+def _norm_cdf(x: np.ndarray) -> np.ndarray:
+    # Abramowitz-Stegun 7.1.26 (|err| < 1.5e-7), vectorised; no scipy dependency.
+    z = np.abs(x) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def option_price(spot: np.ndarray, strike: float, years: np.ndarray, is_call: bool) -> np.ndarray:
+    """Black-Scholes premium (r = 0) rounded to the option tick, floored at one tick."""
+    years = np.maximum(years, 1e-6)
+    vs = ANNUAL_VOL * np.sqrt(years)
+    d1 = (np.log(spot / strike) + 0.5 * vs * vs) / vs
+    d2 = d1 - vs
+    if is_call:
+        px = spot * _norm_cdf(d1) - strike * _norm_cdf(d2)
+    else:
+        px = strike * _norm_cdf(-d2) - spot * _norm_cdf(-d1)
+    return np.maximum(np.round(px / OPTION_TICK) * OPTION_TICK, OPTION_TICK)
+
+
+def _years_left(day: date, expiry: date, elapsed_frac: np.ndarray) -> np.ndarray:
+    # Calendar days to expiry + remainder of today's session, in years.
+    return ((expiry - day).days + 1.0 - elapsed_frac) / 365.0
+
+
+def _symbol(und: str, expiry: date, strike: int, opt_type: str) -> str:
+    return f"{und}{expiry:%y%m%d}{strike}{opt_type}"
+
+
+# =============================================================================
+# Writers
+# =============================================================================
+def write_kite_pickles(paths: Dict[str, List[DayPath]], out_dir: Path) -> List[Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    elapsed = np.arange(SESSION_MINUTES) / SESSION_MINUTES
+    for und, day_paths in paths.items():
+        step = STRIKE_STEP[und]
+        by_expiry: Dict[date, List[DayPath]] = {}
+        for p in day_paths:
+            by_expiry.setdefault(p.expiry, []).append(p)
+        for expiry, group in by_expiry.items():
+            lo = min(float(p.minute["low"].min()) for p in group)
+            hi = max(float(p.minute["high"].max()) for p in group)
+            strikes = range(int(lo // step * step) - step, int((hi + step - 1) // step * step) + step + 1, step)
+
+            frames = []
+            for p in group:
+                m = p.minute
+                idx = m[["date", "open", "high", "low", "close", "volume"]].copy()
+                idx.insert(0, "instrument", INDEX_SYMBOL[und])
+                idx.insert(1, "exchange", INDEX_EXCHANGE[und])
+                idx.insert(2, "name", INDEX_SYMBOL[und])
+                idx.insert(3, "type", "UNDERLYING")
+                idx.insert(4, "option_type", "")
+                idx.insert(5, "strike", None)
+                idx.insert(6, "expiry", expiry)
+                frames.append(idx)
+
+                years = _years_left(p.day, expiry, elapsed)
+                for strike in strikes:
+                    for opt_type in ("CE", "PE"):
+                        call = opt_type == "CE"
+                        o = option_price(m["open"].to_numpy(), strike, years, call)
+                        c = option_price(m["close"].to_numpy(), strike, years, call)
+                        a = option_price(m["high"].to_numpy(), strike, years, call)
+                        b = option_price(m["low"].to_numpy(), strike, years, call)
+                        frames.append(pd.DataFrame({
+                            "instrument": _symbol(und, expiry, strike, opt_type),
+                            "exchange": OPTION_EXCHANGE[und],
+                            "name": und,
+                            "type": "OPTION",
+                            "option_type": opt_type,
+                            "strike": strike,
+                            "expiry": expiry,
+                            "date": m["date"],
+                            "open": o,
+                            "high": np.maximum.reduce([o, c, a, b]),
+                            "low": np.minimum.reduce([o, c, a, b]),
+                            "close": c,
+                            "volume": 1000,
+                        }))
+            master = pd.concat(frames, ignore_index=True)
+            path = out_dir / f"{und}_{expiry:%Y%m%d}_minute.pkl"
+            master.to_pickle(path)
+            written.append(path)
+    return written
+
+
+def write_dhan_pickles(paths: Dict[str, List[DayPath]], out_dir: Path, wings: int) -> List[Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    elapsed = np.arange(SESSION_MINUTES) / SESSION_MINUTES
+    for und, day_paths in paths.items():
+        step = STRIKE_STEP[und]
+        by_expiry: Dict[date, List[DayPath]] = {}
+        for p in day_paths:
+            by_expiry.setdefault(p.expiry, []).append(p)
+        for expiry, group in by_expiry.items():
+            if group[-1].day != expiry:
+                continue                                   # expiry day outside the generated range
+            sessions = group[-2:]                          # D-1, D0
+            parts = []
+            for p, role in zip(sessions, ["D-1", "D0"][-len(sessions):]):
+                m = p.minute
+                spot = m["close"].to_numpy()
+                atm = np.round(spot / step).astype(np.int64) * step
+                years = _years_left(p.day, expiry, elapsed)
+                ts = m["date"].dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+                ts = ts.astype("datetime64[s]").astype(np.int64)
+                for off in range(-wings, wings + 1):
+                    strikes = atm + off * step
+                    selector = "ATM" if off == 0 else f"ATM{off:+d}"
+                    for leg in ("CE", "PE"):
+                        call = leg == "CE"
+                        px = {col: option_price(m[col].to_numpy(), strikes.astype(float), years, call)
+                              for col in ("open", "high", "low", "close")}
+                        hi = np.maximum.reduce([px["open"], px["high"], px["low"], px["close"]])
+                        lo = np.minimum.reduce([px["open"], px["high"], px["low"], px["close"]])
+                        df = pd.DataFrame({
+                            "timestamp": ts,
+                            "open": px["open"], "high": hi, "low": lo, "close": px["close"],
+                            "volume": 1000, "oi": 50000, "iv": ANNUAL_VOL * 100,
+                            "strike": strikes.astype(float),
+                            "spot": spot,
+                        })
+                        df["dt_ist"] = pd.to_datetime(df["timestamp"], unit="s", utc=True).dt.tz_convert(IST)
+                        df["timestamp_dt"] = df["dt_ist"]
+                        df["timestamp_str"] = df["dt_ist"].dt.strftime("%Y-%m-%d %H:%M:%S")
+                        df["date_ist"] = p.day
+                        df["symbol"] = und
+                        df["exchangeSegment"] = DHAN_SEGMENT[und]
+                        df["expiryFlag"] = "WEEK"
+                        df["expiryCode"] = 1
+                        df["strikeSelector"] = selector
+                        df["strike_offset"] = off
+                        df["leg"] = leg
+                        df["target_expiry_date"] = expiry
+                        df["day_role"] = role
+                        parts.append(df)
+            out = pd.concat(parts, ignore_index=True)
+            out["batch_expiries"] = expiry.isoformat()
+            out = out.sort_values(["target_expiry_date", "strike_offset", "leg", "timestamp"],
+                                  ascending=[False, True, True, True]).reset_index(drop=True)
+            path = out_dir / f"{und}_W_EXP1_ATMpm{wings}_{expiry:%Y%m%d}.pkl"
+            out.to_pickle(path)
+            written.append(path)
+    return written
+
+
+_COLLECTOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS instruments (
+    token INTEGER PRIMARY KEY, index_name TEXT NOT NULL, exchange TEXT NOT NULL,
+    symbol TEXT NOT NULL, kind INTEGER NOT NULL, option_type TEXT NOT NULL,
+    strike INTEGER, expiry TEXT, strike_step INTEGER NOT NULL, lot_size INTEGER
+);
+CREATE TABLE IF NOT EXISTS feed_events (
+    id INTEGER PRIMARY KEY, event_time TEXT NOT NULL, event_type TEXT NOT NULL, details TEXT
+);
+CREATE TABLE IF NOT EXISTS bars (
+    k INTEGER PRIMARY KEY, p INTEGER, o INTEGER NOT NULL, h INTEGER NOT NULL,
+    l INTEGER NOT NULL, c INTEGER NOT NULL, off INTEGER NOT NULL, f INTEGER NOT NULL DEFAULT 0
+);
+"""
+# Same tables/columns as KiteOptions1SecSpikeCollector (schema_version 3); the
+# collector's readable view is not needed by the backtester.
+COLLECTOR_SCHEMA_VERSION = 3
+FLAG_ANCHOR, FLAG_UNDERLYING = 1, 2
+OFFSET_UNDERLYING = 127
+
+
+def _bars_for(token: int, paise: np.ndarray, sec0: int, off: int, flags: int) -> List[Tuple[int, ...]]:
+    """Sparse rows: only seconds where the price changed (first row is the anchor)."""
+    changed = np.ones(len(paise), dtype=bool)
+    changed[1:] = paise[1:] != paise[:-1]
+    pos = np.flatnonzero(changed)
+    prev = np.concatenate(([paise[0]], paise[pos[1:] - 1])) if len(pos) else paise[:0]
+    rows = []
+    for j, i in enumerate(pos):
+        px = int(paise[i])
+        f = flags | (FLAG_ANCHOR if j == 0 else 0)
+        rows.append((((sec0 + int(i)) << 32) | token, int(prev[j]), px, px, px, px, off, f))
+    return rows
+
+
+def write_collector_dbs(paths: Dict[str, List[DayPath]], out_dir: Path, wings: int, last_days: int) -> List[Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    sec0 = SESSION_START.hour * 3600 + SESSION_START.minute * 60
+    elapsed = np.arange(SESSION_SECONDS) / SESSION_SECONDS
+    for und, day_paths in paths.items():
+        step = STRIKE_STEP[und]
+        for p in day_paths[-last_days:] if last_days > 0 else []:
+            path = out_dir / f"kite_option_spikes_v3_{und}_{p.day:%Y%m%d}.sqlite3"
+            if path.exists():
+                path.unlink()
+            conn = sqlite3.connect(str(path))
+            try:
+                conn.executescript(_COLLECTOR_SCHEMA)
+                meta = {
+                    "schema_version": COLLECTOR_SCHEMA_VERSION,
+                    "script_version": "synthetic",
+                    "trading_day": p.day.isoformat(),
+                    "target_index": und,
+                    "atm_wings": wings,
+                    "save_only_price_changes": True,
+                    "price_scale": 100,
+                    "time_basis": "receipt_time_IST",
+                    f"expiry:{und}": p.expiry.isoformat(),
+                }
+                conn.executemany("INSERT INTO run_metadata VALUES (?,?)", [(k, str(v)) for k, v in meta.items()])
+
+                atm0 = int(round(p.seconds[0] / step) * step)
+                years = _years_left(p.day, p.expiry, elapsed)
+                utoken = INDEX_TOKEN[und]
+                instruments = [(utoken, und, INDEX_EXCHANGE[und], INDEX_SYMBOL[und], 1, "", None, None, step, None)]
+                bars = _bars_for(utoken, np.round(p.seconds * 100).astype(np.int64), sec0, OFFSET_UNDERLYING, FLAG_UNDERLYING)
+                live_atm = np.round(p.seconds / step).astype(np.int64) * step
+                for i, off in enumerate(range(-wings, wings + 1)):
+                    strike = atm0 + off * step
+                    for j, opt_type in enumerate(("CE", "PE")):
+                        token = ((10_000 + i * 2 + j) << 8) | 2
+                        instruments.append((token, und, OPTION_EXCHANGE[und], _symbol(und, p.expiry, strike, opt_type),
+                                            2, opt_type, strike, p.expiry.isoformat(), step, LOT_SIZE[und]))
+                        px = option_price(p.seconds, float(strike), years, opt_type == "CE")
+                        paise = np.round(px * 100).astype(np.int64)
+                        rows = _bars_for(token, paise, sec0, 0, 0)
+                        offs = ((strike - live_atm) // step).astype(np.int64)
+                        bars.extend((k, pp, o, h, l, c, int(offs[(k >> 32) - sec0]), f)
+                                    for k, pp, o, h, l, c, _, f in rows)
+                conn.executemany("INSERT INTO instruments VALUES (?,?,?,?,?,?,?,?,?,?)", instruments)
+                conn.executemany("INSERT INTO bars VALUES (?,?,?,?,?,?,?,?)", bars)
+                conn.commit()
+            finally:
+                conn.close()
+            written.append(path)
+    return written
+
+
+def write_underlying_minutes(paths: Dict[str, List[DayPath]], out_path: Path) -> Path:
+    frames = []
+    for und, day_paths in paths.items():
+        for p in day_paths:
+            m = p.minute.copy()
+            m.insert(0, "underlying", und)
+            frames.append(m)
+    pd.concat(frames, ignore_index=True).to_pickle(out_path)
+    return out_path
+
+
+# =============================================================================
+# Entry point
+# =============================================================================
+def generate_all(spec: MarketSpec, out_dir: os.PathLike, force: bool = False) -> Dict[str, object]:
+    """Write every format under out_dir; reuse the files when the manifest matches spec."""
+    root = Path(out_dir)
+    manifest_path = root / MANIFEST
+    if not force and manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        if manifest.get("spec") == spec.key():
+            return manifest
+
+    root.mkdir(parents=True, exist_ok=True)
+    paths = spot_paths(spec)
+    kite = write_kite_pickles(paths, root / "kite")
+    dhan = write_dhan_pickles(paths, root / "dhan", spec.wings)
+    dbs = write_collector_dbs(paths, root / "sqlite", spec.wings, spec.sqlite_days)
+    und = write_underlying_minutes(paths, root / "underlying_minute.pkl")
+
+    manifest = {
+        "spec": spec.key(),
+        "kite_pickles": len(kite),
+        "dhan_pickles": len(dhan),
+        "sqlite_dbs": len(dbs),
+        "underlying": str(und),
+        "bytes": sum(f.stat().st_size for f in root.rglob("*") if f.is_file()),
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return manifest
@@ -524,6 +524,7 @@ class PriceFeed:
             self.ticker = KiteTicker(
                 api_key,
                 access_token,
+                root=os.getenv("KITE_TICKER_ROOT") or None,  # replay server for offline runs
                 reconnect=True,
                 reconnect_max_tries=300,
                 reconnect_max_delay=60,
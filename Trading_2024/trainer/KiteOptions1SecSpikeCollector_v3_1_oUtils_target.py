@@ -50,6 +50,17 @@ network/API outage and Kite Connect is not an exchange tick-by-tick archival
 feed. Time buckets use local receipt time in IST because QUOTE mode does not
 contain the exchange timestamp.
 
+Tick path
+---------
+``_on_ticks`` runs on the KiteTicker reactor thread and must keep up with the
+socket on expiry days (40+ options). Each instrument gets a fixed slot, and
+last price, stream epoch, ATM strike offset and the current second's OHLC live
+in preallocated arrays (``TickBook``). A tick costs one token lookup and a few
+array writes; finished seconds leave as ready-made upsert rows, so the writer
+thread only runs SQL. Callback CPU time per frame is logged every
+``HEALTH_LOG_INTERVAL_SEC`` with a warning above ``CALLBACK_BUSY_WARN_PCT`` of
+one core.
+
 Restart safety
 --------------
 SQLite WAL journalling and bounded batch transactions protect committed rows.
@@ -91,6 +102,8 @@ DB_SYNCHRONOUS=FULL
 DB_FLUSH_INTERVAL_SEC=0.50
 DB_BATCH_TICKS=5000
 QUEUE_MAX_FRAMES=20000
+HEALTH_LOG_INTERVAL_SEC=60
+CALLBACK_BUSY_WARN_PCT=50
 SESSION_START=09:15:00
 SESSION_END=15:30:00
 PRECONNECT_SECONDS=5
@@ -128,6 +141,7 @@ import sqlite3
 import sys
 import threading
 import time
+from array import array
 from dataclasses import dataclass
 from datetime import date, datetime, time as dtime, timedelta
 from importlib.metadata import PackageNotFoundError, version as package_version
@@ -151,9 +165,10 @@ except ImportError as exc:  # pragma: no cover
 # Version, constants and configuration
 # =============================================================================
 
-SCRIPT_VERSION = "3.1.0-oUtils-single-target"
+SCRIPT_VERSION = "3.2.0-oUtils-single-target"
 SCHEMA_VERSION = 3
 IST = ZoneInfo("Asia/Kolkata")
+IST_UTC_OFFSET_SEC = 19_800  # IST has no DST; second_of_day from time.time()
 T = TypeVar("T")
 
 PRICE_SCALE = 100  # Store exact paise: rupee price = stored integer / 100.0.
@@ -257,6 +272,7 @@ DB_BUSY_TIMEOUT_MS = env_int("DB_BUSY_TIMEOUT_MS", 30_000, minimum=1000, maximum
 DB_FLUSH_INTERVAL_SEC = env_float(
     "DB_FLUSH_INTERVAL_SEC", 0.50, minimum=0.05, maximum=10.0
 )
+# Bar rows per writer transaction (name kept for existing environment files).
 DB_BATCH_TICKS = env_int("DB_BATCH_TICKS", 5000, minimum=1, maximum=100_000)
 DB_WRITE_ATTEMPTS = env_int("DB_WRITE_ATTEMPTS", 3, minimum=1, maximum=10)
 QUEUE_MAX_FRAMES = env_int("QUEUE_MAX_FRAMES", 20_000, minimum=100, maximum=200_000)
@@ -273,6 +289,10 @@ NO_TICK_WARNING_SEC = env_int("NO_TICK_WARNING_SEC", 30, minimum=5, maximum=600)
 NO_CONNECTION_WARNING_SEC = env_int(
     "NO_CONNECTION_WARNING_SEC", 30, minimum=5, maximum=600
 )
+HEALTH_LOG_INTERVAL_SEC = env_int("HEALTH_LOG_INTERVAL_SEC", 60, minimum=5, maximum=3600)
+CALLBACK_BUSY_WARN_PCT = env_float(
+    "CALLBACK_BUSY_WARN_PCT", 50.0, minimum=1.0, maximum=100.0
+)
 
 OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "./kite_spike_data")).expanduser().resolve()
 CACHE_DIR = OUTPUT_DIR / "instrument_cache"
@@ -526,13 +546,6 @@ def safe_int(value: Any) -> Optional[int]:
             return None
 
 
-def price_to_paise(price: Any) -> Optional[int]:
-    value = safe_float(price)
-    if value is None or value <= 0:
-        return None
-    return int(math.floor(value * PRICE_SCALE + 0.5))
-
-
 def normalize_expiry(value: Any) -> date:
     if isinstance(value, datetime):
         return value.date()
@@ -558,11 +571,6 @@ def round_to_atm(price: float, step: int) -> int:
     return int(math.floor(price / step + 0.5) * step)
 
 
-def seconds_since_midnight(value: datetime) -> int:
-    local = value.astimezone(IST)
-    return local.hour * 3600 + local.minute * 60 + local.second
-
-
 def packed_key(second_of_day: int, instrument_token: int) -> int:
     if not 0 <= second_of_day <= 86_399:
         raise ValueError(f"Invalid second_of_day: {second_of_day}")
@@ -865,71 +873,189 @@ def build_index_runtime(
 
 
 # =============================================================================
-# Compact price messages and one-second accumulation
+# Compact price state and one-second accumulation (WebSocket thread)
 # =============================================================================
 
+# Strike-offset sentinels in TickBook.offset; real offsets are within +/-100.
+OFFSET_NO_ATM = 32767  # ATM unknown or strike misaligned: skip silently
+OFFSET_BUFFER = 32766  # subscribed buffer strike outside the saved band
 
-@dataclass(frozen=True)
-class CompactTick:
-    second_of_day: int
-    instrument_token: int
-    price_paise: int
-    strike_offset: int
-    stream_epoch: int
-    instrument_kind: str
 
+class TickBook:
+    """Struct-of-arrays tick state, indexed by a fixed instrument slot.
 
-@dataclass
-class CompactBar:
-    second_of_day: int
-    instrument_token: int
-    previous_paise: Optional[int]
-    open_paise: int
-    high_paise: int
-    low_paise: int
-    close_paise: int
-    strike_offset: int
-    flags: int
-
-    @classmethod
-    def from_tick(
-        cls,
-        tick: CompactTick,
-        previous_paise: Optional[int],
-        flags: int,
-    ) -> "CompactBar":
-        price = tick.price_paise
-        return cls(
-            second_of_day=tick.second_of_day,
-            instrument_token=tick.instrument_token,
-            previous_paise=previous_paise,
-            open_paise=price,
-            high_paise=price,
-            low_paise=price,
-            close_paise=price,
-            strike_offset=tick.strike_offset,
-            flags=flags,
-        )
+    Every instrument of the runtimes gets one slot at start-up (underlyings
+    first). Per-slot state lives in preallocated ``array``/``bytearray``
+    columns instead of per-tick objects and dictionaries:
 
-    def update(self, tick: CompactTick, flags: int) -> None:
-        price = tick.price_paise
-        self.high_paise = max(self.high_paise, price)
-        self.low_paise = min(self.low_paise, price)
-        self.close_paise = price
-        self.strike_offset = tick.strike_offset
-        self.flags |= flags
-
-    def as_row(self) -> Tuple[Any, ...]:
-        return (
-            packed_key(self.second_of_day, self.instrument_token),
-            self.previous_paise,
-            self.open_paise,
-            self.high_paise,
-            self.low_paise,
-            self.close_paise,
-            self.strike_offset,
-            self.flags,
-        )
+    * last price and the stream epoch it was seen in (anchor detection);
+    * strike offset from the live ATM, recomputed only when the ATM moves;
+    * the current second's open/high/low/close, previous price and flags.
+
+    ``add`` is the only per-tick work. When the receipt second rolls over,
+    ``drain`` turns the slots touched in the finished second into
+    ``bars`` upsert rows, so the writer thread only executes SQL.
+
+    Duplicate/replayed packets need no separate event table: a repeated price
+    does not alter OHLC, and no volume/tick counter is stored.
+    """
+
+    def __init__(self, runtimes: Mapping[str, IndexRuntime]) -> None:
+        metas: List[InstrumentMeta] = [
+            runtime.underlying for runtime in runtimes.values()
+        ]
+        self.index_keys: List[str] = list(runtimes)
+        for runtime in runtimes.values():
+            metas.extend(runtime.option_by_strike_type.values())
+
+        self.slot_of: Dict[int, int] = {}
+        for meta in metas:
+            self.slot_of.setdefault(meta.instrument_token, len(self.slot_of))
+        size = len(self.slot_of)
+        self.size = size
+        self.underlying_slots = len(runtimes)
+
+        index_pos = {key: pos for pos, key in enumerate(self.index_keys)}
+        self.token = array("q", [0]) * size
+        self.index_pos = array("h", [0]) * size
+        self.strike = array("q", [0]) * size
+        self.step = array("q", [1]) * size
+        self.base_flags = bytearray(size)
+        self.symbol: List[str] = [""] * size
+        for meta in metas:
+            slot = self.slot_of[meta.instrument_token]
+            self.token[slot] = meta.instrument_token
+            self.index_pos[slot] = index_pos[meta.index_key]
+            self.strike[slot] = meta.strike or 0
+            self.step[slot] = meta.strike_step
+            self.symbol[slot] = meta.tradingsymbol
+            if meta.instrument_kind == "UNDERLYING":
+                self.base_flags[slot] = FLAG_UNDERLYING
+        self.slots_by_index: List[List[int]] = [
+            [
+                slot
+                for slot in range(self.underlying_slots, size)
+                if self.index_pos[slot] == pos
+            ]
+            for pos in range(len(self.index_keys))
+        ]
+
+        self.offset = array("h", [OFFSET_NO_ATM]) * size
+        for slot in range(self.underlying_slots):
+            self.offset[slot] = OFFSET_UNDERLYING
+
+        self.last_price = array("q", [-1]) * size   # -1: never seen
+        self.seen_epoch = array("q", [-1]) * size   # epoch of last_price
+        self.epoch = array("q", [0]) * size         # current stream epoch
+
+        self.bar_second = -1
+        self.bar_open = bytearray(size)
+        self.bar_prev = array("q", [-1]) * size     # -1: NULL (anchor)
+        self.bar_o = array("q", [0]) * size
+        self.bar_h = array("q", [0]) * size
+        self.bar_l = array("q", [0]) * size
+        self.bar_c = array("q", [0]) * size
+        self.bar_off = array("h", [0]) * size
+        self.bar_flags = bytearray(size)
+        self.dirty: List[int] = []
+
+        self.price_change_ticks = 0
+        self.anchor_ticks = 0
+        self.omitted_unchanged_ticks = 0
+
+    def set_epoch(self, tokens: Iterable[int], epoch: int) -> None:
+        slot_of = self.slot_of
+        for token in tokens:
+            slot = slot_of.get(token)
+            if slot is not None:
+                self.epoch[slot] = epoch
+
+    def set_atm(self, index_key: str, atm: int) -> None:
+        """Recompute strike offsets for one index; called only on ATM change."""
+
+        misaligned = 0
+        strike, step, offset = self.strike, self.step, self.offset
+        for slot in self.slots_by_index[self.index_keys.index(index_key)]:
+            difference = strike[slot] - atm
+            if difference % step[slot] != 0:
+                offset[slot] = OFFSET_NO_ATM
+                misaligned += 1
+                continue
+            value = difference // step[slot]
+            offset[slot] = value if abs(value) <= ATM_WINGS else OFFSET_BUFFER
+        if misaligned:
+            logging.error(
+                "%d %s strikes misaligned versus ATM %d; their ticks are skipped",
+                misaligned,
+                index_key,
+                atm,
+            )
+
+    def add(self, slot: int, price_paise: int, offset: int) -> None:
+        previous = self.last_price[slot]
+        old_epoch = self.seen_epoch[slot]
+        epoch = self.epoch[slot]
+        is_anchor = old_epoch != epoch  # also true when never seen (-1)
+        price_changed = previous >= 0 and price_paise != previous
+
+        flags = self.base_flags[slot]
+        if is_anchor:
+            flags |= FLAG_ANCHOR
+            self.anchor_ticks += 1
+            if old_epoch >= 0:
+                flags |= FLAG_RECONNECT_ANCHOR
+
+        # Always update stream state, even when the row is omitted.
+        self.last_price[slot] = price_paise
+        self.seen_epoch[slot] = epoch
+
+        if not (is_anchor or price_changed or not SAVE_ONLY_PRICE_CHANGES):
+            self.omitted_unchanged_ticks += 1
+            return
+        if price_changed:
+            self.price_change_ticks += 1
+
+        if self.bar_open[slot]:
+            if price_paise > self.bar_h[slot]:
+                self.bar_h[slot] = price_paise
+            if price_paise < self.bar_l[slot]:
+                self.bar_l[slot] = price_paise
+            self.bar_c[slot] = price_paise
+            self.bar_off[slot] = offset
+            self.bar_flags[slot] |= flags
+            return
+        self.bar_open[slot] = 1
+        self.bar_prev[slot] = -1 if is_anchor else previous
+        self.bar_o[slot] = self.bar_h[slot] = self.bar_l[slot] = price_paise
+        self.bar_c[slot] = price_paise
+        self.bar_off[slot] = offset
+        self.bar_flags[slot] = flags
+        self.dirty.append(slot)
+
+    def drain(self) -> List[Tuple[Any, ...]]:
+        """Upsert rows for every bar of ``bar_second``; resets those slots."""
+
+        if not self.dirty:
+            return []
+        second = self.bar_second
+        rows: List[Tuple[Any, ...]] = []
+        for slot in self.dirty:
+            previous = self.bar_prev[slot]
+            rows.append(
+                (
+                    packed_key(second, self.token[slot]),
+                    None if previous < 0 else previous,
+                    self.bar_o[slot],
+                    self.bar_h[slot],
+                    self.bar_l[slot],
+                    self.bar_c[slot],
+                    self.bar_off[slot],
+                    self.bar_flags[slot],
+                )
+            )
+            self.bar_open[slot] = 0
+        self.dirty.clear()
+        return rows
 
 
 COMPACT_BAR_UPSERT_SQL = """
@@ -966,19 +1092,14 @@ class CompactSQLiteStore:
     def __init__(self, db_path: Path, trading_day: date) -> None:
         self.db_path = db_path
         self.trading_day = trading_day
-        self.frame_queue: "queue.Queue[Optional[List[CompactTick]]]" = queue.Queue(
+        self.frame_queue: "queue.Queue[Optional[List[Tuple[Any, ...]]]]" = queue.Queue(
             maxsize=QUEUE_MAX_FRAMES
         )
         self.writer_stop_event = threading.Event()
         self.fatal_event = threading.Event()
         self.writer_thread: Optional[threading.Thread] = None
 
-        self.last_price: Dict[int, int] = {}
-        self.last_epoch: Dict[int, int] = {}
-        self.received_ticks = 0
-        self.price_change_ticks = 0
-        self.anchor_ticks = 0
-        self.omitted_unchanged_ticks = 0
+        self.received_rows = 0
         self.rows_upserted = 0
         self.queue_overflows = 0
         self.max_queue_depth = 0
@@ -1211,22 +1332,24 @@ class CompactSQLiteStore:
         )
         self.writer_thread.start()
 
-    def enqueue(self, ticks: List[CompactTick]) -> bool:
-        if not ticks:
+    def enqueue(self, rows: List[Tuple[Any, ...]]) -> bool:
+        """Queue finished one-second bar rows built by TickBook.drain()."""
+
+        if not rows:
             return True
         if self.fatal_event.is_set():
             return False
         try:
-            self.frame_queue.put(ticks, timeout=QUEUE_PUT_TIMEOUT_SEC)
-            self.received_ticks += len(ticks)
+            self.frame_queue.put(rows, timeout=QUEUE_PUT_TIMEOUT_SEC)
+            self.received_rows += len(rows)
             self.max_queue_depth = max(self.max_queue_depth, self.frame_queue.qsize())
             return True
         except queue.Full:
             self.queue_overflows += 1
             self.fatal_event.set()
             logging.critical(
-                "Writer queue overflow: dropping %d ticks and stopping to avoid silent gaps",
-                len(ticks),
+                "Writer queue overflow: dropping %d bars and stopping to avoid silent gaps",
+                len(rows),
             )
             return False
 
@@ -1256,7 +1379,7 @@ class CompactSQLiteStore:
 
     def _writer_loop(self) -> None:
         conn = self._connect()
-        pending: List[CompactTick] = []
+        pending: List[Tuple[Any, ...]] = []
         last_flush = time.monotonic()
         try:
             while True:
@@ -1294,12 +1417,11 @@ class CompactSQLiteStore:
     def _flush_with_retries(
         self,
         conn: sqlite3.Connection,
-        ticks: Sequence[CompactTick],
+        rows: Sequence[Tuple[Any, ...]],
     ) -> None:
         last_error: Optional[BaseException] = None
         for attempt in range(1, DB_WRITE_ATTEMPTS + 1):
             try:
-                rows = self._build_rows(ticks)
                 if rows:
                     conn.execute("BEGIN IMMEDIATE")
                     conn.executemany(COMPACT_BAR_UPSERT_SQL, rows)
@@ -1327,56 +1449,6 @@ class CompactSQLiteStore:
             f"SQLite batch failed after {DB_WRITE_ATTEMPTS} attempts"
         ) from last_error
 
-    def _build_rows(self, ticks: Sequence[CompactTick]) -> List[Tuple[Any, ...]]:
-        """Convert ordered ticks into price-change bars.
-
-        Duplicate/replayed packets need no separate event table: a repeated price
-        does not alter OHLC, and no volume/tick counter is stored. This removes the
-        largest table in the old schema without compromising spike high/low.
-        """
-
-        bars: Dict[Tuple[int, int], CompactBar] = {}
-        for tick in ticks:
-            token = tick.instrument_token
-            previous = self.last_price.get(token)
-            old_epoch = self.last_epoch.get(token)
-            epoch_changed = old_epoch is None or old_epoch != tick.stream_epoch
-            is_anchor = previous is None or epoch_changed
-            price_changed = previous is not None and tick.price_paise != previous
-
-            flags = 0
-            if is_anchor:
-                flags |= FLAG_ANCHOR
-                self.anchor_ticks += 1
-                if old_epoch is not None and epoch_changed:
-                    flags |= FLAG_RECONNECT_ANCHOR
-            if tick.instrument_kind == "UNDERLYING":
-                flags |= FLAG_UNDERLYING
-
-            # Always update stream state, even when the row is omitted.
-            self.last_price[token] = tick.price_paise
-            self.last_epoch[token] = tick.stream_epoch
-
-            should_store = is_anchor or price_changed or not SAVE_ONLY_PRICE_CHANGES
-            if not should_store:
-                self.omitted_unchanged_ticks += 1
-                continue
-            if price_changed:
-                self.price_change_ticks += 1
-
-            key = (tick.second_of_day, token)
-            bar = bars.get(key)
-            if bar is None:
-                bars[key] = CompactBar.from_tick(
-                    tick=tick,
-                    previous_paise=None if is_anchor else previous,
-                    flags=flags,
-                )
-            else:
-                bar.update(tick, flags)
-
-        return [bar.as_row() for bar in bars.values()]
-
     def _warn_on_size(self) -> None:
         now_mono = time.monotonic()
         if now_mono - self._last_size_warning < 300:
@@ -1439,6 +1511,7 @@ class KiteOptionSpikeCollector:
         self.kws = KiteTicker(
             str(api_key),
             str(access_token),
+            root=os.getenv("KITE_TICKER_ROOT") or None,  # kite_ticker_replay for offline runs
             reconnect=True,
             reconnect_max_tries=WS_MAX_RETRIES,
             reconnect_max_delay=WS_MAX_DELAY_SEC,
@@ -1464,7 +1537,6 @@ class KiteOptionSpikeCollector:
         self.subscribed_option_tokens: Set[int] = set()
 
         self.stream_epoch_counter = 0
-        self.token_stream_epoch: Dict[int, int] = {}
         self.connection_sequence = 0
 
         self.last_tick_monotonic: Optional[float] = None
@@ -1476,13 +1548,16 @@ class KiteOptionSpikeCollector:
         self.buffer_ticks_ignored = 0
         self.unknown_ticks_ignored = 0
 
-        self.token_meta: Dict[int, InstrumentMeta] = {}
-        self.underlying_token_to_index: Dict[int, str] = {}
-        for key, runtime in self.runtimes.items():
-            self.token_meta[runtime.underlying.instrument_token] = runtime.underlying
-            self.underlying_token_to_index[runtime.underlying.instrument_token] = key
-            for meta in runtime.option_by_strike_type.values():
-                self.token_meta[meta.instrument_token] = meta
+        # Tick path: fixed slots per instrument, wall-clock bounds as epochs.
+        self.book = TickBook(self.runtimes)
+        self.book_lock = threading.Lock()
+        self.market_open_epoch = market_open.timestamp()
+        self.market_close_epoch = market_close.timestamp()
+        self.callback_frames = 0
+        self.callback_cpu_ns = 0
+        self.callback_cpu_max_ns = 0
+        self.last_health_monotonic = time.monotonic()
+        self.last_health_counters = (0, 0, 0)
 
         self.subscription_thread = threading.Thread(
             target=self._subscription_loop,
@@ -1524,6 +1599,7 @@ class KiteOptionSpikeCollector:
                     self.latest_underlying_price[key] = price
                     self.actual_atm_by_index[key] = atm
                     self.subscription_center_by_index[key] = atm
+                    self.book.set_atm(key, atm)
                     logging.info("Seeded %s %.2f -> ATM %d", key, price, atm)
                     continue
 
@@ -1536,6 +1612,7 @@ class KiteOptionSpikeCollector:
                     else:
                         self.actual_atm_by_index[key] = atm
                         self.subscription_center_by_index[key] = atm
+                        self.book.set_atm(key, atm)
                         logging.warning("Using persisted %s ATM %d until live tick", key, atm)
         self.refresh_event.set()
 
@@ -1577,6 +1654,9 @@ class KiteOptionSpikeCollector:
 
         if self.subscription_thread.is_alive():
             self.subscription_thread.join(timeout=15.0)
+        with self.book_lock:
+            last_second_rows = self.book.drain()
+        self.store.enqueue(last_second_rows)
         self.store.stop_writer()
 
     def run_until_close(self) -> None:
@@ -1590,6 +1670,7 @@ class KiteOptionSpikeCollector:
                     logging.info("Session close reached: %s", self.market_close)
                     break
                 self._warn_if_feed_unhealthy(current)
+                self._log_tick_path_health()
                 time.sleep(1.0)
         finally:
             self.stop()
@@ -1623,6 +1704,40 @@ class KiteOptionSpikeCollector:
             self.last_warning_monotonic = now_mono
             logging.error("WebSocket open but no tick for %.1fs", stale)
 
+    def _log_tick_path_health(self) -> None:
+        """Periodic callback CPU report: the WebSocket thread must stay well below 100%."""
+
+        now_mono = time.monotonic()
+        elapsed = now_mono - self.last_health_monotonic
+        if elapsed < HEALTH_LOG_INTERVAL_SEC:
+            return
+        counters = (self.callback_frames, self.ticks_received, self.callback_cpu_ns)
+        frames, ticks, cpu_ns = (
+            now - before for now, before in zip(counters, self.last_health_counters)
+        )
+        max_ns, self.callback_cpu_max_ns = self.callback_cpu_max_ns, 0
+        self.last_health_monotonic = now_mono
+        self.last_health_counters = counters
+
+        busy_pct = 100.0 * cpu_ns / (elapsed * 1e9)
+        logging.info(
+            "Tick path: %d frames/%d ticks in %.0fs; callback CPU %.1f us/frame "
+            "(max %.1f us, %.2f us/tick), busy %.2f%%; writer queue %d",
+            frames,
+            ticks,
+            elapsed,
+            cpu_ns / 1000.0 / frames if frames else 0.0,
+            max_ns / 1000.0,
+            cpu_ns / 1000.0 / ticks if ticks else 0.0,
+            busy_pct,
+            self.store.frame_queue.qsize(),
+        )
+        if busy_pct >= CALLBACK_BUSY_WARN_PCT:
+            logging.warning(
+                "Tick callback used %.1f%% of one core; it may fall behind the socket",
+                busy_pct,
+            )
+
     def _assign_new_stream_epoch(self, tokens: Iterable[int], reason: str) -> int:
         token_list = list(tokens)
         if not token_list:
@@ -1630,8 +1745,7 @@ class KiteOptionSpikeCollector:
         with self.state_lock:
             self.stream_epoch_counter += 1
             epoch = self.stream_epoch_counter
-            for token in token_list:
-                self.token_stream_epoch[token] = epoch
+            self.book.set_epoch(token_list, epoch)
         logging.debug("Assigned stream epoch %d to %d tokens: %s", epoch, len(token_list), reason)
         return epoch
 
@@ -1690,8 +1804,19 @@ class KiteOptionSpikeCollector:
         self.refresh_event.set()
 
     def _on_ticks(self, ws: KiteTicker, ticks: List[Dict[str, Any]]) -> None:
-        received_at = now_ist()
-        if received_at < self.market_open or received_at > self.market_close + timedelta(seconds=5):
+        started_ns = time.thread_time_ns()
+        try:
+            self._ingest_frame(ticks)
+        finally:
+            spent_ns = time.thread_time_ns() - started_ns
+            self.callback_frames += 1
+            self.callback_cpu_ns += spent_ns
+            if spent_ns > self.callback_cpu_max_ns:
+                self.callback_cpu_max_ns = spent_ns
+
+    def _ingest_frame(self, ticks: List[Dict[str, Any]]) -> None:
+        received_at = time.time()
+        if received_at < self.market_open_epoch or received_at > self.market_close_epoch + 5:
             return
         if not ticks:
             return
@@ -1700,118 +1825,118 @@ class KiteOptionSpikeCollector:
         self.frames_received += 1
         self.ticks_received += len(ticks)
 
-        refresh_needed = False
-        metadata_changed = False
-        with self.state_lock:
-            # Update all underlying ATMs before classifying options in this frame.
-            for tick in ticks:
-                token = safe_int(tick.get("instrument_token"))
-                if token is None:
-                    continue
-                index_key = self.underlying_token_to_index.get(token)
-                if index_key is None:
-                    continue
-                price = safe_float(tick.get("last_price"))
-                if price is None or price <= 0:
-                    continue
-
-                runtime = self.runtimes[index_key]
-                new_atm = round_to_atm(price, runtime.config.strike_step)
-                old_atm = self.actual_atm_by_index.get(index_key)
-                old_center = self.subscription_center_by_index.get(index_key)
-                first_live = not self.has_live_underlying_tick[index_key]
-
-                self.latest_underlying_price[index_key] = price
-                self.actual_atm_by_index[index_key] = new_atm
-                self.has_live_underlying_tick[index_key] = True
-
-                if old_atm != new_atm:
-                    metadata_changed = True
-                    logging.info(
-                        "%s ATM changed %s -> %d at %.2f",
-                        index_key,
-                        old_atm,
-                        new_atm,
-                        price,
-                    )
-
-                should_recenter = first_live or old_center is None
-                if not should_recenter and new_atm != old_center:
-                    displacement = abs(new_atm - old_center) // runtime.config.strike_step
-                    # A buffer of N strikes safely covers displacement through N;
-                    # recenter only on the next strike. With buffer=0, recenter on
-                    # every ATM change.
-                    should_recenter = displacement >= SUBSCRIPTION_BUFFER_WINGS + 1
-
-                if first_live:
-                    refresh_needed = True
-                if should_recenter and old_center != new_atm:
-                    self.subscription_center_by_index[index_key] = new_atm
-                    refresh_needed = True
-                    logging.info(
-                        "%s subscription centre %s -> %d",
-                        index_key,
-                        old_center,
-                        new_atm,
-                    )
-
-            atm_snapshot = dict(self.actual_atm_by_index)
-            epoch_snapshot = dict(self.token_stream_epoch)
-
-        sec = seconds_since_midnight(received_at)
-        compact_ticks: List[CompactTick] = []
+        book = self.book
+        slot_of = book.slot_of
+        underlying_slots = book.underlying_slots
+        price_scale = PRICE_SCALE
+        option_slots: List[int] = []
+        option_prices: List[int] = []
+        underlying_ticks: List[Tuple[int, float, int]] = []
         for tick in ticks:
-            token = safe_int(tick.get("instrument_token"))
-            if token is None:
-                continue
-            meta = self.token_meta.get(token)
-            if meta is None:
+            slot = slot_of.get(tick.get("instrument_token"))
+            if slot is None:
                 self.unknown_ticks_ignored += 1
                 continue
-            price_paise = price_to_paise(tick.get("last_price"))
-            if price_paise is None:
+            price = tick.get("last_price")
+            try:
+                if not price > 0:
+                    continue
+                price_paise = int(price * price_scale + 0.5)
+            except (TypeError, ValueError, OverflowError):
                 continue
+            if slot < underlying_slots:
+                underlying_ticks.append((slot, float(price), price_paise))
+            else:
+                option_slots.append(slot)
+                option_prices.append(price_paise)
 
-            if meta.instrument_kind == "OPTION":
-                atm = atm_snapshot.get(meta.index_key)
-                if atm is None or meta.strike is None:
-                    continue
-                difference = meta.strike - atm
-                if difference % meta.strike_step != 0:
-                    logging.error(
-                        "Misaligned strike %s versus ATM %s for %s",
-                        meta.strike,
-                        atm,
-                        meta.tradingsymbol,
-                    )
+        refresh_needed = False
+        metadata_changed = False
+        with self.book_lock:
+            second = int(received_at + IST_UTC_OFFSET_SEC) % 86_400
+            if second != book.bar_second:
+                if not self._enqueue_rows(book.drain()):
+                    return
+                book.bar_second = second
+
+            # Update all underlying ATMs before classifying options in this frame.
+            if underlying_ticks:
+                with self.state_lock:
+                    for slot, price, price_paise in underlying_ticks:
+                        changed, recenter = self._update_underlying(
+                            book.index_keys[book.index_pos[slot]], price
+                        )
+                        metadata_changed |= changed
+                        refresh_needed |= recenter
+                        book.add(slot, price_paise, OFFSET_UNDERLYING)
+
+            offsets = book.offset
+            eligible = len(underlying_ticks)
+            for slot, price_paise in zip(option_slots, option_prices):
+                offset = offsets[slot]
+                if offset == OFFSET_NO_ATM:
                     continue
-                offset = difference // meta.strike_step
-                if abs(offset) > ATM_WINGS:
+                if offset == OFFSET_BUFFER:
                     self.buffer_ticks_ignored += 1
                     continue
-            else:
-                offset = OFFSET_UNDERLYING
-
-            compact_ticks.append(
-                CompactTick(
-                    second_of_day=sec,
-                    instrument_token=token,
-                    price_paise=price_paise,
-                    strike_offset=offset,
-                    stream_epoch=epoch_snapshot.get(token, 0),
-                    instrument_kind=meta.instrument_kind,
-                )
-            )
-
-        self.ticks_eligible += len(compact_ticks)
-        if not self.store.enqueue(compact_ticks):
-            self.stop_event.set()
-            self.refresh_event.set()
-            return
+                book.add(slot, price_paise, offset)
+                eligible += 1
+            self.ticks_eligible += eligible
 
         if refresh_needed or metadata_changed:
             self.refresh_event.set()
 
+    def _update_underlying(self, index_key: str, price: float) -> Tuple[bool, bool]:
+        """Apply one underlying LTP; returns (atm_changed, refresh_needed)."""
+
+        runtime = self.runtimes[index_key]
+        new_atm = round_to_atm(price, runtime.config.strike_step)
+        old_atm = self.actual_atm_by_index.get(index_key)
+        old_center = self.subscription_center_by_index.get(index_key)
+        first_live = not self.has_live_underlying_tick[index_key]
+
+        self.latest_underlying_price[index_key] = price
+        self.actual_atm_by_index[index_key] = new_atm
+        self.has_live_underlying_tick[index_key] = True
+
+        atm_changed = old_atm != new_atm
+        if atm_changed:
+            self.book.set_atm(index_key, new_atm)
+            logging.info(
+                "%s ATM changed %s -> %d at %.2f",
+                index_key,
+                old_atm,
+                new_atm,
+                price,
+            )
+
+        should_recenter = first_live or old_center is None
+        if not should_recenter and new_atm != old_center:
+            displacement = abs(new_atm - old_center) // runtime.config.strike_step
+            # A buffer of N strikes safely covers displacement through N;
+            # recenter only on the next strike. With buffer=0, recenter on
+            # every ATM change.
+            should_recenter = displacement >= SUBSCRIPTION_BUFFER_WINGS + 1
+
+        refresh_needed = first_live
+        if should_recenter and old_center != new_atm:
+            self.subscription_center_by_index[index_key] = new_atm
+            refresh_needed = True
+            logging.info(
+                "%s subscription centre %s -> %d",
+                index_key,
+                old_center,
+                new_atm,
+            )
+        return atm_changed, refresh_needed
+
+    def _enqueue_rows(self, rows: List[Tuple[Any, ...]]) -> bool:
+        if self.store.enqueue(rows):
+            return True
+        self.stop_event.set()
+        self.refresh_event.set()
+        return False
+
     def _on_close(self, ws: KiteTicker, code: int, reason: str) -> None:
         self.connected_event.clear()
         logging.warning("KiteTicker closed: code=%s reason=%s", code, reason)
@@ -2217,10 +2342,15 @@ def main() -> int:
             logging.info("Ticks eligible for ATM band: %d", collector.ticks_eligible)
             logging.info("Buffer-only option ticks ignored: %d", collector.buffer_ticks_ignored)
             logging.info("Unknown ticks ignored: %d", collector.unknown_ticks_ignored)
-            logging.info("Ticks offered to writer: %d", store.received_ticks)
-            logging.info("Price-change ticks: %d", store.price_change_ticks)
-            logging.info("Anchor ticks: %d", store.anchor_ticks)
-            logging.info("Unchanged ticks omitted: %d", store.omitted_unchanged_ticks)
+            logging.info("Price-change ticks: %d", collector.book.price_change_ticks)
+            logging.info("Anchor ticks: %d", collector.book.anchor_ticks)
+            logging.info("Unchanged ticks omitted: %d", collector.book.omitted_unchanged_ticks)
+            logging.info("Bar rows offered to writer: %d", store.received_rows)
+            logging.info(
+                "Tick callback CPU: %.3fs over %d frames",
+                collector.callback_cpu_ns / 1e9,
+                collector.callback_frames,
+            )
             logging.info("Bar upsert operations: %d", store.rows_upserted)
             logging.info("Final unique bars: %d", counts["bars"])
             logging.info("Instrument metadata rows: %d", counts["instruments"])
@@ -0,0 +1,903 @@
+#!/usr/bin/env python3
+"""
+Offline KiteTicker replay server and broker stand-in.
+
+Why
+---
+PriceFeed, LiveStraddleTrader.monitor_and_exit() and the collector's _on_ticks
+can only be exercised at realistic tick rates while the market is open. This
+module replays stored ticks through a local WebSocket that speaks the KiteTicker
+binary protocol, so an unmodified ``kiteconnect.KiteTicker`` client connects to
+it exactly as it would to ``wss://ws.kite.trade``.
+
+Sources
+-------
+* a collector database (KiteOptions1SecSpikeCollector ``bars`` table):
+  one tick per stored second at the close price, or with ``--subticks`` the
+  open -> low/high -> close path spread over the second (spikes included);
+* any tick CSV with columns ``ts,token,price`` (ts = HH:MM:SS[.f], ISO datetime
+  or epoch seconds; price in rupees).
+
+Protocol
+--------
+The server honours {"a":"subscribe"|"unsubscribe"|"mode"} text messages per
+client, sends LTP (8 byte), quote (44/28 byte) or full (184/32 byte) packets
+for subscribed tokens only, and a 1-byte heartbeat every HEARTBEAT_SEC.
+Prices are in paise, so the packets are identical to a live NSE/NFO/BFO feed.
+Quote/full packets carry running day open/high/low and the previous close;
+depth in full mode is a synthetic one-tick spread around the last price.
+
+Speed
+-----
+--speed 1 replays at market pace, --speed 20 twenty times faster, --speed 0 as
+fast as the clients accept frames. The summary reports frames, ticks and bytes
+sent and the worst lag behind the replay schedule.
+
+Running the trader offline
+--------------------------
+1) Start the server:
+
+    python -m Trading_2024.trainer.kite_ticker_replay --db kite_option_spikes_v3_NIFTY_20250109.sqlite3 --speed 10
+
+2) Point KiteTicker at it, either with KITE_TICKER_ROOT=ws://127.0.0.1:8765
+   (read by the hardened PriceFeed and the collector) or in-process:
+
+    from Trading_2024.trainer import kite_ticker_replay as replay
+    replay.patch_kite_ticker("ws://127.0.0.1:8765")
+
+3) Use ReplayKite in place of the KiteConnect object. It implements the subset
+   the traders call (place_order/orders/order_history/positions/cancel_order/
+   modify_order/ltp/quote/historical_data), fills from the replayed ticks and
+   records tick-to-order latency plus callback CPU per tick:
+
+    kite = replay.ReplayKite.from_collector_db(db_path)
+    feed = PriceFeed(kite.api_key, kite.access_token)
+    kite.attach(feed.ticker)          # after the feed has set its callbacks
+    ...
+    print(kite.latency_summary())
+
+Strategy time gates (entry/exit clocks) still use the wall clock, so replay at
+1x for a full-session rehearsal; use N x / max speed for feed throughput and
+latency work.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as dtime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+    IST = ZoneInfo("Asia/Kolkata")
+except Exception:  # pragma: no cover
+    IST = None
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+REPLAY_HOST = os.getenv("REPLAY_HOST", "127.0.0.1")
+REPLAY_PORT = int(os.getenv("REPLAY_PORT", "8765"))
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "1"))      # 0 = as fast as possible
+REPLAY_SUBTICKS = os.getenv("REPLAY_SUBTICKS", "0").strip() == "1"
+REPLAY_WAIT_CLIENTS = int(os.getenv("REPLAY_WAIT_CLIENTS", "1"))
+REPLAY_LINGER_SEC = float(os.getenv("REPLAY_LINGER_SEC", "5"))
+HEARTBEAT_SEC = 1.0
+WRITE_HIGH_WATER = 1 << 20      # bytes queued per client before the replay waits for it
+
+PRICE_SCALE = 100            # collector stores paise; Kite packets are paise for NSE/NFO/BFO
+TOKEN_MASK = 0xFFFFFFFF
+SEGMENT_INDICES = 9
+OPTION_TICK = 0.05
+
+MODE_LTP, MODE_QUOTE, MODE_FULL = "ltp", "quote", "full"
+DEFAULT_SUBSCRIBE_MODE = MODE_QUOTE   # Kite's default after a bare subscribe
+
+
+# =============================================================================
+# TICK SOURCES
+# =============================================================================
+# A frame is (seconds_of_day, [(token, price_paise), ...]) in replay order.
+Frame = Tuple[float, List[Tuple[int, int]]]
+
+
+@dataclass
+class ReplayData:
+    frames: List[Frame]
+    instruments: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    prev_close: Dict[int, int] = field(default_factory=dict)
+    trading_day: Optional[str] = None
+
+    @property
+    def tick_count(self) -> int:
+        return sum(len(ticks) for _, ticks in self.frames)
+
+
+def _clock_seconds(value: Optional[str]) -> Optional[float]:
+    if value is None or str(value).strip() == "":
+        return None
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            t = datetime.strptime(str(value).strip(), fmt).time()
+            return t.hour * 3600 + t.minute * 60 + t.second
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid clock time {value!r}; expected HH:MM[:SS]")
+
+
+def _bar_path(o: int, h: int, l: int, c: int) -> List[int]:
+    """Intra-second price path: open, the extreme against the close, the other extreme, close."""
+    path = [o, l, h, c] if c >= o else [o, h, l, c]
+    out = [path[0]]
+    for p in path[1:]:
+        if p != out[-1]:
+            out.append(p)
+    return out
+
+
+def _group_frames(events: Iterable[Tuple[float, int, int]]) -> List[Frame]:
+    frames: List[Frame] = []
+    for t, group in itertools.groupby(sorted(events, key=lambda e: e[0]), key=lambda e: e[0]):
+        frames.append((t, [(tok, px) for _, tok, px in group]))
+    return frames
+
+
+def load_collector_db(
+    db_path: Any,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    subticks: bool = REPLAY_SUBTICKS,
+) -> ReplayData:
+    """Frames from a collector ``bars`` table (k = second_of_day << 32 | token)."""
+    conn = sqlite3.connect(f"file:{Path(db_path)}?mode=ro", uri=True)
+    try:
+        lo = _clock_seconds(start)
+        hi = _clock_seconds(end)
+        sql = "SELECT k, p, o, h, l, c FROM bars"
+        args: List[int] = []
+        if lo is not None or hi is not None:
+            sql += " WHERE k >= ? AND k < ?"
+            args = [int(lo or 0) << 32, (int(hi if hi is not None else 86400) + 1) << 32]
+        sql += " ORDER BY k"
+
+        events: List[Tuple[float, int, int]] = []
+        prev_close: Dict[int, int] = {}
+        for k, p, o, h, l, c in conn.execute(sql, args):
+            sec = k >> 32
+            token = k & TOKEN_MASK
+            if token not in prev_close:
+                prev_close[token] = int(p if p is not None else o)
+            if subticks:
+                path = _bar_path(o, h, l, c)
+                step = 1.0 / len(path)
+                events.extend((sec + i * step, token, px) for i, px in enumerate(path))
+            else:
+                events.append((float(sec), token, c))
+
+        instruments: Dict[int, Dict[str, Any]] = {}
+        try:
+            cur = conn.execute("SELECT * FROM instruments")
+            cols = [d[0] for d in cur.description]
+            for row in cur:
+                rec = dict(zip(cols, row))
+                instruments[int(rec["token"])] = rec
+        except sqlite3.Error:
+            pass
+
+        trading_day = None
+        try:
+            row = conn.execute("SELECT value FROM run_metadata WHERE key = 'trading_day'").fetchone()
+            trading_day = row[0] if row else None
+        except sqlite3.Error:
+            pass
+    finally:
+        conn.close()
+
+    return ReplayData(_group_frames(events), instruments, prev_close, trading_day)
+
+
+def _ts_seconds(raw: str) -> float:
+    raw = raw.strip()
+    try:
+        value = float(raw)
+        if value > 86400:  # epoch seconds
+            dt = datetime.fromtimestamp(value, IST) if IST else datetime.fromtimestamp(value)
+            return dt.hour * 3600 + dt.minute * 60 + dt.second + dt.microsecond / 1e6
+        return value
+    except ValueError:
+        pass
+    if len(raw) <= 15 and ":" in raw:
+        t = dtime.fromisoformat(raw)
+    else:
+        dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        if dt.tzinfo is not None and IST is not None:
+            dt = dt.astimezone(IST)
+        t = dt.time()
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+
+
+def load_tick_csv(path: Any, start: Optional[str] = None, end: Optional[str] = None) -> ReplayData:
+    """Frames from a ``ts,token,price`` CSV (price in rupees)."""
+    lo = _clock_seconds(start)
+    hi = _clock_seconds(end)
+    events: List[Tuple[float, int, int]] = []
+    prev_close: Dict[int, int] = {}
+    with open(path, "r", newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            t = _ts_seconds(row["ts"])
+            if (lo is not None and t < lo) or (hi is not None and t >= hi + 1):
+                continue
+            token = int(row["token"])
+            px = int(round(float(row["price"]) * PRICE_SCALE))
+            prev_close.setdefault(token, px)
+            events.append((t, token, px))
+    return ReplayData(_group_frames(events), {}, prev_close)
+
+
+# =============================================================================
+# KITE BINARY PACKETS
+# =============================================================================
+# Message = int16 packet count, then per packet int16 length + packet, big-endian.
+_LTP = struct.Struct(">II")
+_INDEX_QUOTE = struct.Struct(">IIIIIIi")            # token ltp high low open close change
+_INDEX_FULL = struct.Struct(">IIIIIIiI")           # ... + exchange timestamp
+_QUOTE = struct.Struct(">IIIIIIIIIII")              # token ltp lastqty avg vol buyq sellq o h l c
+_FULL_EXTRA = struct.Struct(">IIIII")               # last trade time, oi, oi high, oi low, exch ts
+_DEPTH = struct.Struct(">IIHxx")                    # qty price orders pad
+_DEPTH_QTY = 75
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class DayState:
+    """Running open/high/low/last/volume per token for quote and full packets."""
+
+    __slots__ = ("open", "high", "low", "last", "close", "volume")
+
+    def __init__(self, price: int, prev_close: int):
+        self.open = self.high = self.low = self.last = price
+        self.close = prev_close
+        self.volume = 0
+
+    def update(self, price: int) -> None:
+        self.last = price
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.volume += 1
+
+
+def is_index_token(token: int) -> bool:
+    return (token & 0xFF) == SEGMENT_INDICES
+
+
+def encode_packet(token: int, mode: str, day: DayState, epoch: int = 0) -> bytes:
+    ltp = day.last
+    if mode == MODE_LTP:
+        return _LTP.pack(token, ltp)
+
+    if is_index_token(token):
+        change = ltp - day.close
+        if mode == MODE_FULL:
+            return _INDEX_FULL.pack(token, ltp, day.high, day.low, day.open, day.close, change, epoch)
+        return _INDEX_QUOTE.pack(token, ltp, day.high, day.low, day.open, day.close, change)
+
+    quote = _QUOTE.pack(token, ltp, 1, ltp, day.volume, _DEPTH_QTY * 5, _DEPTH_QTY * 5,
+                        day.open, day.high, day.low, day.close)
+    if mode != MODE_FULL:
+        return quote
+    tick = int(round(OPTION_TICK * PRICE_SCALE))
+    bids = b"".join(_DEPTH.pack(_DEPTH_QTY, max(0, ltp - tick * (i + 1)), 1) for i in range(5))
+    asks = b"".join(_DEPTH.pack(_DEPTH_QTY, ltp + tick * (i + 1), 1) for i in range(5))
+    return quote + _FULL_EXTRA.pack(epoch, 0, 0, 0, epoch) + bids + asks
+
+
+def encode_message(packets: Sequence[bytes]) -> bytes:
+    parts = [struct.pack(">H", len(packets))]
+    for pkt in packets:
+        parts.append(struct.pack(">H", len(pkt)))
+        parts.append(pkt)
+    return b"".join(parts)
+
+
+# =============================================================================
+# WEBSOCKET SERVER
+# =============================================================================
+@dataclass
+class ReplayStats:
+    clients: int = 0
+    frames: int = 0
+    ticks_sent: int = 0
+    bytes_sent: int = 0
+    max_lag_ms: float = 0.0
+    wall_sec: float = 0.0
+    replay_sec: float = 0.0
+
+    def summary(self) -> str:
+        rate = self.ticks_sent / self.wall_sec if self.wall_sec > 0 else 0.0
+        return (f"frames={self.frames:,} ticks_sent={self.ticks_sent:,} bytes={self.bytes_sent:,} "
+                f"wall={self.wall_sec:.1f}s replay={self.replay_sec:.0f}s "
+                f"ticks/s={rate:,.0f} max_lag={self.max_lag_ms:.1f}ms clients={self.clients}")
+
+
+class _WsClient:
+    """Server side of one RFC 6455 connection (enough for KiteTicker: text in, binary out)."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.modes: Dict[int, str] = {}
+
+    @classmethod
+    async def accept(cls, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Optional["_WsClient"]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return None
+        headers = {}
+        for line in head.decode("latin-1").split("\r\n")[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        key = headers.get("sec-websocket-key")
+        if not key:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            writer.close()
+            return None
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        return cls(reader, writer)
+
+    async def read_frame(self) -> Tuple[int, bytes]:
+        b0, b1 = await self.reader.readexactly(2)
+        opcode, n = b0 & 0x0F, b1 & 0x7F
+        if n == 126:
+            n = struct.unpack(">H", await self.reader.readexactly(2))[0]
+        elif n == 127:
+            n = struct.unpack(">Q", await self.reader.readexactly(8))[0]
+        mask = await self.reader.readexactly(4) if b1 & 0x80 else b""
+        data = await self.reader.readexactly(n)
+        if mask:
+            data = bytes(c ^ mask[i & 3] for i, c in enumerate(data))
+        return opcode, data
+
+    def send(self, opcode: int, payload: bytes) -> None:
+        n = len(payload)
+        if n < 126:
+            head = struct.pack(">BB", 0x80 | opcode, n)
+        elif n < 65536:
+            head = struct.pack(">BBH", 0x80 | opcode, 126, n)
+        else:
+            head = struct.pack(">BBQ", 0x80 | opcode, 127, n)
+        self.writer.write(head + payload)
+
+    def buffered(self) -> int:
+        return self.writer.transport.get_write_buffer_size()
+
+    async def drain(self) -> None:
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+
+
+class ReplayServer:
+    """Serve ReplayData frames to every connected KiteTicker client."""
+
+    def __init__(
+        self,
+        data: ReplayData,
+        speed: float = REPLAY_SPEED,
+        host: str = REPLAY_HOST,
+        port: int = REPLAY_PORT,
+        wait_clients: int = REPLAY_WAIT_CLIENTS,
+        linger_sec: float = REPLAY_LINGER_SEC,
+    ):
+        self.data = data
+        self.speed = float(speed)
+        self.host = host
+        self.port = int(port)
+        self.wait_clients = max(0, int(wait_clients))
+        self.linger_sec = float(linger_sec)
+        self.clients: set = set()
+        self.stats = ReplayStats()
+        self.days: Dict[int, DayState] = {}
+        self._client_event: Optional[asyncio.Event] = None
+        self._epoch0 = 0
+        if data.trading_day:
+            try:
+                d = date.fromisoformat(str(data.trading_day)[:10])
+                self._epoch0 = int(datetime.combine(d, dtime(0, 0), tzinfo=IST).timestamp())
+            except ValueError:
+                pass
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def _on_text(self, client: "_WsClient", payload: bytes) -> None:
+        try:
+            msg = json.loads(payload.decode("utf-8"))
+        except ValueError:
+            return
+        action, value = msg.get("a"), msg.get("v")
+        if action == "subscribe":
+            for token in value or []:
+                client.modes.setdefault(int(token), DEFAULT_SUBSCRIBE_MODE)
+        elif action == "unsubscribe":
+            for token in value or []:
+                client.modes.pop(int(token), None)
+        elif action == "mode" and isinstance(value, list) and len(value) == 2:
+            mode, tokens = value
+            for token in tokens or []:
+                client.modes[int(token)] = str(mode)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = await _WsClient.accept(reader, writer)
+        if client is None:
+            return
+        self.clients.add(client)
+        self.stats.clients = max(self.stats.clients, len(self.clients))
+        if self._client_event is not None and len(self.clients) >= self.wait_clients:
+            self._client_event.set()
+        try:
+            while True:
+                opcode, payload = await client.read_frame()
+                if opcode == 0x1:
+                    self._on_text(client, payload)
+                elif opcode == 0x9:
+                    client.send(0xA, payload)
+                elif opcode == 0x8:
+                    client.send(0x8, payload[:2])
+                    break
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    def _apply(self, ticks: List[Tuple[int, int]]) -> None:
+        days = self.days
+        prev = self.data.prev_close
+        for token, px in ticks:
+            day = days.get(token)
+            if day is None:
+                days[token] = DayState(px, prev.get(token, px))
+            else:
+                day.update(px)
+
+    async def _send_frame(self, t: float, ticks: List[Tuple[int, int]]) -> None:
+        epoch = self._epoch0 + int(t)
+        for client in list(self.clients):
+            modes = client.modes
+            packets = [encode_packet(token, modes[token], self.days[token], epoch)
+                       for token, _ in ticks if token in modes]
+            if not packets:
+                continue
+            # Keep each message well under the int16 packet-count limit.
+            for i in range(0, len(packets), 4000):
+                msg = encode_message(packets[i:i + 4000])
+                client.send(0x2, msg)
+                self.stats.bytes_sent += len(msg)
+            self.stats.ticks_sent += len(packets)
+            if client.buffered() > WRITE_HIGH_WATER:
+                await client.drain()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SEC)
+            for client in list(self.clients):
+                client.send(0x2, b"\x00")
+
+    async def _play(self) -> None:
+        frames = self.data.frames
+        if not frames:
+            print("[WARN] Nothing to replay.")
+            return
+        loop = asyncio.get_running_loop()
+        t_first = frames[0][0]
+        wall0 = loop.time()
+        for t, ticks in frames:
+            self._apply(ticks)
+            if self.speed > 0:
+                target = wall0 + (t - t_first) / self.speed
+                delay = target - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.stats.max_lag_ms = max(self.stats.max_lag_ms, -delay * 1000.0)
+            await self._send_frame(t, ticks)
+            self.stats.frames += 1
+            if self.speed <= 0:
+                await asyncio.sleep(0)   # let the transport drain and read client messages
+        self.stats.wall_sec = loop.time() - wall0
+        self.stats.replay_sec = frames[-1][0] - t_first
+
+    async def serve(self) -> ReplayStats:
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        heartbeat = asyncio.ensure_future(self._heartbeat())
+        print(f"[STEP] Replay server on {self.url}: {len(self.data.frames):,} frames, "
+              f"{self.data.tick_count:,} ticks, {len(self.data.prev_close):,} tokens, speed={self.speed:g}")
+        try:
+            if self.wait_clients:
+                self._client_event = asyncio.Event()
+                if len(self.clients) < self.wait_clients:
+                    print(f"[INFO] Waiting for {self.wait_clients} client(s) ...")
+                    await self._client_event.wait()
+                # Give the clients a moment to send subscribe/mode.
+                await asyncio.sleep(1.0)
+            await self._play()
+            print(f"[INFO] Replay finished: {self.stats.summary()}")
+            if self.linger_sec > 0:
+                await asyncio.sleep(self.linger_sec)
+        finally:
+            heartbeat.cancel()
+            for client in list(self.clients):
+                client.send(0x8, struct.pack(">H", 1000))
+            server.close()
+            await server.wait_closed()
+        return self.stats
+
+    def run(self) -> ReplayStats:
+        return asyncio.run(self.serve())
+
+    def start_in_thread(self) -> threading.Thread:
+        """Run serve() on a daemon thread (in-process load tests)."""
+        th = threading.Thread(target=self.run, name="kite-replay", daemon=True)
+        th.start()
+        return th
+
+
+def patch_kite_ticker(url: str) -> None:
+    """Make every KiteTicker created without an explicit root connect to url."""
+    from kiteconnect import KiteTicker
+
+    KiteTicker.ROOT_URI = url
+
+
+# =============================================================================
+# BROKER STAND-IN
+# =============================================================================
+def _percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+def _now() -> datetime:
+    return datetime.now(IST) if IST else datetime.now()
+
+
+class ReplayKite:
+    """
+    KiteConnect subset backed by the replayed ticks.
+
+    attach(ticker) wraps ticker.on_ticks: every tick updates the price book and a
+    per-token arrival stamp, and the wrapped callback's thread CPU is measured.
+    MARKET orders and marketable LIMITs fill at the last price; other LIMITs stay
+    OPEN until a later tick crosses them. Each place_order records the time since
+    the most recent tick (tick-to-order latency).
+    """
+
+    api_key = "replay"
+    access_token = "replay"
+
+    PRODUCT_MIS = "MIS"
+    PRODUCT_NRML = "NRML"
+    PRODUCT_CNC = "CNC"
+    ORDER_TYPE_MARKET = "MARKET"
+    ORDER_TYPE_LIMIT = "LIMIT"
+    ORDER_TYPE_SL = "SL"
+    ORDER_TYPE_SLM = "SL-M"
+    TRANSACTION_TYPE_BUY = "BUY"
+    TRANSACTION_TYPE_SELL = "SELL"
+    VARIETY_REGULAR = "regular"
+    VALIDITY_DAY = "DAY"
+    EXCHANGE_NSE = "NSE"
+    EXCHANGE_NFO = "NFO"
+    EXCHANGE_BSE = "BSE"
+    EXCHANGE_BFO = "BFO"
+
+    def __init__(self, instruments: Optional[Dict[int, Dict[str, Any]]] = None, spread_ticks: int = 1):
+        self.instruments = dict(instruments or {})
+        self.symbol_token: Dict[str, int] = {}
+        for token, rec in self.instruments.items():
+            self.symbol_token[f"{rec.get('exchange')}:{rec.get('symbol')}"] = int(token)
+            self.symbol_token[str(rec.get("symbol"))] = int(token)
+        self.spread = spread_ticks * OPTION_TICK
+
+        self._lock = threading.RLock()
+        self._ids = itertools.count(250_000_000_000_001)
+        self.prices: Dict[int, float] = {}
+        self.tick_seen: Dict[int, float] = {}
+        self.last_tick_perf: Optional[float] = None
+        self.candles: Dict[int, Dict[datetime, List[float]]] = defaultdict(dict)
+        self.order_book: Dict[str, Dict[str, Any]] = {}
+        self.latencies_ms: List[float] = []
+        self.callback_cpu_us: List[float] = []
+        self.ticks_received = 0
+        self._cpu0 = time.process_time()
+
+    @classmethod
+    def from_collector_db(cls, db_path: Any, **kwargs: Any) -> "ReplayKite":
+        conn = sqlite3.connect(f"file:{Path(db_path)}?mode=ro", uri=True)
+        try:
+            cur = conn.execute("SELECT * FROM instruments")
+            cols = [d[0] for d in cur.description]
+            instruments = {int(r[0]): dict(zip(cols, r)) for r in cur}
+        finally:
+            conn.close()
+        return cls(instruments, **kwargs)
+
+    # ---------- tick tap ----------
+
+    def on_ticks(self, ticks: List[Dict[str, Any]]) -> None:
+        stamp = time.perf_counter()
+        minute = _now().replace(second=0, microsecond=0)
+        with self._lock:
+            self.last_tick_perf = stamp
+            self.ticks_received += len(ticks)
+            for tick in ticks:
+                token = tick.get("instrument_token")
+                price = tick.get("last_price")
+                if token is None or price is None:
+                    continue
+                token, price = int(token), float(price)
+                self.prices[token] = price
+                self.tick_seen[token] = stamp
+                bar = self.candles[token].get(minute)
+                if bar is None:
+                    self.candles[token][minute] = [price, price, price, price]
+                else:
+                    bar[1] = max(bar[1], price)
+                    bar[2] = min(bar[2], price)
+                    bar[3] = price
+            self._match_open_orders()
+
+    def attach(self, ticker: Any) -> Any:
+        inner = getattr(ticker, "on_ticks", None)
+
+        def on_ticks(ws: Any, ticks: List[Dict[str, Any]]) -> None:
+            self.on_ticks(ticks)
+            if inner is None:
+                return
+            c0 = time.thread_time()
+            inner(ws, ticks)
+            if ticks:
+                self.callback_cpu_us.append((time.thread_time() - c0) * 1e6 / len(ticks))
+
+        ticker.on_ticks = on_ticks
+        return ticker
+
+    # ---------- orders ----------
+
+    def _token(self, exchange: Optional[str], symbol: str) -> Optional[int]:
+        return self.symbol_token.get(f"{exchange}:{symbol}") or self.symbol_token.get(symbol)
+
+    def _fill(self, order: Dict[str, Any], price: float) -> None:
+        order.update(status="COMPLETE", average_price=round(price, 2),
+                     filled_quantity=order["quantity"], pending_quantity=0,
+                     exchange_timestamp=_now(), status_message=None)
+
+    def _try_fill(self, order: Dict[str, Any]) -> None:
+        token = order.get("instrument_token")
+        ltp = self.prices.get(token) if token is not None else None
+        if ltp is None:
+            return
+        side = order["transaction_type"]
+        if order["order_type"] == self.ORDER_TYPE_MARKET:
+            self._fill(order, ltp - self.spread if side == "SELL" else ltp + self.spread)
+            return
+        limit = float(order.get("price") or 0.0)
+        if side == "SELL" and limit <= ltp:
+            self._fill(order, max(limit, ltp))
+        elif side == "BUY" and limit >= ltp:
+            self._fill(order, min(limit, ltp))
+
+    def _match_open_orders(self) -> None:
+        for order in self.order_book.values():
+            if order["status"] == "OPEN":
+                self._try_fill(order)
+
+    def place_order(self, variety: str, exchange: str, tradingsymbol: str, transaction_type: str,
+                    quantity: int, product: str, order_type: str, price: Optional[float] = None,
+                    tag: Optional[str] = None, **kwargs: Any) -> str:
+        placed = time.perf_counter()
+        with self._lock:
+            order_id = str(next(self._ids))
+            token = self._token(exchange, tradingsymbol)
+            order = {
+                "order_id": order_id, "variety": variety, "exchange": exchange,
+                "tradingsymbol": tradingsymbol, "instrument_token": token,
+                "transaction_type": transaction_type, "quantity": int(quantity),
+                "product": product, "order_type": order_type,
+                "price": float(price or 0.0), "tag": tag, "status": "OPEN",
+                "filled_quantity": 0, "pending_quantity": int(quantity), "average_price": 0.0,
+                "order_timestamp": _now(), "exchange_timestamp": None, "status_message": None,
+            }
+            if token is None or token not in self.prices:
+                order.update(status="REJECTED", status_message=f"no replayed price for {tradingsymbol}")
+            else:
+                self._try_fill(order)
+            self.order_book[order_id] = order
+            if self.last_tick_perf is not None:
+                self.latencies_ms.append((placed - self.last_tick_perf) * 1000.0)
+        return order_id
+
+    def modify_order(self, variety: str, order_id: str, quantity: Optional[int] = None,
+                     price: Optional[float] = None, order_type: Optional[str] = None,
+                     **kwargs: Any) -> str:
+        with self._lock:
+            order = self.order_book[str(order_id)]
+            if order["status"] != "OPEN":
+                raise RuntimeError(f"Order {order_id} is {order['status']}; cannot modify")
+            if quantity is not None:
+                order["quantity"] = order["pending_quantity"] = int(quantity)
+            if price is not None:
+                order["price"] = float(price)
+            if order_type is not None:
+                order["order_type"] = order_type
+            self._try_fill(order)
+        return str(order_id)
+
+    def cancel_order(self, variety: str, order_id: str, **kwargs: Any) -> str:
+        with self._lock:
+            order = self.order_book[str(order_id)]
+            if order["status"] == "OPEN":
+                order["status"] = "CANCELLED"
+        return str(order_id)
+
+    def orders(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(o) for o in self.order_book.values()]
+
+    def order_history(self, order_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(self.order_book[str(order_id)])]
+
+    def positions(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            rows: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+            for o in self.order_book.values():
+                if o["status"] != "COMPLETE":
+                    continue
+                key = (o["exchange"], o["tradingsymbol"], o["product"])
+                row = rows.setdefault(key, {
+                    "exchange": o["exchange"], "tradingsymbol": o["tradingsymbol"],
+                    "instrument_token": o["instrument_token"], "product": o["product"],
+                    "quantity": 0, "buy_quantity": 0, "sell_quantity": 0,
+                    "buy_value": 0.0, "sell_value": 0.0,
+                })
+                qty, value = o["filled_quantity"], o["filled_quantity"] * o["average_price"]
+                if o["transaction_type"] == "BUY":
+                    row["buy_quantity"] += qty
+                    row["buy_value"] += value
+                else:
+                    row["sell_quantity"] += qty
+                    row["sell_value"] += value
+            for row in rows.values():
+                row["quantity"] = row["buy_quantity"] - row["sell_quantity"]
+                row["buy_price"] = row["buy_value"] / row["buy_quantity"] if row["buy_quantity"] else 0.0
+                row["sell_price"] = row["sell_value"] / row["sell_quantity"] if row["sell_quantity"] else 0.0
+                row["average_price"] = row["sell_price"] if row["quantity"] < 0 else row["buy_price"]
+                last = self.prices.get(row["instrument_token"], 0.0)
+                row["last_price"] = last
+                row["pnl"] = round(row["sell_value"] - row["buy_value"] + row["quantity"] * last, 2)
+            net = list(rows.values())
+        return {"net": net, "day": [dict(r) for r in net]}
+
+    # ---------- market data ----------
+
+    def _quote_keys(self, instruments: Tuple[Any, ...]) -> List[str]:
+        keys: List[str] = []
+        for item in instruments:
+            keys.extend([item] if isinstance(item, str) else list(item))
+        return keys
+
+    def ltp(self, *instruments: Any) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for key in self._quote_keys(instruments):
+                token = self.symbol_token.get(key)
+                if token is not None and token in self.prices:
+                    out[key] = {"instrument_token": token, "last_price": self.prices[token]}
+        return out
+
+    def quote(self, *instruments: Any) -> Dict[str, Dict[str, Any]]:
+        out = self.ltp(*instruments)
+        for row in out.values():
+            ltp = row["last_price"]
+            row["depth"] = {
+                "buy": [{"price": round(ltp - self.spread, 2), "quantity": _DEPTH_QTY, "orders": 1}],
+                "sell": [{"price": round(ltp + self.spread, 2), "quantity": _DEPTH_QTY, "orders": 1}],
+            }
+        return out
+
+    def historical_data(self, instrument_token: int, from_date: Any, to_date: Any, interval: str,
+                        continuous: bool = False, oi: bool = False, **kwargs: Any) -> List[Dict[str, Any]]:
+        """Minute candles built from ticks received so far (wall-clock minutes)."""
+        with self._lock:
+            bars = sorted(self.candles.get(int(instrument_token), {}).items())
+        out = []
+        for minute, (o, h, l, c) in bars:
+            if from_date <= minute <= to_date:
+                out.append({"date": minute, "open": o, "high": h, "low": l, "close": c, "volume": 0})
+        return out
+
+    # ---------- report ----------
+
+    def latency_summary(self) -> Dict[str, float]:
+        with self._lock:
+            lat = list(self.latencies_ms)
+            cpu = list(self.callback_cpu_us)
+            ticks = self.ticks_received
+        proc_cpu = time.process_time() - self._cpu0
+        return {
+            "orders": float(len(lat)),
+            "tick_to_order_p50_ms": _percentile(lat, 0.50),
+            "tick_to_order_p95_ms": _percentile(lat, 0.95),
+            "tick_to_order_max_ms": max(lat) if lat else 0.0,
+            "ticks_received": float(ticks),
+            "callback_cpu_us_per_tick_p50": _percentile(cpu, 0.50),
+            "callback_cpu_us_per_tick_p99": _percentile(cpu, 0.99),
+            "process_cpu_us_per_tick": proc_cpu * 1e6 / ticks if ticks else 0.0,
+        }
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Replay stored ticks through a KiteTicker-compatible WebSocket.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--db", help="collector SQLite database (bars table)")
+    src.add_argument("--ticks-csv", help="CSV with ts,token,price columns")
+    ap.add_argument("--speed", type=float, default=REPLAY_SPEED, help="1 = real time, N = N x, 0 = max")
+    ap.add_argument("--start", help="HH:MM[:SS] first second to replay")
+    ap.add_argument("--end", help="HH:MM[:SS] last second to replay")
+    ap.add_argument("--subticks", action="store_true", default=REPLAY_SUBTICKS,
+                    help="emit each stored second's open/high/low/close path")
+    ap.add_argument("--host", default=REPLAY_HOST)
+    ap.add_argument("--port", type=int, default=REPLAY_PORT)
+    ap.add_argument("--wait-clients", type=int, default=REPLAY_WAIT_CLIENTS,
+                    help="start replay after this many clients connect (0 = immediately)")
+    ap.add_argument("--linger", type=float, default=REPLAY_LINGER_SEC,
+                    help="seconds to keep connections open after the last frame")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    t0 = time.perf_counter()
+    if args.db:
+        data = load_collector_db(args.db, args.start, args.end, subticks=args.subticks)
+    else:
+        data = load_tick_csv(args.ticks_csv, args.start, args.end)
+    print(f"[INFO] Loaded {data.tick_count:,} ticks in {time.perf_counter() - t0:.2f}s")
+    ReplayServer(data, speed=args.speed, host=args.host, port=args.port,
+                 wait_clients=args.wait_clients, linger_sec=args.linger).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -25,18 +25,30 @@ PERSISTENCE (survives a script restart)
 * On startup the script reloads both; if it died with a position OPEN, it
   resumes monitoring that position rather than losing it.
 
-NOTE ON DATA: 1-minute bars hide intra-minute premium swings; this polls LTP
-every second so the swell/fallback is measured on the real per-second path.
+NOTE ON DATA: 1-minute bars hide intra-minute premium swings; this follows the
+ATM pair tick by tick (KiteTicker) so the swell/fallback is measured on the real
+intra-second path.
+
+FEED
+----
+* FEED_MODE=TICKER (default): the underlying and CE/PE of the ATM strike plus
+  NEIGHBOUR_STRIKES either side are subscribed in LTP mode, so refresh_atm() finds
+  the new pair already streaming. The loop wakes on every tick of the underlying,
+  the ATM pair or an open position's legs.
+* If no tick arrives for TICK_STALE_SEC (or the socket is down) prices come from
+  Broker REST calls every POLL_SECONDS until ticks resume. FEED_MODE=POLL always
+  polls (the original one-second loop).
+* Premiums go into a fixed-cadence ring (one slot per RING_STEP_SEC), so "premium
+  LOOKBACK_SECONDS ago" and the per-band sustain run are O(1) per tick.
 
 Run:  python live_swell_fade.py
 """
 
 from __future__ import annotations
-import os, json, time, signal
-from collections import deque
+import os, json, math, time, signal, threading
 from dataclasses import dataclass, asdict, field
 from datetime import datetime, date, time as dtime
-from typing import Dict, Optional, Deque, Tuple, Any
+from typing import Dict, Iterable, List, Optional, Tuple, Any
 
 import pandas as pd
 
@@ -52,6 +64,11 @@ except Exception:
     except Exception:
         _TZ = None
 
+try:
+    from kiteconnect import KiteTicker
+except Exception:
+    KiteTicker = None
+
 
 # =============================================================================
 # CONFIG
@@ -73,7 +90,14 @@ LOOKBACK_SECONDS  = int(os.getenv("LOOKBACK_SECONDS", "10"))   # premium now vs
 SWELL_THRESHOLDS  = [5, 7.5, 10, 12.5, 15, 20, 25, 30]         # percent bands
 SUSTAIN_SECONDS   = int(os.getenv("SUSTAIN_SECONDS", "3"))     # rise must hold this long
 # Require the threshold to be continuously met for SUSTAIN_SECONDS consecutive
-# polls -> rejects one-tick spikes.
+# ring slots (and on every tick in between) -> rejects one-tick spikes.
+RING_STEP_SEC     = float(os.getenv("RING_STEP_SEC", str(POLL_SECONDS)))  # premium ring cadence
+
+# ---- Feed ----
+FEED_MODE         = os.getenv("FEED_MODE", "TICKER").strip().upper()  # TICKER | POLL
+NEIGHBOUR_STRIKES = int(os.getenv("NEIGHBOUR_STRIKES", "2"))   # pre-subscribed strikes each side of ATM
+TICK_STALE_SEC    = float(os.getenv("TICK_STALE_SEC", "5"))    # no tick this long -> REST polling
+KITE_TICKER_ROOT  = os.getenv("KITE_TICKER_ROOT", "").strip()  # replay server for offline runs
 
 # ---- Exit ----
 # Profit: premium falls back to pre-swell level (the premium LOOKBACK_SECONDS
@@ -143,6 +167,68 @@ def which_bucket(rise_pct: float) -> Optional[float]:
     return max(cleared) if cleared else None
 
 
+# =============================================================================
+# PREMIUM RING  (fixed cadence, O(1) lookback + sustain)
+# =============================================================================
+class PremiumRing:
+    """
+    Straddle premium sampled on a fixed grid of RING_STEP_SEC slots.
+
+    Every tick overwrites the current slot (last premium wins); slots without a
+    tick carry the previous premium forward. "Premium N seconds ago" is then one
+    index, slot[head - N/step], instead of a scan over timestamped samples.
+
+    Sustain: for each threshold band we remember the slot where the current run
+    of rise >= band started. A tick below the band ends the run, so a band is
+    sustained once it has held on every tick for SUSTAIN_SECONDS worth of slots.
+    """
+
+    def __init__(self, lookback_sec: float, sustain_sec: float, step_sec: float, thresholds: Iterable[float]):
+        self.step = float(step_sec) if step_sec > 0 else 1.0
+        self.lag = max(1, int(round(lookback_sec / self.step)))
+        self.sustain_slots = max(1, int(math.ceil(sustain_sec / self.step)))
+        self.size = self.lag + self.sustain_slots + 8
+        self.values: List[float] = [0.0] * self.size
+        self.head: Optional[int] = None       # absolute slot number of the newest sample
+        self.filled = 0
+        self.run_start: Dict[float, Optional[int]] = {th: None for th in thresholds}
+
+    def push(self, epoch: float, premium: float) -> None:
+        slot = int(epoch // self.step)
+        if self.head is None:
+            self.head, self.filled = slot, 1
+        elif slot > self.head:
+            last = self.values[self.head % self.size]
+            gap = slot - self.head
+            for s in range(self.head + 1, self.head + min(gap, self.size)):
+                self.values[s % self.size] = last
+            self.head = slot
+            self.filled = min(self.size, self.filled + gap)
+        self.values[self.head % self.size] = float(premium)
+
+    def ago(self) -> Optional[float]:
+        """Premium lookback_sec before the newest slot (oldest kept if the ring is younger)."""
+        if self.head is None:
+            return None
+        back = min(self.lag, self.filled - 1)
+        return self.values[(self.head - back) % self.size]
+
+    def update_sustain(self, rise_pct: float) -> None:
+        for th in self.run_start:
+            if rise_pct >= th:
+                if self.run_start[th] is None:
+                    self.run_start[th] = self.head
+            else:
+                self.run_start[th] = None
+
+    def sustained(self, th: float) -> bool:
+        start = self.run_start.get(th)
+        return start is not None and self.head is not None and self.head - start + 1 >= self.sustain_slots
+
+    def reset_sustain(self) -> None:
+        self.run_start = {th: None for th in self.run_start}
+
+
 # =============================================================================
 # STATE  (serialised to JSON for restart safety)
 # =============================================================================
@@ -282,6 +368,29 @@ class Broker:
         q = self.kite.ltp([ck, pk])
         return float(q[ck]["last_price"]), float(q[pk]["last_price"])
 
+    def underlying_key(self) -> str:
+        return f"{self.under_exch}:{self.underlying_sym}"
+
+    def option_key(self, sym: str) -> str:
+        return f"{self.opt_exch}:{sym}"
+
+    def strike_window_keys(self, atm: int, each_side: int) -> List[str]:
+        """CE/PE keys for atm +/- each_side strikes (ticker pre-subscription)."""
+        keys = []
+        for k in range(-each_side, each_side + 1):
+            ce, pe = self.atm_option_symbols(atm + k * self.step)
+            keys += [self.option_key(ce), self.option_key(pe)]
+        return keys
+
+    def instrument_tokens(self, keys: List[str]) -> Dict[str, int]:
+        """Instrument tokens via one kite.ltp() call; unknown symbols are skipped."""
+        try:
+            q = self.kite.ltp(keys)
+        except Exception as e:
+            log(f"WARN token lookup failed for {len(keys)} keys: {e}")
+            return {}
+        return {k: int(v["instrument_token"]) for k, v in q.items() if "instrument_token" in v}
+
     def place_order(self, tradingsymbol: str, side: str, qty: int) -> Optional[str]:
         """side = 'SELL' or 'BUY'. Returns order_id or None. Gated for safety."""
         if PAPER_TRADING or not ALLOW_LIVE_ORDERS:
@@ -298,6 +407,136 @@ class Broker:
         return oid
 
 
+# =============================================================================
+# TICK FEED  (KiteTicker, LTP mode)
+# =============================================================================
+class TickFeed:
+    """
+    Latest LTP per "EXCH:SYMBOL" key from KiteTicker.
+
+    track() keeps the subscription equal to the given keys (ATM window, open legs
+    and the underlying). Only ticks for hot keys wake the engine loop; neighbour
+    strikes are kept warm so an ATM change needs no REST call.
+    """
+
+    def __init__(self, broker: "Broker"):
+        if KiteTicker is None:
+            raise RuntimeError("kiteconnect is not installed. Run: pip install kiteconnect")
+        api_key = getattr(broker.kite, "api_key", None) or getattr(oUtils, "KITE_API_KEY", None)
+        access_token = getattr(broker.kite, "access_token", None) or getattr(oUtils, "KITE_ACCESS_CODE", None)
+        if not api_key or not access_token:
+            raise RuntimeError("Could not obtain api_key/access_token for KiteTicker.")
+        try:
+            self.ticker = KiteTicker(api_key, access_token, root=KITE_TICKER_ROOT or None,
+                                     reconnect=True, reconnect_max_tries=300, reconnect_max_delay=60)
+        except TypeError:
+            self.ticker = KiteTicker(api_key, access_token)
+        self.broker = broker
+        self._lock = threading.Lock()
+        self.wake = threading.Event()
+        self.connected = threading.Event()
+        self._token_of: Dict[str, int] = {}      # key -> token (resolved once)
+        self._key_of: Dict[int, str] = {}        # subscribed token -> key
+        self._hot: set = set()
+        self._ltp: Dict[str, float] = {}
+        self._last_tick = 0.0
+        self.ticks = 0
+        self.ticker.on_ticks = self._on_ticks
+        self.ticker.on_connect = self._on_connect
+        self.ticker.on_close = self._on_close
+        self.ticker.on_error = self._on_error
+
+    def _on_ticks(self, ws, ticks):
+        hot = False
+        with self._lock:
+            for tick in ticks:
+                key = self._key_of.get(tick.get("instrument_token"))
+                price = tick.get("last_price")
+                if key is None or price is None:
+                    continue
+                self._ltp[key] = float(price)
+                self.ticks += 1
+                hot = hot or key in self._hot
+            self._last_tick = time.monotonic()
+        if hot:
+            self.wake.set()
+
+    def _on_connect(self, ws, response):
+        log("KiteTicker connected.")
+        self.connected.set()
+        tokens = list(self._key_of)
+        if tokens:
+            ws.subscribe(tokens)
+            ws.set_mode(ws.MODE_LTP, tokens)
+
+    def _on_close(self, ws, code, reason):
+        self.connected.clear()
+        log(f"WARN KiteTicker closed code={code} reason={reason}")
+
+    def _on_error(self, ws, code, reason):
+        log(f"WARN KiteTicker error code={code} reason={reason}")
+
+    def start(self, timeout: float = 15.0) -> bool:
+        self.ticker.connect(threaded=True)
+        return self.connected.wait(timeout)
+
+    def stop(self):
+        try:
+            self.ticker.close()
+        except Exception:
+            pass
+
+    def track(self, keys: Iterable[str], hot: Iterable[str]):
+        keys = list(dict.fromkeys(keys))
+        missing = [k for k in keys if k not in self._token_of]
+        if missing:
+            self._token_of.update(self.broker.instrument_tokens(missing))
+        wanted = {self._token_of[k]: k for k in keys if k in self._token_of}
+        with self._lock:
+            added = [t for t in wanted if t not in self._key_of]
+            removed = [t for t in self._key_of if t not in wanted]
+            for t in removed:
+                self._ltp.pop(self._key_of[t], None)
+            self._key_of = wanted
+            self._hot = set(hot)
+        if not self.connected.is_set():
+            return                      # _on_connect subscribes the current set
+        try:
+            if removed:
+                self.ticker.unsubscribe(removed)
+            if added:
+                self.ticker.subscribe(added)
+                self.ticker.set_mode(self.ticker.MODE_LTP, added)
+        except Exception as e:
+            log(f"WARN KiteTicker subscription update failed: {e}")
+
+    def is_stale(self) -> bool:
+        if not self.connected.is_set():
+            return True
+        with self._lock:
+            return time.monotonic() - self._last_tick > TICK_STALE_SEC
+
+    def ltp(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._ltp.get(key)
+
+    def wait(self, timeout: float) -> bool:
+        woke = self.wake.wait(timeout)
+        self.wake.clear()
+        return woke
+
+
+def start_tick_feed(broker: "Broker") -> Optional[TickFeed]:
+    try:
+        feed = TickFeed(broker)
+    except Exception as e:
+        log(f"WARN KiteTicker unavailable ({e}); polling Broker every {POLL_SECONDS}s.")
+        return None
+    if not feed.start():
+        log("WARN KiteTicker connection not confirmed yet; polling until ticks arrive.")
+    return feed
+
+
 # =============================================================================
 # ENGINE
 # =============================================================================
@@ -310,10 +549,9 @@ class Engine:
         self.state = load_state()
         self.pos = Position(**self.state.position)
         self.step = int(self.broker.step)
-        # rolling premium buffer: list of (epoch, premium)
-        self.buf: Deque[Tuple[float, float]] = deque(maxlen=LOOKBACK_SECONDS + SUSTAIN_SECONDS + 5)
-        # per-threshold sustain counters
-        self.sustain_count: Dict[float, int] = {th: 0 for th in SWELL_THRESHOLDS}
+        # fixed-cadence premium ring: O(1) lookback + per-band sustain runs
+        self.ring = PremiumRing(LOOKBACK_SECONDS, SUSTAIN_SECONDS, RING_STEP_SEC, SWELL_THRESHOLDS)
+        self.feed: Optional[TickFeed] = None
         self._stop = False
         # resolve today's ATM symbols once (re-resolved if ATM moves a lot)
         self.atm = 0
@@ -328,12 +566,40 @@ class Engine:
 
     # ---- ATM resolution ----
     def refresh_atm(self):
-        spot = self.broker.underlying_ltp()
+        spot = self._feed_ltp(self.broker.underlying_key())
+        if spot is None:
+            spot = self.broker.underlying_ltp()
         atm = round_to_step(spot, self.step)
         if atm != self.atm:
             self.atm = atm
             self.ce_sym, self.pe_sym = self.broker.atm_option_symbols(atm)
             log(f"ATM set to {atm} (spot {spot:.1f}) CE={self.ce_sym} PE={self.pe_sym}")
+            self.track_feed()
+
+    # ---- tick feed ----
+    def track_feed(self):
+        """Subscribe underlying + ATM window + open legs; wake only on underlying/ATM/legs."""
+        if self.feed is None:
+            return
+        hot = [self.broker.underlying_key(),
+               self.broker.option_key(self.ce_sym), self.broker.option_key(self.pe_sym)]
+        if self.pos.open:
+            hot += [self.broker.option_key(self.pos.ce_symbol), self.broker.option_key(self.pos.pe_symbol)]
+        keys = hot + (self.broker.strike_window_keys(self.atm, NEIGHBOUR_STRIKES) if self.atm else [])
+        self.feed.track(keys, hot)
+
+    def _feed_ltp(self, key: str) -> Optional[float]:
+        if self.feed is None or self.feed.is_stale():
+            return None
+        return self.feed.ltp(key)
+
+    def straddle(self, ce_sym: str, pe_sym: str) -> Tuple[float, float]:
+        """CE/PE LTP from ticks; Broker REST when the feed is off, stale or not ticked yet."""
+        ce = self._feed_ltp(self.broker.option_key(ce_sym))
+        pe = self._feed_ltp(self.broker.option_key(pe_sym))
+        if ce is None or pe is None:
+            return self.broker.straddle_ltp(ce_sym, pe_sym)
+        return ce, pe
 
     # ---- persistence ----
     def persist(self):
@@ -342,14 +608,7 @@ class Engine:
 
     # ---- premium reference ----
     def premium_n_sec_ago(self) -> Optional[float]:
-        if not self.buf:
-            return None
-        target = now_ist().timestamp() - LOOKBACK_SECONDS
-        # earliest sample at or after target; if buffer shorter, use oldest
-        for epoch, prem in self.buf:
-            if epoch >= target:
-                return prem
-        return self.buf[0][1]
+        return self.ring.ago()
 
     # ---- entry ----
     def try_enter(self, now_prem: float):
@@ -372,21 +631,17 @@ class Engine:
         rise_pct = (now_prem / past - 1.0) * 100.0
         bucket = which_bucket(rise_pct)
 
-        # update sustain counters: a band is "sustained" if rise stayed >= it
-        for th in SWELL_THRESHOLDS:
-            if rise_pct >= th:
-                self.sustain_count[th] += 1
-            else:
-                self.sustain_count[th] = 0
+        # update sustain runs: a band is "sustained" if rise stayed >= it
+        self.ring.update_sustain(rise_pct)
 
         if bucket is None:
             return
-        # require the triggering band to have sustained for SUSTAIN_SECONDS polls
-        if self.sustain_count[bucket] < SUSTAIN_SECONDS:
+        # require the triggering band to have sustained for SUSTAIN_SECONDS
+        if not self.ring.sustained(bucket):
             return
 
         # ---- ENTER short straddle ----
-        ce, pe = self.broker.straddle_ltp(self.ce_sym, self.pe_sym)
+        ce, pe = self.straddle(self.ce_sym, self.pe_sym)
         entry_prem = ce + pe
         stop_pct = STOP_SAME_PCT_OVERRIDE if STOP_SAME_PCT_OVERRIDE > 0 else bucket
         self.pos = Position(
@@ -403,8 +658,9 @@ class Engine:
         log(f"ENTER short straddle @ {entry_prem:.2f} (rise {rise_pct:.1f}% band {bucket}) "
             f"TP={self.pos.tp_level:.2f} SL={self.pos.sl_level:.2f} [{'PAPER' if PAPER_TRADING else 'LIVE'}]")
         # reset sustain so we don't immediately re-trigger
-        self.sustain_count = {th: 0 for th in SWELL_THRESHOLDS}
+        self.ring.reset_sustain()
         self.persist()
+        self.track_feed()
 
     # ---- exit ----
     def try_exit(self, now_prem: float, force_reason: Optional[str] = None):
@@ -419,7 +675,7 @@ class Engine:
         if reason is None:
             return
 
-        ce, pe = self.broker.straddle_ltp(self.pos.ce_symbol, self.pos.pe_symbol)
+        ce, pe = self.straddle(self.pos.ce_symbol, self.pos.pe_symbol)
         exit_prem = ce + pe
         self.broker.place_order(self.pos.ce_symbol, "BUY", self.qty)
         self.broker.place_order(self.pos.pe_symbol, "BUY", self.qty)
@@ -450,6 +706,7 @@ class Engine:
         self.state.cooldown_target = self.pos.pre_swell_premium * COOLDOWN_TO_PRESWELL_FRAC
         self.pos = Position()  # flat
         self.persist()
+        self.track_feed()
 
     # ---- main loop ----
     def run(self):
@@ -460,9 +717,15 @@ class Engine:
             log("PAPER_TRADING is off but ALLOW_LIVE_ORDERS is not set -> still simulating, no real orders.")
         if not PAPER_TRADING and ALLOW_LIVE_ORDERS:
             log("!!! LIVE ORDER MODE ACTIVE - real orders will be placed !!!")
+        if FEED_MODE == "TICKER":
+            self.feed = start_tick_feed(self.broker)
+            self.track_feed()
 
         while not self._stop:
             try:
+                if self.feed is not None:
+                    # next hot tick; POLL_SECONDS at most so gates/stale fallback still run
+                    self.feed.wait(POLL_SECONDS)
                 t = now_ist().time()
                 if not in_session(t):
                     if t < SESSION_START:
@@ -471,14 +734,14 @@ class Engine:
                         # after close: square off if needed, then stop
                         if self.pos.open:
                             self.refresh_atm()
-                            ce, pe = self.broker.straddle_ltp(self.pos.ce_symbol, self.pos.pe_symbol)
+                            ce, pe = self.straddle(self.pos.ce_symbol, self.pos.pe_symbol)
                             self.try_exit(ce + pe, force_reason="SESSION_END")
                         log("Session over; exiting loop."); break
 
                 self.refresh_atm()
-                ce, pe = self.broker.straddle_ltp(self.ce_sym, self.pe_sym)
+                ce, pe = self.straddle(self.ce_sym, self.pe_sym)
                 prem = ce + pe
-                self.buf.append((now_ist().timestamp(), prem))
+                self.ring.push(now_ist().timestamp(), prem)
 
                 # square-off window
                 if t >= SQUARE_OFF and self.pos.open:
@@ -488,13 +751,17 @@ class Engine:
                 else:
                     self.try_enter(prem)           # look for a fresh swell
 
-                time.sleep(POLL_SECONDS)
+                if self.feed is None:
+                    time.sleep(POLL_SECONDS)
             except KeyboardInterrupt:
                 self._stop = True
             except Exception as e:
                 log(f"WARN loop error: {e}")
                 time.sleep(2.0)
 
+        if self.feed is not None:
+            self.feed.stop()
+            log(f"KiteTicker ticks received: {self.feed.ticks:,}")
         log(f"=== STOPPED === trades_done={self.state.trades_done} "
             f"realized={self.state.realized_pnl:.0f}  (state persisted to {STATE_FILE})")
 
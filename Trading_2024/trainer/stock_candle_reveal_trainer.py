@@ -28,13 +28,16 @@ What this version changes
    on a desktop/laptop screen.
 6. The top button ribbon is sticky/fixed at the top while the page scrolls.
 7. The Right Arrow key is captured at the full-page level.
-8. Disk caching is reduced to exactly one pickle file:
+8. Shown history lives in one pickle file:
 
        stock_reveal_cache/shown_stock_dates.pkl
 
    This pickle stores shown stock/date pairs, shown dates, and the last stock in
-   the rotation. Candle data, daily data, and Kite instrument metadata are kept
-   in memory only during the current run.
+   the rotation. Kite instrument metadata is kept in memory only.
+   Downloaded 1-minute and daily candles are kept in a size-capped LRU folder,
+   stock_reveal_cache/candles, one pickle per (token, day), so a date is never
+   fetched from Kite twice. A background worker pre-validates random unused
+   dates for each cycle stock, so "New random" usually needs no API call.
 9. The chart uses a sleek crosshair mouse cursor.
 10. When the mouse is inside the chart area, only a compact price label is shown
     near the mouse pointer. No horizontal/vertical overlay lines are drawn.
@@ -88,10 +91,12 @@ import argparse
 import os
 import pickle
 import random
+import threading
 import time
+from collections import deque
 from dataclasses import dataclass
 from datetime import date, datetime, time as dtime, timedelta
-from typing import Dict, List, Optional, Sequence, Set, Tuple
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
 
 import numpy as np
 import pandas as pd
@@ -209,13 +214,24 @@ PIVOT_LINE_WIDTH = {
 }
 CPR_BAND_FILL_COLOR = "rgba(57, 73, 171, 0.055)"
 
-# Single local cache file. No candle-cache files, daily-cache files, or
-# instrument-cache files are created in this version.
+# Local cache folder: the shown-history pickle plus the candle cache.
+# No instrument-cache files are created in this version.
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CACHE_DIR = os.path.join(BASE_DIR, "stock_reveal_cache")
 SHOWN_CACHE_PATH = os.path.join(CACHE_DIR, "shown_stock_dates.pkl")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Candle cache: one pickle per (kind, token, day). When the folder grows past the
+# cap, least recently used files are deleted (file mtime is refreshed on each hit).
+CANDLE_CACHE_DIR = os.path.join(CACHE_DIR, "candles")
+CANDLE_CACHE_MAX_MB = int(os.getenv("CANDLE_CACHE_MAX_MB", "256"))
+
+# Background prefetch: validated random dates kept ready per cycle stock.
+# 0 disables it. The gap keeps prefetch well under Kite's 3 historical calls/s.
+PREFETCH_DATES_PER_STOCK = int(os.getenv("PREFETCH_DATES_PER_STOCK", "2"))
+PREFETCH_CALL_GAP_SEC = 0.7
+PREFETCH_RETRY_SEC = 30
+
 # Three-stock training universe.
 #
 # Requirement implemented here:
@@ -412,6 +428,18 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Clear the single shown stock/date pickle before starting.",
     )
+    parser.add_argument(
+        "--candle-cache-mb",
+        type=int,
+        default=CANDLE_CACHE_MAX_MB,
+        help=f"Size cap of the on-disk candle cache in MB. 0 disables it. Default: {CANDLE_CACHE_MAX_MB}",
+    )
+    parser.add_argument(
+        "--prefetch-dates",
+        type=int,
+        default=PREFETCH_DATES_PER_STOCK,
+        help=f"Random dates pre-validated per cycle stock in the background. 0 disables. Default: {PREFETCH_DATES_PER_STOCK}",
+    )
     return parser.parse_args()
 
 
@@ -821,7 +849,7 @@ def reset_shown_cache() -> None:
 
 
 # -----------------------------------------------------------------------------
-# Historical data download and normalization. No candle/daily disk caching.
+# Historical data download and normalization
 # -----------------------------------------------------------------------------
 def ist_datetime(session_day: date, t: dtime) -> datetime:
     """Create an IST-aware datetime for Kite historical_data calls."""
@@ -969,6 +997,146 @@ def download_recent_daily_candles(
     raise RuntimeError(f"Could not download daily candles after retries: {last_exc}")
 
 
+# -----------------------------------------------------------------------------
+# On-disk candle cache with LRU eviction
+# -----------------------------------------------------------------------------
+class CandleDiskCache:
+    """(kind, token, day) -> normalized candle DataFrame, one pickle per key.
+
+    Historical days never change, so entries never expire; they are only
+    evicted, least recently used first, when the folder exceeds max_bytes.
+    Recency is the file mtime (refreshed on every hit), so the order
+    survives restarts. Empty frames are cached too: a holiday or a date
+    before listing costs one Kite call ever, not one per random attempt.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._sizes: Optional[Dict[str, int]] = None
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, kind: str, token: int, day: date) -> str:
+        return os.path.join(self.root, f"{kind}_{int(token)}_{day.isoformat()}.pkl")
+
+    def _index_locked(self) -> Dict[str, int]:
+        """Lazy size index of the cache folder (built once per process)."""
+        if self._sizes is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._sizes = {}
+            for entry in os.scandir(self.root):
+                if entry.is_file() and entry.name.endswith(".pkl"):
+                    self._sizes[entry.path] = entry.stat().st_size
+            self._total = sum(self._sizes.values())
+        return self._sizes
+
+    def get(self, kind: str, token: int, day: date) -> Optional[pd.DataFrame]:
+        if not self.enabled:
+            return None
+        path = self._path(kind, token, day)
+        with self._lock:
+            known = path in self._index_locked()
+        if not known:
+            self.misses += 1
+            return None
+        try:
+            with open(path, "rb") as f:
+                df = pickle.load(f)
+            os.utime(path)
+        except Exception as exc:
+            print(f"[WARN] Dropping unreadable candle cache file {os.path.basename(path)}: {exc}")
+            self._discard(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return df
+
+    def put(self, kind: str, token: int, day: date, df: pd.DataFrame) -> None:
+        if not self.enabled:
+            return
+        path = self._path(kind, token, day)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with self._lock:
+                self._index_locked()
+            with open(tmp_path, "wb") as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except Exception as exc:
+            print(f"[WARN] Could not write candle cache file {os.path.basename(path)}: {exc}")
+            return
+
+        with self._lock:
+            sizes = self._index_locked()
+            self._total += size - sizes.get(path, 0)
+            sizes[path] = size
+            if self._total > self.max_bytes:
+                self._evict_locked(keep=path)
+
+    def _discard(self, path: str) -> None:
+        with self._lock:
+            sizes = self._index_locked()
+            self._total -= sizes.pop(path, 0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict_locked(self, keep: str) -> None:
+        """Delete least recently used files until the folder is under 90% of the cap."""
+        target = int(self.max_bytes * 0.9)
+        by_age = []
+        for path in self._sizes:
+            try:
+                by_age.append((os.path.getmtime(path), path))
+            except OSError:
+                by_age.append((0.0, path))
+        by_age.sort()
+
+        evicted = 0
+        for _, path in by_age:
+            if self._total <= target:
+                break
+            if path == keep:
+                continue
+            self._total -= self._sizes.pop(path)
+            evicted += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        print(f"[CACHE] Candle cache over {self.max_bytes / (1024 * 1024):.1f} MB: evicted {evicted} LRU files.")
+
+
+CANDLE_CACHE = CandleDiskCache(CANDLE_CACHE_DIR, CANDLE_CACHE_MAX_MB * 1024 * 1024)
+
+
+def load_one_day_candles(kite: "KiteConnect", stock: StockIdentity, session_day: date) -> pd.DataFrame:
+    """One-day 1-minute candles from the disk cache, or Kite on a miss."""
+    df = CANDLE_CACHE.get("minute", stock.token, session_day)
+    if df is None:
+        df = download_one_day_candles(kite, stock, session_day)
+        CANDLE_CACHE.put("minute", stock.token, session_day, df)
+    return df
+
+
+def load_recent_daily_candles(kite: "KiteConnect", stock: StockIdentity, session_day: date) -> pd.DataFrame:
+    """Daily candles before session_day from the disk cache, or Kite on a miss."""
+    df = CANDLE_CACHE.get("daily", stock.token, session_day)
+    if df is None:
+        df = download_recent_daily_candles(kite, stock, session_day)
+        CANDLE_CACHE.put("daily", stock.token, session_day, df)
+    return df
+
+
 # -----------------------------------------------------------------------------
 # CPR/pivot calculation
 # -----------------------------------------------------------------------------
@@ -1018,7 +1186,7 @@ def get_pivot_levels_for_session(
     session_day: date,
 ) -> Optional[PivotLevels]:
     """Fetch daily candles and compute previous-session pivot levels."""
-    daily_df = download_recent_daily_candles(kite, stock, session_day)
+    daily_df = load_recent_daily_candles(kite, stock, session_day)
     return compute_pivot_levels_from_previous_session(daily_df, session_day)
 
 
@@ -1086,11 +1254,99 @@ def cycle_stock_from_universe(instruments_df: pd.DataFrame, last_stock: Optional
 
 
 
+class SessionPrefetcher:
+    """Background worker keeping validated random dates ready for each cycle stock.
+
+    For every stock in THREE_STOCK_CYCLE it draws random unused dates (same rule as
+    random mode), downloads the 1-minute and daily candles into CANDLE_CACHE and
+    keeps only dates that actually have candles. Dates are unique across stocks,
+    because date non-repetition is global. Nothing is marked shown here.
+    """
+
+    def __init__(self, kite: "KiteConnect", instruments_df: pd.DataFrame, per_stock: int) -> None:
+        self.kite = kite
+        self.instruments_df = instruments_df
+        self.per_stock = max(0, int(per_stock))
+        self._ready: Dict[str, Deque[date]] = {symbol: deque() for symbol in THREE_STOCK_CYCLE}
+        self._empty_dates: Dict[str, Set[str]] = {symbol: set() for symbol in THREE_STOCK_CYCLE}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start once; called from the serving process, not the debug reloader parent."""
+        if self.per_stock <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="stock-prefetch", daemon=True)
+        self._thread.start()
+        print(f"[PREFETCH] Started: {self.per_stock} dates per stock")
+
+    def _reserved_dates_locked(self) -> Set[str]:
+        return {d.isoformat() for days in self._ready.values() for d in days}
+
+    def _next_stock_needing_dates(self) -> Optional[str]:
+        """Start with the stock that the next 'New random' click will use."""
+        first = next_cycle_symbol(load_last_cycle_stock())
+        start = THREE_STOCK_CYCLE.index(first)
+        with self._cond:
+            for i in range(len(THREE_STOCK_CYCLE)):
+                symbol = THREE_STOCK_CYCLE[(start + i) % len(THREE_STOCK_CYCLE)]
+                if len(self._ready[symbol]) < self.per_stock:
+                    return symbol
+        return None
+
+    def _run(self) -> None:
+        stocks = {
+            symbol: resolve_stock_by_symbol(self.instruments_df, symbol, exchange="NSE", display_name=symbol)
+            for symbol in THREE_STOCK_CYCLE
+        }
+        while True:
+            symbol = self._next_stock_needing_dates()
+            if symbol is None:
+                with self._cond:
+                    self._cond.wait()
+                continue
+
+            try:
+                with self._cond:
+                    excluded = load_shown_dates() | self._reserved_dates_locked() | self._empty_dates[symbol]
+                session_day = random_candidate_date(excluded_dates=excluded)
+                stock = stocks[symbol]
+                misses_before = CANDLE_CACHE.misses
+                df = load_one_day_candles(self.kite, stock, session_day)
+                if df.empty:
+                    self._empty_dates[symbol].add(session_day.isoformat())
+                else:
+                    load_recent_daily_candles(self.kite, stock, session_day)
+                    with self._cond:
+                        self._ready[symbol].append(session_day)
+                    print(f"[PREFETCH] Ready {symbol} {session_day} candles={len(df)}")
+                if CANDLE_CACHE.misses != misses_before:
+                    time.sleep(PREFETCH_CALL_GAP_SEC)
+            except Exception as exc:
+                print(f"[PREFETCH WARN] {symbol}: {exc}")
+                time.sleep(PREFETCH_RETRY_SEC)
+
+    def take(self, stock: StockIdentity, excluded_dates: Set[str]) -> Optional[date]:
+        """Pop a validated date for this stock that is still unused, if one is ready."""
+        symbol = normalize_stock_key_for_cache(stock.display_label)
+        with self._cond:
+            days = self._ready.get(symbol)
+            picked = None
+            while days:
+                candidate = days.popleft()
+                if candidate.isoformat() not in excluded_dates:
+                    picked = candidate
+                    break
+            self._cond.notify()
+        return picked
+
+
 def pick_session_with_constraints(
     kite: "KiteConnect",
     instruments_df: pd.DataFrame,
     fixed_stock: Optional[StockIdentity],
     fixed_date: Optional[date],
+    prefetcher: Optional[SessionPrefetcher] = None,
 ) -> Tuple[SessionSelection, pd.DataFrame]:
     """Pick a stock/date pair while respecting provided constraints.
 
@@ -1101,6 +1357,8 @@ def pick_session_with_constraints(
     - Dates are not repeated globally in random-date mode.
     - After a successful session, both the stock/date pair and the date are
       stored in the single pickle. The last successful stock updates the cycle.
+    - In random-date mode a date already validated by `prefetcher` is used
+      first; its candles come from the disk cache.
     """
     if fixed_date is not None:
         validate_requested_date(fixed_date)
@@ -1120,7 +1378,7 @@ def pick_session_with_constraints(
     # if already shown, but they are still recorded again in the cache state.
     if fixed_date is not None:
         selection = SessionSelection(stock=stock, session_date=fixed_date)
-        df = download_one_day_candles(kite, stock, fixed_date)
+        df = load_one_day_candles(kite, stock, fixed_date)
         if df.empty:
             raise RuntimeError(f"No candles found for {stock.display_label} on {fixed_date}.")
         mark_combination_shown(selection)
@@ -1129,6 +1387,19 @@ def pick_session_with_constraints(
 
     # Random-date mode. Date must not repeat globally. The selected stock remains
     # fixed for this call; only the date changes across attempts.
+    if prefetcher is not None:
+        session_day = prefetcher.take(stock, shown_dates | {day for _stock, day in shown_pairs})
+        if session_day is not None:
+            selection = SessionSelection(stock=stock, session_date=session_day)
+            df = load_one_day_candles(kite, stock, session_day)
+            if not df.empty:
+                mark_combination_shown(selection)
+                print(
+                    f"[SELECTED] Cycle/random-date (prefetched): {stock.display_label} | {session_day} | "
+                    f"candles={len(df)}"
+                )
+                return selection, df
+
     attempted_dates: Set[str] = set()
     for attempt in range(1, MAX_RANDOM_ATTEMPTS + 1):
         try:
@@ -1145,7 +1416,7 @@ def pick_session_with_constraints(
         if selection.key() in shown_pairs:
             continue
 
-        df = download_one_day_candles(kite, stock, session_day)
+        df = load_one_day_candles(kite, stock, session_day)
         if df.empty:
             # Exchange holiday or unavailable data. Do not mark the date as
             # shown; simply try another random unused date.
@@ -1649,14 +1920,16 @@ def make_app(
     instruments_df: pd.DataFrame,
     initial_selection: SessionSelection,
     initial_df: pd.DataFrame,
+    prefetch_dates: int = PREFETCH_DATES_PER_STOCK,
 ) -> Dash:
     """Create the Dash app.
 
-    Candle data and pivot data are cached only in memory while the app is open.
-    Nothing except shown_stock_dates.pkl is written to disk.
+    The current session's candles and pivots are also held in memory; the
+    on-disk CANDLE_CACHE backs every Kite download.
     """
     candle_data_by_key: Dict[Tuple[str, str], pd.DataFrame] = {initial_selection.key(): initial_df}
     pivot_levels_by_key: Dict[Tuple[str, str], Optional[PivotLevels]] = {}
+    prefetcher = SessionPrefetcher(kite, instruments_df, prefetch_dates)
 
     def selection_from_store(store: Dict[str, object]) -> SessionSelection:
         """Deserialize Dash store into SessionSelection."""
@@ -1673,7 +1946,7 @@ def make_app(
         """Get intraday candles from memory or Kite."""
         key = selection.key()
         if key not in candle_data_by_key:
-            candle_data_by_key[key] = download_one_day_candles(
+            candle_data_by_key[key] = load_one_day_candles(
                 kite=kite,
                 stock=selection.stock,
                 session_day=selection.session_date,
@@ -1854,6 +2127,7 @@ def make_app(
             instruments_df=instruments_df,
             fixed_stock=None,
             fixed_date=None,
+            prefetcher=prefetcher,
         )
         candle_data_by_key[selection.key()] = df
         return selection.to_store(step=INITIAL_STEP)
@@ -1922,6 +2196,7 @@ def make_app(
     )
     def render_chart(store: Dict[str, object]) -> Tuple[str, go.Figure]:
         """Render status text and chart."""
+        prefetcher.start()
         if not store:
             return "No stock/date selected.", go.Figure()
 
@@ -1961,17 +2236,20 @@ def main() -> None:
     if args.reset_shown_cache:
         reset_shown_cache()
 
+    CANDLE_CACHE.max_bytes = max(0, int(args.candle_cache_mb)) * 1024 * 1024
+
     kite = init_kite()
     instruments_df = load_market_instruments(kite)
     selection, df = select_start_session(kite, instruments_df, args)
 
-    app = make_app(kite, instruments_df, selection, df)
+    app = make_app(kite, instruments_df, selection, df, prefetch_dates=args.prefetch_dates)
 
     print("\nOpen this URL in your browser:")
     print(f"http://127.0.0.1:{args.port}")
     print("\nControls: click 'Next candle' or press the Right Arrow key. Move mouse over chart to show only the exact price at pointer.")
     print("Random mode cycles IDEA -> FORCEMOT -> KAYNES -> IDEA, with globally non-repeated random dates.")
-    print(f"Only one disk cache file is used: {SHOWN_CACHE_PATH}\n")
+    print(f"Shown history: {SHOWN_CACHE_PATH}")
+    print(f"Candle cache: {CANDLE_CACHE_DIR} (cap {args.candle_cache_mb} MB)\n")
 
     app.run(debug=True, port=args.port)
 